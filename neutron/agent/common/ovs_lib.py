@@ -263,6 +263,7 @@ class OVSBridge(BaseOVS):
             ovs_constants.OPENFLOW14}
         self.initial_protocols.add(self._highest_protocol_needed)
         self._flows_per_port = cfg.CONF.OVS.openflow_processed_per_port
+        self._ports_per_transaction = cfg.CONF.OVS.openflow_bundle_ports or 1
 
     @property
     def default_cookie(self):
@@ -516,10 +517,20 @@ class OVSBridge(BaseOVS):
     def do_action_flows_by_group_id(self, action, flows_by_group_id,
                                     use_bundle=False):
         if self._flows_per_port:
-            # Group flow actions per port.
-            for flow_group_id, flows in flows_by_group_id.items():
-                self.do_action_flows(action, flows, use_bundle=use_bundle,
-                                     flow_group_id=flow_group_id)
+            # Group flow actions per port; the flows of
+            # "openflow_bundle_ports" ports share the same transaction.
+            group_ids = list(flows_by_group_id)
+            while group_ids:
+                chunk = group_ids[:self._ports_per_transaction]
+                if None in chunk:
+                    # The flows without group ID are not merged with others.
+                    chunk = chunk[:chunk.index(None)] or [None]
+                del group_ids[:len(chunk)]
+                flows = [item for flow_group_id in chunk
+                         for item in flows_by_group_id[flow_group_id]]
+                self.do_action_flows(
+                    action, flows, use_bundle=use_bundle,
+                    flow_group_id=chunk[0] if len(chunk) == 1 else chunk)
         else:
             # Group all actions in one single list without any group ID
             # reference.
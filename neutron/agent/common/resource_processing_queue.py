@@ -13,8 +13,13 @@
 #    under the License.
 #
 
+import bisect
+import collections
 import datetime
+import heapq
+import itertools
 import queue
+import threading
 import time
 
 from oslo_utils import timeutils
@@ -79,6 +84,18 @@ class ResourceUpdate:
     def hit_retry_limit(self):
         return self.tries < 0
 
+    @property
+    def coalesce_key(self):
+        """Key of the queued updates this update replaces
+
+        The updates without resource data are processed by fetching the
+        resource again, so a queued one is replaced by a newer one with the
+        same action. None means that the update is never replaced.
+        """
+        if self.resource is None:
+            return self.id, self.action
+        return None
+
 
 class ExclusiveResourceProcessor:
     """Manager for access to a resource for processing
@@ -118,6 +135,10 @@ class ExclusiveResourceProcessor:
     def _i_am_primary(self):
         return self == self._primary
 
+    def is_primary(self):
+        """Returns True if this instance has exclusive access"""
+        return self._i_am_primary()
+
     def __enter__(self):
         return self
 
@@ -161,21 +182,201 @@ class ExclusiveResourceProcessor:
                 yield update
 
 
+def _histogram(buckets, counts):
+    histogram = {'<=%s' % bucket: count
+                 for bucket, count in zip(buckets, counts)}
+    histogram['>%s' % buckets[-1]] = counts[-1]
+    return histogram
+
+
 class ResourceProcessingQueue:
-    """Manager of the queue of resources to process."""
+    """Manager of the queue of resources to process.
+
+    The updates of each resource are served by priority, then by timestamp.
+    By default, the resources are served in the same order, by the priority
+    and timestamp of their next update. The following optional behaviours
+    change it:
+
+    - aging_interval: the next update of a resource is served before the
+      updates of the next more urgent priority received more than
+      aging_interval seconds after it (and so on for each priority level),
+      so that a continuous flow of urgent updates can not starve the less
+      urgent ones. The priorities are then weighted instead of strict.
+    - min_interval: a resource is served at most once per min_interval
+      seconds; its updates received meanwhile are delayed, which lets the
+      other resources be served first.
+    - coalesce: a queued update is replaced by a newer update with the same
+      ResourceUpdate.coalesce_key, keeping the position in the queue and the
+      priority of the most urgent one.
+    """
 
-    def __init__(self):
-        self._queue = queue.PriorityQueue()
+    # Upper bounds of the histogram buckets
+    WAIT_TIME_BUCKETS = (0.1, 1, 10, 60, 300)
+    QUEUE_DEPTH_BUCKETS = (10, 100, 1000, 10000)
+
+    def __init__(self, aging_interval=0, min_interval=0, coalesce=False):
+        self._aging_interval = aging_interval
+        self._min_interval = min_interval
+        self._coalesce = coalesce
+        self._cond = threading.Condition()
+        # Heap of the [sort key, sequence, update, coalesce key, virtual
+        # time] entries of each resource; the update of a replaced entry is
+        # set to None
+        self._resources = {}
+        self._entries = {}
+        # Heap of the [schedule key, sequence, resource ID, entry] of the
+        # next update of each resource; the resource ID of an outdated item
+        # is set to None
+        self._schedule = []
+        self._scheduled = {}
+        # Heap of [release time, sequence, resource ID] of the delayed
+        # resources
+        self._delayed = []
+        self._delayed_ids = set()
+        # Last time each resource was served, oldest first
+        self._served = collections.OrderedDict()
+        self._sequence = itertools.count()
+        self._size = 0
+        self._coalesced = 0
+        self._delayed_count = 0
+        self._wait_times = [0] * (len(self.WAIT_TIME_BUCKETS) + 1)
+        self._queue_depths = [0] * (len(self.QUEUE_DEPTH_BUCKETS) + 1)
         self._run = True
 
     @property
     def qsize(self):
-        """Returns the number of elements stored in the PriorityQueue"""
-        return self._queue.qsize()
+        """Returns the number of updates waiting in the queue"""
+        return self._size
+
+    def _head(self, resource_id):
+        updates = self._resources[resource_id]
+        while updates[0][2] is None:
+            heapq.heappop(updates)
+        return updates[0]
+
+    def _reschedule(self, resource_id):
+        if resource_id in self._delayed_ids:
+            return
+        head = self._head(resource_id)
+        scheduled = self._scheduled.get(resource_id)
+        if scheduled:
+            if scheduled[3] is head:
+                return
+            scheduled[2] = None
+        key = head[4] if self._aging_interval else head[0]
+        scheduled = [key, next(self._sequence), resource_id, head]
+        self._scheduled[resource_id] = scheduled
+        heapq.heappush(self._schedule, scheduled)
 
     def add(self, update):
         update.tries -= 1
-        self._queue.put(update)
+        key = update.coalesce_key if self._coalesce else None
+        with self._cond:
+            sort_key = update
+            virtual_time = None
+            if self._aging_interval:
+                virtual_time = (time.monotonic() +
+                                update.priority * self._aging_interval)
+            replaced = self._entries.get(key) if key is not None else None
+            if replaced:
+                old_update = replaced[2]
+                replaced[2] = None
+                self._size -= 1
+                self._coalesced += 1
+                update.priority = min(update.priority, old_update.priority)
+                update.create_time = min(update.create_time,
+                                         old_update.create_time)
+                sort_key = min(update, replaced[0])
+                if virtual_time is not None:
+                    virtual_time = min(virtual_time, replaced[4])
+            entry = [sort_key, next(self._sequence), update, key,
+                     virtual_time]
+            if key is not None:
+                self._entries[key] = entry
+            heapq.heappush(self._resources.setdefault(update.id, []), entry)
+            self._reschedule(update.id)
+            self._size += 1
+            self._queue_depths[bisect.bisect_left(self.QUEUE_DEPTH_BUCKETS,
+                                                  self._size)] += 1
+            self._cond.notify()
+
+    def _served_now(self, resource_id, now):
+        self._served.pop(resource_id, None)
+        self._served[resource_id] = now
+        # Forget the resources which can be served again
+        oldest = next(iter(self._served.values()))
+        while oldest + self._min_interval <= now:
+            self._served.popitem(last=False)
+            oldest = next(iter(self._served.values()), now)
+
+    def _release(self, now):
+        while self._delayed and self._delayed[0][0] <= now:
+            resource_id = heapq.heappop(self._delayed)[2]
+            self._delayed_ids.discard(resource_id)
+            self._reschedule(resource_id)
+
+    def _get(self):
+        """Wait for and return the next update to serve"""
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._release(now)
+                while self._schedule:
+                    resource_id = heapq.heappop(self._schedule)[2]
+                    if resource_id is None:
+                        continue
+                    del self._scheduled[resource_id]
+                    served = self._served.get(resource_id)
+                    if served is not None and self._min_interval:
+                        release_time = served + self._min_interval
+                        if release_time > now:
+                            self._delayed_ids.add(resource_id)
+                            heapq.heappush(self._delayed, [
+                                release_time, next(self._sequence),
+                                resource_id])
+                            self._delayed_count += 1
+                            continue
+                    return self._pop(resource_id, now)
+                timeout = None
+                if self._delayed:
+                    timeout = self._delayed[0][0] - now
+                self._cond.wait(timeout)
+
+    def _pop(self, resource_id, now):
+        updates = self._resources[resource_id]
+        entry = self._head(resource_id)
+        heapq.heappop(updates)
+        while updates and updates[0][2] is None:
+            heapq.heappop(updates)
+        if updates:
+            self._reschedule(resource_id)
+        else:
+            del self._resources[resource_id]
+        if self._entries.get(entry[3]) is entry:
+            del self._entries[entry[3]]
+        if self._min_interval:
+            self._served_now(resource_id, now)
+        update = entry[2]
+        self._size -= 1
+        self._wait_times[bisect.bisect_left(
+            self.WAIT_TIME_BUCKETS, update.time_elapsed_since_create)] += 1
+        return update
+
+    def get_stats(self):
+        """Return the queue depth and wait time statistics.
+
+        The queue depth histogram is sampled each time an update is queued,
+        the wait time histogram each time an update is served.
+        """
+        with self._cond:
+            return {
+                'queue_depth': self._size,
+                'queue_depth_histogram': _histogram(
+                    self.QUEUE_DEPTH_BUCKETS, self._queue_depths),
+                'wait_time_histogram': _histogram(
+                    self.WAIT_TIME_BUCKETS, self._wait_times),
+                'coalesced_updates': self._coalesced,
+                'delayed_updates': self._delayed_count}
 
     def each_update_to_next_resource(self):
         """Grabs the next resource from the queue and processes
@@ -185,7 +386,7 @@ class ResourceProcessingQueue:
         """
         if not self._run:
             yield None, None
-        next_update = self._queue.get()
+        next_update = self._get()
 
         with ExclusiveResourceProcessor(next_update.id) as rp:
             # Queue the update whether this worker is the primary or not.
@@ -58,6 +58,10 @@ DELETED_PORT_MAX_AGE = 86400
 
 DHCP_READY_PORTS_SYNC_MAX = 64
 
+# Maximum time the reload thread waits before checking if the agent is
+# stopping.
+RELOAD_ALLOCATIONS_POLL_INTERVAL = 1
+
 
 def _sync_lock(f):
     """Decorator to block all operations for a global sync call."""
@@ -96,6 +100,93 @@ class DHCPResourceUpdate(queue.ResourceUpdate):
 
         return super().__lt__(other)
 
+    @property
+    def coalesce_key(self):
+        if self.action in ('_network_create', '_network_update',
+                           '_network_delete', '_subnet_update'):
+            # Only the network ID and state of the newest one are used
+            return self.id, self.action
+        if self.action in ('_port_create', '_port_update'):
+            return self.id, self.action, self.resource['id']
+        if self.action == '_port_delete':
+            return self.id, self.action, self.resource['port_id']
+        return None
+
+
+class ReloadAllocationsCoalescer:
+    """Coalesce the DHCP allocations reload requests of each network.
+
+    A network is reloaded once no new request has been received during the
+    debounce window or, if the requests keep arriving, once its oldest
+    pending request reaches the maximum delay. All the requests received in
+    between are served by a single reload.
+    """
+
+    def __init__(self, debounce, max_delay):
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self._cond = threading.Condition()
+        # {network_id: [first_request, last_request, num_requests]}
+        self._pending = {}
+        self._requests = 0
+        self._served_requests = 0
+        self._reloads = 0
+
+    def add(self, network_id):
+        now = time.monotonic()
+        with self._cond:
+            pending = self._pending.get(network_id)
+            if pending:
+                pending[1] = now
+                pending[2] += 1
+            else:
+                self._pending[network_id] = [now, now, 1]
+            self._requests += 1
+            self._cond.notify()
+
+    def _deadline(self, pending):
+        first_request, last_request = pending[:2]
+        return min(last_request + self.debounce,
+                   first_request + self.max_delay)
+
+    def get_ready(self, timeout=None):
+        """Wait for the networks whose reload can not be delayed any more.
+
+        :param timeout: maximum time to wait, in seconds.
+        :returns: the list of network IDs to reload; it is empty if no
+                  network became ready within the timeout.
+        """
+        end = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                ready = [net_id for net_id, pending in self._pending.items()
+                         if self._deadline(pending) <= now]
+                if ready:
+                    for net_id in ready:
+                        self._served_requests += self._pending.pop(net_id)[2]
+                    self._reloads += len(ready)
+                    return ready
+                wait = None
+                if self._pending:
+                    wait = min(self._deadline(pending) for pending in
+                               self._pending.values()) - now
+                if end is not None:
+                    if end <= now:
+                        return []
+                    wait = end - now if wait is None else min(wait, end - now)
+                self._cond.wait(wait)
+
+    def get_stats(self):
+        """Return the reload queue depth and coalescing ratio."""
+        with self._cond:
+            ratio = (round(self._served_requests / self._reloads, 2)
+                     if self._reloads else 0)
+            return {'reload_allocations_queue_depth': len(self._pending),
+                    'reload_allocations_requests': self._requests,
+                    'reload_allocations_reloads': self._reloads,
+                    'reload_allocations_coalescing_ratio': ratio}
+
 
 class DhcpAgent(manager.Manager):
     """DHCP agent service manager.
@@ -133,7 +224,15 @@ class DhcpAgent(manager.Manager):
         # keep track of mappings between networks and routers for
         # metadata processing
         self._metadata_routers = {}  # {network_id: router_id}
-        self._network_bulk_allocations = {}
+        self._reload_coalescer = None
+        if self.conf.reload_allocations_debounce:
+            self._reload_coalescer = ReloadAllocationsCoalescer(
+                self.conf.reload_allocations_debounce,
+                self.conf.reload_allocations_max_delay)
+        elif self.conf.bulk_reload_interval:
+            self._reload_coalescer = ReloadAllocationsCoalescer(
+                self.conf.bulk_reload_interval,
+                self.conf.bulk_reload_interval)
         # Each dhcp-agent restart should trigger a restart of all
         # metadata-proxies too. This way we can ensure that changes in
         # the metadata-proxy config we generate will be applied soon
@@ -158,7 +257,10 @@ class DhcpAgent(manager.Manager):
             resource_type='dhcp')
         self._pool = utils.ThreadPoolExecutorWithBlock(
             max_workers=DHCP_PROCESS_THREADS)
-        self._queue = queue.ResourceProcessingQueue()
+        self._queue = queue.ResourceProcessingQueue(
+            aging_interval=self.conf.resource_update_aging_interval,
+            min_interval=self.conf.resource_update_min_interval,
+            coalesce=self.conf.resource_update_coalescing)
 
         self.dhcp_driver_cls = importutils.import_class(self.conf.dhcp_driver)
         self.plugin_rpc = DhcpPluginApi(topics.PLUGIN, self.conf.host)
@@ -219,7 +321,7 @@ class DhcpAgent(manager.Manager):
         pr_loop_thread = threading.Thread(target=self._process_loop)
         pr_loop_thread.start()
         self._threads.append(pr_loop_thread)
-        if self.conf.bulk_reload_interval:
+        if self._reload_coalescer:
             bulk_thread = threading.Thread(
                 target=self._reload_bulk_allocations)
             bulk_thread.start()
@@ -227,18 +329,18 @@ class DhcpAgent(manager.Manager):
 
     def _reload_bulk_allocations(self):
         while not self._stopping_event.is_set():
-            # No need to lock access to _network_bulk_allocations because
-            # greenthreads multi-task co-operatively.
-            to_reload = self._network_bulk_allocations.keys()
-            self._network_bulk_allocations = {}
-
+            to_reload = self._reload_coalescer.get_ready(
+                timeout=RELOAD_ALLOCATIONS_POLL_INTERVAL)
+            if not to_reload:
+                continue
+            LOG.debug("Reloading DHCP allocations of networks %(nets)s, "
+                      "stats: %(stats)s",
+                      {'nets': to_reload,
+                       'stats': self._reload_coalescer.get_stats()})
             for network_id in to_reload:
                 network = self.cache.get_network_by_id(network_id)
                 if network is not None:
                     self.call_driver('bulk_reload_allocations', network)
-            if self._stopping_event.wait(
-                    timeout=self.conf.bulk_reload_interval):
-                break
 
     def call_driver(self, action, network, **action_kwargs):
         sid_segment = {}
@@ -277,9 +379,9 @@ class DhcpAgent(manager.Manager):
         LOG.debug('Calling driver for network: %(net)s/seg=%(seg)s '
                   'action: %(action)s',
                   {'net': network.id, 'action': action, 'seg': segment})
-        if self.conf.bulk_reload_interval and action == 'reload_allocations':
+        if self._reload_coalescer and action == 'reload_allocations':
             LOG.debug("Call deferred to bulk load")
-            self._network_bulk_allocations[network.id] = True
+            self._reload_coalescer.add(network.id)
             return True
         if action == 'bulk_reload_allocations':
             action = 'reload_allocations'
@@ -1154,6 +1256,11 @@ class DhcpAgentWithStateReport(DhcpAgent):
         try:
             self.agent_state.get('configurations').update(
                 self.cache.get_state())
+            if self._reload_coalescer:
+                self.agent_state.get('configurations').update(
+                    self._reload_coalescer.get_stats())
+            self.agent_state.get('configurations')['update_queue'] = (
+                self._queue.get_stats())
             ctx = context.get_admin_context_without_session()
             agent_status = self.state_rpc.report_state(
                 ctx, self.agent_state, True)
@@ -13,8 +13,10 @@
 #    under the License.
 #
 
+from concurrent import futures
 import functools
 import threading
+import time
 
 import netaddr
 from neutron_lib.agent import constants as agent_consts
@@ -280,6 +282,15 @@ class L3NATAgent(ha.AgentMixin,
         self._exiting = False
         self.legacy_state_change_check = True
         self.sync_routers_chunk_size = SYNC_ROUTERS_MAX_CHUNK_SIZE
+        # Routers initialized by the router_init_workers, not processed yet
+        self._prepared_routers = {}
+        # Routers of the first full sync not processed yet; the time to
+        # process all of them is the time to all routers active.
+        self._start_time = time.time()
+        self._initial_sync_lock = threading.Lock()
+        self._initial_sync_routers = set()
+        self._initial_sync_fetched = False
+        self.initial_sync_duration = None
         super().__init__(host=self.conf.host)
 
     def init_host(self):
@@ -324,7 +335,14 @@ class L3NATAgent(ha.AgentMixin,
         # L3 agent router processing Thread Pool Executor
         self._pool = utils.ThreadPoolExecutorWithBlock(
             max_workers=ROUTER_PROCESS_THREADS)
-        self._queue = queue.ResourceProcessingQueue()
+        self._queue = queue.ResourceProcessingQueue(
+            aging_interval=self.conf.resource_update_aging_interval,
+            min_interval=self.conf.resource_update_min_interval,
+            coalesce=self.conf.resource_update_coalescing)
+        self._init_pool = None
+        if self.conf.router_init_workers:
+            self._init_pool = futures.ThreadPoolExecutor(
+                max_workers=self.conf.router_init_workers)
 
         # Consume network updates to trigger router resync
         consumers = [[topics.NETWORK, topics.UPDATE]]
@@ -446,7 +464,69 @@ class L3NATAgent(ha.AgentMixin,
 
         return self.router_factory.create(features, **kwargs)
 
+    def _pop_prepared_router(self, router_id, router):
+        ri = self._prepared_routers.pop(router_id, None)
+        if ri is None:
+            return None
+        # The router could have changed since it was initialized
+        for key in ('ha', 'distributed', lib_const.HA_INTERFACE_KEY):
+            if bool(ri.router.get(key)) != bool(router.get(key)):
+                LOG.debug("Type of the router %s changed since it was "
+                          "initialized, initializing it again", router_id)
+                try:
+                    ri.delete()
+                except Exception:
+                    LOG.exception('Error while deleting router %s',
+                                  router_id)
+                    self.namespaces_manager.ensure_router_cleanup(router_id)
+                return None
+        return ri
+
+    def _initialize_router(self, update):
+        """Initialize a router of the first full sync ahead of processing
+
+        This creates the router namespaces and spawns the HA router
+        processes in the router_init_workers, then queues the update for
+        the processing threads, which take the initialized router from
+        _prepared_routers. The router is held by an
+        ExclusiveResourceProcessor meanwhile and the updates received for it
+        are queued again.
+        """
+        router = update.resource
+        ex_net_id = (router.get('external_gateway_info') or {}).get(
+            'network_id')
+        compatible = ex_net_id or self.conf.handle_internal_only_routers
+        with queue.ExclusiveResourceProcessor(update.id) as rp:
+            # A router initialized by a previous full sync attempt is not
+            # initialized again, its RouterInfo would be leaked
+            if (rp.is_primary() and compatible and not self._exiting and
+                    update.id not in self.router_info and
+                    update.id not in self._prepared_routers):
+                try:
+                    ri = self._create_router(update.id, router)
+                    registry.publish(resources.ROUTER, events.BEFORE_CREATE,
+                                     self,
+                                     payload=events.DBEventPayload(
+                                         self.context,
+                                         resource_id=update.id,
+                                         states=(ri,)))
+                    ri.initialize(self.process_monitor)
+                    self._prepared_routers[update.id] = ri
+                except Exception:
+                    # The processing threads will initialize it again
+                    LOG.exception('Error while initializing router %s',
+                                  update.id)
+                    self.namespaces_manager.ensure_router_cleanup(update.id)
+            for pending in rp.updates():
+                self._queue.add(pending)
+        self._queue.add(update)
+
     def _router_added(self, router_id, router):
+        ri = self._pop_prepared_router(router_id, router)
+        if ri:
+            self.router_info[router_id] = ri
+            return
+
         ri = self._create_router(router_id, router)
         registry.publish(resources.ROUTER, events.BEFORE_CREATE, self,
                          payload=events.DBEventPayload(
@@ -501,6 +581,11 @@ class L3NATAgent(ha.AgentMixin,
         restored.
         """
         if ri is None:
+            ri = self._prepared_routers.pop(router_id, None)
+            if ri:
+                # Initialized but not processed yet
+                ri.delete()
+                return
             LOG.warning("Info for router %s was not found. "
                         "Performing router cleanup", router_id)
             self.namespaces_manager.ensure_router_cleanup(router_id)
@@ -763,6 +848,7 @@ class L3NATAgent(ha.AgentMixin,
                 # processing queue (like events from fullsync) in order to
                 # prevent deleted router re-creation
                 rp.fetched_and_processed(update.timestamp)
+                self._initial_sync_router_done(update.id)
             else:
                 self._resync_router(update)
             LOG.info("Finished a router delete for %s, update_id %s. "
@@ -776,6 +862,7 @@ class L3NATAgent(ha.AgentMixin,
             return
 
         rp.fetched_and_processed(update.timestamp)
+        self._initial_sync_router_done(update.id)
         LOG.info("Finished a router update for %s, update_id %s. "
                  "Time elapsed: %.3f",
                  update.id, update.update_id,
@@ -889,7 +976,18 @@ class L3NATAgent(ha.AgentMixin,
                         resource=r,
                         action=ADD_UPDATE_ROUTER,
                         timestamp=timestamp)
-                    self._queue.add(update)
+                    if self._initial_sync_fetched:
+                        self._queue.add(update)
+                        continue
+                    with self._initial_sync_lock:
+                        self._initial_sync_routers.add(r['id'])
+                    if (self._init_pool and
+                            r['id'] not in self.router_info and
+                            r['id'] not in self._prepared_routers):
+                        self._init_pool.submit(self._initialize_router,
+                                               update)
+                    else:
+                        self._queue.add(update)
         except oslo_messaging.MessagingTimeout:
             if self.sync_routers_chunk_size > SYNC_ROUTERS_MIN_CHUNK_SIZE:
                 self.sync_routers_chunk_size = max(
@@ -913,6 +1011,9 @@ class L3NATAgent(ha.AgentMixin,
 
         self.fullsync = False
         LOG.debug("periodic_sync_routers_task successfully completed")
+        if not self._initial_sync_fetched:
+            self._initial_sync_fetched = True
+            self._initial_sync_router_done()
         # adjust chunk size after successful sync
         if self.sync_routers_chunk_size < SYNC_ROUTERS_MAX_CHUNK_SIZE:
             self.sync_routers_chunk_size = min(
@@ -928,6 +1029,18 @@ class L3NATAgent(ha.AgentMixin,
                                           action=DELETE_ROUTER)
             self._queue.add(update)
 
+    def _initial_sync_router_done(self, router_id=None):
+        """Record the processing of a router of the first full sync"""
+        with self._initial_sync_lock:
+            if self.initial_sync_duration is not None:
+                return
+            self._initial_sync_routers.discard(router_id)
+            if self._initial_sync_fetched and not self._initial_sync_routers:
+                self.initial_sync_duration = time.time() - self._start_time
+                LOG.info("All routers of the first full sync are active, "
+                         "%.3f seconds after the agent start",
+                         self.initial_sync_duration)
+
     @property
     def context(self):
         # generate a new request-id on each call to make server side tracking
@@ -937,9 +1050,13 @@ class L3NATAgent(ha.AgentMixin,
 
     def stop(self):
         LOG.info("Stopping L3 agent")
+        if self._init_pool:
+            # No router is being initialized once the pool is shut down
+            self._init_pool.shutdown(cancel_futures=True)
         if self.conf.cleanup_on_shutdown:
             self._exiting = True
-            for router in self.router_info.values():
+            for router in (list(self.router_info.values()) +
+                           list(self._prepared_routers.values())):
                 router.delete()
 
     # TODO(zigo): Let's remove this in 2028.1, which is enough
@@ -1067,6 +1184,10 @@ class L3NATAgentWithStateReport(L3NATAgent):
         configurations['ex_gw_ports'] = num_ex_gw_ports
         configurations['interfaces'] = num_interfaces
         configurations['floating_ips'] = num_floating_ips
+        if self.initial_sync_duration is not None:
+            configurations['initial_sync_duration'] = round(
+                self.initial_sync_duration, 3)
+        configurations['update_queue'] = self._queue.get_stats()
         try:
             agent_status = self.state_rpc.report_state(self.context,
                                                        self.agent_state,
@@ -271,8 +271,11 @@ class FipNamespace(namespaces.Namespace):
         if tbl_index is None:
             ip_version = common_utils.get_ip_version(gw_ip)
             tbl_index_list = self.get_fip_table_indexes(ip_version)
+            # One table per router, add all the routes at once
+            batch = ip_lib.NetlinkBatch(ip_device.namespace)
             for tbl_index in tbl_index_list:
-                ip_device.route.add_gateway(gw_ip, table=tbl_index)
+                batch.add_gateway(gw_ip, ip_device.name, table=tbl_index)
+            batch.execute(raise_on_error=True)
         else:
             ip_device.route.add_gateway(gw_ip, table=tbl_index)
 
@@ -443,9 +446,13 @@ class FipNamespace(namespaces.Namespace):
         self._add_cidr_to_device(rtr_2_fip_dev, str(rtr_2_fip))
         self._add_cidr_to_device(fip_2_rtr_dev, str(fip_2_rtr))
 
+        # The router namespace ARP entry and default routes are added at once
+        rtr_batch = ip_lib.NetlinkBatch(ri.ns_name)
+        fip_2_rtr_address = fip_2_rtr_dev.link.address
+
         # Add permanent ARP entries on each side of veth pair
-        rtr_2_fip_dev.neigh.add(common_utils.cidr_to_ip(fip_2_rtr),
-                                fip_2_rtr_dev.link.address)
+        rtr_batch.add_neigh_entry(common_utils.cidr_to_ip(fip_2_rtr),
+                                  fip_2_rtr_address, rtr_2_fip_dev.name)
         fip_2_rtr_dev.neigh.add(common_utils.cidr_to_ip(rtr_2_fip),
                                 rtr_2_fip_dev.link.address)
 
@@ -453,10 +460,12 @@ class FipNamespace(namespaces.Namespace):
                                                     fip_2_rtr_dev.name)
 
         # add default route for the link local interface
-        rtr_2_fip_dev.route.add_gateway(str(fip_2_rtr.ip), table=FIP_RT_TBL)
+        rtr_batch.add_gateway(str(fip_2_rtr.ip), rtr_2_fip_dev.name,
+                              table=FIP_RT_TBL)
         v6_gateway = common_utils.cidr_to_ip(
-            ip_lib.get_ipv6_lladdr(fip_2_rtr_dev.link.address))
-        rtr_2_fip_dev.route.add_gateway(v6_gateway)
+            ip_lib.get_ipv6_lladdr(fip_2_rtr_address))
+        rtr_batch.add_gateway(v6_gateway, rtr_2_fip_dev.name)
+        rtr_batch.execute(raise_on_error=True)
 
     def scan_fip_ports(self, ri):
         # scan system for any existing fip ports
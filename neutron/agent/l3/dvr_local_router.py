@@ -196,20 +196,31 @@ class DvrLocalRouter(dvr_router_base.DvrRouterBase):
             self.rtr_fip_subnet = self.fip_ns.local_subnets.allocate(
                 self.router_id)
         rtr_2_fip, __ = self.rtr_fip_subnet.get_pair()
-        device = ip_lib.IPDevice(fip_2_rtr_name, namespace=fip_ns_name)
-        device.route.add_route(fip_cidr, str(rtr_2_fip.ip))
+        batch = self._get_netlink_batch(fip_ns_name)
+        if batch is not None:
+            batch.add_ip_route(fip_cidr, device=fip_2_rtr_name,
+                               via=str(rtr_2_fip.ip))
+        else:
+            device = ip_lib.IPDevice(fip_2_rtr_name, namespace=fip_ns_name)
+            device.route.add_route(fip_cidr, str(rtr_2_fip.ip))
         interface_name = (
             self.fip_ns.get_ext_device_name(
                 self.fip_ns.agent_gateway_port['id']))
-        ip_lib.send_ip_addr_adv_notif(fip_ns_name,
-                                      interface_name,
-                                      floating_ip)
+        self._call_after_netlink_batch(ip_lib.send_ip_addr_adv_notif,
+                                       fip_ns_name,
+                                       interface_name,
+                                       floating_ip)
         return lib_constants.FLOATINGIP_STATUS_ACTIVE
 
     def _add_floating_ip_rule(self, floating_ip, fixed_ip):
         rule_pr = self.fip_ns.allocate_rule_priority(floating_ip)
         self.floating_ips_dict[floating_ip] = (fixed_ip, rule_pr)
 
+        batch = self._get_netlink_batch(self.ns_name)
+        if batch is not None:
+            batch.add_ip_rule(fixed_ip, table=dvr_fip_ns.FIP_RT_TBL,
+                              priority=int(str(rule_pr)))
+            return
         ip_lib.add_ip_rule(namespace=self.ns_name, ip=fixed_ip,
                            table=dvr_fip_ns.FIP_RT_TBL,
                            priority=int(str(rule_pr)))
@@ -217,9 +228,14 @@ class DvrLocalRouter(dvr_router_base.DvrRouterBase):
     def _remove_floating_ip_rule(self, floating_ip):
         if floating_ip in self.floating_ips_dict:
             fixed_ip, rule_pr = self.floating_ips_dict[floating_ip]
-            ip_lib.delete_ip_rule(self.ns_name, ip=fixed_ip,
-                                  table=dvr_fip_ns.FIP_RT_TBL,
-                                  priority=int(str(rule_pr)))
+            batch = self._get_netlink_batch(self.ns_name)
+            if batch is not None:
+                batch.delete_ip_rule(fixed_ip, table=dvr_fip_ns.FIP_RT_TBL,
+                                     priority=int(str(rule_pr)))
+            else:
+                ip_lib.delete_ip_rule(self.ns_name, ip=fixed_ip,
+                                      table=dvr_fip_ns.FIP_RT_TBL,
+                                      priority=int(str(rule_pr)))
             self.fip_ns.deallocate_rule_priority(floating_ip)
         else:
             LOG.error('Floating IP %s not stored in this agent. Because of '
@@ -244,8 +260,11 @@ class DvrLocalRouter(dvr_router_base.DvrRouterBase):
             self._remove_floating_ip_rule(floating_ip)
 
             device = ip_lib.IPDevice(fip_2_rtr_name, namespace=fip_ns_name)
-
-            device.route.delete_route(fip_cidr, via=str(rtr_2_fip.ip))
+            batch = self._get_netlink_batch(fip_ns_name)
+            if batch is not None:
+                batch.delete_ip_route(fip_cidr, via=str(rtr_2_fip.ip))
+            else:
+                device.route.delete_route(fip_cidr, via=str(rtr_2_fip.ip))
             return device
 
     def floating_ip_moved_dist(self, fip):
@@ -262,7 +281,8 @@ class DvrLocalRouter(dvr_router_base.DvrRouterBase):
     def remove_floating_ip(self, device, ip_cidr):
         fip_2_rtr_device = self.floating_ip_removed_dist(ip_cidr)
         if fip_2_rtr_device:
-            fip_2_rtr_device.delete_conntrack_state(ip_cidr)
+            self._call_after_netlink_batch(
+                fip_2_rtr_device.delete_conntrack_state, ip_cidr)
 
     def move_floating_ip(self, fip):
         self.floating_ip_moved_dist(fip)
@@ -316,14 +336,20 @@ class DvrLocalRouter(dvr_router_base.DvrRouterBase):
 
     def _update_arp_entry(
             self, ip, mac, subnet_id, operation, device,
-            device_exists=True):
-        """Add or delete arp entry into router namespace for the subnet."""
+            device_exists=True, batch=None):
+        """Add or delete arp entry into router namespace for the subnet.
+
+        If an ip_lib.NetlinkBatch is given, the entry additions are queued in
+        it instead of being executed.
+        """
 
         LOG.debug("Handling ARP entry operation %s for ip: %s mac: %s "
                   "device: %s", operation, ip, mac, device)
         try:
             if device_exists:
-                if operation == 'add':
+                if operation == 'add' and batch is not None:
+                    batch.add_neigh_entry(ip, mac, device.name)
+                elif operation == 'add':
                     device.neigh.add(ip, mac)
                 elif operation == 'delete':
                     device.neigh.delete(ip, mac)
@@ -359,6 +385,8 @@ class DvrLocalRouter(dvr_router_base.DvrRouterBase):
             lib_constants.ROUTER_INTERFACE_OWNERS +
             tuple(common_utils.get_dvr_allowed_address_pair_device_owners()))
         device, device_exists = self.get_arp_related_dev(subnet['id'])
+        # The entries of all the subnet ports are added at once
+        batch = ip_lib.NetlinkBatch(self.ns_name)
 
         subnet_ip_version = netaddr.IPNetwork(subnet['cidr']).version
         for p in subnet_ports:
@@ -370,7 +398,8 @@ class DvrLocalRouter(dvr_router_base.DvrRouterBase):
                                                subnet['id'],
                                                'add',
                                                device=device,
-                                               device_exists=device_exists)
+                                               device_exists=device_exists,
+                                               batch=batch)
                 for allowed_address_pair in p.get('allowed_address_pairs', []):
                     if ('/' not in str(allowed_address_pair['ip_address']) or
                             common_utils.is_cidr_host(
@@ -385,7 +414,8 @@ class DvrLocalRouter(dvr_router_base.DvrRouterBase):
                                 subnet['id'],
                                 'add',
                                 device=device,
-                                device_exists=device_exists)
+                                device_exists=device_exists,
+                                batch=batch)
 
         # subnet_ports does not have snat port if the port is still unbound
         # by the time this function is called. So ensure to add arp entry
@@ -398,7 +428,16 @@ class DvrLocalRouter(dvr_router_base.DvrRouterBase):
                                            subnet['id'],
                                            'add',
                                            device=device,
-                                           device_exists=device_exists)
+                                           device_exists=device_exists,
+                                           batch=batch)
+        errors = batch.execute()
+        for (__, args), error in errors:
+            LOG.error("DVR: Failed updating arp entry for ip: %(ip)s mac: "
+                      "%(mac)s device: %(device)s: %(error)s",
+                      {'ip': args['ip_address'], 'mac': args['mac_address'],
+                       'device': args['device'], 'error': error})
+        if errors:
+            raise errors[0][1]
         self._process_arp_cache_for_internal_port(subnet['id'])
 
     @staticmethod
@@ -873,6 +912,16 @@ class DvrLocalRouter(dvr_router_base.DvrRouterBase):
 
     def _update_fip_route_table_with_next_hop_routes(self, operation, route,
                                                      fip_ns_name, tbl_index):
+        batch = self._get_netlink_batch(fip_ns_name)
+        if batch is not None:
+            if operation == 'replace':
+                batch.add_ip_route(route['destination'], via=route['nexthop'],
+                                   table=tbl_index, proto='boot')
+            else:
+                batch.delete_ip_route(route['destination'],
+                                      via=route['nexthop'], table=tbl_index,
+                                      proto='boot')
+            return
         cmd = (ip_lib.add_ip_route if operation == 'replace' else
                ip_lib.delete_ip_route)
         try:
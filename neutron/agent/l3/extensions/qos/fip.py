@@ -168,8 +168,12 @@ class FipQosAgentExtension(qos_base.L3QosAgentExtensionBase,
             return
 
         if self._policy_rules_modified(old_qos_policy, qos_policy):
+            rates = self.get_policy_rates(qos_policy)
+            router_fip_rates = collections.defaultdict(list)
             for fip_res in self.fip_qos_map.get_resources(qos_policy):
                 router_id = self.fip_qos_map.get_router_id_by_fip(fip_res)
+                router_fip_rates[router_id].append((fip_res, rates))
+            for router_id, fip_rates in router_fip_rates.items():
                 router_info = self._get_router_info(router_id)
                 if not router_info:
                     continue
@@ -179,31 +183,56 @@ class FipQosAgentExtension(qos_base.L3QosAgentExtensionBase,
                     LOG.debug("Router %s does not have a floating IP "
                               "related device, skipping.", router_id)
                     continue
-                rates = self.get_policy_rates(qos_policy)
                 if device:
-                    self.process_ip_rates(fip_res, device, rates)
+                    self.process_ip_rate_limits(device, fip_rates)
                 if dvr_fip_device:
-                    self.process_ip_rates(
-                        fip_res, dvr_fip_device, rates, with_cache=False)
+                    self.process_ip_rate_limits(
+                        dvr_fip_device, fip_rates, with_cache=False)
         self.fip_qos_map.update_policy(qos_policy)
 
-    @coordination.synchronized('qos-floating-ip-{ip}')
-    def process_ip_rate_limit(self, ip, direction,
-                              device, rate, burst):
+    @coordination.synchronized('qos-floating-ip-{device.name}')
+    def process_ip_rate_limits(self, device, fip_rates, with_cache=True):
+        """Set the rate limits of floating IPs on a device.
 
-        tc_wrapper = self._get_tc_wrapper(device)
+        The tc filters of all the floating IPs are updated at once, per
+        direction.
 
-        if (rate == qos_base.IP_DEFAULT_RATE and
-                burst == qos_base.IP_DEFAULT_BURST):
-            # According to the agreements of default value definition,
-            # floating IP bandwidth was changed to default value (no limit).
-            # NOTE: l3_tc_lib will ignore exception FilterIDForIPNotFound.
-            tc_wrapper.clear_ip_rate_limit(direction, ip)
-            self.fip_qos_map.remove_fip_ratelimit_cache(direction, ip)
-            return
+        :param fip_rates: list of (FipResource, rates) tuples, the rates as
+                          returned by get_policy_rates
+        """
+        tc_wrapper = self._get_tc_wrapper(device)
+        for direction in constants.VALID_DIRECTIONS:
+            rate_limits = {}
+            cached_rates = []
+            for fip_res, rates in fip_rates:
+                rate = rates[direction]['rate']
+                burst = rates[direction]['burst']
+                if with_cache:
+                    old_rate, old_burst = (
+                        self.fip_qos_map.get_fip_ratelimit_cache(
+                            direction, fip_res.id))
+                    if old_rate == rate and old_burst == burst:
+                        # Two possibilities here:
+                        # 1. Floating IP rate limit does not change.
+                        # 2. Floating IP bandwidth does not limit.
+                        continue
+                    cached_rates.append((fip_res.id, rate, burst))
+                if (rate == qos_base.IP_DEFAULT_RATE and
+                        burst == qos_base.IP_DEFAULT_BURST):
+                    # According to the agreements of default value
+                    # definition, floating IP bandwidth was changed to
+                    # default value (no limit).
+                    rate_limits[fip_res.ip_address] = None
+                else:
+                    rate_limits[fip_res.ip_address] = (rate, burst)
 
-        # Finally just set it, l3_tc_lib will clean the old rules if exists.
-        tc_wrapper.set_ip_rate_limit(direction, ip, rate, burst)
+            # Finally just set them, l3_tc_lib will clean the old rules if
+            # they exist.
+            if rate_limits:
+                tc_wrapper.update_ip_rate_limits(direction, rate_limits)
+            for fip_id, rate, burst in cached_rates:
+                self.fip_qos_map.set_fip_ratelimit_cache(
+                    direction, fip_id, rate, burst)
 
     def _get_rate_limit_ip_device(self, router_info):
         ex_gw_port = router_info.get_ex_gw_port()
@@ -229,17 +258,21 @@ class FipQosAgentExtension(qos_base.L3QosAgentExtensionBase,
         namespace = router_info.get_gw_ns_name()
         return ip_lib.IPDevice(name, namespace=namespace)
 
-    def _remove_fip_rate_limit(self, device, fip_res):
+    def _remove_fip_rate_limits(self, device, fips):
         tc_wrapper = self._get_tc_wrapper(device)
+        device_exists = device.exists()
         for direction in constants.VALID_DIRECTIONS:
-            if device.exists():
-                tc_wrapper.clear_ip_rate_limit(direction, fip_res.ip_address)
-            self.fip_qos_map.remove_fip_ratelimit_cache(direction, fip_res.id)
+            if device_exists:
+                tc_wrapper.clear_ip_rate_limits(
+                    direction, [fip_res.ip_address for fip_res in fips])
+            for fip_res in fips:
+                self.fip_qos_map.remove_fip_ratelimit_cache(direction,
+                                                            fip_res.id)
 
     def get_fip_qos_rates(self, context, fip_res, policy_id):
         if policy_id is None:
             self.fip_qos_map.clean_by_resource(fip_res)
-            # process_ip_rate_limit will treat value 0 as
+            # process_ip_rate_limits will treat value 0 as
             # cleaning the tc filters if exits or no action.
             return {
                 constants.INGRESS_DIRECTION: {
@@ -253,35 +286,6 @@ class FipQosAgentExtension(qos_base.L3QosAgentExtensionBase,
         self.fip_qos_map.set_resource_policy(fip_res, policy)
         return self.get_policy_rates(policy)
 
-    def process_ip_rates(self, fip_res, device, rates, with_cache=True):
-        for direction in constants.VALID_DIRECTIONS:
-            rate = rates.get(direction)
-            if with_cache:
-
-                old_rate, old_burst = self.fip_qos_map.get_fip_ratelimit_cache(
-                    direction, fip_res.id)
-                if old_rate == rate['rate'] and old_burst == rate['burst']:
-                    # Two possibilities here:
-                    # 1. Floating IP rate limit does not change.
-                    # 2. Floating IP bandwidth does not limit.
-                    continue
-
-                self.process_ip_rate_limit(fip_res.ip_address, direction,
-                                           device, rate['rate'], rate['burst'])
-
-                self.fip_qos_map.set_fip_ratelimit_cache(
-                    direction, fip_res.id, rate['rate'], rate['burst'])
-            else:
-                tc_wrapper = self._get_tc_wrapper(device)
-                if (rate['rate'] == qos_base.IP_DEFAULT_RATE and
-                        rate['burst'] == qos_base.IP_DEFAULT_BURST):
-                    # Default value is no limit
-                    tc_wrapper.clear_ip_rate_limit(direction,
-                                                   fip_res.ip_address)
-                else:
-                    tc_wrapper.set_ip_rate_limit(direction, fip_res.ip_address,
-                                                 rate['rate'], rate['burst'])
-
     def _get_dvr_fip_device(self, router_info):
         is_distributed_router = router_info.router.get('distributed')
         agent_mode = router_info.agent_conf.agent_mode
@@ -338,32 +342,35 @@ class FipQosAgentExtension(qos_base.L3QosAgentExtensionBase,
         current_fips = self.fip_qos_map.get_fips_by_router_id(
             router_info.router_id)
         new_fips = set()
+        fip_rates = []
         for fip in floating_ips:
             fip_res = FipResource(fip['id'], fip['floating_ip_address'])
             new_fips.add(fip_res)
             rates = self.get_fip_qos_rates(context,
                                            fip_res,
                                            fip.get(qos_consts.QOS_POLICY_ID))
-            if device:
-                self.process_ip_rates(fip_res, device, rates)
-
-            if dvr_fip_device:
-                # NOTE(liuyulong): for scenario 4 (mixed dvr_snat and compute
-                # node), because floating IP qos rates may have been
-                # processed in dvr snat-namespace, so here the cache was
-                # already set. We just install the rules to the device in
-                # qrouter-namespace.
-                self.process_ip_rates(
-                    fip_res, dvr_fip_device, rates, with_cache=False)
+            fip_rates.append((fip_res, rates))
+
+        if device:
+            self.process_ip_rate_limits(device, fip_rates)
+        if dvr_fip_device:
+            # NOTE(liuyulong): for scenario 4 (mixed dvr_snat and compute
+            # node), because floating IP qos rates may have been
+            # processed in dvr snat-namespace, so here the cache was
+            # already set. We just install the rules to the device in
+            # qrouter-namespace.
+            self.process_ip_rate_limits(
+                dvr_fip_device, fip_rates, with_cache=False)
 
         self.fip_qos_map.set_fips(router_info.router_id, new_fips)
         fips_removed = current_fips - new_fips
-        for fip_res in fips_removed:
+        if fips_removed:
             if device:
-                self._remove_fip_rate_limit(device, fip_res)
+                self._remove_fip_rate_limits(device, fips_removed)
             if dvr_fip_device:
-                self._remove_fip_rate_limit(dvr_fip_device, fip_res)
-            self.fip_qos_map.clean_by_resource(fip_res)
+                self._remove_fip_rate_limits(dvr_fip_device, fips_removed)
+            for fip_res in fips_removed:
+                self.fip_qos_map.clean_by_resource(fip_res)
 
     def add_router(self, context, data):
         router_info = self._get_router_info(data['id'])
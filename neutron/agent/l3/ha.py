@@ -202,6 +202,7 @@ class AgentMixin:
         # dependency that currently exists on l3-agent running for the IPv6
         # failover.
         ri.ha_state = state
+        ri.update_agent_floating_ips(state)
         self._configure_ipv6_params(ri, state)
         if self.conf.enable_metadata_proxy:
             self._update_metadata_proxy(ri, router_id, state)
@@ -85,6 +85,9 @@ class HaRouter(router.RouterInfo):
         self._ha_state = None
         self._ha_state_path = None
         self.conntrackd_manager = None
+        # Floating IP CIDRs configured by the agent instead of keepalived,
+        # with their interface name
+        self.agent_floating_ips = {}
 
     def create_router_namespace_object(
             self, router_id, agent_conf, iface_driver, use_ipv6):
@@ -296,13 +299,20 @@ class HaRouter(router.RouterInfo):
     def _clear_vips(self, interface):
         instance = self._get_keepalived_instance()
         instance.remove_vips_vroutes_by_interface(interface)
+        self.agent_floating_ips = {
+            ip_cidr: interface_name for ip_cidr, interface_name in
+            self.agent_floating_ips.items() if interface_name != interface}
 
     def _get_cidrs_from_keepalived(self, interface_name):
         instance = self._get_keepalived_instance()
         return instance.get_existing_vip_ip_addresses(interface_name)
 
     def get_router_cidrs(self, device):
-        return set(self._get_cidrs_from_keepalived(device.name))
+        cidrs = set(self._get_cidrs_from_keepalived(device.name))
+        cidrs.update(ip_cidr for ip_cidr, interface_name in
+                     self.agent_floating_ips.items()
+                     if interface_name == device.name)
+        return cidrs
 
     def routes_updated(self, old_routes, new_routes):
         instance = self._get_keepalived_instance()
@@ -312,7 +322,6 @@ class HaRouter(router.RouterInfo):
             for route in new_routes]
         if self.router.get('distributed', False):
             super().routes_updated(old_routes, new_routes)
-        self.keepalived_manager.get_process().reload_cfg()
 
     def _add_default_gw_virtual_route(self, ex_gw_port, interface_name):
         gateway_ips = self._get_external_gw_ips(ex_gw_port)
@@ -390,13 +399,64 @@ class HaRouter(router.RouterInfo):
     def add_floating_ip(self, fip, interface_name, device):
         fip_ip = fip['floating_ip_address']
         ip_cidr = common_utils.ip_to_cidr(fip_ip)
-        self._add_vip(ip_cidr, interface_name)
+        if self.agent_conf.ha_keepalived_floating_ips:
+            self._add_vip(ip_cidr, interface_name)
+            return n_consts.FLOATINGIP_STATUS_ACTIVE
+
+        self.agent_floating_ips[ip_cidr] = interface_name
+        if (self.ha_state == 'primary' and
+                not self._add_agent_floating_ip(ip_cidr, interface_name)):
+            return n_consts.FLOATINGIP_STATUS_ERROR
         return n_consts.FLOATINGIP_STATUS_ACTIVE
 
+    def _add_agent_floating_ip(self, ip_cidr, interface_name):
+        batch = self._get_netlink_batch(self.ns_name)
+        if batch is not None:
+            batch.add_ip_address(ip_cidr, interface_name)
+        else:
+            device = ip_lib.IPDevice(interface_name, namespace=self.ns_name)
+            try:
+                device.addr.add(ip_cidr)
+            except ip_lib.IpAddressAlreadyExists:
+                return True
+            except RuntimeError:
+                LOG.warning("Unable to configure IP address %s of router %s",
+                            ip_cidr, self.router_id)
+                return False
+        # As GARP is processed in a distinct thread the call below
+        # won't raise an exception to be handled.
+        self._call_after_netlink_batch(ip_lib.send_ip_addr_adv_notif,
+                                       self.ns_name, interface_name,
+                                       common_utils.cidr_to_ip(ip_cidr))
+        return True
+
+    def update_agent_floating_ips(self, state):
+        """Add or remove the agent configured floating IPs of the router"""
+        interfaces = {}
+        for ip_cidr, interface_name in self.agent_floating_ips.items():
+            interfaces.setdefault(interface_name, set()).add(ip_cidr)
+        for interface_name, ip_cidrs in interfaces.items():
+            device = ip_lib.IPDevice(interface_name, namespace=self.ns_name)
+            try:
+                if state == 'primary':
+                    ip_cidrs -= {address['cidr'] for address in
+                                 device.addr.list()}
+                    for ip_cidr in ip_cidrs:
+                        self._add_agent_floating_ip(ip_cidr, interface_name)
+                else:
+                    device.addr.delete_multiple(ip_cidrs)
+            except RuntimeError:
+                LOG.warning("Unable to update the floating IP addresses of "
+                            "router %s on %s", self.router_id, interface_name)
+
     def remove_floating_ip(self, device, ip_cidr):
+        self.agent_floating_ips.pop(ip_cidr, None)
         self._remove_vip(ip_cidr)
+        # The batched floating IP removals are only done for the addresses
+        # just listed on the device
         to = common_utils.cidr_to_ip(ip_cidr)
-        if device.addr.list(to=to):
+        if (self._get_netlink_batch(device.namespace) is not None or
+                device.addr.list(to=to)):
             super().remove_floating_ip(device, ip_cidr)
 
     def internal_network_updated(self, port):
@@ -611,6 +671,10 @@ class HaRouter(router.RouterInfo):
             if self.agent_conf.ha_conntrackd_enabled:
                 self.enable_conntrackd()
             self.enable_keepalived()
+            if self.ha_state == 'primary':
+                # Restores the addresses removed by a keepalived reload, if
+                # they were VIPs before the agent configured them
+                self.update_agent_floating_ips('primary')
 
     @runtime.synchronized('enable_radvd')
     def enable_radvd(self, internal_ports=None):
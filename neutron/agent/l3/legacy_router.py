@@ -25,7 +25,8 @@ class LegacyRouter(router.RouterInfo):
 
         # As GARP is processed in a distinct thread the call below
         # won't raise an exception to be handled.
-        ip_lib.send_ip_addr_adv_notif(self.ns_name,
-                                      interface_name,
-                                      fip['floating_ip_address'])
+        self._call_after_netlink_batch(ip_lib.send_ip_addr_adv_notif,
+                                       self.ns_name,
+                                       interface_name,
+                                       fip['floating_ip_address'])
         return lib_constants.FLOATINGIP_STATUS_ACTIVE
@@ -14,6 +14,7 @@
 
 import abc
 import collections
+import contextlib
 import itertools
 
 import netaddr
@@ -28,6 +29,7 @@ from neutron._i18n import _
 from neutron.agent.l3 import namespaces
 from neutron.agent.linux import ip_lib
 from neutron.agent.linux import iptables_manager
+from neutron.agent.linux import namespace_mirror
 from neutron.agent.linux import ra
 from neutron.common import coordination
 from neutron.common import utils as common_utils
@@ -149,6 +151,11 @@ class RouterInfo(BaseRouterInfo):
         self.initialize_address_scope_iptables()
         self.initialize_metadata_iptables()
         self.routes = []
+        # ip_lib.NetlinkBatch per namespace, and the functions to call once
+        # they are executed, set while the netlink operations are batched
+        # (see _batch_netlink_operations)
+        self._netlink_batches = None
+        self._netlink_batch_callbacks = None
         # radvd is a neutron.agent.linux.ra.DaemonMonitor
         self.radvd = None
         self.centralized_port_forwarding_fip_set = set()
@@ -173,7 +180,61 @@ class RouterInfo(BaseRouterInfo):
     def is_router_primary(self):
         return True
 
+    def _get_netlink_batch(self, namespace):
+        if self._netlink_batches is None:
+            return None
+        if namespace not in self._netlink_batches:
+            self._netlink_batches[namespace] = ip_lib.NetlinkBatch(namespace)
+        return self._netlink_batches[namespace]
+
+    def _call_after_netlink_batch(self, func, *args):
+        """Call a function once the batched netlink operations are executed
+
+        The function is called right away if the operations are not batched.
+        """
+        if self._netlink_batches is None:
+            func(*args)
+        else:
+            self._netlink_batch_callbacks.append((func, args))
+
+    @contextlib.contextmanager
+    def _batch_netlink_operations(self):
+        """Execute the netlink operations at once per namespace
+
+        The yielded list is filled, once the operations are executed, with
+        a (namespace, operation, error) tuple per failed operation. The
+        operation is None when the whole batch of the namespace failed.
+        """
+        outer = self._netlink_batches, self._netlink_batch_callbacks
+        self._netlink_batches, self._netlink_batch_callbacks = {}, []
+        errors = []
+        try:
+            yield errors
+        finally:
+            batches, callbacks = (self._netlink_batches,
+                                  self._netlink_batch_callbacks)
+            self._netlink_batches, self._netlink_batch_callbacks = outer
+            for namespace, batch in batches.items():
+                try:
+                    errors.extend((namespace, operation, error)
+                                  for operation, error in batch.execute())
+                except (RuntimeError, OSError) as e:
+                    errors.append((namespace, None, e))
+            for namespace, operation, error in errors:
+                LOG.debug('Failed to execute the netlink operation %(op)s '
+                          'in namespace %(ns)s: %(err)s',
+                          {'ns': namespace, 'op': operation or 'batch',
+                           'err': error})
+            for func, args in callbacks:
+                func(*args)
+
     def _update_routing_table(self, operation, route, namespace):
+        batch = self._get_netlink_batch(namespace)
+        if batch is not None:
+            method = (batch.add_ip_route if operation == 'replace' else
+                      batch.delete_ip_route)
+            method(route['destination'], via=route['nexthop'])
+            return
         method = (ip_lib.add_ip_route if operation == 'replace' else
                   ip_lib.delete_ip_route)
         try:
@@ -187,6 +248,10 @@ class RouterInfo(BaseRouterInfo):
     def _update_routing_table_ecmp(self, route_list, namespace):
         multipath = [dict(via=route['nexthop'])
                      for route in route_list]
+        batch = self._get_netlink_batch(namespace)
+        if batch is not None:
+            batch.add_ip_route(route_list[0]['destination'], via=multipath)
+            return
         try:
             ip_lib.add_ip_route(namespace, route_list[0]['destination'],
                                 via=multipath)
@@ -237,21 +302,22 @@ class RouterInfo(BaseRouterInfo):
     def routes_updated(self, old_routes, new_routes):
         adds, removes = helpers.diff_list_of_dict(old_routes,
                                                   new_routes)
-        for route in removes:
-            # Judge if modifying an ECMP route or not, if not,
-            # just delete it, if it is, replace it
-            # update old_routes after modify
-            if not self.check_and_remove_ecmp_route(old_routes, route):
-                LOG.debug("Removed route entry is '%s'", route)
-                self.update_routing_table('delete', route)
-            old_routes.remove(route)
-
-        for route in adds:
-            if not self.check_and_add_ecmp_route(old_routes, route):
-                LOG.debug("Added route entry is '%s'", route)
-                # replace success even if there is no existing route
-                self.update_routing_table('replace', route)
-            old_routes.append(route)
+        with self._batch_netlink_operations():
+            for route in removes:
+                # Judge if modifying an ECMP route or not, if not,
+                # just delete it, if it is, replace it
+                # update old_routes after modify
+                if not self.check_and_remove_ecmp_route(old_routes, route):
+                    LOG.debug("Removed route entry is '%s'", route)
+                    self.update_routing_table('delete', route)
+                old_routes.remove(route)
+
+            for route in adds:
+                if not self.check_and_add_ecmp_route(old_routes, route):
+                    LOG.debug("Added route entry is '%s'", route)
+                    # replace success even if there is no existing route
+                    self.update_routing_table('replace', route)
+                old_routes.append(route)
 
     def get_floating_ips(self):
         """Filter Floating IPs to be hosted on this agent."""
@@ -381,8 +447,12 @@ class RouterInfo(BaseRouterInfo):
     def _add_fip_addr_to_device(self, fip, device):
         """Configures the floating ip address on the device.
         """
+        ip_cidr = common_utils.ip_to_cidr(fip['floating_ip_address'])
+        batch = self._get_netlink_batch(device.namespace)
+        if batch is not None:
+            batch.add_ip_address(ip_cidr, device.name)
+            return True
         try:
-            ip_cidr = common_utils.ip_to_cidr(fip['floating_ip_address'])
             device.addr.add(ip_cidr)
             return True
         except RuntimeError:
@@ -404,7 +474,12 @@ class RouterInfo(BaseRouterInfo):
         pass
 
     def remove_floating_ip(self, device, ip_cidr):
-        device.delete_addr_and_conntrack_state(ip_cidr)
+        batch = self._get_netlink_batch(device.namespace)
+        if batch is None:
+            device.delete_addr_and_conntrack_state(ip_cidr)
+            return
+        batch.delete_ip_address(ip_cidr, device.name)
+        self._call_after_netlink_batch(device.delete_conntrack_state, ip_cidr)
 
     def move_floating_ip(self, fip):
         return lib_constants.FLOATINGIP_STATUS_ACTIVE
@@ -413,6 +488,11 @@ class RouterInfo(BaseRouterInfo):
         device.delete_addr_and_conntrack_state(ip_cidr)
 
     def get_router_cidrs(self, device):
+        if (self.agent_conf.namespace_mirror and
+                device.namespace == self.ns_name):
+            mirror = namespace_mirror.get_mirror(self.ns_name)
+            return {addr['cidr'] for addr in
+                    mirror.get_addresses(device.name)}
         return {addr['cidr'] for addr in device.addr.list()}
 
     def get_centralized_fip_cidr_set(self):
@@ -437,48 +517,81 @@ class RouterInfo(BaseRouterInfo):
         gw_cidrs = self._get_gw_ips_cidr()
         centralized_fip_cidrs = self.get_centralized_fip_cidr_set()
         floating_ips = self.get_floating_ips()
-        # Loop once to ensure that floating ips are configured.
-        for fip in floating_ips:
-            fip_ip = fip['floating_ip_address']
-            ip_cidr = common_utils.ip_to_cidr(fip_ip)
-            new_cidrs.add(ip_cidr)
-            fip_statuses[fip['id']] = lib_constants.FLOATINGIP_STATUS_ACTIVE
-
-            if ip_cidr not in existing_cidrs:
-                fip_statuses[fip['id']] = self.add_floating_ip(
-                    fip, interface_name, device)
-                LOG.debug('Floating ip %(id)s added, status %(status)s',
-                          {'id': fip['id'],
-                           'status': fip_statuses.get(fip['id'])})
-            elif (fip_ip in self.fip_map and
-                  self.fip_map[fip_ip] != fip['fixed_ip_address']):
-                LOG.debug("Floating IP was moved from fixed IP "
-                          "%(old)s to %(new)s",
-                          {'old': self.fip_map[fip_ip],
-                           'new': fip['fixed_ip_address']})
-                fip_statuses[fip['id']] = self.move_floating_ip(fip)
-            elif (ip_cidr in centralized_fip_cidrs and
-                  fip.get('host') == self.host):
-                LOG.debug("Floating IP is migrating from centralized "
-                          "to distributed: %s", fip)
-                fip_statuses[fip['id']] = self.migrate_centralized_floating_ip(
-                    fip, interface_name, device)
-            elif fip_statuses[fip['id']] == fip['status']:
-                # mark the status as not changed. we can't remove it because
-                # that's how the caller determines that it was removed
-                fip_statuses[fip['id']] = FLOATINGIP_STATUS_NOCHANGE
-        fips_to_remove = (
-            ip_cidr
-            for ip_cidr in (existing_cidrs - new_cidrs - gw_cidrs -
-                            self.centralized_port_forwarding_fip_set)
-            if common_utils.is_cidr_host(ip_cidr))
-        for ip_cidr in fips_to_remove:
-            LOG.debug("Removing floating ip %s from interface %s in "
-                      "namespace %s", ip_cidr, interface_name, self.ns_name)
-            self.remove_floating_ip(device, ip_cidr)
+        changed_fips = []
+        with self._batch_netlink_operations() as errors:
+            # Loop once to ensure that floating ips are configured.
+            for fip in floating_ips:
+                fip_ip = fip['floating_ip_address']
+                ip_cidr = common_utils.ip_to_cidr(fip_ip)
+                new_cidrs.add(ip_cidr)
+                fip_statuses[fip['id']] = (
+                    lib_constants.FLOATINGIP_STATUS_ACTIVE)
+
+                if ip_cidr not in existing_cidrs:
+                    fip_statuses[fip['id']] = self.add_floating_ip(
+                        fip, interface_name, device)
+                    changed_fips.append(fip)
+                    LOG.debug('Floating ip %(id)s added, status %(status)s',
+                              {'id': fip['id'],
+                               'status': fip_statuses.get(fip['id'])})
+                elif (fip_ip in self.fip_map and
+                      self.fip_map[fip_ip] != fip['fixed_ip_address']):
+                    LOG.debug("Floating IP was moved from fixed IP "
+                              "%(old)s to %(new)s",
+                              {'old': self.fip_map[fip_ip],
+                               'new': fip['fixed_ip_address']})
+                    fip_statuses[fip['id']] = self.move_floating_ip(fip)
+                    changed_fips.append(fip)
+                elif (ip_cidr in centralized_fip_cidrs and
+                      fip.get('host') == self.host):
+                    LOG.debug("Floating IP is migrating from centralized "
+                              "to distributed: %s", fip)
+                    fip_statuses[fip['id']] = (
+                        self.migrate_centralized_floating_ip(
+                            fip, interface_name, device))
+                    changed_fips.append(fip)
+                elif fip_statuses[fip['id']] == fip['status']:
+                    # mark the status as not changed. we can't remove it
+                    # because that's how the caller determines that it was
+                    # removed
+                    fip_statuses[fip['id']] = FLOATINGIP_STATUS_NOCHANGE
+            fips_to_remove = (
+                ip_cidr
+                for ip_cidr in (existing_cidrs - new_cidrs - gw_cidrs -
+                                self.centralized_port_forwarding_fip_set)
+                if common_utils.is_cidr_host(ip_cidr))
+            for ip_cidr in fips_to_remove:
+                LOG.debug("Removing floating ip %s from interface %s in "
+                          "namespace %s", ip_cidr, interface_name,
+                          self.ns_name)
+                self.remove_floating_ip(device, ip_cidr)
+
+        # The floating IPs configured by a failed netlink operation
+        for fip in changed_fips:
+            if any(self._fip_operation_failed(fip, operation, error)
+                   for __, operation, error in errors):
+                fip_statuses[fip['id']] = lib_constants.FLOATINGIP_STATUS_ERROR
 
         return fip_statuses
 
+    @staticmethod
+    def _fip_operation_failed(fip, operation, error):
+        if operation is None:
+            # The whole batch failed
+            return True
+        command, args = operation
+        if command == 'addr_add':
+            if isinstance(error, ip_lib.IpAddressAlreadyExists):
+                return False
+            return args['cidr'] == common_utils.ip_to_cidr(
+                fip['floating_ip_address'])
+        if command == 'route_replace':
+            return args['cidr'] == common_utils.ip_to_cidr(
+                fip['floating_ip_address'])
+        if command == 'rule_add':
+            return args['kwargs'].get('src') == fip['fixed_ip_address']
+        return False
+
     def _get_gw_ips_cidr(self):
         gw_cidrs = set()
         ex_gw_port = self.get_ex_gw_port()
@@ -573,6 +686,9 @@ class RouterInfo(BaseRouterInfo):
                                prefix=INTERNAL_DEV_PREFIX)
 
     def _get_existing_devices(self):
+        if self.agent_conf.namespace_mirror:
+            return namespace_mirror.get_mirror(
+                self.ns_name).get_device_names()
         ip_wrapper = ip_lib.IPWrapper(namespace=self.ns_name)
         ip_devs = ip_wrapper.get_devices()
         return [ip_dev.name for ip_dev in ip_devs]
@@ -41,6 +41,7 @@ from neutron.agent.common import utils as agent_common_utils
 from neutron.agent.linux import external_process
 from neutron.agent.linux import ip_lib
 from neutron.agent.linux import iptables_manager
+from neutron.agent.linux import namespace_mirror
 from neutron.cmd import runtime_checks as checks
 from neutron.common.ovn import constants as ovn_constants
 from neutron.common.ovn import utils as ovn_utils
@@ -74,6 +75,12 @@ def port_requires_dhcp_configuration(port):
     return port.device_owner not in constants.DHCP_CONFIG_NOT_REQUIRED_OWNERS
 
 
+def _use_namespace_mirror(conf):
+    # The option is one of the interface options, which are not registered
+    # by every user of the DHCP drivers and DeviceManager
+    return getattr(conf, 'namespace_mirror', False)
+
+
 class DictModel(collections.abc.MutableMapping):
     """Convert dict into an object that provides attribute access to values."""
 
@@ -417,6 +424,23 @@ class DhcpLocalProcess(DhcpBase, metaclass=abc.ABCMeta):
             self.network, dhcp_port=None)
 
 
+class HostsFragmentsCache:
+    """Rendered dnsmasq configuration lines of the ports of a network.
+
+    The lines of a port are rendered again only if its revision number or
+    the network context (subnets and configuration) they depend on have
+    changed; the configuration files are written from these cached
+    fragments, and only if their content changed.
+    """
+
+    def __init__(self):
+        self.context = None
+        # {port_id: (port revision number, {kind: [lines]})}
+        self.ports = {}
+        # {kind: file content last written}
+        self.contents = {}
+
+
 class Dnsmasq(DhcpLocalProcess):
     _SUBNET_TAG_PREFIX = 'subnet-%s'
     _PORT_TAG_PREFIX = 'port-%s'
@@ -426,6 +450,10 @@ class Dnsmasq(DhcpLocalProcess):
     _IS_DHCP_RELEASE6_SUPPORTED = None
     _IS_HOST_TAG_SUPPORTED = None
 
+    # {network_conf_dir: HostsFragmentsCache}; the driver instances are
+    # short lived, the cache must outlive them.
+    _FRAGMENTS_CACHE = {}
+
     @classmethod
     def check_version(cls):
         pass
@@ -625,9 +653,70 @@ class Dnsmasq(DhcpLocalProcess):
                         'Reason: %(e)s', {'params': params, 'e': e})
 
     def _output_config_files(self):
-        self._output_hosts_file()
-        self._output_addn_hosts_file()
-        self._output_opts_file()
+        ports_fragments = self._get_ports_fragments()
+        self._output_hosts_file(ports_fragments)
+        self._output_addn_hosts_file(ports_fragments)
+        self._output_opts_file(ports_fragments)
+
+    def _remove_config_files(self):
+        super()._remove_config_files()
+        self._FRAGMENTS_CACHE.pop(self.network_conf_dir, None)
+
+    def _get_fragments_cache(self, v6_nets, dhcp_enabled_subnet_ids):
+        context = (tuple(sorted((subnet_id, subnet.ipv6_address_mode)
+                                for subnet_id, subnet in v6_nets.items())),
+                   tuple(sorted(dhcp_enabled_subnet_ids)),
+                   self.conf.dnsmasq_enable_addr6_list,
+                   self.conf.dns_domain,
+                   self._is_dnsmasq_host_tag_supported())
+        cache = self._FRAGMENTS_CACHE.setdefault(self.network_conf_dir,
+                                                 HostsFragmentsCache())
+        if cache.context != context:
+            cache.context = context
+            cache.ports = {}
+        return cache
+
+    def _get_ports_fragments(self):
+        """Return the rendered configuration lines of the network ports.
+
+        The result is a tuple with the HostsFragmentsCache of the network and
+        the list of the {kind: [lines]} dictionaries of each port, in the
+        network port order. Only the new and updated ports are rendered.
+        """
+        subnets = self._get_all_subnets(self.network)
+        v6_nets = {subnet.id: subnet for subnet in subnets
+                   if subnet.ip_version == 6}
+        dhcp_enabled_subnet_ids = {s.id for s in subnets if s.enable_dhcp}
+        cache = self._get_fragments_cache(v6_nets, dhcp_enabled_subnet_ids)
+
+        ports = {}
+        ports_fragments = []
+        for port in self.network.ports:
+            # NOTE: the ports without revision number are always rendered.
+            revision_number = getattr(port, 'revision_number', None)
+            cached = cache.ports.get(port.id)
+            if (revision_number is not None and cached and
+                    cached[0] == revision_number):
+                fragments = cached[1]
+            else:
+                fragments = {
+                    'host': self._render_host_lines(
+                        port, v6_nets, dhcp_enabled_subnet_ids),
+                    'addn_hosts': self._render_addn_hosts_lines(
+                        port, v6_nets),
+                    'opts': self._render_port_opts_lines(port)}
+            if revision_number is not None:
+                ports[port.id] = (revision_number, fragments)
+            ports_fragments.append(fragments)
+        cache.ports = ports
+        return cache, ports_fragments
+
+    def _replace_file(self, cache, kind, filename, content):
+        """Write a configuration file only if its content changed."""
+        if cache.contents.get(kind) == content and os.path.exists(filename):
+            return
+        file_utils.replace_file(filename, content)
+        cache.contents[kind] = content
 
     def reload_allocations(self):
         """Rebuild the dnsmasq config and signal the dnsmasq to reload."""
@@ -792,36 +881,39 @@ class Dnsmasq(DhcpLocalProcess):
                    if subnet.ip_version == 6}
 
         for port in self.network.ports:
-            if not port_requires_dhcp_configuration(port):
-                continue
+            yield from self._iter_port_hosts(port, v6_nets, merge_addr6_list)
+
+    def _iter_port_hosts(self, port, v6_nets, merge_addr6_list=False):
+        """Iterate over the hosts of a port, see ``_iter_hosts``."""
+        if not port_requires_dhcp_configuration(port):
+            return
 
-            fixed_ips = self._sort_fixed_ips_for_dnsmasq(port.fixed_ips,
-                                                         v6_nets)
-            # TODO(hjensas): Drop this conditional and option once distros
-            #  generally have dnsmasq supporting addr6 list and range.
-            if self.conf.dnsmasq_enable_addr6_list and merge_addr6_list:
-                fixed_ips = self._merge_alloc_addr6_list(fixed_ips, v6_nets)
-            # Confirm whether Neutron server supports dns_name attribute in the
-            # ports API
-            dns_assignment = getattr(port, 'dns_assignment', None)
-            for alloc in fixed_ips:
-                no_dhcp = False
-                no_opts = False
-                tag = ''
-                if alloc.subnet_id in v6_nets:
-                    addr_mode = v6_nets[alloc.subnet_id].ipv6_address_mode
-                    no_dhcp = addr_mode in (constants.IPV6_SLAAC,
-                                            constants.DHCPV6_STATELESS)
-                    if self._is_dnsmasq_host_tag_supported():
-                        tag = HOST_DHCPV6_TAG
-                    # we don't setup anything for SLAAC. It doesn't make sense
-                    # to provide options for a client that won't use DHCP
-                    no_opts = addr_mode == constants.IPV6_SLAAC
-
-                hostname, fqdn = self._get_dns_assignment(alloc.ip_address,
-                                                          dns_assignment)
-
-                yield (port, alloc, hostname, fqdn, no_dhcp, no_opts, tag)
+        fixed_ips = self._sort_fixed_ips_for_dnsmasq(port.fixed_ips, v6_nets)
+        # TODO(hjensas): Drop this conditional and option once distros
+        #  generally have dnsmasq supporting addr6 list and range.
+        if self.conf.dnsmasq_enable_addr6_list and merge_addr6_list:
+            fixed_ips = self._merge_alloc_addr6_list(fixed_ips, v6_nets)
+        # Confirm whether Neutron server supports dns_name attribute in the
+        # ports API
+        dns_assignment = getattr(port, 'dns_assignment', None)
+        for alloc in fixed_ips:
+            no_dhcp = False
+            no_opts = False
+            tag = ''
+            if alloc.subnet_id in v6_nets:
+                addr_mode = v6_nets[alloc.subnet_id].ipv6_address_mode
+                no_dhcp = addr_mode in (constants.IPV6_SLAAC,
+                                        constants.DHCPV6_STATELESS)
+                if self._is_dnsmasq_host_tag_supported():
+                    tag = HOST_DHCPV6_TAG
+                # we don't setup anything for SLAAC. It doesn't make sense
+                # to provide options for a client that won't use DHCP
+                no_opts = addr_mode == constants.IPV6_SLAAC
+
+            hostname, fqdn = self._get_dns_assignment(alloc.ip_address,
+                                                      dns_assignment)
+
+            yield (port, alloc, hostname, fqdn, no_dhcp, no_opts, tag)
 
     def _get_port_extra_dhcp_opts(self, port):
         return getattr(port, edo_ext.EXTRADHCPOPTS, False)
@@ -915,7 +1007,7 @@ class Dnsmasq(DhcpLocalProcess):
             return '[%s]' % address
         return address
 
-    def _output_hosts_file(self):
+    def _output_hosts_file(self, ports_fragments=None):
         """Writes a dnsmasq compatible dhcp hosts file.
 
         The generated file is sent to the --dhcp-hostsfile option of dnsmasq,
@@ -931,20 +1023,27 @@ class Dnsmasq(DhcpLocalProcess):
         should receive a dhcp lease, the hosts resolution in itself is
         defined by the `_output_addn_hosts_file` method.
         """
-        buf = io.StringIO()
         filename = self.get_conf_file_name('host')
 
         LOG.debug('Building host file: %s', filename)
-        dhcp_enabled_subnet_ids = [s.id for s in
-                                   self._get_all_subnets(self.network)
-                                   if s.enable_dhcp]
+        cache, fragments = ports_fragments or self._get_ports_fragments()
+        content = ''.join(line for port_fragments in fragments
+                          for line in port_fragments['host'])
+        self._replace_file(cache, 'host', filename, content)
+        LOG.debug('Done building host file %s', filename)
+        return filename
+
+    def _render_host_lines(self, port, v6_nets, dhcp_enabled_subnet_ids):
+        """Render the dhcp hosts file lines of a port."""
+        lines = []
         # NOTE(ihrachyshka): the loop should not log anything inside it, to
         # avoid potential performance drop when lots of hosts are dumped
-        for host_tuple in self._iter_hosts(merge_addr6_list=True):
+        for host_tuple in self._iter_port_hosts(port, v6_nets,
+                                                merge_addr6_list=True):
             port, alloc, hostname, name, no_dhcp, no_opts, tag = host_tuple
             if no_dhcp:
                 if not no_opts and self._get_port_extra_dhcp_opts(port):
-                    buf.write('{},{}{}{}\n'.format(
+                    lines.append('{},{}{}{}\n'.format(
                         port.mac_address, tag,
                         'set:', self._PORT_TAG_PREFIX % port.id))
                 continue
@@ -958,25 +1057,22 @@ class Dnsmasq(DhcpLocalProcess):
             if self._get_port_extra_dhcp_opts(port):
                 client_id = self._get_client_id(port)
                 if client_id and len(port.extra_dhcp_opts) > 1:
-                    buf.write('%s,%s%s%s,%s,%s,%s%s\n' %
-                              (port.mac_address, tag, self._ID, client_id,
-                               name, ip_address, 'set:',
-                               self._PORT_TAG_PREFIX % port.id))
+                    lines.append('%s,%s%s%s,%s,%s,%s%s\n' %
+                                 (port.mac_address, tag, self._ID, client_id,
+                                  name, ip_address, 'set:',
+                                  self._PORT_TAG_PREFIX % port.id))
                 elif client_id and len(port.extra_dhcp_opts) == 1:
-                    buf.write('%s,%s%s%s,%s,%s\n' %
-                              (port.mac_address, tag, self._ID, client_id,
-                               name, ip_address))
+                    lines.append('%s,%s%s%s,%s,%s\n' %
+                                 (port.mac_address, tag, self._ID, client_id,
+                                  name, ip_address))
                 else:
-                    buf.write('%s,%s%s,%s,%s%s\n' %
-                              (port.mac_address, tag, name, ip_address,
-                               'set:', self._PORT_TAG_PREFIX % port.id))
+                    lines.append('%s,%s%s,%s,%s%s\n' %
+                                 (port.mac_address, tag, name, ip_address,
+                                  'set:', self._PORT_TAG_PREFIX % port.id))
             else:
-                buf.write('%s,%s%s,%s\n' %
-                          (port.mac_address, tag, name, ip_address))
-
-        file_utils.replace_file(filename, buf.getvalue())
-        LOG.debug('Done building host file %s', filename)
-        return filename
+                lines.append('%s,%s%s,%s\n' %
+                             (port.mac_address, tag, name, ip_address))
+        return lines
 
     def _get_client_id(self, port):
         if self._get_port_extra_dhcp_opts(port):
@@ -1159,7 +1255,7 @@ class Dnsmasq(DhcpLocalProcess):
                         DHCP_RELEASE_TRIES,
                         ', '.join(ip for ip, m, c in entries_to_release))
 
-    def _output_addn_hosts_file(self):
+    def _output_addn_hosts_file(self, ports_fragments=None):
         """Writes a dnsmasq compatible additional hosts file.
 
         The generated file is sent to the --addn-hosts option of dnsmasq,
@@ -1169,25 +1265,33 @@ class Dnsmasq(DhcpLocalProcess):
         Each line in this file is in the same form as a standard /etc/hosts
         file.
         """
-        buf = io.StringIO()
-        for host_tuple in self._iter_hosts():
+        cache, fragments = ports_fragments or self._get_ports_fragments()
+        content = ''.join(line for port_fragments in fragments
+                          for line in port_fragments['addn_hosts'])
+        addn_hosts = self.get_conf_file_name('addn_hosts')
+        self._replace_file(cache, 'addn_hosts', addn_hosts, content)
+        return addn_hosts
+
+    def _render_addn_hosts_lines(self, port, v6_nets):
+        """Render the additional hosts file lines of a port."""
+        lines = []
+        for host_tuple in self._iter_port_hosts(port, v6_nets):
             port, alloc, hostname, fqdn, no_dhcp, no_opts, tag = host_tuple
             # It is compulsory to write the `fqdn` before the `hostname` in
             # order to obtain it in PTR responses.
             if alloc:
-                buf.write('{}\t{} {}\n'.format(
+                lines.append('{}\t{} {}\n'.format(
                     alloc.ip_address, fqdn, hostname))
-        addn_hosts = self.get_conf_file_name('addn_hosts')
-        file_utils.replace_file(addn_hosts, buf.getvalue())
-        return addn_hosts
+        return lines
 
-    def _output_opts_file(self):
+    def _output_opts_file(self, ports_fragments=None):
         """Write a dnsmasq compatible options file."""
+        cache, fragments = ports_fragments or self._get_ports_fragments()
         options, subnet_index_map = self._generate_opts_per_subnet()
-        options += self._generate_opts_per_port(subnet_index_map)
+        options += self._generate_opts_per_port(subnet_index_map, fragments)
 
         name = self.get_conf_file_name('opts')
-        file_utils.replace_file(name, '\n'.join(options))
+        self._replace_file(cache, 'opts', name, '\n'.join(options))
         return name
 
     def _get_ovn_metadata_port_ip(self, subnet):
@@ -1320,32 +1424,15 @@ class Dnsmasq(DhcpLocalProcess):
                         'router'))
         return options, subnets_without_nameservers
 
-    def _generate_opts_per_port(self, subnets_without_nameservers):
+    def _generate_opts_per_port(self, subnets_without_nameservers,
+                                ports_fragments=None):
         options = []
         dhcp_ips = collections.defaultdict(list)
-        for port in self.network.ports:
-            if self._get_port_extra_dhcp_opts(port):
-                port_ip_versions = {
-                    netaddr.IPAddress(ip.ip_address).version
-                    for ip in port.fixed_ips}
-                for opt in port.extra_dhcp_opts:
-                    if opt.opt_name in (edo_ext.DHCP_OPT_CLIENT_ID,
-                                        DHCP_OPT_CLIENT_ID_NUM,
-                                        str(DHCP_OPT_CLIENT_ID_NUM)):
-                        continue
-                    opt_ip_version = opt.ip_version
-                    if opt_ip_version in port_ip_versions:
-                        options.append(
-                            self._format_option(
-                                opt_ip_version,
-                                self._PORT_TAG_PREFIX % port.id,
-                                opt.opt_name, opt.opt_value))
-                    else:
-                        LOG.info("Cannot apply dhcp option %(opt)s "
-                                 "because it's ip_version %(version)d "
-                                 "is not in port's address IP versions",
-                                 {'opt': opt.opt_name,
-                                  'version': opt_ip_version})
+        if ports_fragments is None:
+            ports_fragments = [{'opts': self._render_port_opts_lines(port)}
+                               for port in self.network.ports]
+        for port, fragments in zip(self.network.ports, ports_fragments):
+            options += fragments['opts']
 
             # provides all dnsmasq ip as dns-server if there is more than
             # one dnsmasq for a subnet and there is no dns-server submitted
@@ -1370,6 +1457,32 @@ class Dnsmasq(DhcpLocalProcess):
                                                                   vx_ips))))
         return options
 
+    def _render_port_opts_lines(self, port):
+        """Render the extra DHCP options lines of a port."""
+        options = []
+        if not self._get_port_extra_dhcp_opts(port):
+            return options
+        port_ip_versions = {netaddr.IPAddress(ip.ip_address).version
+                            for ip in port.fixed_ips}
+        for opt in port.extra_dhcp_opts:
+            if opt.opt_name in (edo_ext.DHCP_OPT_CLIENT_ID,
+                                DHCP_OPT_CLIENT_ID_NUM,
+                                str(DHCP_OPT_CLIENT_ID_NUM)):
+                continue
+            opt_ip_version = opt.ip_version
+            if opt_ip_version in port_ip_versions:
+                options.append(
+                    self._format_option(
+                        opt_ip_version, self._PORT_TAG_PREFIX % port.id,
+                        opt.opt_name, opt.opt_value))
+            else:
+                LOG.info("Cannot apply dhcp option %(opt)s "
+                         "because it's ip_version %(version)d "
+                         "is not in port's address IP versions",
+                         {'opt': opt.opt_name,
+                          'version': opt_ip_version})
+        return options
+
     def _make_subnet_interface_ip_map(self):
         subnet_lookup = {
             netaddr.IPNetwork(subnet.cidr): subnet.id
@@ -1378,8 +1491,13 @@ class Dnsmasq(DhcpLocalProcess):
 
         retval = {}
 
-        for addr in ip_lib.get_devices_with_ip(self.network.namespace,
-                                               name=self.interface_name):
+        if _use_namespace_mirror(self.conf):
+            addresses = namespace_mirror.get_mirror(
+                self.network.namespace).get_addresses(self.interface_name)
+        else:
+            addresses = ip_lib.get_devices_with_ip(self.network.namespace,
+                                                   name=self.interface_name)
+        for addr in addresses:
             ip_net = netaddr.IPNetwork(addr['cidr'])
 
             if ip_net in subnet_lookup:
@@ -1515,7 +1633,14 @@ class DeviceManager:
 
     def _set_default_route_ip_version(self, network, device_name, ip_version):
         device = ip_lib.IPDevice(device_name, namespace=network.namespace)
-        gateway = device.route.get_gateway(ip_version=ip_version)
+        if _use_namespace_mirror(self.conf):
+            routes = namespace_mirror.get_mirror(
+                network.namespace).get_routes(ip_version, device=device_name)
+            gateway = next((route for route in routes if route['via'] and
+                            route['cidr'] in constants.IP_ANY.values()),
+                           None)
+        else:
+            gateway = device.route.get_gateway(ip_version=ip_version)
         if gateway:
             gateway = gateway.get('gateway')
 
@@ -1772,7 +1897,11 @@ class DeviceManager:
 
         db_ports = {self.get_interface_name(network, port)
                     for port in network.ports}
-        hw_ports = {d.name for d in ns_ip.get_devices()}
+        if _use_namespace_mirror(self.conf):
+            hw_ports = set(namespace_mirror.get_mirror(
+                network.namespace).get_device_names())
+        else:
+            hw_ports = {d.name for d in ns_ip.get_devices()}
 
         for port in network.ports:
             dev_name = self.driver.get_device_name(port)
@@ -13,17 +13,22 @@
 
 import queue
 import re
+import socket
 import threading
 
 import netaddr
 from neutron_lib import constants
 from neutron_lib import exceptions
 from oslo_concurrency import lockutils
+from oslo_config import cfg
 from oslo_log import log as logging
 
 from neutron.agent.linux import utils as linux_utils
+from neutron.conf.agent import securitygroups_rpc as sc_cfg
+from neutron.privileged.agent.linux import netlink_lib
 
 LOG = logging.getLogger(__name__)
+sc_cfg.register_securitygroups_opts()
 CONTRACK_MGRS = {}
 MAX_CONNTRACK_ZONES = 65535
 ZONE_START = 4097
@@ -73,6 +78,10 @@ class IpConntrackManager:
         self.unfiltered_ports = unfiltered_ports
         self.zone_per_port = zone_per_port  # zone per port vs per network
         self._populate_initial_zone_map()
+        # The netlink socket is opened in the namespace of the privsep
+        # daemon, the namespaced tables are cleaned with the command
+        self._netlink = (cfg.CONF.SECURITYGROUP.netlink_conntrack_deletion and
+                         not namespace and netlink_lib.nfct_lib is not None)
         self._queue = queue.Queue()
         LOG.debug('Starting the ip_conntrack _process_queue_worker() thread')
         # TODO(sahid): We have to revisit this part as this should have
@@ -88,20 +97,21 @@ class IpConntrackManager:
             self._process_queue()
 
     def _process_queue(self):
-        update = None
+        updates = []
         try:
             # this will block until an entry gets added to the queue
-            update = self._queue.get()
-            if update.remote_ips:
-                for remote_ip in update.remote_ips:
-                    self._delete_conntrack_state(
-                        update.device_info_list, update.rule, remote_ip)
-            else:
-                self._delete_conntrack_state(
-                    update.device_info_list, update.rule)
+            updates.append(self._queue.get())
+            # the updates queued in the meantime are processed together, the
+            # entries they have in common are deleted once
+            while True:
+                try:
+                    updates.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._delete_conntrack_states(updates)
         except Exception:
-            LOG.exception("Failed to process ip_conntrack queue entry: %s",
-                          update)
+            LOG.exception("Failed to process ip_conntrack queue entries: %s",
+                          updates)
 
     def _process(self, device_info_list, rule, remote_ips=None):
         # queue the update to allow the caller to resume its work
@@ -130,9 +140,24 @@ class IpConntrackManager:
         cmd_ns.extend(cmd)
         return cmd_ns
 
-    def _get_conntrack_cmds(self, device_info_list, rule, remote_ip=None):
-        conntrack_cmds = set()
-        cmd = self._generate_conntrack_cmd_by_rule(rule, self.namespace)
+    @staticmethod
+    def _get_protocol_number(protocol):
+        if protocol is None or str(protocol) in ('0', 'ip'):
+            return None
+        try:
+            return int(protocol)
+        except ValueError:
+            pass
+        number = constants.IP_PROTOCOL_MAP.get(str(protocol).lower())
+        if number is None:
+            # raises OSError if the protocol is unknown
+            number = socket.getprotobyname(str(protocol))
+        return number
+
+    def _get_conntrack_addresses(self, device_info_list, rule,
+                                 remote_ip=None):
+        """Return the (zone, port address, remote address) to clean"""
+        addresses = set()
         ethertype = rule.get('ethertype')
         for device_info in device_info_list:
             zone_id = self.get_device_zone(device_info, create=False)
@@ -155,20 +180,78 @@ class IpConntrackManager:
                 net = netaddr.IPNetwork(ip)
                 if str(net.version) not in ethertype:
                     continue
-                ip_cmd = [str(net), '-w', zone_id]
                 if remote_ip and str(
                         netaddr.IPNetwork(remote_ip).version) in ethertype:
-                    if rule.get('direction') == 'ingress':
-                        direction = '-s'
-                    else:
-                        direction = '-d'
-                    ip_cmd.extend([direction, str(remote_ip)])
-                conntrack_cmds.add(tuple(cmd + ip_cmd))
+                    addresses.add((zone_id, net, str(remote_ip)))
+                else:
+                    addresses.add((zone_id, net, None))
+        return addresses
+
+    def _get_conntrack_cmds(self, device_info_list, rule, remote_ip=None):
+        conntrack_cmds = set()
+        cmd = self._generate_conntrack_cmd_by_rule(rule, self.namespace)
+        for zone_id, net, remote in self._get_conntrack_addresses(
+                device_info_list, rule, remote_ip):
+            ip_cmd = [str(net), '-w', zone_id]
+            if remote:
+                if rule.get('direction') == 'ingress':
+                    direction = '-s'
+                else:
+                    direction = '-d'
+                ip_cmd.extend([direction, remote])
+            conntrack_cmds.add(tuple(cmd + ip_cmd))
         return conntrack_cmds
 
-    def _delete_conntrack_state(self, device_info_list, rule, remote_ip=None):
-        conntrack_cmds = self._get_conntrack_cmds(device_info_list,
-                                                  rule, remote_ip)
+    def _get_conntrack_filters(self, device_info_list, rule, remote_ip=None):
+        """Return the netlink_lib.delete_entries_by_filters filters"""
+        try:
+            protocol = self._get_protocol_number(rule.get('protocol'))
+        except OSError:
+            LOG.warning("Unknown protocol %s, conntrack state of rule %s "
+                        "not cleared", rule.get('protocol'), rule)
+            return set()
+        mark = rule.get('mark')
+        if mark is not None:
+            mark = str(mark)
+        conntrack_filters = set()
+        for zone_id, net, remote in self._get_conntrack_addresses(
+                device_info_list, rule, remote_ip):
+            if rule.get('direction') == 'ingress':
+                src, dst = remote, str(net)
+            else:
+                src, dst = str(net), remote
+            conntrack_filters.add(
+                (net.version, zone_id, protocol, mark, src, dst))
+        return conntrack_filters
+
+    def _delete_conntrack_states(self, updates):
+        if self._netlink:
+            conntrack_filters = {}
+            for update in updates:
+                for remote_ip in update.remote_ips or [None]:
+                    conntrack_filters.update(dict.fromkeys(
+                        self._get_conntrack_filters(
+                            update.device_info_list, update.rule,
+                            remote_ip)))
+            if not conntrack_filters:
+                return
+            try:
+                deleted = netlink_lib.delete_entries_by_filters(
+                    list(conntrack_filters))
+                LOG.debug("Deleted %(deleted)s conntrack entries matching "
+                          "%(filters)s filters",
+                          {'deleted': deleted,
+                           'filters': len(conntrack_filters)})
+                return
+            except Exception:
+                LOG.exception("Failed to delete conntrack entries through "
+                              "netlink, using the conntrack command")
+
+        conntrack_cmds = {}
+        for update in updates:
+            for remote_ip in update.remote_ips or [None]:
+                conntrack_cmds.update(dict.fromkeys(self._get_conntrack_cmds(
+                    update.device_info_list, update.rule, remote_ip)))
         for cmd in conntrack_cmds:
             try:
                 self.execute(list(cmd), run_as_root=True, privsep_exec=True,
@@ -177,6 +260,10 @@ class IpConntrackManager:
             except RuntimeError:
                 LOG.exception("Failed execute conntrack command %s", cmd)
 
+    def _delete_conntrack_state(self, device_info_list, rule, remote_ip=None):
+        self._delete_conntrack_states([IpConntrackUpdate(
+            device_info_list, rule, [remote_ip] if remote_ip else None)])
+
     def delete_conntrack_state_by_rule(self, device_info_list, rule):
         self._process(device_info_list, rule)
 
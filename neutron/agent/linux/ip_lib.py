@@ -89,6 +89,21 @@ IP_ROUTE_METRIC_DEFAULT = {constants.IP_VERSION_4: 0,
 ARPING_SLEEP = 2
 
 
+# Functions called with the name of a namespace, and deleted=True when it is
+# deleted, when the agent changes the devices, the IP addresses or the routes
+# of the namespace (see namespace_mirror.NamespaceMirror).
+_NAMESPACE_CHANGE_CALLBACKS = []
+
+
+def register_namespace_change_callback(callback):
+    _NAMESPACE_CHANGE_CALLBACKS.append(callback)
+
+
+def _namespace_changed(namespace, deleted=False):
+    for callback in _NAMESPACE_CHANGE_CALLBACKS:
+        callback(namespace, deleted=deleted)
+
+
 class AddressNotReady(exceptions.NeutronException):
     message = _("Failure waiting for address %(address)s to "
                 "become ready: %(reason)s")
@@ -206,6 +221,7 @@ class IPWrapper(SubProcessBase):
     def add_tuntap(self, name, mode='tap'):
         privileged.create_interface(
             name, self.namespace, "tuntap", mode=mode)
+        _namespace_changed(self.namespace)
         return IPDevice(name, namespace=self.namespace)
 
     def add_veth(self, name1, name2, namespace2=None):
@@ -219,6 +235,9 @@ class IPWrapper(SubProcessBase):
 
         privileged.create_interface(
             name1, self.namespace, 'veth', peer=peer)
+        _namespace_changed(self.namespace)
+        if namespace2 != self.namespace:
+            _namespace_changed(namespace2)
 
         return (IPDevice(name1, namespace=self.namespace),
                 IPDevice(name2, namespace=namespace2))
@@ -229,15 +248,18 @@ class IPWrapper(SubProcessBase):
                                     "macvtap",
                                     physical_interface=src_dev,
                                     mode=mode)
+        _namespace_changed(self.namespace)
         return IPDevice(name, namespace=self.namespace)
 
     def del_veth(self, name):
         """Delete a virtual interface between two namespaces."""
         privileged.delete_interface(name, self.namespace)
+        _namespace_changed(self.namespace)
 
     def add_dummy(self, name):
         """Create a Linux dummy interface with the given name."""
         privileged.create_interface(name, self.namespace, "dummy")
+        _namespace_changed(self.namespace)
         return IPDevice(name, namespace=self.namespace)
 
     def ensure_namespace(self, name):
@@ -285,6 +307,7 @@ class IPWrapper(SubProcessBase):
                                     "vlan",
                                     physical_interface=physical_interface,
                                     vlan_id=vlan_id)
+        _namespace_changed(self.namespace)
         return IPDevice(name, namespace=self.namespace)
 
     def add_vxlan(self, name, vni, dev, group=None, ttl=None, tos=None,
@@ -329,6 +352,7 @@ class IPWrapper(SubProcessBase):
         if dstport:
             kwargs['vxlan_port'] = dstport
         privileged.create_interface(name, self.namespace, "vxlan", **kwargs)
+        _namespace_changed(self.namespace)
         return IPDevice(name, namespace=self.namespace)
 
 
@@ -462,16 +486,20 @@ class IpLinkCommand(IpDeviceCommandBase):
     def set_up(self):
         privileged.set_link_attribute(
             self.name, self._parent.namespace, state='up')
+        _namespace_changed(self._parent.namespace)
 
     def set_down(self):
         privileged.set_link_attribute(
             self.name, self._parent.namespace, state='down')
+        _namespace_changed(self._parent.namespace)
 
     def set_netns(self, namespace):
         old_namespace = self._parent.namespace
         try:
             privileged.set_link_attribute(
                 self.name, self._parent.namespace, net_ns_fd=namespace)
+            _namespace_changed(old_namespace)
+            _namespace_changed(namespace)
             self._parent.namespace = namespace
             common_utils.wait_until_true(lambda: self.exists, timeout=3,
                                          sleep=0.5)
@@ -482,6 +510,7 @@ class IpLinkCommand(IpDeviceCommandBase):
     def set_name(self, name):
         privileged.set_link_attribute(
             self.name, self._parent.namespace, ifname=name)
+        _namespace_changed(self._parent.namespace)
         self._parent.name = name
 
     def set_alias(self, alias_name):
@@ -491,9 +520,11 @@ class IpLinkCommand(IpDeviceCommandBase):
     def create(self):
         privileged.create_interface(self.name, self._parent.namespace,
                                     self.kind)
+        _namespace_changed(self._parent.namespace)
 
     def delete(self):
         privileged.delete_interface(self.name, self._parent.namespace)
+        _namespace_changed(self._parent.namespace)
 
     @property
     def address(self):
@@ -840,6 +871,7 @@ def add_ip_address(cidr, device, namespace=None, scope='global',
     privileged.add_ip_address(
         net.version, str(net.ip), net.prefixlen,
         device, namespace, scope, broadcast)
+    _namespace_changed(namespace)
 
 
 def add_ip_addresses(cidrs, device, namespace=None, scope='global',
@@ -854,6 +886,7 @@ def add_ip_addresses(cidrs, device, namespace=None, scope='global',
     """
     privileged.add_ip_addresses(
         cidrs, device, namespace, scope, add_broadcast)
+    _namespace_changed(namespace)
 
 
 def delete_ip_address(cidr, device, namespace=None):
@@ -866,6 +899,7 @@ def delete_ip_address(cidr, device, namespace=None):
     net = netaddr.IPNetwork(cidr)
     privileged.delete_ip_address(
         net.version, str(net.ip), net.prefixlen, device, namespace)
+    _namespace_changed(namespace)
 
 
 def delete_ip_addresses(cidrs, device, namespace=None):
@@ -876,6 +910,7 @@ def delete_ip_addresses(cidrs, device, namespace=None):
     :param namespace: The name of the namespace in which to delete the address
     """
     privileged.delete_ip_addresses(cidrs, device, namespace)
+    _namespace_changed(namespace)
 
 
 def flush_ip_addresses(ip_version, device, namespace=None):
@@ -886,6 +921,7 @@ def flush_ip_addresses(ip_version, device, namespace=None):
     :param namespace: The name of the namespace in which to flush the addresses
     """
     privileged.flush_ip_addresses(ip_version, device, namespace)
+    _namespace_changed(namespace)
 
 
 # NOTE(haleyb): These neighbour functions live outside the IpNeighCommand
@@ -963,6 +999,7 @@ def delete_network_namespace(namespace, **kwargs):
     :param namespace: The name of the namespace to delete
     :param kwargs: Callers add any filters they use as kwargs
     """
+    _namespace_changed(namespace, deleted=True)
     privileged.remove_netns(namespace, **kwargs)
 
 
@@ -1561,6 +1598,7 @@ def add_ip_route(namespace, cidr, device=None, via=None, table=None,
     privileged.add_ip_route(namespace, cidr, ip_version,
                             device=device, via=via, table=table,
                             metric=metric, scope=scope, proto=proto, **kwargs)
+    _namespace_changed(namespace)
 
 
 def list_ip_routes(namespace, ip_version, scope=None, via=None, table=None,
@@ -1637,3 +1675,144 @@ def delete_ip_route(namespace, cidr, device=None, via=None, table=None,
     privileged.delete_ip_route(namespace, cidr, ip_version,
                                device=device, via=via, table=table,
                                scope=scope, **kwargs)
+    _namespace_changed(namespace)
+
+
+class NetlinkBatch:
+    """Netlink operations queued to be executed at once in a namespace.
+
+    The queued address, route, neighbour, rule and link operations are
+    executed in order in a single privsep call, over a single netlink
+    socket. They are not atomic: a failed operation does not stop the
+    following ones, and execute() returns the error of each failed
+    operation. The operations ignore the same errors as the equivalent
+    single operation functions of this module (e.g.: deleting a missing
+    route).
+    """
+
+    def __init__(self, namespace=None):
+        self.namespace = namespace
+        self._operations = []
+        self._rules = {}
+
+    def __len__(self):
+        return len(self._operations)
+
+    def _queue(self, command, **args):
+        self._operations.append((command, args))
+
+    def add_ip_address(self, cidr, device, scope='global',
+                       add_broadcast=True):
+        broadcast = None
+        if add_broadcast:
+            broadcast = common_utils.cidr_broadcast_address_alternative(cidr)
+        self._queue('addr_add', cidr=cidr, device=device, scope=scope,
+                    broadcast=broadcast)
+
+    def delete_ip_address(self, cidr, device):
+        self._queue('addr_del', cidr=cidr, device=device)
+
+    def add_ip_route(self, cidr, device=None, via=None, table=None,
+                     metric=None, scope=None, proto='static', **kwargs):
+        if table:
+            table = IP_RULE_TABLES.get(table, table)
+        self._queue('route_replace', cidr=cidr,
+                    ip_version=common_utils.get_ip_version(cidr or via),
+                    device=device, via=via, table=table, metric=metric,
+                    scope=scope, proto=proto, kwargs=kwargs)
+
+    def delete_ip_route(self, cidr, device=None, via=None, table=None,
+                        scope=None, **kwargs):
+        if table:
+            table = IP_RULE_TABLES.get(table, table)
+        self._queue('route_del', cidr=cidr,
+                    ip_version=common_utils.get_ip_version(cidr or via),
+                    device=device, via=via, table=table, scope=scope,
+                    kwargs=kwargs)
+
+    def add_gateway(self, gateway, device, metric=None, table=None,
+                    scope='global'):
+        self.add_ip_route(None, device=device, via=gateway, table=table,
+                          metric=metric, scope=scope)
+
+    def add_neigh_entry(self, ip_address, mac_address, device,
+                        nud_state=None, **kwargs):
+        self._queue('neigh_replace', ip_address=ip_address,
+                    mac_address=mac_address, device=device,
+                    ip_version=common_utils.get_ip_version(ip_address),
+                    nud_state=nud_state or 'permanent', kwargs=kwargs)
+
+    def delete_neigh_entry(self, ip_address, mac_address, device, **kwargs):
+        self._queue('neigh_del', ip_address=ip_address,
+                    mac_address=mac_address, device=device,
+                    ip_version=common_utils.get_ip_version(ip_address),
+                    kwargs=kwargs)
+
+    def _get_rules(self, ip_version):
+        # The existing rules are listed once per IP version and batch, then
+        # updated with the rules queued in the batch
+        if ip_version not in self._rules:
+            self._rules[ip_version] = list_ip_rules(self.namespace,
+                                                    ip_version)
+        return self._rules[ip_version]
+
+    def add_ip_rule(self, ip, iif=None, table=IP_RULE_TABLES['default'],
+                    priority=None, to=None):
+        table = table if table is not None else IP_RULE_TABLES['default']
+        rules = self._get_rules(common_utils.get_ip_version(ip))
+        if _exist_ip_rule(rules, ip, iif, table, priority, to):
+            return
+        self._queue('rule_add',
+                    kwargs=_make_pyroute2_args(ip, iif, table, priority, to))
+        # Same keys as the rules returned by list_ip_rules, for
+        # _exist_ip_rule
+        rules.append({'from': ip, 'iif': iif, 'table': str(table),
+                      'priority': str(priority or 0), 'to': to})
+
+    def delete_ip_rule(self, ip, iif=None, table=None, priority=None,
+                       to=None):
+        self._queue('rule_del',
+                    kwargs=_make_pyroute2_args(ip, iif, table, priority, to))
+        ip_version = common_utils.get_ip_version(ip)
+        if ip_version in self._rules:
+            self._rules[ip_version] = [
+                rule for rule in self._rules[ip_version] if
+                not _exist_ip_rule([rule], ip, iif, table, priority, to)]
+
+    def set_link_attribute(self, device, **attributes):
+        self._queue('link_set', device=device, attributes=attributes)
+
+    def execute(self, raise_on_error=False):
+        """Execute the queued operations and empty the queue.
+
+        :param raise_on_error: raise the exception of the first failed
+                               operation, once all of them are executed
+        :returns: a list of (operation, exception) pairs, one per failed
+                  operation, where operation is the (command, arguments)
+                  pair queued
+        """
+        operations, self._operations = self._operations, []
+        self._rules = {}
+        if not operations:
+            return []
+        try:
+            results = privileged.execute_batch(self.namespace, operations)
+        finally:
+            _namespace_changed(self.namespace)
+        errors = []
+        for operation, result in zip(operations, results):
+            if result is None:
+                continue
+            (command, args), (code, message) = operation, result
+            if code == errno.ENODEV:
+                error = privileged.NetworkInterfaceNotFound(message)
+            elif code == errno.EEXIST and command == 'addr_add':
+                error = privileged.IpAddressAlreadyExists(
+                    ip=str(netaddr.IPNetwork(args['cidr']).ip),
+                    device=args['device'])
+            else:
+                error = netlink_exceptions.NetlinkError(code, message)
+            errors.append((operation, error))
+        if errors and raise_on_error:
+            raise errors[0][1]
+        return errors
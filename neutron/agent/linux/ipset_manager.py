@@ -14,6 +14,7 @@
 import copy
 
 import netaddr
+from oslo_utils import excutils
 
 from neutron.agent.linux import utils as linux_utils
 from oslo_concurrency import lockutils
@@ -29,12 +30,19 @@ class IpsetManager:
 
        Keeps track of ip addresses per set, using bulk
        or single ip add/remove for smaller changes.
+
+       Between defer_apply_on and defer_apply_off the set changes are
+       not executed but gathered, and sent to the kernel in a single
+       ipset restore transaction when defer_apply_off is called.
     """
 
     def __init__(self, execute=None, namespace=None):
         self.execute = execute or linux_utils.execute
         self.namespace = namespace
         self.ipset_sets = {}
+        self._defer_apply = False
+        self._deferred_input = []
+        self._deferred_sets = set()
 
     def _sanitize_addresses(self, addresses):
         """This method converts any address to ipset format.
@@ -83,7 +91,18 @@ class IpsetManager:
             self.set_members_mutate(set_name, ethertype, member_ips)
         return add_ips, del_ips
 
+    def defer_apply_on(self):
+        self._defer_apply = True
+
+    def defer_apply_off(self):
+        if self._defer_apply:
+            self._defer_apply = False
+            self._apply_deferred()
+
     def set_members_mutate(self, set_name, ethertype, member_ips):
+        if self._defer_apply:
+            self._defer_set_members(set_name, ethertype, member_ips)
+            return
         with lockutils.lock('neutron-ipset-%s' % self.namespace,
                             external=True):
             if not self.set_name_exists(set_name):
@@ -106,6 +125,48 @@ class IpsetManager:
                 else:
                     self._refresh_set(set_name, member_ips, ethertype)
 
+    def _defer_set_members(self, set_name, ethertype, member_ips):
+        """Gather the ipset restore input needed to update a set.
+
+        The same create/refresh and add/del decisions of
+        set_members_mutate are taken, but expressed as ipset restore
+        commands. The known members are updated immediately so the
+        following calls are computed against the deferred state.
+        """
+        if not self.set_name_exists(set_name):
+            process_input = ['create {} hash:net family {}'.format(
+                set_name, self._get_ipset_set_type(ethertype))]
+            process_input += self._get_refresh_set_input(
+                set_name, member_ips, ethertype)
+        else:
+            add_ips = self._get_new_set_ips(set_name, member_ips)
+            del_ips = self._get_deleted_set_ips(set_name, member_ips)
+            if len(add_ips) + len(del_ips) < IPSET_ADD_BULK_THRESHOLD:
+                process_input = [f'add {set_name} {ip}' for ip in add_ips]
+                process_input += [f'del {set_name} {ip}' for ip in del_ips]
+            else:
+                process_input = self._get_refresh_set_input(
+                    set_name, member_ips, ethertype)
+        self._deferred_input.extend(process_input)
+        self._deferred_sets.add(set_name)
+        self.ipset_sets[set_name] = copy.copy(member_ips)
+
+    def _apply_deferred(self):
+        process_input, self._deferred_input = self._deferred_input, []
+        set_names, self._deferred_sets = self._deferred_sets, set()
+        if not process_input:
+            return
+        with lockutils.lock('neutron-ipset-%s' % self.namespace,
+                            external=True):
+            try:
+                self._restore_sets(process_input)
+            except Exception:
+                with excutils.save_and_reraise_exception():
+                    # The kernel state of these sets is unknown now, forget
+                    # them so the next update creates and refreshes them.
+                    for set_name in set_names:
+                        self.ipset_sets.pop(set_name, None)
+
     def destroy(self, id, ethertype, forced=False):
         with lockutils.lock('neutron-ipset-%s' % self.namespace,
                             external=True):
@@ -117,13 +178,30 @@ class IpsetManager:
         self._apply(cmd)
         self.ipset_sets[set_name].append(member_ip)
 
-    def _refresh_set(self, set_name, member_ips, ethertype):
+    def _get_refresh_set_input(self, set_name, member_ips, ethertype):
+        """Return the ipset restore input replacing the set members.
+
+        A temporary set is filled and atomically swapped with the set.
+        """
         new_set_name = set_name + SWAP_SUFFIX
+        process_input = self._get_new_set_input(new_set_name, member_ips,
+                                                ethertype)
+        process_input.append(f'swap {new_set_name} {set_name}')
+        process_input.append(f'destroy {new_set_name}')
+        return process_input
+
+    def _get_new_set_input(self, new_set_name, member_ips, ethertype):
         set_type = self._get_ipset_set_type(ethertype)
         process_input = ["create {} hash:net family {}".format(new_set_name,
                                                                set_type)]
         for ip in member_ips:
             process_input.append(f"add {new_set_name} {ip}")
+        return process_input
+
+    def _refresh_set(self, set_name, member_ips, ethertype):
+        new_set_name = set_name + SWAP_SUFFIX
+        process_input = self._get_new_set_input(new_set_name, member_ips,
+                                                ethertype)
 
         self._restore_sets(process_input)
         self._swap_sets(new_set_name, set_name)
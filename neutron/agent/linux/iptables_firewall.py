@@ -876,6 +876,8 @@ class IptablesFirewallDriver(firewall.FirewallDriver):
     def filter_defer_apply_on(self):
         if not self._defer_apply:
             self.iptables.defer_apply_on()
+            if self.enable_ipset:
+                self.ipset.defer_apply_on()
             self._pre_defer_filtered_ports = dict(self.filtered_ports)
             self._pre_defer_unfiltered_ports = dict(self.unfiltered_ports)
             self.pre_sg_members = dict(self.sg_members)
@@ -1035,6 +1037,10 @@ class IptablesFirewallDriver(firewall.FirewallDriver):
 
     def filter_defer_apply_off(self):
         if self._defer_apply:
+            if self.enable_ipset:
+                # The ipsets must be in the kernel before the iptables rules
+                # referencing them are applied.
+                self.ipset.defer_apply_off()
             self._defer_apply = False
             self._remove_chains_apply(self._pre_defer_filtered_ports,
                                       self._pre_defer_unfiltered_ports)
@@ -21,9 +21,11 @@
 import collections
 import contextlib
 import difflib
+import hashlib
 import os
 import re
 import sys
+import time
 
 from neutron_lib import constants
 from neutron_lib import exceptions
@@ -274,6 +276,20 @@ class IptablesTable:
         for rule in rules:
             self.rules.remove(rule)
 
+    def get_checksum(self):
+        """Return a digest of the chains and rules of this table.
+
+        Two tables with the same checksum generate the same iptables-restore
+        input when applied over the same state.
+        """
+        content = (sorted(self.chains) + ['#'] +
+                   sorted(self.unwrapped_chains) + ['#'] +
+                   ['%d %d %s %s %s' % (rule.top, rule.wrap, rule.chain,
+                                        rule.rule, rule.comment)
+                    for rule in self.rules])
+        return hashlib.sha256(
+            '\n'.join(content).encode('utf-8')).hexdigest()
+
 
 class IptablesManager:
     """Wrapper for iptables.
@@ -312,6 +328,9 @@ class IptablesManager:
         self.iptables_apply_deferred = False
         self.wrap_name = binary_name[:16]
         self.external_lock = external_lock
+        # Last applied state per command ('iptables', 'ip6tables'), used when
+        # the AGENT.iptables_cache_state option is enabled.
+        self._cached_state = {}
 
         self.ipv4 = {'filter': IptablesTable(binary_name=self.wrap_name)}
         self.ipv6 = {'filter': IptablesTable(binary_name=self.wrap_name)}
@@ -578,62 +597,147 @@ class IptablesManager:
             s += [('ip6tables', self.ipv6)]
         all_commands = []  # variable to keep track all commands for return val
         for cmd, tables in s:
-            args = [f'{cmd}-save']
-            if self.namespace:
-                args = ['ip', 'netns', 'exec', self.namespace] + args
-            try:
-                save_output = linux_utils.execute(args, run_as_root=True,
-                                                  privsep_exec=True)
-            except RuntimeError:
-                # We could be racing with a cron job deleting namespaces.
-                # It is useless to try to apply iptables rules over and
-                # over again in a endless loop if the namespace does not
-                # exist.
-                with excutils.save_and_reraise_exception() as ctx:
-                    if (self.namespace and not
-                            ip_lib.network_namespace_exists(self.namespace)):
-                        ctx.reraise = False
-                        LOG.error("Namespace %s was deleted during IPTables "
-                                  "operations.", self.namespace)
-                        return []
-            all_lines = save_output.split('\n')
-            commands = []
-            # Traverse tables in sorted order for predictable dump output
-            for table_name in sorted(tables):
-                table = tables[table_name]
-                # isolate the lines of the table we are modifying
-                start, end = self._find_table(all_lines, table_name)
-                old_rules = all_lines[start:end]
-                # generate the new table state we want
-                new_rules = self._modify_rules(old_rules, table, table_name)
-                # generate the iptables commands to get between the old state
-                # and the new state
-                changes = _generate_path_between_rules(old_rules, new_rules)
-                if changes:
-                    # if there are changes to the table, we put on the header
-                    # and footer that iptables-save needs
-                    commands += (['# Generated by iptables_manager'] +
-                                 ['*%s' % table_name] + changes +
-                                 ['COMMIT', '# Completed by iptables_manager'])
-            if not commands:
-                continue
+            commands = self._apply_tables(cmd, tables)
+            if commands is None:
+                # The namespace was deleted during the IPTables operations.
+                return []
             all_commands += commands
 
-            # always end with a new line
-            commands.append('')
+        LOG.debug("IPTablesManager.apply completed with success. %d iptables "
+                  "commands were issued", len(all_commands))
+        return all_commands
 
+    @property
+    def _use_cached_state(self):
+        # The cached state is only trusted inside a network namespace, where
+        # this manager is the only writer. In the host namespace other
+        # processes (and other agents) modify the same built-in chains.
+        return bool(self.namespace and
+                    cfg.CONF.AGENT.iptables_cache_state and
+                    not cfg.CONF.AGENT.debug_iptables_rules)
+
+    def _get_cached_state(self, cmd):
+        state = self._cached_state.get(cmd)
+        if state is None:
+            return None
+        audit_interval = cfg.CONF.AGENT.iptables_cache_audit_interval
+        if (audit_interval and
+                time.monotonic() - state['timestamp'] >= audit_interval):
+            LOG.debug('Auditing the cached %(cmd)s state of namespace '
+                      '%(ns)s', {'cmd': cmd, 'ns': self.namespace})
+            del self._cached_state[cmd]
+            return None
+        return state
+
+    def _read_state(self, cmd, tables):
+        """Read the kernel state of the given tables with iptables-save.
+
+        Returns None if the namespace was deleted meanwhile.
+        """
+        args = [f'{cmd}-save']
+        if self.namespace:
+            args = ['ip', 'netns', 'exec', self.namespace] + args
+        try:
+            save_output = linux_utils.execute(args, run_as_root=True,
+                                              privsep_exec=True)
+        except RuntimeError:
+            # We could be racing with a cron job deleting namespaces.
+            # It is useless to try to apply iptables rules over and
+            # over again in a endless loop if the namespace does not
+            # exist.
+            with excutils.save_and_reraise_exception() as ctx:
+                if (self.namespace and not
+                        ip_lib.network_namespace_exists(self.namespace)):
+                    ctx.reraise = False
+                    LOG.error("Namespace %s was deleted during IPTables "
+                              "operations.", self.namespace)
+                    return None
+        all_lines = save_output.split('\n')
+        state = {'tables': {}, 'checksums': {},
+                 'timestamp': time.monotonic()}
+        for table_name in tables:
+            # isolate the lines of the table we are modifying
+            start, end = self._find_table(all_lines, table_name)
+            state['tables'][table_name] = all_lines[start:end]
+        return state
+
+    def _apply_tables(self, cmd, tables):
+        """Apply the tables of one IP version, returning the commands issued.
+
+        If the cached state is enabled and trusted, the changes are computed
+        against it. If iptables-restore fails, the cached state is discarded
+        and the changes are computed again over the kernel state.
+        """
+        state = (self._get_cached_state(cmd) if self._use_cached_state
+                 else None)
+        if state is None:
+            return self._apply_tables_state(cmd, tables)
+
+        # _modify_rules consumes the pending removals; keep them in case the
+        # changes must be calculated again over the kernel state.
+        removals = {name: (set(table.remove_chains), list(table.remove_rules))
+                    for name, table in tables.items()}
+        try:
+            return self._apply_tables_state(cmd, tables, state=state)
+        except RuntimeError as err:
+            LOG.warning('Failed to apply the %(cmd)s rules over the cached '
+                        'state of namespace %(ns)s, reading the kernel state '
+                        'again. Error: %(err)s',
+                        {'cmd': cmd, 'ns': self.namespace, 'err': err})
+            self._cached_state.pop(cmd, None)
+            for name, (remove_chains, remove_rules) in removals.items():
+                tables[name].remove_chains = remove_chains
+                tables[name].remove_rules = remove_rules
+        return self._apply_tables_state(cmd, tables)
+
+    def _apply_tables_state(self, cmd, tables, state=None):
+        cached = state is not None
+        if not cached:
+            state = self._read_state(cmd, tables)
+            if state is None:
+                return None
+
+        new_state = {'tables': dict(state['tables']), 'checksums': {},
+                     'timestamp': state['timestamp']}
+        commands = []
+        # Traverse tables in sorted order for predictable dump output
+        for table_name in sorted(tables):
+            table = tables[table_name]
+            checksum = table.get_checksum()
+            new_state['checksums'][table_name] = checksum
+            if (state['checksums'].get(table_name) == checksum and
+                    not table.remove_chains and not table.remove_rules):
+                # Nothing changed in this table since the last apply.
+                continue
+            old_rules = state['tables'].get(table_name, [])
+            # generate the new table state we want
+            new_rules = self._modify_rules(old_rules, table, table_name)
+            new_state['tables'][table_name] = new_rules
+            # generate the iptables commands to get between the old state
+            # and the new state
+            changes = _generate_path_between_rules(old_rules, new_rules)
+            if changes:
+                # if there are changes to the table, we put on the header
+                # and footer that iptables-save needs
+                commands += (['# Generated by iptables_manager'] +
+                             ['*%s' % table_name] + changes +
+                             ['COMMIT', '# Completed by iptables_manager'])
+
+        if commands:
+            # always end with a new line
             args = [f'{cmd}-restore', '-n']
             if self.namespace:
                 args = ['ip', 'netns', 'exec', self.namespace] + args
 
-            err = self._run_restore(args, commands)
+            err = self._run_restore(args, commands + [''])
             if err:
-                self._log_restore_err(err, commands)
+                if not cached:
+                    self._log_restore_err(err, commands + [''])
                 raise err
 
-        LOG.debug("IPTablesManager.apply completed with success. %d iptables "
-                  "commands were issued", len(all_commands))
-        return all_commands
+        if self._use_cached_state:
+            self._cached_state[cmd] = new_state
+        return commands
 
     def _find_table(self, lines, table_name):
         if len(lines) < 3:
@@ -669,7 +773,8 @@ class IptablesManager:
         # Sort the output chains here to make their order predictable.
         unwrapped_chains = sorted(table.unwrapped_chains)
         chains = sorted(table.chains)
-        rules = set(map(str, table.rules))
+        rule_strs = [str(rule) for rule in table.rules]
+        rules = set(rule_strs)
 
         # we don't want to change any rules that don't belong to us so we start
         # the new_filter with these rules
@@ -692,9 +797,7 @@ class IptablesManager:
 
         our_top_rules = []
         our_bottom_rules = []
-        for rule in table.rules:
-            rule_str = str(rule)
-
+        for rule, rule_str in zip(table.rules, rule_strs):
             if rule.top:
                 # rule.top == True means we want this rule to be at the top.
                 our_top_rules += [rule_str]
@@ -835,6 +938,8 @@ def _generate_path_between_rules(old_rules, new_rules):
             other_chains.append(chain)
 
     for chain in other_chains + sg_chains:
+        if old_by_chain[chain] == new_by_chain[chain]:
+            continue
         statements += _generate_chain_diff_iptables_commands(
             chain, old_by_chain[chain], new_by_chain[chain])
     # unreferenced chains get the axe
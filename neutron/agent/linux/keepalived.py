@@ -16,6 +16,8 @@ import errno
 import itertools
 import os
 import signal
+import threading
+import time
 
 import netaddr
 from neutron_lib import constants
@@ -368,6 +370,39 @@ class KeepalivedConf:
         return '\n'.join(self.build_config())
 
 
+def get_config_sections(config_str):
+    """Parse a keepalived configuration into its sections.
+
+    :param config_str: the configuration, or None if there is none
+    :return: a dict of the lines of each section, as a frozenset as their
+             order is not relevant, keyed by the tuple of the headers of the
+             section and of its parents,
+             e.g. ('vrrp_instance VR_1', 'virtual_ipaddress_excluded')
+    """
+    if config_str is None:
+        return {}
+    sections = {(): []}
+    path = ()
+    for line in config_str.splitlines():
+        line = line.strip()
+        if line.endswith('{'):
+            path += (line[:-1].strip(),)
+            sections.setdefault(path, [])
+        elif line == '}':
+            path = path[:-1]
+        elif line:
+            sections[path].append(line)
+    return {path: frozenset(lines) for path, lines in sections.items()}
+
+
+def diff_config(old_config_str, new_config_str):
+    """Return the sections changed between two keepalived configurations"""
+    old_sections = get_config_sections(old_config_str)
+    new_sections = get_config_sections(new_config_str)
+    return sorted(path for path in set(old_sections) | set(new_sections)
+                  if old_sections.get(path) != new_sections.get(path))
+
+
 class KeepalivedManager:
     """Wrapper for keepalived.
 
@@ -383,14 +418,16 @@ class KeepalivedManager:
         self.namespace = namespace
         self.process_monitor = process_monitor
         self.conf_path = conf_path
-        # configure throttler for spawn to introduce delay between SIGHUPs,
-        # otherwise keepalived primary may unnecessarily flip to backup
-        if throttle_restart_value is not None:
-            self._throttle_spawn(throttle_restart_value)
-
-    # pylint: disable=method-hidden
-    def _throttle_spawn(self, threshold):
-        self.spawn = utils.throttler(threshold)(self.spawn)
+        # Minimum delay between two SIGHUPs, otherwise keepalived primary may
+        # unnecessarily flip to backup. The configuration changes done during
+        # that delay are applied by a single SIGHUP at its end.
+        self._reload_interval = throttle_restart_value or 0
+        self._reload_lock = threading.Lock()
+        self._reload_timer = None
+        self._last_reload = None
+        # Configuration written by this manager, read from the disk on the
+        # first spawn to not reload keepalived after an agent restart
+        self._config_str = None
 
     def get_conf_dir(self):
         confs_dir = os.path.abspath(os.path.normpath(self.conf_path))
@@ -404,13 +441,23 @@ class KeepalivedManager:
         return os.path.join(conf_dir, filename)
 
     def _output_config_file(self):
+        """Write the configuration file if the configuration changed.
+
+        :return: the configuration file path and whether it was written
+        """
         config_str = self.config.get_config_str()
-        LOG.debug("Router %s keepalived config: %s",
-                  self.resource_id, config_str)
         config_path = self.get_full_config_file_path('keepalived.conf')
+        if self._config_str is None:
+            self._config_str = self.get_conf_on_disk()
+        changed_sections = diff_config(self._config_str, config_str)
+        if not changed_sections:
+            return config_path, False
+
+        LOG.debug("Router %s keepalived config: %s, changed sections: %s",
+                  self.resource_id, config_str, changed_sections)
         file_utils.replace_file(config_path, config_str)
-
-        return config_path
+        self._config_str = config_str
+        return config_path, True
 
     def get_vrrp_pid_file_name(self, base_pid_file):
         return '%s-vrrp' % base_pid_file
@@ -425,28 +472,74 @@ class KeepalivedManager:
                 raise
 
     def spawn(self):
-        config_path = self._output_config_file()
-
-        for key, instance in self.config.instances.items():
-            if instance.track_script:
-                instance.track_script.write_check_script()
-
+        config_path, changed = self._output_config_file()
         keepalived_pm = self.get_process()
-        vrrp_pm = self._get_vrrp_process(
-            self.get_vrrp_pid_file_name(keepalived_pm.get_pid_file_name()))
-
-        keepalived_pm.default_cmd_callback = (
-            self._get_keepalived_process_callback(vrrp_pm, config_path))
-
-        keepalived_pm.enable(reload_cfg=True)
+        active = keepalived_pm.active
+
+        if changed or not active:
+            for key, instance in self.config.instances.items():
+                if instance.track_script:
+                    instance.track_script.write_check_script()
+
+        if active:
+            if changed:
+                self._reload(keepalived_pm)
+            else:
+                LOG.debug('Keepalived config of %s unchanged, not reloaded',
+                          self.resource_id)
+        else:
+            vrrp_pm = self._get_vrrp_process(
+                self.get_vrrp_pid_file_name(
+                    keepalived_pm.get_pid_file_name()))
+            keepalived_pm.default_cmd_callback = (
+                self._get_keepalived_process_callback(vrrp_pm, config_path))
+            keepalived_pm.enable()
+            LOG.debug('Keepalived spawned with config %s', config_path)
 
         self.process_monitor.register(uuid=self.resource_id,
                                       service_name=KEEPALIVED_SERVICE_NAME,
                                       monitored_process=keepalived_pm)
 
-        LOG.debug('Keepalived spawned with config %s', config_path)
+    def _reload(self, keepalived_pm):
+        """Send a SIGHUP, or schedule it at the end of the reload interval
+
+        While a SIGHUP is scheduled, the configuration changes are only
+        written to the disk, the scheduled SIGHUP applies all of them.
+        """
+        with self._reload_lock:
+            if self._reload_timer:
+                LOG.debug('Keepalived reload of %s already scheduled',
+                          self.resource_id)
+                return
+            now = time.monotonic()
+            delay = 0
+            if self._last_reload is not None:
+                delay = self._last_reload + self._reload_interval - now
+            if delay <= 0:
+                self._last_reload = now
+                keepalived_pm.reload_cfg()
+                return
+            LOG.debug('Keepalived reload of %s scheduled in %.1f seconds',
+                      self.resource_id, delay)
+            self._reload_timer = threading.Timer(delay,
+                                                 self._scheduled_reload)
+            self._reload_timer.daemon = True
+            self._reload_timer.start()
+
+    def _scheduled_reload(self):
+        with self._reload_lock:
+            self._reload_timer = None
+            self._last_reload = time.monotonic()
+        keepalived_pm = self.get_process()
+        if keepalived_pm.active:
+            keepalived_pm.reload_cfg()
 
     def disable(self):
+        with self._reload_lock:
+            if self._reload_timer:
+                self._reload_timer.cancel()
+                self._reload_timer = None
+        self._config_str = None
         self.process_monitor.unregister(uuid=self.resource_id,
                                         service_name=KEEPALIVED_SERVICE_NAME)
 
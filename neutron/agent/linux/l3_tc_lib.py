@@ -10,8 +10,10 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
 import re
 
+import netaddr
 from neutron_lib import constants
 from neutron_lib import exceptions
 from oslo_log import log as logging
@@ -26,6 +28,11 @@ LOG = logging.getLogger(__name__)
 FILTER_ID_REGEX = re.compile(
     r"filter protocol ip u32 (fh|chain \d+ fh) (\w+::\w+) *")
 FILTER_STATS_REGEX = re.compile(r"Sent (\w+) bytes (\w+) pkts *")
+FILTER_PRIORITY = 1
+# Offsets of the source and destination addresses in the IPv4 header
+IP_SRC_OFFSET = 12
+IP_DST_OFFSET = 16
+IP_MASK = 0xffffffff
 
 
 class FloatingIPTcCommandBase(ip_lib.IPDevice):
@@ -119,6 +126,20 @@ class FloatingIPTcCommandBase(ip_lib.IPDevice):
                'parent', qdisc_id] + args
         self._execute_tc_cmd(cmd)
 
+    def _get_ip_filter_ids(self, qdisc_id):
+        """Return the handles of the filters of a qdisc, indexed by IP"""
+        filter_ids = collections.defaultdict(list)
+        for tc_filter in tc_lib.list_tc_filters(self.name, qdisc_id,
+                                                namespace=self.namespace):
+            if tc_filter['priority'] != FILTER_PRIORITY:
+                continue
+            for key in tc_filter['keys']:
+                if (key['mask'] == IP_MASK and
+                        key['offset'] in (IP_SRC_OFFSET, IP_DST_OFFSET)):
+                    ip = str(netaddr.IPAddress(key['value']))
+                    filter_ids[ip].append(tc_filter['handle'])
+        return filter_ids
+
     def _get_or_create_qdisc(self, direction):
         qdisc_id = self._get_qdisc_id_for_filter(direction)
         if not qdisc_id:
@@ -188,3 +209,52 @@ class FloatingIPTcCommand(FloatingIPTcCommandBase):
                       "skipping deletion.",
                       {'ip': ip,
                        'direction': direction})
+
+    def update_ip_rate_limits(self, direction, rate_limits):
+        """Set or clear the rate limits of several IPs.
+
+        The filters of the qdisc are listed and indexed by IP once, then the
+        old filters of the IPs are deleted and the new ones added in a single
+        netlink session.
+
+        :param direction: traffic direction
+        :param rate_limits: dictionary of IP: (rate, burst); a None value
+                            clears the rate limit of the IP
+        """
+        if any(limit is not None for limit in rate_limits.values()):
+            qdisc_id = self._get_or_create_qdisc(direction)
+        else:
+            qdisc_id = self._get_qdisc_id_for_filter(direction)
+            if not qdisc_id:
+                return
+        offset = (IP_SRC_OFFSET if direction == constants.EGRESS_DIRECTION
+                  else IP_DST_OFFSET)
+        filter_ids = self._get_ip_filter_ids(qdisc_id)
+        handles = []
+        policies = []
+        for ip, limit in rate_limits.items():
+            handles += filter_ids.get(ip, [])
+            if limit is None:
+                continue
+            rate, burst = limit
+            key = '{}/{}+{}'.format(hex(int(netaddr.IPAddress(ip))),
+                                    hex(IP_MASK), offset)
+            policies.append({
+                'keys': [key],
+                'rate_kbps': rate,
+                'burst_kb': tc_lib.TcCommand.get_ingress_qdisc_burst_value(
+                    rate, burst)})
+        if not handles and not policies:
+            return
+        LOG.debug("Deleting %(deleted)s and adding %(added)s filters in "
+                  "%(direction)s.",
+                  {'deleted': len(handles),
+                   'added': len(policies),
+                   'direction': direction})
+        tc_lib.update_tc_filters_policy(
+            self.name, qdisc_id, handles, policies, tc_lib.MAX_MTU_VALUE,
+            'drop', priority=FILTER_PRIORITY,
+            protocol=constants.ETHERTYPE_IP, namespace=self.namespace)
+
+    def clear_ip_rate_limits(self, direction, ips):
+        self.update_ip_rate_limits(direction, dict.fromkeys(ips))
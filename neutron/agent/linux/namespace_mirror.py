@@ -0,0 +1,232 @@
+# Copyright 2026 Red Hat, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import collections
+import re
+import threading
+
+from oslo_log import log as logging
+
+from neutron.agent.common import async_process
+from neutron.agent.linux import ip_lib
+from neutron.agent.linux import utils as linux_utils
+from neutron.common import utils as common_utils
+
+LOG = logging.getLogger(__name__)
+
+MONITOR_START_TIMEOUT = 10
+MONITOR_RESPAWN_INTERVAL = 1
+
+_NSID_EVENT = re.compile(r'^\[nsid (\d+)\]')
+_NSID_NAMESPACE = re.compile(r'^(\S+) \(id: (\d+)\)')
+
+
+class NamespaceMonitor(async_process.AsyncProcess):
+    """Count the link, address and route netlink events of all namespaces.
+
+    A single "ip monitor all-nsid" process, run in the root namespace,
+    receives the events of every namespace with a namespace id. Each line
+    it prints is an event, prefixed by the id of its namespace; the lines
+    are not parsed further nor queued, the new state is read from the
+    kernel by the NamespaceMirror.
+    """
+
+    def __init__(self, respawn_interval=None):
+        super().__init__(
+            ['ip', '-o', 'monitor', 'all-nsid', 'link', 'address', 'route'],
+            run_as_root=True, respawn_interval=respawn_interval)
+        # Incremented each time the process is (re)spawned, as the events
+        # emitted while it was not running are lost
+        self._generation = 0
+        self._events = collections.Counter()
+
+    def _spawn(self):
+        self._generation += 1
+        super()._spawn()
+
+    def _read_stdout(self):
+        data = self._process.stdout.readline()
+        match = _NSID_EVENT.match(data)
+        if match:
+            self._events[match.group(1)] += 1
+        return data
+
+    def get_state(self, nsid):
+        """Return a value which changes with each event of a namespace"""
+        return self._generation, self._events[nsid]
+
+
+def get_namespace_id(namespace):
+    """Return the id of a namespace in the root namespace, set if needed.
+
+    The netlink events of a namespace are only received by the monitor once
+    the namespace has an id.
+    """
+    def find_id():
+        output = linux_utils.execute(['ip', 'netns', 'list'],
+                                     run_as_root=True)
+        for line in output.splitlines():
+            match = _NSID_NAMESPACE.match(line)
+            if match and match.group(1) == namespace:
+                return match.group(2)
+
+    nsid = find_id()
+    if nsid is None:
+        # Fails if another process set the id in the meantime
+        linux_utils.execute(['ip', 'netns', 'set', namespace, 'auto'],
+                            run_as_root=True, check_exit_code=False,
+                            log_fail_as_error=False)
+        nsid = find_id()
+    return nsid
+
+
+class NamespaceMirror:
+    """In-memory copy of the devices, IP addresses and routes of a namespace.
+
+    The copy is read from the kernel (through privsep) on the first read,
+    then served from memory until the namespace monitor reports an event of
+    the namespace or the agent itself changes the namespace with ip_lib.
+    While the monitor is not running, or when the namespace has no id,
+    every read goes to the kernel.
+    """
+
+    def __init__(self, namespace, monitor):
+        self.namespace = namespace
+        self._monitor = monitor
+        self._nsid = None
+        self._started = False
+        self._lock = threading.Lock()
+        self._state = None
+        self._cache = {}
+
+    def start(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+            self._nsid = get_namespace_id(self.namespace)
+            if self._nsid is None:
+                LOG.warning('Namespace %s has no id, its devices will be '
+                            'read from the kernel', self.namespace)
+
+    def invalidate(self):
+        with self._lock:
+            self._cache.clear()
+
+    def _get(self, key, fetch):
+        with self._lock:
+            if self._nsid is None or not self._monitor.is_running:
+                return fetch()
+            state = self._monitor.get_state(self._nsid)
+            if state != self._state:
+                self._cache.clear()
+                self._state = state
+            if key not in self._cache:
+                self._cache[key] = fetch()
+            return self._cache[key]
+
+    def get_device_names(self):
+        """Return the device names, as returned by IPWrapper.get_devices"""
+        return list(self._get('devices', lambda: [
+            device.name for device in
+            ip_lib.IPWrapper(namespace=self.namespace).get_devices()]))
+
+    def get_addresses(self, device):
+        """Return the IP addresses of a device.
+
+        :returns: a list of addresses, as returned by
+                  ip_lib.get_devices_with_ip
+        """
+        def fetch():
+            addresses = {}
+            for address in ip_lib.get_devices_with_ip(self.namespace):
+                addresses.setdefault(address['name'], []).append(address)
+            return addresses
+
+        return [dict(address) for address in
+                self._get('addresses', fetch).get(device, [])]
+
+    def get_routes(self, ip_version, device=None, scope=None):
+        """Return the routes of the main table.
+
+        :returns: a list of routes, as returned by ip_lib.list_ip_routes,
+                  optionally filtered by device and scope
+        """
+        routes = self._get(
+            ('routes', ip_version),
+            lambda: ip_lib.list_ip_routes(self.namespace, ip_version))
+        return [dict(route) for route in routes
+                if (device is None or route['device'] == device) and
+                (scope is None or route['scope'] == scope)]
+
+
+_MIRRORS = {}
+_MIRRORS_LOCK = threading.Lock()
+_MONITOR = None
+
+
+def _start_monitor():
+    global _MONITOR
+    _MONITOR = NamespaceMonitor(respawn_interval=MONITOR_RESPAWN_INTERVAL)
+    _MONITOR.start()
+    try:
+        common_utils.wait_until_true(_MONITOR.is_active,
+                                     timeout=MONITOR_START_TIMEOUT)
+    except common_utils.WaitTimeout:
+        LOG.warning('Namespace monitor not started, the namespace devices '
+                    'will be read from the kernel')
+
+
+def get_mirror(namespace):
+    """Return the mirror of a namespace, starting it if needed."""
+    with _MIRRORS_LOCK:
+        if _MONITOR is None:
+            _start_monitor()
+        mirror = _MIRRORS.get(namespace)
+        if mirror is None:
+            mirror = _MIRRORS[namespace] = NamespaceMirror(namespace,
+                                                           _MONITOR)
+    mirror.start()
+    return mirror
+
+
+def remove_mirror(namespace):
+    """Forget the mirror of a namespace, if any.
+
+    The namespace monitor is stopped with the last mirror.
+    """
+    global _MONITOR
+    with _MIRRORS_LOCK:
+        _MIRRORS.pop(namespace, None)
+        if _MIRRORS or _MONITOR is None:
+            return
+        monitor, _MONITOR = _MONITOR, None
+    try:
+        monitor.stop()
+    except async_process.AsyncProcessException:
+        # Not running, stop() also disabled the respawn
+        pass
+
+
+def _namespace_changed(namespace, deleted=False):
+    if deleted:
+        # A new namespace with the same name can get another id
+        remove_mirror(namespace)
+        return
+    mirror = _MIRRORS.get(namespace)
+    if mirror:
+        mirror.invalidate()
+
+
+ip_lib.register_namespace_change_callback(_namespace_changed)
@@ -0,0 +1,685 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Security groups enforced with nftables for hybrid plugged OVS ports.
+
+All the state is kept in a single ``bridge`` family table. The ports are
+dispatched to their chains with verdict maps keyed by the interface name, so
+the classification cost does not depend on the number of ports. Each
+security group has its own chains, shared by all the ports using it, and the
+remote security groups are nftables sets. Every change is calculated
+incrementally and sent to the kernel as a single ``nft -f`` transaction.
+"""
+
+import collections
+
+import netaddr
+from neutron_lib import constants
+from oslo_log import log as logging
+from oslo_serialization import jsonutils
+from oslo_utils import excutils
+from oslo_utils import netutils
+
+from neutron.agent import firewall
+from neutron.agent.linux import ip_conntrack
+from neutron.agent.linux import iptables_firewall
+from neutron.agent.linux import utils as linux_utils
+from neutron.common import _constants as const
+
+LOG = logging.getLogger(__name__)
+
+TABLE = 'bridge neutron'
+INGRESS_PORTS_MAP = 'ingress-ports'
+EGRESS_PORTS_MAP = 'egress-ports'
+ZONES_MAP = 'zones'
+NOTRACK_PORTS_SET = 'notrack-ports'
+SPOOF_FILTER = iptables_firewall.SPOOF_FILTER
+CHAIN_NAME_PREFIX = {constants.INGRESS_DIRECTION: 'i-',
+                     constants.EGRESS_DIRECTION: 'o-',
+                     SPOOF_FILTER: 's-'}
+DIRECTION_ADDR = {constants.INGRESS_DIRECTION: 'saddr',
+                  constants.EGRESS_DIRECTION: 'daddr'}
+ETHERTYPE_PROTOCOL = {constants.IPv4: 'ip', constants.IPv6: 'ip6'}
+ETHERTYPE_SET_TYPE = {constants.IPv4: 'ipv4_addr',
+                      constants.IPv6: 'ipv6_addr'}
+ICMP_PROTOCOL = {constants.IPv4: 'icmp', constants.IPv6: 'icmpv6'}
+
+
+def _ifname(name):
+    return '"%s"' % name
+
+
+def _elements(elements):
+    return '{ %s }' % ', '.join(elements)
+
+
+class NftConntrackManager(ip_conntrack.IpConntrackManager):
+    """Conntrack manager reading the initial zones from the nftables map."""
+
+    def __init__(self, get_zones_func, filtered_ports, unfiltered_ports,
+                 namespace=None):
+        self._get_zones_func = get_zones_func
+        super().__init__(None, filtered_ports, unfiltered_ports,
+                         namespace=namespace, zone_per_port=True)
+
+    def _populate_initial_zone_map(self):
+        self._device_zone_map = {}
+        for device, zone in self._get_zones_func().items():
+            # strip off any prefix that the interface is using
+            short_port_id = device[constants.LINUX_DEV_PREFIX_LEN:]
+            self._device_zone_map[short_port_id] = zone
+        LOG.debug("Populated conntrack zone map: %s", self._device_zone_map)
+
+
+class NftablesFirewallDriver(firewall.FirewallDriver):
+    """Driver which enforces security groups through nftables rules.
+
+    The ports must be plugged in a Linux bridge between the instance tap
+    device and the OVS integration bridge, as done for the iptables_hybrid
+    driver.
+    """
+    OVS_HYBRID_PLUG_REQUIRED = True
+
+    def __init__(self, namespace=None):
+        self.namespace = namespace
+        # list of port which has security group
+        self.filtered_ports = {}
+        self.unfiltered_ports = {}
+        self.trusted_ports = []
+        self.sg_rules = {}
+        self.sg_members = collections.defaultdict(
+            lambda: collections.defaultdict(list))
+        self.ipconntrack = NftConntrackManager(
+            self._get_kernel_zones, self.filtered_ports,
+            self.unfiltered_ports, namespace=namespace)
+        self._defer_apply = False
+        # Devices whose chains and map elements must be (re)generated
+        self._updated_ports = set()
+        # {device: port} of the ports whose filter must be removed
+        self._removed_ports = {}
+        self._updated_trusted_ports = set()
+        # Applied state: it reflects what is currently in the kernel table
+        self._synced = False
+        self._applied_port_elements = {}
+        self._applied_port_chains = {}
+        self._applied_sg_rules = {}
+        self._applied_sets = {}
+        # Conntrack deletions to execute once the rules are applied
+        self._pending_conntrack_updates = []
+
+    @property
+    def ports(self):
+        return dict(self.filtered_ports, **self.unfiltered_ports)
+
+    def _execute(self, cmd, **kwargs):
+        if self.namespace:
+            cmd = ['ip', 'netns', 'exec', self.namespace] + cmd
+        return linux_utils.execute(cmd, run_as_root=True, privsep_exec=True,
+                                   **kwargs)
+
+    def _get_kernel_zones(self):
+        """Return the {device: zone} map currently present in the kernel."""
+        output = self._execute(
+            ['nft', '-j', 'list', 'map'] + TABLE.split() + [ZONES_MAP],
+            check_exit_code=False, log_fail_as_error=False)
+        if not output:
+            return {}
+        zones = {}
+        try:
+            for item in jsonutils.loads(output).get('nftables', []):
+                for device, zone in item.get('map', {}).get('elem', []):
+                    zones[device] = int(zone)
+        except (ValueError, TypeError, AttributeError):
+            LOG.warning('Unable to parse the nftables conntrack zones map: '
+                        '%s', output)
+        return zones
+
+    # Device and object names
+
+    @staticmethod
+    def _get_device_name(port):
+        if not isinstance(port, dict):
+            return iptables_firewall.get_hybrid_port_name(port)
+        return iptables_firewall.get_hybrid_port_name(port['device'])
+
+    @staticmethod
+    def _get_br_device_name(port):
+        return ('qvb' + port['device'])[:constants.LINUX_DEV_LEN]
+
+    @staticmethod
+    def _port_chain_name(port, direction):
+        return CHAIN_NAME_PREFIX[direction] + port['device']
+
+    @staticmethod
+    def _sg_chain_name(sg_id, direction):
+        return f'sg-{sg_id}-{direction}'
+
+    @staticmethod
+    def _set_name(remote_id, ethertype):
+        return f'sg-{remote_id}-{ethertype.lower()}'
+
+    # Public FirewallDriver API
+
+    def prepare_port_filter(self, port):
+        LOG.debug("Preparing device (%s) filter", port['device'])
+        self._set_ports(port)
+        self._apply_changes()
+
+    def update_port_filter(self, port):
+        LOG.debug("Updating device (%s) filter", port['device'])
+        if port['device'] not in self.ports:
+            LOG.info('Attempted to update port filter which is not '
+                     'filtered %s', port['device'])
+            return
+        self._set_ports(port)
+        self._apply_changes()
+
+    def remove_port_filter(self, port):
+        LOG.debug("Removing device (%s) filter", port['device'])
+        if port['device'] not in self.ports:
+            LOG.info('Attempted to remove port filter which is not '
+                     'filtered %r', port)
+            return
+        device_info = self.filtered_ports.get(port['device'])
+        if device_info:
+            for ethertype in (constants.IPv4, constants.IPv6):
+                self._pending_conntrack_updates.append(
+                    (self.ipconntrack.delete_conntrack_state_by_remote_ips,
+                     ([device_info], ethertype, set())))
+        self.filtered_ports.pop(port['device'], None)
+        self.unfiltered_ports.pop(port['device'], None)
+        self._updated_ports.discard(port['device'])
+        self._removed_ports[port['device']] = port
+        self._apply_changes()
+
+    def update_security_group_rules(self, sg_id, sg_rules):
+        LOG.debug("Update rules of security group (%s)", sg_id)
+        deleted_rules = [rule for rule in self.sg_rules.get(sg_id, [])
+                         if rule not in sg_rules]
+        if deleted_rules:
+            devices = self._get_devices_on_security_group(sg_id)
+            for rule in deleted_rules:
+                self._pending_conntrack_updates.append(
+                    (self.ipconntrack.delete_conntrack_state_by_rule,
+                     (devices, rule)))
+        self.sg_rules[sg_id] = sg_rules
+
+    def update_security_group_members(self, sg_id, sg_members):
+        LOG.debug("Update members of security group (%s)", sg_id)
+        devices = self._get_devices_with_remote_group(sg_id)
+        for ethertype in (constants.IPv4, constants.IPv6):
+            old_ips = {ip for ip, _mac in
+                       self.sg_members.get(sg_id, {}).get(ethertype, [])}
+            new_ips = {ip for ip, _mac in sg_members.get(ethertype, [])}
+            deleted_ips = [str(netaddr.IPNetwork(ip).ip)
+                           for ip in old_ips - new_ips]
+            if devices and deleted_ips:
+                self._pending_conntrack_updates.append(
+                    (self.ipconntrack.delete_conntrack_state_by_remote_ips,
+                     (devices, ethertype, deleted_ips)))
+        self.sg_members[sg_id] = collections.defaultdict(list, sg_members)
+
+    def security_group_updated(self, action_type, sec_group_ids,
+                               device_ids=None):
+        # The rules and members are compared with the applied ones when the
+        # changes are calculated, nothing needs to be tracked here.
+        pass
+
+    def process_trusted_ports(self, port_ids):
+        """Process ports that are trusted and shouldn't be filtered."""
+        for port_id in port_ids:
+            if port_id not in self.trusted_ports:
+                self.trusted_ports.append(port_id)
+                self._updated_trusted_ports.add(port_id)
+        self._apply_changes()
+
+    def remove_trusted_ports(self, port_ids):
+        for port_id in port_ids:
+            if port_id in self.trusted_ports:
+                self.trusted_ports.remove(port_id)
+                self._updated_trusted_ports.add(port_id)
+        self._apply_changes()
+
+    def filter_defer_apply_on(self):
+        self._defer_apply = True
+
+    def filter_defer_apply_off(self):
+        if self._defer_apply:
+            self._defer_apply = False
+            self._apply_changes()
+
+    # Internal state helpers
+
+    def _set_ports(self, port):
+        if not firewall.port_sec_enabled(port):
+            self.unfiltered_ports[port['device']] = port
+            self.filtered_ports.pop(port['device'], None)
+        else:
+            self.filtered_ports[port['device']] = port
+            self.unfiltered_ports.pop(port['device'], None)
+        self._removed_ports.pop(port['device'], None)
+        self._updated_ports.add(port['device'])
+
+    def _get_devices_on_security_group(self, sg_id):
+        return [port for port in self.filtered_ports.values()
+                if sg_id in port.get('security_groups', [])]
+
+    def _get_devices_with_remote_group(self, remote_id):
+        return [port for port in self.filtered_ports.values()
+                if remote_id in port.get('security_group_source_groups', [])]
+
+    @staticmethod
+    def _get_any_remote_group_id_in_rule(rule):
+        return (rule.get('remote_group_id') or
+                rule.get('remote_address_group_id'))
+
+    def _is_port_stateful(self, port):
+        for sg_id in port.get('security_groups', [])[:1]:
+            for rule in self.sg_rules.get(sg_id, []):
+                return rule.get('stateful', True)
+        return True
+
+    # nftables rules generation
+
+    def _table_commands(self):
+        return [
+            'add table %s' % TABLE,
+            'delete table %s' % TABLE,
+            'add table %s' % TABLE,
+            'add map %s %s { type ifname : verdict; }' % (
+                TABLE, INGRESS_PORTS_MAP),
+            'add map %s %s { type ifname : verdict; }' % (
+                TABLE, EGRESS_PORTS_MAP),
+            'add map %s %s { typeof iifname : ct zone; }' % (
+                TABLE, ZONES_MAP),
+            'add set %s %s { type ifname; }' % (TABLE, NOTRACK_PORTS_SET),
+            'add chain %s prerouting { type filter hook prerouting '
+            'priority -300; policy accept; }' % TABLE,
+            'add rule %s prerouting iifname @%s notrack' % (
+                TABLE, NOTRACK_PORTS_SET),
+            'add rule %s prerouting ct zone set iifname map @%s' % (
+                TABLE, ZONES_MAP),
+            'add chain %s forward { type filter hook forward '
+            'priority 0; policy accept; }' % TABLE,
+            # Traffic sent to the port, matched by the output interface.
+            'add rule %s forward oifname vmap @%s' % (
+                TABLE, INGRESS_PORTS_MAP),
+            # Traffic sent by the port, matched by the input interface.
+            'add rule %s forward iifname vmap @%s' % (
+                TABLE, EGRESS_PORTS_MAP),
+        ]
+
+    def _protocol_args(self, rule):
+        protocol = rule.get('protocol')
+        if protocol is None or str(protocol) in ('0', 'any'):
+            return []
+        ethertype = rule.get('ethertype')
+        if (ethertype == constants.IPv6 and
+                protocol in const.IPV6_ICMP_LEGACY_PROTO_LIST):
+            protocol = constants.PROTO_NAME_IPV6_ICMP
+        protocol_num = str(constants.IP_PROTOCOL_MAP.get(protocol, protocol))
+        args = ['meta l4proto %s' % protocol_num]
+
+        port_min = rule.get('port_range_min')
+        port_max = rule.get('port_range_max')
+        if protocol_num in (str(constants.PROTO_NUM_ICMP),
+                            str(constants.PROTO_NUM_IPV6_ICMP)):
+            # port_range_min/port_range_max represent the icmp type/code
+            icmp = ICMP_PROTOCOL[ethertype]
+            if port_min is not None:
+                args.append(f'{icmp} type {port_min}')
+                if port_max is not None:
+                    args.append(f'{icmp} code {port_max}')
+        elif int(protocol_num) in const.SG_PORT_PROTO_NUMS:
+            for match, p_min, p_max in (
+                    ('sport', rule.get('source_port_range_min'),
+                     rule.get('source_port_range_max')),
+                    ('dport', port_min, port_max)):
+                if p_min is None:
+                    continue
+                if p_max is None or p_min == p_max:
+                    args.append(f'th {match} {p_min}')
+                else:
+                    args.append(f'th {match} {p_min}-{p_max}')
+        return args
+
+    def _convert_sg_rule(self, rule, direction):
+        ethertype = rule.get('ethertype')
+        if ethertype not in ETHERTYPE_PROTOCOL:
+            return None
+        l3 = ETHERTYPE_PROTOCOL[ethertype]
+        args = ['meta protocol %s' % l3]
+        addr = DIRECTION_ADDR[direction]
+        remote_id = self._get_any_remote_group_id_in_rule(rule)
+        ip_prefix = rule.get(firewall.DIRECTION_IP_PREFIX[direction])
+        if ip_prefix:
+            # an allow for every address is not a constraint
+            if not ip_prefix.endswith('/0'):
+                args.append(
+                    f'{l3} {addr} {netaddr.IPNetwork(ip_prefix).cidr}')
+        elif remote_id:
+            args.append('%s %s @%s' % (l3, addr,
+                                       self._set_name(remote_id, ethertype)))
+        args += self._protocol_args(rule)
+        args.append('accept')
+        return ' '.join(args)
+
+    def _convert_sg_rules(self, rules, direction):
+        nft_rules = []
+        for rule in rules:
+            if rule.get('direction') != direction:
+                continue
+            nft_rule = self._convert_sg_rule(rule, direction)
+            # since these rules may come from several sources, there may be
+            # duplicates so we prune them out here
+            if nft_rule and nft_rule not in nft_rules:
+                nft_rules.append(nft_rule)
+        return nft_rules
+
+    def _chain_commands(self, chain, rules):
+        commands = ['add chain %s %s' % (TABLE, chain),
+                    'flush chain %s %s' % (TABLE, chain)]
+        commands += ['add rule %s %s %s' % (TABLE, chain, rule)
+                     for rule in rules]
+        return commands
+
+    def _get_mac_ip_pairs(self, port):
+        pairs = {constants.IPv4: [], constants.IPv6: []}
+
+        def _add_pair(mac, ip_address):
+            mac = str(netaddr.EUI(mac, dialect=netaddr.mac_unix_expanded))
+            ip_net = netaddr.IPNetwork(ip_address)
+            ethertype = (constants.IPv4 if ip_net.version == 4
+                         else constants.IPv6)
+            pairs[ethertype].append((mac, str(ip_net.cidr)))
+            if ip_net.version == constants.IP_VERSION_6:
+                lla = '%s/128' % netutils.get_ipv6_addr_by_EUI64(
+                    constants.IPv6_LLA_PREFIX, mac)
+                if (mac, lla) not in pairs[ethertype]:
+                    pairs[ethertype].append((mac, lla))
+
+        for address_pair in port.get('allowed_address_pairs') or []:
+            _add_pair(address_pair['mac_address'],
+                      address_pair['ip_address'])
+        for ip in port.get('fixed_ips', []):
+            _add_pair(port['mac_address'], ip)
+        return pairs
+
+    def _spoof_filter_rules(self, port):
+        rules = []
+        pairs = self._get_mac_ip_pairs(port)
+        for ethertype, mac_ips in pairs.items():
+            l3 = ETHERTYPE_PROTOCOL[ethertype]
+            rules += ['ether saddr %s %s saddr %s return' % (mac, l3, ip)
+                      for mac, ip in mac_ips]
+        if not port.get('fixed_ips'):
+            mac = str(netaddr.EUI(port['mac_address'],
+                                  dialect=netaddr.mac_unix_expanded))
+            rules.append('ether saddr %s return' % mac)
+        rules.append('drop')
+        return rules
+
+    def _port_egress_rules(self, port):
+        spoof_chain = self._port_chain_name(port, SPOOF_FILTER)
+        icmpv6_unspec_types = ', '.join(
+            str(icmp6_type)
+            for icmp6_type in constants.ICMPV6_ALLOWED_UNSPEC_ADDR_TYPES)
+        return [
+            'meta protocol != { ip, ip6 } accept',
+            # Allow dhcp client discovery and request
+            'meta protocol ip ip saddr 0.0.0.0 ip daddr 255.255.255.255 '
+            'udp sport 68 udp dport 67 accept',
+            # Allow neighbor solicitation and multicast listener discovery
+            # from the unspecified address for duplicate address detection
+            'meta protocol ip6 ip6 saddr :: ip6 daddr ff02::/16 '
+            'icmpv6 type { %s } accept' % icmpv6_unspec_types,
+            'jump %s' % spoof_chain,
+            # Allow dhcp client renewal and rebinding
+            'meta protocol ip udp sport 68 udp dport 67 accept',
+            # Drop Router Advts from the port.
+            'meta protocol ip6 icmpv6 type %s drop' % constants.ICMPV6_TYPE_RA,
+            'meta protocol ip6 meta l4proto %s accept' %
+            constants.PROTO_NUM_IPV6_ICMP,
+            'meta protocol ip6 udp sport 546 udp dport 547 accept',
+            # Drop dhcp packets from the port
+            'meta protocol ip udp sport 67 udp dport 68 drop',
+            'meta protocol ip6 udp sport 547 udp dport 546 drop',
+        ]
+
+    def _port_ingress_rules(self, port):
+        icmpv6_types = ', '.join(str(icmp6_type) for icmp6_type in
+                                 firewall.ICMPV6_ALLOWED_INGRESS_TYPES)
+        return [
+            'meta protocol != { ip, ip6 } accept',
+            'meta protocol ip6 icmpv6 type { %s } accept' % icmpv6_types,
+        ]
+
+    def _port_chain_rules(self, port, direction):
+        if direction == constants.EGRESS_DIRECTION:
+            rules = self._port_egress_rules(port)
+        else:
+            rules = self._port_ingress_rules(port)
+        rules.append('ct state related,established accept')
+        rules += self._convert_sg_rules(
+            port.get('security_group_rules', []), direction)
+        rules += ['jump %s' % self._sg_chain_name(sg_id, direction)
+                  for sg_id in port.get('security_groups', [])]
+        rules += ['ct state invalid drop', 'drop']
+        return rules
+
+    def _port_elements(self, port, filtered):
+        """Return the {map or set: [element]} entries of a port."""
+        tap = _ifname(self._get_device_name(port))
+        if not filtered:
+            return {INGRESS_PORTS_MAP: ['%s : accept' % tap],
+                    EGRESS_PORTS_MAP: ['%s : accept' % tap]}
+        elements = {
+            INGRESS_PORTS_MAP: ['%s : jump %s' % (
+                tap,
+                self._port_chain_name(port, constants.INGRESS_DIRECTION))],
+            EGRESS_PORTS_MAP: ['%s : jump %s' % (
+                tap,
+                self._port_chain_name(port, constants.EGRESS_DIRECTION))]}
+        devices = (tap, _ifname(self._get_br_device_name(port)))
+        if self._is_port_stateful(port):
+            zone = self.ipconntrack.get_device_zone(port)
+            elements[ZONES_MAP] = ['%s : %s' % (dev, zone) for dev in devices]
+        else:
+            elements[NOTRACK_PORTS_SET] = list(devices)
+        return elements
+
+    @staticmethod
+    def _elements_commands(action, elements):
+        return ['%s element %s %s %s' % (action, TABLE, name,
+                                         _elements(values))
+                for name, values in sorted(elements.items()) if values]
+
+    @staticmethod
+    def _delete_elements(elements):
+        # "delete element" only needs the key of the map elements.
+        return {name: [value.split(' : ')[0] for value in values]
+                for name, values in elements.items()}
+
+    def _get_remote_sets(self, rules):
+        """Return the {set name: (remote id, ethertype)} used by the rules."""
+        remote_sets = {}
+        for rule in rules:
+            remote_id = self._get_any_remote_group_id_in_rule(rule)
+            ethertype = rule.get('ethertype')
+            if (remote_id and ethertype in ETHERTYPE_SET_TYPE and
+                    not rule.get(firewall.DIRECTION_IP_PREFIX.get(
+                        rule.get('direction')))):
+                remote_sets[self._set_name(remote_id, ethertype)] = (
+                    remote_id, ethertype)
+        return remote_sets
+
+    def _get_set_elements(self, remote_id, ethertype):
+        ips = [ip for ip, _mac in
+               self.sg_members.get(remote_id, {}).get(ethertype, [])]
+        # The set elements are intervals, they must not overlap.
+        return {str(net) for net in netaddr.cidr_merge(ips)}
+
+    def _apply_changes(self):
+        if self._defer_apply:
+            return
+        if not self._synced:
+            # Build the whole table again, in the same transaction, so the
+            # kernel state matches the applied state tracked by the driver.
+            self._applied_port_elements = {}
+            self._applied_port_chains = {}
+            self._applied_sg_rules = {}
+            self._applied_sets = {}
+            self._updated_ports |= set(self.ports)
+            self._updated_trusted_ports |= set(self.trusted_ports)
+            self._removed_ports = {}
+
+        port_elements = dict(self._applied_port_elements)
+        port_chains = dict(self._applied_port_chains)
+        sg_rules = dict(self._applied_sg_rules)
+        sets = dict(self._applied_sets)
+        commands = [] if self._synced else self._table_commands()
+
+        used_sg_ids = set()
+        for port in self.filtered_ports.values():
+            used_sg_ids.update(port.get('security_groups', []))
+        remote_sets = {}
+        for sg_id in used_sg_ids:
+            remote_sets.update(
+                self._get_remote_sets(self.sg_rules.get(sg_id, [])))
+        for port in self.filtered_ports.values():
+            remote_sets.update(self._get_remote_sets(
+                port.get('security_group_rules', [])))
+
+        # Remote security group sets
+        for set_name, (remote_id, ethertype) in sorted(remote_sets.items()):
+            elements = self._get_set_elements(remote_id, ethertype)
+            applied = sets.get(set_name)
+            if applied is None:
+                commands.append('add set %s %s { type %s; flags interval; }'
+                                % (TABLE, set_name,
+                                   ETHERTYPE_SET_TYPE[ethertype]))
+                applied = set()
+            commands += self._elements_commands(
+                'delete', {set_name: sorted(applied - elements)})
+            commands += self._elements_commands(
+                'add', {set_name: sorted(elements - applied)})
+            sets[set_name] = elements
+
+        # Security group chains, shared by all the ports using them
+        for sg_id in sorted(used_sg_ids):
+            rules = self.sg_rules.get(sg_id, [])
+            if sg_id in sg_rules and sg_rules[sg_id] == rules:
+                continue
+            for direction in (constants.INGRESS_DIRECTION,
+                              constants.EGRESS_DIRECTION):
+                commands += self._chain_commands(
+                    self._sg_chain_name(sg_id, direction),
+                    self._convert_sg_rules(rules, direction))
+            sg_rules[sg_id] = list(rules)
+
+        # Port chains and dispatch map elements
+        ports = self.ports
+        for device in sorted(self._updated_ports):
+            filtered = device in self.filtered_ports
+            port = ports[device]
+            if device in port_elements:
+                commands += self._elements_commands(
+                    'delete', self._delete_elements(port_elements[device]))
+            if filtered:
+                chains = {}
+                for direction in (SPOOF_FILTER, constants.INGRESS_DIRECTION,
+                                  constants.EGRESS_DIRECTION):
+                    chain = self._port_chain_name(port, direction)
+                    rules = (self._spoof_filter_rules(port)
+                             if direction == SPOOF_FILTER else
+                             self._port_chain_rules(port, direction))
+                    commands += self._chain_commands(chain, rules)
+                    chains[direction] = chain
+                port_chains[device] = chains
+            port_elements[device] = self._port_elements(port, filtered)
+            commands += self._elements_commands('add', port_elements[device])
+            if not filtered and device in port_chains:
+                commands += self._delete_chains_commands(
+                    port_chains.pop(device))
+
+        for device in sorted(self._removed_ports):
+            if device in port_elements:
+                commands += self._elements_commands(
+                    'delete', self._delete_elements(port_elements.pop(device)))
+            if device in port_chains:
+                commands += self._delete_chains_commands(
+                    port_chains.pop(device))
+
+        # Trusted ports
+        for port_id in sorted(self._updated_trusted_ports):
+            key = 'trusted-%s' % port_id
+            if key in port_elements:
+                commands += self._elements_commands(
+                    'delete', self._delete_elements(port_elements.pop(key)))
+            if port_id in self.trusted_ports:
+                port_elements[key] = self._port_elements(port_id, False)
+                commands += self._elements_commands('add',
+                                                    port_elements[key])
+
+        # Unused security group chains and sets, once no rule uses them
+        for sg_id in sorted(set(sg_rules) - used_sg_ids):
+            commands += self._delete_chains_commands(
+                {direction: self._sg_chain_name(sg_id, direction)
+                 for direction in (constants.INGRESS_DIRECTION,
+                                   constants.EGRESS_DIRECTION)})
+            del sg_rules[sg_id]
+        for set_name in sorted(set(sets) - set(remote_sets)):
+            commands.append('delete set %s %s' % (TABLE, set_name))
+            del sets[set_name]
+
+        if commands:
+            try:
+                self._execute(['nft', '-f', '-'],
+                              process_input='\n'.join(commands + ['']))
+            except Exception:
+                with excutils.save_and_reraise_exception():
+                    # The transaction is atomic: nothing was changed in the
+                    # kernel. Rebuild the whole table in the next apply.
+                    self._synced = False
+
+        self._synced = True
+        self._applied_port_elements = port_elements
+        self._applied_port_chains = port_chains
+        self._applied_sg_rules = sg_rules
+        self._applied_sets = sets
+        self._updated_ports = set()
+        self._updated_trusted_ports = set()
+        self._removed_ports = {}
+        self._process_pending_conntrack_updates()
+        self._remove_unused_security_group_info(used_sg_ids, remote_sets)
+
+    @staticmethod
+    def _delete_chains_commands(chains):
+        # The chains must be flushed before being deleted, as they can
+        # reference each other (the egress chain jumps to the spoof one).
+        chains = sorted(chains.values())
+        return (['flush chain %s %s' % (TABLE, chain) for chain in chains] +
+                ['delete chain %s %s' % (TABLE, chain) for chain in chains])
+
+    def _process_pending_conntrack_updates(self):
+        updates, self._pending_conntrack_updates = (
+            self._pending_conntrack_updates, [])
+        for method, args in updates:
+            method(*args)
+
+    def _remove_unused_security_group_info(self, used_sg_ids, remote_sets):
+        used_remote_ids = {remote_id for remote_id, _ethertype
+                           in remote_sets.values()}
+        for sg_id in set(self.sg_rules) - used_sg_ids:
+            del self.sg_rules[sg_id]
+        for remote_id in set(self.sg_members) - used_remote_ids:
+            del self.sg_members[remote_id]
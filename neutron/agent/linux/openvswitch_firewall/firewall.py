@@ -390,6 +390,8 @@ class ConjIPFlowManager:
         self.driver = driver
         # The following two are dict of dicts and are indexed like:
         #     self.x[vlan_tag][(direction, ethertype)]
+        # "flow_state" stores the conjunction flows installed in OVS, as
+        # returned by "_build_flow_state".
         self.conj_ids = collections.defaultdict(dict)
         self.flow_state = collections.defaultdict(
             lambda: collections.defaultdict(dict))
@@ -408,73 +410,92 @@ class ConjIPFlowManager:
                 addr_to_conj[addr].extend(conj_id_set)
         return addr_to_conj
 
-    def _update_flows_for_vlan_subr(self, direction, ethertype, vlan_tag,
-                                    flow_state, addr_to_conj,
-                                    conj_id_to_remove, ofport):
-        """Do the actual flow updates for given direction and ethertype."""
-        conj_id_to_remove = conj_id_to_remove or []
-        # Delete any current flow related to any deleted IP address, before
-        # creating the flows for the current IPs.
-        self.driver.delete_flows_for_flow_state(
-            flow_state, addr_to_conj, direction, ethertype, vlan_tag)
-        for conj_id_set in conj_id_to_remove:
-            # Remove any remaining flow with remote SG/AG ID conj_id_to_remove
-            for (current_ip, current_mac), conj_ids in flow_state.items():
-                conj_ids_to_remove = conj_id_set & set(conj_ids)
-                self.driver.delete_flow_for_ip_and_mac(
-                    current_ip, current_mac, direction, ethertype,
-                    vlan_tag, conj_ids_to_remove)
-
-        # NOTE(hangyang): Handle add/delete overlapped IPs among
-        # remote security groups and remote address groups
-        removed_ips = {
-            str(netaddr.IPNetwork(addr).cidr)
-            for addr, _ in set(flow_state) - set(addr_to_conj)
-        }
+    @staticmethod
+    def _build_flow_state(addr_to_conj):
+        """Build the conjunction flows state needed for the given addresses.
+
+        The state is a dictionary indexed by the flow match, (IP prefix, MAC
+        address), being the MAC address only matched for "any" IP prefixes.
+        The values are the conj_ids of each flow priority offset.
+        """
         ip_to_conj = collections.defaultdict(set)
-        for (addr, mac), conj_ids in addr_to_conj.items():
-            # Addresses from remote security groups have mac addresses,
-            # others from remote address groups have not.
+        for (addr, _mac), conj_ids in addr_to_conj.items():
+            # Overlapped IPs among remote security groups and remote address
+            # groups (addresses from remote security groups have MAC
+            # addresses, others from remote address groups have not) must
+            # have their conj_ids combined, otherwise the flows would be
+            # overridden in the creation sequence.
             ip_to_conj[str(netaddr.IPNetwork(addr).cidr)].update(conj_ids)
 
+        flow_state = {}
         for addr, mac in addr_to_conj:
-            ip_cidr = str(netaddr.IPNetwork(addr).cidr)
-            # When the overlapped IP in remote security group and remote
-            # address group have different conjunction ids but with the
-            # same priority offset, we need to combine the conj_ids together
-            # before create flows otherwise flows will be overridden in the
-            # creation sequence.
-            conj_ids = list(ip_to_conj[ip_cidr])
-            conj_ids.sort()
-            if (flow_state.get((addr, mac)) == conj_ids and
-                    ip_cidr not in removed_ips):
-                # When there are IP overlaps among remote security groups
-                # and remote address groups, removal of the overlapped ips
-                # from one remote group will also delete the flows for the
-                # other groups because the non-strict delete method cannot
-                # match flow priority or actions for different conjunction
-                # ids, therefore we need to recreate the affected flows.
+            net = netaddr.IPNetwork(addr)
+            ip_cidr = str(net.cidr)
+            match_mac = mac if net.prefixlen == 0 else None
+            flow_state[(ip_cidr, match_mac)] = (
+                rules.group_conj_ids_by_priority_offset(ip_to_conj[ip_cidr]))
+        return flow_state
+
+    def _update_flows_for_vlan_subr(self, direction, ethertype, vlan_tag,
+                                    flow_state, new_flow_state, ofport):
+        """Do the actual flow updates for given direction and ethertype.
+
+        Only the difference between the installed flows, "flow_state", and
+        the required ones, "new_flow_state", is sent to OVS.
+        """
+        deleted = set()
+        for (ip_cidr, mac), offsets in flow_state.items():
+            new_offsets = new_flow_state.get((ip_cidr, mac), {})
+            removed = set(offsets) - set(new_offsets)
+            if not removed:
+                continue
+            if mac is None and netaddr.IPNetwork(ip_cidr).prefixlen == 0:
+                # A non-strict delete of a wildcard address without MAC
+                # would match every flow of this network in the table:
+                # only the removed priorities are deleted, strictly.
+                self.driver.delete_flow_for_ip_and_mac(
+                    ip_cidr, mac, direction, ethertype, vlan_tag,
+                    [offsets[offset][0] for offset in sorted(removed)])
+                continue
+            # The non-strict delete method cannot match the flow
+            # priority: all the flows of this address are deleted and
+            # the remaining ones created again.
+            self.driver.delete_flow_for_ip_and_mac(
+                ip_cidr, mac, direction, ethertype, vlan_tag, [0])
+            deleted.add((ip_cidr, mac))
+
+        for (ip_cidr, mac), new_offsets in new_flow_state.items():
+            offsets = ({} if (ip_cidr, mac) in deleted else
+                       flow_state.get((ip_cidr, mac), {}))
+            # Adding a flow with the same match and priority replaces the
+            # actions of the installed one.
+            conj_ids = [conj_id
+                        for offset, offset_conj_ids in new_offsets.items()
+                        if offsets.get(offset) != offset_conj_ids
+                        for conj_id in offset_conj_ids]
+            if not conj_ids:
                 continue
             for flow in rules.create_flows_for_ip_address_and_mac(
-                    addr, mac, direction, ethertype, vlan_tag, conj_ids):
+                    ip_cidr, mac, direction, ethertype, vlan_tag,
+                    sorted(conj_ids)):
                 self.driver._add_flow(flow_group_id=ofport, **flow)
 
-    def update_flows_for_vlan(self, vlan_tag, ofport, conj_id_to_remove=None):
+    def update_flows_for_vlan(self, vlan_tag, ofport):
         """Install action=conjunction(conj_id, 1/2) flows,
         which depend on IP addresses of remote_group_id or
         remote_address_group_id.
         """
         for (direction, ethertype), sg_ag_conj_id_map in (
                 self.conj_ids[vlan_tag].items()):
-            # TODO(toshii): optimize when remote_groups have
-            # no address overlaps.
             addr_to_conj = self._build_addr_conj_id_map(
                 ethertype, sg_ag_conj_id_map)
+            new_flow_state = self._build_flow_state(addr_to_conj)
             self._update_flows_for_vlan_subr(
                 direction, ethertype, vlan_tag,
                 self.flow_state[vlan_tag][(direction, ethertype)],
-                addr_to_conj, conj_id_to_remove, ofport)
-            self.flow_state[vlan_tag][(direction, ethertype)] = addr_to_conj
+                new_flow_state, ofport)
+            self.flow_state[vlan_tag][(direction, ethertype)] = (
+                new_flow_state)
 
     def add(self, vlan_tag, sg_id, remote_id, direction, ethertype,
             priority_offset):
@@ -515,22 +536,17 @@ class ConjIPFlowManager:
 
         for vlan_tag, vlan_conj_id_map in self.conj_ids.items():
             update = False
-            conj_id_to_remove = []
             for sg_conj_id_map in vlan_conj_id_map.values():
                 for remote_sg_id, unused in unused_dict.items():
                     if (remote_sg_id in sg_conj_id_map and
                             sg_conj_id_map[remote_sg_id] & unused):
-                        if remote_sg_id == sg_id:
-                            conj_id_to_remove.append(
-                                sg_conj_id_map[remote_sg_id] & unused)
                         sg_conj_id_map[remote_sg_id] -= unused
                         if not sg_conj_id_map[remote_sg_id]:
                             del sg_conj_id_map[remote_sg_id]
                         update = True
 
             if update:
-                self.update_flows_for_vlan(vlan_tag, None,
-                                           conj_id_to_remove=conj_id_to_remove)
+                self.update_flows_for_vlan(vlan_tag, None)
 
 
 class OVSFirewallDriver(firewall.FirewallDriver):
@@ -1667,24 +1683,6 @@ class OVSFirewallDriver(firewall.FirewallDriver):
                            in_port=port.ofport)
         self._delete_flows(reg_port=port.ofport)
 
-    def delete_flows_for_flow_state(
-            self, flow_state, addr_to_conj, direction, ethertype, vlan_tag):
-        # Remove rules for deleted IPs and action=conjunction(conj_id, 1/2)
-        removed_ips = set(flow_state.keys()) - set(addr_to_conj.keys())
-        for removed_ip, removed_mac in removed_ips:
-            conj_ids = flow_state[(removed_ip, removed_mac)]
-            self.delete_flow_for_ip_and_mac(
-                removed_ip, removed_mac, direction,
-                ethertype, vlan_tag, conj_ids)
-
-        if not cfg.CONF.AGENT.explicitly_egress_direct:
-            return
-
-        for ip, mac in removed_ips:
-            # Generate deletion template with bogus conj_id.
-            self.delete_flow_for_ip_and_mac(
-                ip, mac, direction, ethertype, vlan_tag, [0])
-
     def delete_flow_for_ip_and_mac(self, ip, mac, direction, ethertype,
                                    vlan_tag, conj_ids):
         for flow in rules.create_flows_for_ip_address_and_mac(
@@ -1694,10 +1692,17 @@ class OVSFirewallDriver(firewall.FirewallDriver):
             # these field in non-strict delete flow messages, and
             # the actions field is bogus anyway.
             del flow['actions']
-            del flow['priority']
             # NOTE(hangyang) If cookie is not set then _delete_flows will
             # use the OVSBridge._default_cookie to filter the flows but that
             # will not match with the ip flow's cookie so OVS won't actually
             # delete the flow
             flow['cookie'] = ovs_lib.COOKIE_ANY
+            if mac is None and netaddr.IPNetwork(ip).prefixlen == 0:
+                # Without any IP or MAC match, a non-strict delete would
+                # remove all the flows of the network in the table. A strict
+                # delete cannot be mixed with the non-strict ones of the
+                # deferred bridge batch, so it is sent right away.
+                self._delete_flows(deferred=False, strict=True, **flow)
+                continue
+            del flow['priority']
             self._delete_flows(**flow)
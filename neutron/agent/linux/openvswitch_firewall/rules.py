@@ -295,6 +295,16 @@ def _flow_priority_offset_from_conj_id(conj_id):
     return conj_id % 8 // 2
 
 
+def group_conj_ids_by_priority_offset(conj_ids):
+    """Return a {priority offset: sorted tuple of conj_ids} dictionary."""
+    conj_id_lists = collections.defaultdict(list)
+    for conj_id in sorted(conj_ids):
+        conj_id_lists[_flow_priority_offset_from_conj_id(conj_id)].append(
+            conj_id)
+    return {offset: tuple(conj_id_list)
+            for offset, conj_id_list in conj_id_lists.items()}
+
+
 def create_flows_for_ip_address_and_mac(ip_address, mac_address, direction,
                                         ethertype, vlan_tag, conj_ids):
     """Create flows from a rule, ip, and mac addresses derived from
@@ -549,6 +549,35 @@ def add_tc_filter_policy(device, parent, rate_kbps, burst_kb, mtu, action,
                                      namespace=namespace)
 
 
+def update_tc_filters_policy(device, parent, handles, policies, mtu, action,
+                             priority=0, protocol=None, namespace=None):
+    """Delete and add TC policy filters in a device, in one netlink session.
+
+    :param device: (string) device name
+    :param parent: (string) qdisc parent class ('root', 'ingress', '2:10')
+    :param handles: (list) handles of the filters to delete, as returned by
+                    list_tc_filters
+    :param policies: (list) filters to add, dictionaries with the match
+                     "keys" (pyroute2 u32 keys), "rate_kbps" (rate in
+                     kbits/second) and "burst_kb" (burst in kbits)
+    :param mtu: (int) MTU size (bytes)
+    :param action: (string) filter policy action
+    :param priority: (int) (optional) filter priority (lower priority, higher
+                     preference)
+    :param protocol: (int) (optional) traffic filter protocol; if None, all
+                     will be matched.
+    :param namespace: (string) (optional) namespace name
+
+    """
+    parent = iproute_linux.transform_handle(parent)
+    filters = [(policy['keys'], int(policy['rate_kbps'] * 1000 / 8),
+                int(policy['burst_kb'] * 1000 / 8)) for policy in policies]
+    priv_tc_lib.update_tc_filters_policy(device, parent, priority, handles,
+                                         filters, mtu, action,
+                                         protocol=protocol,
+                                         namespace=namespace)
+
+
 def list_tc_filters(device, parent, namespace=None):
     """List TC filter in a device
 
@@ -578,7 +607,9 @@ def list_tc_filters(device, parent, namespace=None):
                          'mask': key['key_val'],
                          'offset': key['key_offmask']})
 
-        value = {'keys': keys}
+        value = {'keys': keys,
+                 'handle': filter['handle'],
+                 'priority': filter['info'] >> 16}
 
         tca_u32_police = linux_utils.get_attr(tca_options, 'TCA_U32_POLICE')
         if tca_u32_police:
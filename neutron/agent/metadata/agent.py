@@ -61,7 +61,8 @@ class MetadataProxyHandler(
     def __init__(self, request, client_address, server):
         self.plugin_rpc = MetadataPluginAPI(topics.PLUGIN)
         self.context = context.get_admin_context_without_session()
-        super().__init__(self._conf, has_cache=False, request=request,
+        super().__init__(self._conf, has_cache=self._port_cache is not None,
+                         request=request,
                          client_address=client_address, server=server)
 
     @staticmethod
@@ -152,6 +153,7 @@ class UnixDomainMetadataProxy(proxy_base.UnixDomainMetadataProxyBase):
         super().__init__(conf)
         agent_utils.ensure_directory_exists_without_file(
             cfg.CONF.metadata_proxy_socket)
+        self._port_cache = None
 
     def _init_state_reporting(self):
         self.context = context.get_admin_context_without_session()
@@ -176,6 +178,9 @@ class UnixDomainMetadataProxy(proxy_base.UnixDomainMetadataProxyBase):
             self.heartbeat.start(interval=report_interval)
 
     def _report_state(self):
+        if self._port_cache:
+            self.agent_state['configurations'].update(
+                self._port_cache.get_stats())
         try:
             self.state_rpc.report_state(
                 self.context,
@@ -203,9 +208,12 @@ class UnixDomainMetadataProxy(proxy_base.UnixDomainMetadataProxyBase):
             md_workers = host.cpu_count() // 2
 
         file_socket = cfg.CONF.metadata_proxy_socket
-        self._server = proxy_base.MetadataProxyServer(
-            md_workers, file_socket, MetadataProxyHandler)
+        server_class = proxy_base.get_metadata_proxy_server_class(self.conf)
+        self._server = server_class(md_workers, file_socket,
+                                    MetadataProxyHandler)
 
         MetadataProxyHandler._conf = self.conf
+        MetadataProxyHandler._port_cache = self._port_cache = (
+            proxy_base.get_port_lookup_cache(self.conf))
         self._init_state_reporting()
         self._server.serve_forever()
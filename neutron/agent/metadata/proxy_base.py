@@ -14,8 +14,15 @@
 #    under the License.
 
 import abc
+import asyncio
+import collections
 from concurrent import futures
+from http import cookiejar
+import socket
 import socketserver
+import ssl
+import threading
+import time
 import urllib
 
 import netaddr
@@ -24,6 +31,9 @@ from oslo_config import cfg
 from oslo_log import log as logging
 from oslo_utils import netutils
 import requests
+from requests import adapters
+from requests import structures
+from requests import utils as requests_utils
 import webob
 
 from neutron._i18n import _
@@ -40,6 +50,105 @@ MODE_MAP = {
     config.ALL_MODE: 0o666,
 }
 
+_SESSION = None
+_SESSION_LOCK = threading.Lock()
+
+
+def get_nova_metadata_session(conf):
+    """Return the HTTP session shared by the metadata proxy requests.
+
+    The session keeps alive the connections to the Nova metadata server, and
+    the TLS sessions on top of them, so that they are reused by the next
+    requests instead of being established for each instance request. At most
+    ``nova_metadata_pool_size`` connections are kept alive per backend; the
+    connections opened beyond them, while they are all in use, are closed
+    once their request completes. The cookies set by the Nova metadata
+    server are rejected, so that no state is shared between the instances.
+    """
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            session = requests.Session()
+            session.cookies.set_policy(
+                cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+            adapter = adapters.HTTPAdapter(
+                pool_maxsize=conf.nova_metadata_pool_size, pool_block=False)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _SESSION = session
+        return _SESSION
+
+
+class PortLookupCache:
+    """TTL and LRU bounded cache of the metadata proxy instance lookups.
+
+    The entries are keyed by the source IP address, the source MAC address,
+    the network ID and the router ID of the request and store the instance
+    and project IDs they were resolved to. A single cache is shared by all
+    the handler threads.
+    """
+
+    def __init__(self, size, ttl):
+        self.size = size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # {key: (expiration time, (instance_id, project_id))}
+        self._entries = collections.OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+
+    @staticmethod
+    def get_key(remote_address, remote_mac, network_id, router_id):
+        return remote_address, remote_mac, network_id, router_id
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry[1]
+            if entry:
+                del self._entries[key]
+            self._misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, addresses=(), macs=()):
+        """Remove the entries of the given source IP or MAC addresses."""
+        with self._lock:
+            keys = [key for key in self._entries
+                    if key[0] in addresses or key[1] in macs]
+            for key in keys:
+                del self._entries[key]
+            self._invalidations += len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._invalidations += len(self._entries)
+            self._entries.clear()
+
+    def get_stats(self):
+        with self._lock:
+            return {'metadata_cache_entries': len(self._entries),
+                    'metadata_cache_hits': self._hits,
+                    'metadata_cache_misses': self._misses,
+                    'metadata_cache_invalidations': self._invalidations}
+
+
+def get_port_lookup_cache(conf):
+    """Return a PortLookupCache, or None if the cache is disabled."""
+    if not conf.metadata_cache_ttl:
+        return None
+    return PortLookupCache(conf.metadata_cache_size, conf.metadata_cache_ttl)
+
 
 class MetadataProxyServer(socketserver.UnixStreamServer):
     """Metadata server which listens on a unix domain socket.
@@ -50,11 +159,12 @@ class MetadataProxyServer(socketserver.UnixStreamServer):
     """
 
     def __init__(self, workers, *kargs, **kwargs):
+        # Used by server_activate(), called by the parent constructor
+        self.request_queue_size = cfg.CONF.metadata_backlog
         super().__init__(*kargs, **kwargs)
         self._pool = None
         if workers > 0:
             self._pool = futures.ThreadPoolExecutor(max_workers=workers)
-        self.request_queue_size = cfg.CONF.metadata_backlog
 
     def process_request_thread(self, request, client_address):
         """Same as in BaseServer but as a thread.
@@ -91,9 +201,235 @@ class MetadataProxyServer(socketserver.UnixStreamServer):
             pass
 
 
+class AsyncNovaMetadataClient:
+    """Minimal asyncio HTTP/1.1 client of the Nova metadata server.
+
+    The connections are kept alive and reused by the next requests; at most
+    ``nova_metadata_pool_size`` requests are sent concurrently, the others
+    wait for a connection to be released. The responses are returned as
+    ``requests.Response`` objects, like the ones of the shared session
+    returned by ``get_nova_metadata_session``.
+
+    Unlike that session, the client always connects directly to the Nova
+    metadata server: the proxies set in the environment (``http_proxy``,
+    ``https_proxy``...) are not used.
+    """
+
+    def __init__(self, conf, timeout=60):
+        self.conf = conf
+        self.timeout = timeout
+        self._ssl_context = self._get_ssl_context()
+        self._semaphore = asyncio.Semaphore(conf.nova_metadata_pool_size)
+        self._idle = []
+        url = '{}://{}/'.format(conf.nova_metadata_protocol,
+                                ipv6_utils.valid_ipv6_url(
+                                    conf.nova_metadata_host,
+                                    conf.nova_metadata_port))
+        if requests_utils.get_environ_proxies(url):
+            LOG.warning("The environment proxy settings are ignored by the "
+                        "asyncio metadata server, the requests are sent "
+                        "directly to the Nova metadata server %s", url)
+
+    def _get_ssl_context(self):
+        if self.conf.nova_metadata_protocol != 'https':
+            return None
+        if self.conf.nova_metadata_insecure:
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+        else:
+            context = ssl.create_default_context(
+                cafile=(self.conf.auth_ca_cert or
+                        requests_utils.DEFAULT_CA_BUNDLE_PATH))
+        if self.conf.nova_client_cert and self.conf.nova_client_priv_key:
+            context.load_cert_chain(self.conf.nova_client_cert,
+                                    self.conf.nova_client_priv_key)
+        return context
+
+    async def _connect(self):
+        return await asyncio.open_connection(
+            self.conf.nova_metadata_host, self.conf.nova_metadata_port,
+            ssl=self._ssl_context)
+
+    async def request(self, method, url, headers, data=b''):
+        """Send a request to the Nova metadata server.
+
+        :param url: URL of the request; only its path and query are sent,
+                    the connections are opened to the configured server.
+        :raises: OSError if the Nova metadata server can not be reached,
+                 asyncio.IncompleteReadError if it closes the connection
+                 before the end of the response, asyncio.TimeoutError if it
+                 does not answer in time.
+        """
+        path = urllib.parse.urlunsplit(
+            ('', '') + urllib.parse.urlsplit(url)[2:])
+        headers = dict(headers, Host=ipv6_utils.valid_ipv6_url(
+            self.conf.nova_metadata_host, self.conf.nova_metadata_port))
+        if data:
+            headers['Content-Length'] = str(len(data))
+        request = ''.join(['%s %s HTTP/1.1\r\n' % (method, path)] +
+                          ['%s: %s\r\n' % item for item in headers.items()
+                           if item[1] is not None] +
+                          ['\r\n']).encode('latin-1') + (data or b'')
+
+        async with self._semaphore:
+            while True:
+                reused = bool(self._idle)
+                reader, writer = (self._idle.pop() if reused else
+                                  await asyncio.wait_for(self._connect(),
+                                                         self.timeout))
+                try:
+                    writer.write(request)
+                    response, keep_alive = await asyncio.wait_for(
+                        self._read_response(reader, method), self.timeout)
+                except (OSError, asyncio.IncompleteReadError):
+                    writer.close()
+                    if reused:
+                        # The server closed the idle connection, retry on
+                        # another one
+                        continue
+                    raise
+                except BaseException:
+                    writer.close()
+                    raise
+                if keep_alive:
+                    self._idle.append((reader, writer))
+                else:
+                    writer.close()
+                return response
+
+    @staticmethod
+    async def _read_status_and_headers(reader):
+        status_line = await reader.readuntil(b'\r\n')
+        version, status_code = status_line.split(None, 2)[:2]
+        headers = structures.CaseInsensitiveDict()
+        while True:
+            line = await reader.readuntil(b'\r\n')
+            if line == b'\r\n':
+                break
+            name, _sep, value = line.decode('latin-1').partition(':')
+            headers[name.strip()] = value.strip()
+        return version, int(status_code), headers
+
+    @classmethod
+    async def _read_response(cls, reader, method='GET'):
+        while True:
+            version, status_code, headers = (
+                await cls._read_status_and_headers(reader))
+            # The interim responses (100 Continue...) precede the final one
+            if not 100 <= status_code < 200:
+                break
+
+        keep_alive = (version == b'HTTP/1.1' and
+                      headers.get('connection', '').lower() != 'close')
+        if method == 'HEAD' or status_code in (204, 304):
+            # These responses never have a body (RFC 9112, section 6.3)
+            content = b''
+        elif headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int((await reader.readuntil(b'\r\n')).split(b';')[0],
+                           16)
+                if not size:
+                    # Skip the trailer section
+                    while await reader.readuntil(b'\r\n') != b'\r\n':
+                        pass
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            content = b''.join(chunks)
+        elif 'content-length' in headers:
+            content = await reader.readexactly(
+                int(headers['content-length']))
+        else:
+            content = await reader.read()
+            keep_alive = False
+
+        response = requests.Response()
+        response.status_code = status_code
+        response.headers = headers
+        response.encoding = requests_utils.get_encoding_from_headers(headers)
+        response._content = content
+        return response, keep_alive
+
+    def close(self):
+        while self._idle:
+            self._idle.pop()[1].close()
+
+
+class AsyncMetadataProxyServer:
+    """Metadata server which listens on a unix domain socket.
+
+    The connections are served by an asyncio event loop, run by
+    ``serve_forever``. Each request is processed by the
+    ``handle_async`` coroutine of a handler instance which is not bound to
+    a connection; the blocking instance lookups are run in a threadpool of
+    ``workers`` threads (at least one), while the requests to the Nova
+    metadata server are sent concurrently by an ``AsyncNovaMetadataClient``.
+    """
+
+    def __init__(self, workers, server_address, RequestHandlerClass):
+        self.server_address = server_address
+        self.RequestHandlerClass = RequestHandlerClass
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self.socket.bind(server_address)
+            self.socket.listen(cfg.CONF.metadata_backlog)
+        except Exception:
+            self.socket.close()
+            raise
+        self._pool = futures.ThreadPoolExecutor(max_workers=max(workers, 1))
+        self._loop = None
+        self._stop = None
+        self.nova_client = None
+
+    async def _serve(self):
+        self._loop = asyncio.get_running_loop()
+        self._loop.set_default_executor(self._pool)
+        self._stop = asyncio.Event()
+        handler = self.RequestHandlerClass(None, None, self)
+        self.nova_client = AsyncNovaMetadataClient(handler.conf)
+        server = await asyncio.start_unix_server(
+            handler.handle_async, sock=self.socket,
+            backlog=cfg.CONF.metadata_backlog)
+        try:
+            async with server:
+                await self._stop.wait()
+        finally:
+            self.nova_client.close()
+
+    def serve_forever(self):
+        asyncio.run(self._serve())
+
+    def server_close(self):
+        try:
+            # The socket is closed by the asyncio server when stopped
+            self._loop.call_soon_threadsafe(self._stop.set)
+        except (AttributeError, RuntimeError):
+            # The event loop is not running
+            self.socket.close()
+        self._pool.shutdown(wait=False)
+
+    def __del__(self):
+        try:
+            if hasattr(self, 'socket') and self.socket.fileno() != -1:
+                self.socket.close()
+        except Exception:  # noqa: S110
+            pass
+
+
+def get_metadata_proxy_server_class(conf):
+    """Return the metadata server class of ``metadata_server_type``."""
+    if conf.metadata_server_type == config.ASYNCIO_SERVER:
+        return AsyncMetadataProxyServer
+    return MetadataProxyServer
+
+
 class MetadataProxyHandlerBase(metaclass=abc.ABCMeta):
     NETWORK_ID_HEADER: str
     ROUTER_ID_HEADER: str
+    # PortLookupCache shared by the handler instances, set by the proxy
+    _port_cache = None
 
     def __init__(self, conf, has_cache=False, **kwargs):
         self.conf = conf
@@ -175,11 +511,22 @@ class MetadataProxyHandlerBase(metaclass=abc.ABCMeta):
                 # recognize.
                 remote_mac = str(netutils.get_mac_addr_by_ipv6(remote_ip))
 
+        port_cache = self._port_cache
+        if port_cache is not None:
+            key = port_cache.get_key(forwarded_for, remote_mac, network_id,
+                                     router_id)
+            if not skip_cache:
+                cached = port_cache.get(key)
+                if cached:
+                    return cached
+
         instance_id, project_id = self.get_port(forwarded_for,
                                                 network_id=network_id,
                                                 remote_mac=remote_mac,
                                                 router_id=router_id,
                                                 skip_cache=skip_cache)
+        if port_cache is not None and instance_id:
+            port_cache.put(key, (instance_id, project_id))
         return instance_id, project_id
 
     def _proxy_request(self, instance_id, project_id, req):
@@ -214,12 +561,13 @@ class MetadataProxyHandlerBase(metaclass=abc.ABCMeta):
                            self.conf.nova_client_priv_key)
 
         try:
-            resp = requests.request(method=req.method, url=url,
-                                    headers=headers,
-                                    data=req.body,
-                                    cert=client_cert,
-                                    verify=verify_cert,
-                                    timeout=60)
+            session = get_nova_metadata_session(self.conf)
+            resp = session.request(method=req.method, url=url,
+                                   headers=headers,
+                                   data=req.body,
+                                   cert=client_cert,
+                                   verify=verify_cert,
+                                   timeout=60)
         except requests.ConnectionError:
             msg = _('The remote metadata server is temporarily unavailable. '
                     'Please try again later.')
@@ -98,6 +98,7 @@ class PortBindingEvent(extension_manager.OVNExtensionEvent,
         return row.type in OVN_VIF_PORT_TYPES
 
     def run(self, event, row, old):
+        self.agent.invalidate_metadata_cache(row, old)
         # Check if the port has been bound/unbound to our chassis and update
         # the metadata namespace accordingly.
         resync = False
@@ -343,6 +344,7 @@ class MetadataAgent:
         self._sb_idl = None
         self._post_fork_event = threading.Event()
         self._chassis = None
+        self._proxy = None
 
     @property
     def conf(self):
@@ -362,6 +364,11 @@ class MetadataAgent:
     def chassis(self):
         return self._chassis
 
+    def invalidate_metadata_cache(self, *rows):
+        """Invalidate the metadata proxy lookups of Port_Binding rows."""
+        if self._proxy:
+            self._proxy.invalidate_port_cache(rows)
+
     @property
     def chassis_id(self):
         return self._chassis_id
@@ -33,7 +33,8 @@ class MetadataProxyHandler(
     _sb_idl = None
 
     def __init__(self, request, client_address, server):
-        super().__init__(self._conf, has_cache=False, request=request,
+        super().__init__(self._conf, has_cache=self._port_cache is not None,
+                         request=request,
                          client_address=client_address, server=server)
 
     @property
@@ -71,6 +72,7 @@ class UnixDomainMetadataProxy(proxy_base.UnixDomainMetadataProxyBase):
         agent_utils.ensure_directory_exists_without_file(
             cfg.CONF.metadata_proxy_socket)
         self._server = None
+        self._port_cache = None
 
     def run(self):
         # Set the default metadata_workers if not yet set in the config file
@@ -78,12 +80,34 @@ class UnixDomainMetadataProxy(proxy_base.UnixDomainMetadataProxyBase):
         md_workers = 0 if md_workers is None else md_workers
 
         file_socket = cfg.CONF.metadata_proxy_socket
-        self._server = proxy_base.MetadataProxyServer(
-            md_workers, file_socket, MetadataProxyHandler)
+        server_class = proxy_base.get_metadata_proxy_server_class(self.conf)
+        self._server = server_class(md_workers, file_socket,
+                                    MetadataProxyHandler)
 
         MetadataProxyHandler._conf = self.conf
         MetadataProxyHandler._chassis = self.chassis
         MetadataProxyHandler._sb_idl = self.sb_idl
+        MetadataProxyHandler._port_cache = self._port_cache = (
+            proxy_base.get_port_lookup_cache(self.conf))
+
+    def invalidate_port_cache(self, rows):
+        """Invalidate the cached lookups of the addresses of a port binding.
+
+        :param rows: Port_Binding rows (new and old); their "mac" column
+                     entries are in the form "<MAC> [<IP> ...]".
+        """
+        if not self._port_cache:
+            return
+        macs = set()
+        addresses = set()
+        for row in rows:
+            for entry in getattr(row, 'mac', ()):
+                mac, *ips = entry.split()
+                macs.add(mac)
+                addresses.update(ips)
+        self._port_cache.invalidate(addresses=addresses, macs=macs)
+        LOG.debug("Metadata cache invalidated for addresses %s, stats: %s",
+                  addresses | macs, self._port_cache.get_stats())
 
     def close(self):
         if self._server:
@@ -12,21 +12,48 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
+import itertools
+import threading
+
 from neutron_lib.callbacks import events
 from neutron_lib.callbacks import registry
 from neutron_lib import context as n_ctx
 from neutron_lib import rpc as n_rpc
+from neutron_lib.utils import file as file_utils
 from oslo_log import log as logging
+import oslo_messaging
+from oslo_serialization import jsonutils
 
 from neutron._i18n import _
 from neutron.api.rpc.callbacks.consumer import registry as registry_rpc
 from neutron.api.rpc.callbacks import events as events_rpc
+from neutron.api.rpc.callbacks import resources as callback_resources
 from neutron.api.rpc.handlers import resources_rpc
 from neutron import objects
 
 LOG = logging.getLogger(__name__)
 objects.register_objects()
 
+# Attributes indexed per resource type, used by get_resources to avoid
+# scanning all the cached resources. When the attribute is a list or a set,
+# each of its values is indexed.
+INDEXED_ATTRIBUTES = {
+    callback_resources.PORT: ('network_id', 'security_group_ids',
+                              'device_owner'),
+    callback_resources.SECURITYGROUPRULE: ('security_group_id',
+                                           'remote_group_id',
+                                           'remote_address_group_id'),
+    callback_resources.SUBNET: ('network_id', ),
+}
+
+
+def _get_attr_values(resource, attr):
+    value = getattr(resource, attr, None)
+    if isinstance(value, list | tuple | set):
+        return set(value)
+    return {value}
+
 
 class RemoteResourceCache:
     """Retrieves and stashes logical resources in their OVO format.
@@ -34,13 +61,32 @@ class RemoteResourceCache:
     This is currently only compatible with OVO objects that have an ID.
     """
 
-    def __init__(self, resource_types):
+    def __init__(self, resource_types, indexed_attributes=None):
         self.resource_types = resource_types
         self._cache_by_type_and_id = {rt: {} for rt in self.resource_types}
+        if indexed_attributes is None:
+            indexed_attributes = INDEXED_ATTRIBUTES
+        # {rtype: {attr: {value: set of resource IDs}}}
+        self._indexes = {
+            rt: {attr: collections.defaultdict(set) for attr in attrs}
+            for rt, attrs in indexed_attributes.items()
+            if rt in self.resource_types}
+        # insertion position of the indexed resources, to return them in the
+        # same order as the cache
+        self._positions_by_type = {rt: {} for rt in self._indexes}
+        self._positions_counter = itertools.count()
         self._deleted_ids_by_type = {rt: set() for rt in self.resource_types}
         # track everything we've asked the server so we don't ask again
         self._satisfied_server_queries = set()
         self._puller = resources_rpc.ResourcesPullRpcApi()
+        # resources loaded from a snapshot, not confirmed by the server yet
+        self._snapshot_by_type_and_id = {rt: {} for rt in self.resource_types}
+        # filters of the server queries satisfied before the snapshot
+        self._snapshot_queries_by_type = {
+            rt: [] for rt in self.resource_types}
+        self._snapshot_path = None
+        self._snapshot_event = None
+        self._snapshot_thread = None
 
     def _type_cache(self, rtype):
         if rtype not in self.resource_types:
@@ -53,6 +99,97 @@ class RemoteResourceCache:
     def stop_watcher(self):
         self._watcher.stop()
 
+    def start_snapshot(self, path, interval):
+        """Load the snapshot stored in path and refresh it periodically."""
+        self._snapshot_path = path
+        self.load_snapshot()
+        self._snapshot_event = threading.Event()
+
+        def snapshot_worker():
+            while not self._snapshot_event.wait(interval):
+                self.save_snapshot()
+
+        self._snapshot_thread = threading.Thread(target=snapshot_worker,
+                                                 daemon=True)
+        self._snapshot_thread.start()
+
+    def stop_snapshot(self):
+        if not self._snapshot_thread:
+            return
+        self._snapshot_event.set()
+        self._snapshot_thread.join()
+        self._snapshot_thread = None
+        self.save_snapshot()
+
+    def load_snapshot(self):
+        """Load the resources and queries stored by save_snapshot.
+
+        The resources are not returned by the cache until the server confirms
+        their revision number, see _resync_from_snapshot.
+        """
+        try:
+            with open(self._snapshot_path) as snapshot_file:
+                snapshot = jsonutils.loads(snapshot_file.read())
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            LOG.warning("Unable to load the resource cache snapshot %(path)s: "
+                        "%(error)s", {'path': self._snapshot_path, 'error': e})
+            return
+        for rtype, primitives in snapshot.get('resources', {}).items():
+            if rtype not in self.resource_types:
+                continue
+            resource_cls = callback_resources.get_resource_cls(rtype)
+            for primitive in primitives:
+                try:
+                    resource = resource_cls.clean_obj_from_primitive(
+                        primitive)
+                except Exception as e:
+                    LOG.debug("Ignoring %(rtype)s resource of the snapshot: "
+                              "%(error)s", {'rtype': rtype, 'error': e})
+                    continue
+                self._snapshot_by_type_and_id[rtype][resource.id] = resource
+        for query in snapshot.get('queries', []):
+            if query['type'] not in self.resource_types:
+                continue
+            self._snapshot_queries_by_type[query['type']].append(
+                {key: tuple(values)
+                 for key, values in query['filters'].items()})
+        LOG.info("Resource cache snapshot %(path)s loaded: %(count)s",
+                 {'path': self._snapshot_path,
+                  'count': {rtype: len(snapshot) for rtype, snapshot in
+                            self._snapshot_by_type_and_id.items()}})
+
+    def save_snapshot(self):
+        """Store the cached resources in the snapshot file.
+
+        The filters of the server queries satisfied so far are stored too,
+        except the ID queries: they are satisfied again by the resync of the
+        stored resources. The resources and queries loaded from the previous
+        snapshot that were not requested yet are kept.
+        """
+        snapshot = {'resources': {}, 'queries': []}
+        for rtype in self.resource_types:
+            resources = dict(self._snapshot_by_type_and_id[rtype])
+            resources.update(self._type_cache(rtype))
+            snapshot['resources'][rtype] = [
+                resource.obj_to_primitive() for resource in resources.values()]
+            snapshot['queries'].extend(
+                {'type': rtype, 'filters': filters}
+                for filters in self._snapshot_queries_by_type[rtype])
+        for query_id in tuple(self._satisfied_server_queries):
+            rtype, filters = query_id[0], dict(query_id[1:])
+            if set(filters) != {'id'}:
+                snapshot['queries'].append({'type': rtype,
+                                            'filters': filters})
+        try:
+            file_utils.replace_file(self._snapshot_path,
+                                    jsonutils.dumps(snapshot),
+                                    file_mode=0o600)
+        except Exception:
+            LOG.exception("Unable to store the resource cache snapshot %s",
+                          self._snapshot_path)
+
     def get_resource_by_id(self, rtype, obj_id, agent_restarted=False):
         """Returns None if it doesn't exist."""
         if obj_id in self._deleted_ids_by_type[rtype]:
@@ -72,6 +209,9 @@ class RemoteResourceCache:
         Queries the server if this is the first time a given query for
         rtype has been issued.
         """
+        if (self._snapshot_by_type_and_id[rtype] or
+                self._snapshot_queries_by_type[rtype]):
+            self._resync_from_snapshot(rtype, agent_restarted=agent_restarted)
         query_ids = self._get_query_ids(rtype, filter_kwargs)
         if query_ids.issubset(self._satisfied_server_queries):
             # we've already asked the server this question so we don't
@@ -93,6 +233,94 @@ class RemoteResourceCache:
                   query_ids)
         self._satisfied_server_queries.update(query_ids)
 
+    def _resync_from_snapshot(self, rtype, agent_restarted=False):
+        """Confirm the resources and queries of rtype loaded from the snapshot.
+
+        A revision-filtered bulk pull is done for all the resources, then
+        for the queries satisfied before the snapshot, merged by
+        _merge_query_filters: the server only returns the resources whose
+        revision number changed (or that were created since the snapshot),
+        the others are taken from the snapshot. The resources that do not
+        exist anymore are discarded. The queries are then satisfied without
+        pulling all their resources again.
+        """
+        snapshot = self._snapshot_by_type_and_id[rtype]
+        queries = self._snapshot_queries_by_type[rtype]
+        self._snapshot_by_type_and_id[rtype] = {}
+        self._snapshot_queries_by_type[rtype] = []
+        context = n_ctx.get_admin_context()
+        known_revisions = {resource_id: resource.revision_number
+                           for resource_id, resource in snapshot.items()}
+        filters_list = self._merge_query_filters(queries)
+        if known_revisions:
+            filters_list.insert(0, {'id': tuple(known_revisions)})
+        changed = {}
+        unchanged_ids = set()
+        for filters in filters_list:
+            try:
+                query_changed, query_unchanged_ids = (
+                    self._puller.bulk_pull_changed(
+                        context, rtype, known_revisions,
+                        filter_kwargs=filters))
+            except oslo_messaging.RemoteError as e:
+                if e.exc_type != 'UnsupportedVersion':
+                    raise
+                LOG.info("The server does not support revision-filtered bulk "
+                         "pulls, discarding the %s resources of the snapshot",
+                         rtype)
+                return
+            changed.update((resource.id, resource)
+                           for resource in query_changed)
+            unchanged_ids.update(query_unchanged_ids)
+        resources = list(changed.values()) + [
+            snapshot[resource_id] for resource_id in unchanged_ids
+            if resource_id in snapshot and resource_id not in changed]
+        for resource in resources:
+            self.record_resource_update(context, rtype, resource,
+                                        agent_restarted=agent_restarted)
+        # the resources not returned by the server were deleted
+        for filters in filters_list:
+            self._satisfied_server_queries.update(
+                self._get_query_ids(rtype, filters))
+        LOG.info("%(unchanged)s %(rtype)s resources restored from the "
+                 "snapshot, %(changed)s changed and %(deleted)s deleted, "
+                 "%(queries)s queries restored",
+                 {'unchanged': len(resources) - len(changed), 'rtype': rtype,
+                  'changed': len(changed),
+                  'deleted': len(set(snapshot) - set(changed) - unchanged_ids),
+                  'queries': len(queries)})
+
+    @staticmethod
+    def _merge_query_filters(queries):
+        """Merges the filters of queries differing by a single key.
+
+        The values of a key are matched in an OR fashion by the server, so
+        {'a': ('1', ), 'b': ('2', )} and {'a': ('3', ), 'b': ('2', )} are
+        merged into {'a': ('1', '3'), 'b': ('2', )}. The queries with the
+        same keys are merged on the key with the most distinct values.
+        """
+        queries_by_keys = collections.defaultdict(list)
+        for filters in queries:
+            queries_by_keys[tuple(sorted(filters))].append(filters)
+        merged = []
+        for keys, key_queries in queries_by_keys.items():
+            if not keys:
+                merged.append({})
+                continue
+            merge_key = max(keys, key=lambda key: len(
+                {filters[key] for filters in key_queries}))
+            values_by_other_filters = collections.defaultdict(dict)
+            for filters in key_queries:
+                other_filters = tuple((key, filters[key]) for key in keys
+                                      if key != merge_key)
+                values_by_other_filters[other_filters].update(
+                    dict.fromkeys(filters[merge_key]))
+            for other_filters, values in values_by_other_filters.items():
+                filters = dict(other_filters)
+                filters[merge_key] = tuple(values)
+                merged.append(filters)
+        return merged
+
     def _get_query_ids(self, rtype, filters):
         """Turns filters for a given rypte into a set of query IDs.
 
@@ -126,6 +354,7 @@ class RemoteResourceCache:
         fashion.
         """
         self._flood_cache_for_query(rtype, **filters)
+        resource_ids = self._get_indexed_resource_ids(rtype, filters)
 
         def match(obj):
             for key, values in filters.items():
@@ -142,7 +371,62 @@ class RemoteResourceCache:
                     # no match found for this key
                     return False
             return True
-        return self.match_resources_with_func(rtype, match)
+        if resource_ids is None:
+            return self.match_resources_with_func(rtype, match)
+        type_cache = self._type_cache(rtype)
+        positions = self._positions_by_type[rtype]
+        resources = (type_cache.get(resource_id) for resource_id in
+                     sorted(resource_ids,
+                            key=lambda r_id: positions.get(r_id, -1)))
+        return [r for r in resources if r is not None and match(r)]
+
+    def _get_indexed_resource_ids(self, rtype, filters):
+        """Returns the IDs of the resources matching the indexed filters.
+
+        The resources still have to be matched against all the filters.
+        None is returned if no filter is indexed.
+        """
+        indexes = self._indexes.get(rtype, {})
+        resource_ids = None
+        for key, values in filters.items():
+            index = indexes.get(key)
+            if index is None:
+                continue
+            key_ids = set()
+            for value in values:
+                key_ids |= set(index.get(value, ()))
+            resource_ids = (key_ids if resource_ids is None
+                            else resource_ids & key_ids)
+            if not resource_ids:
+                break
+        return resource_ids
+
+    def _update_indexes(self, rtype, resource_id, existing, resource):
+        """Replaces the existing resource by resource in the rtype indexes.
+
+        Any of them can be None, when the resource is created or removed.
+        The index entries are keyed by resource_id, the cache key.
+        """
+        if rtype not in self._indexes:
+            return
+        if not existing and resource:
+            self._positions_by_type[rtype][resource_id] = next(
+                self._positions_counter)
+        elif existing and not resource:
+            self._positions_by_type[rtype].pop(resource_id, None)
+        for attr, index in self._indexes[rtype].items():
+            old_values = (_get_attr_values(existing, attr) if existing
+                          else set())
+            new_values = (_get_attr_values(resource, attr) if resource
+                          else set())
+            for value in old_values - new_values:
+                resource_ids = index.get(value)
+                if resource_ids is not None:
+                    resource_ids.discard(resource_id)
+                    if not resource_ids:
+                        index.pop(value, None)
+            for value in new_values - old_values:
+                index[value].add(resource_id)
 
     def match_resources_with_func(self, rtype, matcher):
         """Returns a list of all resources satisfying func matcher."""
@@ -180,6 +464,7 @@ class RemoteResourceCache:
             return
         existing = self._type_cache(rtype).get(resource.id)
         self._type_cache(rtype)[resource.id] = resource
+        self._update_indexes(rtype, resource.id, existing, resource)
         changed_fields = self._get_changed_fields(existing, resource)
         if not changed_fields:
             LOG.debug("Received resource %s update without any changes: %s",
@@ -212,7 +497,8 @@ class RemoteResourceCache:
                 continue
         LOG.debug("Remove resource cache for resource %s: %s",
                   rtype, resource_id)
-        self._type_cache(rtype).pop(resource_id, None)
+        existing = self._type_cache(rtype).pop(resource_id, None)
+        self._update_indexes(rtype, resource_id, existing, None)
 
     def record_resource_delete(self, context, rtype, resource_id):
         # deletions are final, record them so we never
@@ -225,6 +511,7 @@ class RemoteResourceCache:
             return
         self._deleted_ids_by_type[rtype].add(resource_id)
         existing = self._type_cache(rtype).pop(resource_id, None)
+        self._update_indexes(rtype, resource_id, existing, None)
         # local notification for agent internals to subscribe to
         registry.publish(rtype, events.AFTER_DELETE, self,
                          payload=events.DBEventPayload(
@@ -35,9 +35,11 @@ from oslo_utils import uuidutils
 
 from neutron.agent import resource_cache
 from neutron.api.rpc.callbacks import resources
+from neutron.conf.agent import common as agent_conf
 from neutron import objects
 
 LOG = logging.getLogger(__name__)
+agent_conf.register_resource_cache_opts(cfg.CONF)
 BINDING_DEACTIVATE = 'binding_deactivate'
 DeviceInfo = collections.namedtuple('DeviceInfo', 'mac pci_slot')
 
@@ -406,11 +408,16 @@ class CacheBackedPluginApi(PluginApi):
         """Create a push-notifications cache for L2 agent related resources."""
         objects.register_objects()
         rcache = resource_cache.RemoteResourceCache(self.RESOURCE_TYPES)
+        if cfg.CONF.AGENT.resource_cache_snapshot_path:
+            rcache.start_snapshot(
+                cfg.CONF.AGENT.resource_cache_snapshot_path,
+                cfg.CONF.AGENT.resource_cache_snapshot_interval)
         rcache.start_watcher()
         self.remote_resource_cache = rcache
 
     def stop(self):
         self.remote_resource_cache.stop_watcher()
+        self.remote_resource_cache.stop_snapshot()
 
 
 # TODO(ralonsoh): move this method to neutron_lib.plugins.utils
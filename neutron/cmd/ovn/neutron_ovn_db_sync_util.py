@@ -74,6 +74,11 @@ class OVNMechanismDriver(mech_driver.OVNMechanismDriver):
         port = context.current
         self.ovn_client.create_port(context.plugin_context, port)
 
+    def create_port_bulk_postcommit(self, contexts):
+        self.ovn_client.create_ports(
+            contexts[0].plugin_context,
+            [context.current for context in contexts])
+
     def update_port_precommit(self, context):
         pass
 
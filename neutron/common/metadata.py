@@ -12,6 +12,9 @@
 #    under the License.
 
 import abc
+import asyncio
+import functools
+from http import client
 import io
 import socketserver
 from urllib import parse
@@ -209,7 +212,8 @@ class MetadataProxyHandlerBaseSocketServer(
             out += '\r\n\r\n'
         return out.encode(http_response.encoding)
 
-    def _proxy_request(self, instance_id, project_id, req):
+    def _get_proxy_request(self, instance_id, project_id, req):
+        """Return the URL and the signed headers of the Nova request"""
         headers = {
             'X-Forwarded-For': req.headers.get('X-Forwarded-For'),
             'X-Instance-ID': instance_id,
@@ -228,32 +232,17 @@ class MetadataProxyHandlerBaseSocketServer(
             req.path_info,
             req.query_string,
             ''))
+        return url, headers
 
-        disable_ssl_certificate_validation = self.conf.nova_metadata_insecure
-        if self.conf.auth_ca_cert and not disable_ssl_certificate_validation:
-            verify_cert = self.conf.auth_ca_cert
-        else:
-            verify_cert = not disable_ssl_certificate_validation
-
-        client_cert = None
-        if self.conf.nova_client_cert and self.conf.nova_client_priv_key:
-            client_cert = (self.conf.nova_client_cert,
-                           self.conf.nova_client_priv_key)
-
-        try:
-            resp = requests.request(method=req.method, url=url,
-                                    headers=headers,
-                                    data=req.body,
-                                    cert=client_cert,
-                                    verify=verify_cert,
-                                    timeout=60)
-        except requests.ConnectionError:
-            msg = _('The remote metadata server is temporarily unavailable. '
-                    'Please try again later.')
-            LOG.warning(msg)
-            title = '503 Service Unavailable'
-            return encode_http_reponse(title, title, msg)
-
+    @staticmethod
+    def _service_unavailable_response():
+        msg = _('The remote metadata server is temporarily unavailable. '
+                'Please try again later.')
+        LOG.warning(msg)
+        title = '503 Service Unavailable'
+        return encode_http_reponse(title, title, msg)
+
+    def _proxy_response(self, resp, req):
         if resp.status_code == 200:
             return self._http_response(resp, req)
         if resp.status_code == 403:
@@ -275,7 +264,77 @@ class MetadataProxyHandlerBaseSocketServer(
             return self._http_response(resp, req)
         raise Exception(_('Unexpected response code: %s') % resp.status_code)
 
+    def _proxy_request(self, instance_id, project_id, req):
+        url, headers = self._get_proxy_request(instance_id, project_id, req)
+
+        disable_ssl_certificate_validation = self.conf.nova_metadata_insecure
+        if self.conf.auth_ca_cert and not disable_ssl_certificate_validation:
+            verify_cert = self.conf.auth_ca_cert
+        else:
+            verify_cert = not disable_ssl_certificate_validation
+
+        client_cert = None
+        if self.conf.nova_client_cert and self.conf.nova_client_priv_key:
+            client_cert = (self.conf.nova_client_cert,
+                           self.conf.nova_client_priv_key)
+
+        try:
+            session = proxy_base.get_nova_metadata_session(self.conf)
+            resp = session.request(method=req.method, url=url,
+                                   headers=headers,
+                                   data=req.body,
+                                   cert=client_cert,
+                                   verify=verify_cert,
+                                   timeout=60)
+        except requests.ConnectionError:
+            return self._service_unavailable_response()
+        return self._proxy_response(resp, req)
+
+    async def _proxy_request_async(self, instance_id, project_id, req):
+        url, headers = self._get_proxy_request(instance_id, project_id, req)
+        try:
+            resp = await self.server.nova_client.request(
+                req.method, url, headers, data=req.body)
+        except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+            return self._service_unavailable_response()
+        return self._proxy_response(resp, req)
+
+    @staticmethod
+    def _is_not_found(res):
+        # The response starts with the "<version> <code>" status line
+        return res.split(b' ', 2)[1:2] == [b'404']
+
+    def _instance_not_found_response(self, req):
+        network_id, router_id = self._get_instance_id(req)
+        if network_id and router_id:
+            title = '400 Bad Request'
+            msg = (_('Both network %(network)s and router %(router)s '
+                     'defined.') %
+                   {'network': network_id, 'router': router_id})
+            LOG.warning(msg)
+        elif network_id:
+            title = '404 Not Found'
+            msg = _('Instance was not found on network %s.') % network_id
+            LOG.warning(msg)
+        else:
+            title = '404 Not Found'
+            msg = _('Instance was not found on router %s.') % router_id
+            LOG.warning(msg)
+        return encode_http_reponse(title, title, msg)
+
+    # A handler created without a request is not bound to a connection; it
+    # is used by the AsyncMetadataProxyServer to run ``handle_async``.
+    def setup(self):
+        if self.request is not None:
+            super().setup()
+
+    def finish(self):
+        if self.request is not None:
+            super().finish()
+
     def handle(self):
+        if self.request is None:
+            return
         try:
             request = self.request.recv(4096)
             LOG.debug('Request: %s', request.decode('utf-8'))
@@ -284,26 +343,59 @@ class MetadataProxyHandlerBaseSocketServer(
             instance_id, project_id = self._get_instance_and_project_id(req)
             if instance_id:
                 res = self._proxy_request(instance_id, project_id, req)
+                if self._has_cache and self._is_not_found(res):
+                    LOG.info("The instance: %s is not present anymore, "
+                             "skipping cache...", instance_id)
+                    instance_id, project_id = (
+                        self._get_instance_and_project_id(req,
+                                                          skip_cache=True))
+                    if instance_id:
+                        res = self._proxy_request(instance_id, project_id,
+                                                  req)
                 self.wfile.write(res)
                 return
 
-            network_id, router_id = self._get_instance_id(req)
-            if network_id and router_id:
-                title = '400 Bad Request'
-                msg = (_('Both network %(network)s and router %(router)s '
-                         'defined.') %
-                       {'network': network_id, 'router': router_id})
-                LOG.warning(msg)
-            elif network_id:
-                title = '404 Not Found'
-                msg = _('Instance was not found on network %s.') % network_id
-                LOG.warning(msg)
-            else:
-                title = '404 Not Found'
-                msg = _('Instance was not found on router %s.') % router_id
-                LOG.warning(msg)
-            res = encode_http_reponse(title, title, msg)
-            self.wfile.write(res)
+            self.wfile.write(self._instance_not_found_response(req))
         except Exception as exc:
             LOG.exception('Error while receiving data.')
             raise exc
+
+    async def handle_async(self, reader, writer):
+        """Serve a connection of the AsyncMetadataProxyServer.
+
+        The instance lookups are blocking calls, run in the default executor
+        of the event loop; the request is then forwarded to the Nova
+        metadata server by the asyncio client of the server.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            request = await reader.readuntil(b'\r\n\r\n')
+            headers = client.parse_headers(
+                io.BytesIO(request.split(b'\r\n', 1)[1]))
+            request += await reader.readexactly(
+                int(headers.get('Content-Length', 0)))
+            LOG.debug('Request: %s', request.decode('utf-8'))
+            req = webob.Request.from_file(io.BytesIO(request))
+            instance_id, project_id = await loop.run_in_executor(
+                None, self._get_instance_and_project_id, req)
+            if instance_id:
+                res = await self._proxy_request_async(instance_id,
+                                                      project_id, req)
+                if self._has_cache and self._is_not_found(res):
+                    LOG.info("The instance: %s is not present anymore, "
+                             "skipping cache...", instance_id)
+                    instance_id, project_id = await loop.run_in_executor(
+                        None, functools.partial(
+                            self._get_instance_and_project_id, req,
+                            skip_cache=True))
+                    if instance_id:
+                        res = await self._proxy_request_async(
+                            instance_id, project_id, req)
+            else:
+                res = self._instance_not_found_response(req)
+            writer.write(res)
+            await writer.drain()
+        except Exception:
+            LOG.exception('Error while receiving data.')
+        finally:
+            writer.close()
@@ -37,6 +37,15 @@ INTERFACE_OPTS = [
                        "(e.g. RHEL 6.5) and rate limiting on router's gateway "
                        "port so long as ovs_use_veth is set to "
                        "True.")),
+    cfg.BoolOpt('namespace_mirror',
+                default=False,
+                help=_("Keep an in-memory copy of the devices, IP addresses "
+                       "and routes of the router and DHCP namespaces, "
+                       "updated from the netlink events reported by a "
+                       "single 'ip monitor all-nsid' process. The "
+                       "router and network processing reads it instead of "
+                       "querying the kernel through privsep when the "
+                       "namespace did not change.")),
 ]
 
 
@@ -117,6 +126,23 @@ IPTABLES_OPTS = [
     cfg.BoolOpt('use_random_fully',
                 default=True,
                 help=_("Use random-fully in SNAT masquerade rules.")),
+    cfg.BoolOpt('iptables_cache_state', default=False,
+                help=_("Keep a copy of the iptables state applied in a "
+                       "network namespace and compute the next changes "
+                       "against it, instead of reading the rules from the "
+                       "kernel with iptables-save on every apply. Tables "
+                       "whose rules did not change are skipped. The kernel "
+                       "state is read again if iptables-restore fails or "
+                       "after 'iptables_cache_audit_interval' seconds. Only "
+                       "enable this option if the agent is the only one "
+                       "writing iptables rules in its namespaces. It is "
+                       "ignored when 'debug_iptables_rules' is enabled.")),
+    cfg.IntOpt('iptables_cache_audit_interval', default=300, min=0,
+               help=_("Time, in seconds, after which the cached iptables "
+                      "state is discarded and read again from the kernel. "
+                      "Use 0 to read the kernel state only when "
+                      "iptables-restore fails. Only used when "
+                      "'iptables_cache_state' is enabled.")),
 ]
 
 PROCESS_MONITOR_OPTS = [
@@ -139,6 +165,47 @@ PROCESS_MONITOR_OPTS = [
                       'will be used to stop processes.')),
 ]
 
+RESOURCE_CACHE_OPTS = [
+    cfg.StrOpt('resource_cache_snapshot_path',
+               help=_("File where the agent periodically stores a snapshot "
+                      "of the resources (ports, networks, security groups, "
+                      "etc.) received from the Neutron server. When the "
+                      "agent is restarted, the snapshot is loaded and only "
+                      "the resources whose revision number changed, or that "
+                      "were created since the snapshot, are retrieved again "
+                      "from the server. The file must not "
+                      "be shared with other agents. The snapshot is "
+                      "disabled if this option is not set.")),
+    cfg.IntOpt('resource_cache_snapshot_interval', default=300, min=1,
+               help=_("Interval, in seconds, between two snapshots of the "
+                      "resources cache. Only used when "
+                      "'resource_cache_snapshot_path' is set.")),
+]
+
+RESOURCE_QUEUE_OPTS = [
+    cfg.FloatOpt('resource_update_aging_interval', default=0, min=0,
+                 help=_("Wait time, in seconds, after which a queued router "
+                        "or network update is served before the updates of "
+                        "the next more urgent priority, for instance a "
+                        "periodic resync update before a notification of "
+                        "the Neutron server. The updates of each priority "
+                        "are then served in proportion to the rate they are "
+                        "received at instead of strictly by priority. If "
+                        "set to 0, the updates are served strictly by "
+                        "priority.")),
+    cfg.FloatOpt('resource_update_min_interval', default=0, min=0,
+                 help=_("Minimum time, in seconds, between two processings "
+                        "of the same router or network. The updates "
+                        "received for a resource processed more recently "
+                        "are delayed, so that a resource updated very often "
+                        "can not keep the agent from processing the other "
+                        "ones. If set to 0, the updates are not delayed.")),
+    cfg.BoolOpt('resource_update_coalescing', default=True,
+                help=_("Replace a queued router or network update by a "
+                       "newer update of the same resource with the same "
+                       "action, instead of processing both of them.")),
+]
+
 AVAILABILITY_ZONE_OPTS = [
     # The default AZ name "nova" is selected to match the default
     # AZ name in Nova and Cinder.
@@ -193,6 +260,14 @@ def register_process_monitor_opts(conf):
     conf.register_opts(PROCESS_MONITOR_OPTS, 'AGENT')
 
 
+def register_resource_cache_opts(conf):
+    conf.register_opts(RESOURCE_CACHE_OPTS, 'AGENT')
+
+
+def register_resource_queue_opts(conf):
+    conf.register_opts(RESOURCE_QUEUE_OPTS)
+
+
 def register_availability_zone_opts_helper(conf):
     conf.register_opts(AVAILABILITY_ZONE_OPTS, 'AGENT')
 
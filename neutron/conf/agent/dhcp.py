@@ -81,6 +81,18 @@ DHCP_AGENT_OPTS = [
                       'This will only be invoked if the value is not 0. '
                       'If a network has N updates in X seconds then '
                       'it will reload once and not N times.')),
+    cfg.FloatOpt('reload_allocations_debounce', default=0, min=0,
+                 help=_('Time, in seconds, without new port events after '
+                        'which the DHCP allocations of a network are '
+                        'reloaded. All the events received on a network '
+                        'during this window are coalesced in a single reload. '
+                        'This will only be invoked if the value is not 0 and '
+                        'it takes precedence over "bulk_reload_interval".')),
+    cfg.FloatOpt('reload_allocations_max_delay', default=5, min=0,
+                 help=_('Maximum time, in seconds, a reload of the DHCP '
+                        'allocations of a network can be delayed by '
+                        '"reload_allocations_debounce" when the port events '
+                        'keep arriving.')),
 ]
 
 DHCP_OPTS = [
@@ -137,6 +149,7 @@ def register_agent_dhcp_opts(cfg=cfg.CONF):
     cfg.register_opts(DHCP_OPTS)
     cfg.register_opts(DNSMASQ_OPTS)
     cfg.register_opts(common.DHCP_PROTOCOL_OPTS)
+    common.register_resource_queue_opts(cfg)
     meta_conf.register_meta_conf_opts(meta_conf.METADATA_RATE_LIMITING_OPTS,
                                       cfg=cfg,
                                       group=meta_conf.RATE_LIMITING_GROUP)
@@ -18,6 +18,7 @@ from neutron_lib import constants
 from oslo_config import cfg
 
 from neutron._i18n import _
+from neutron.conf.agent import common
 
 
 OPTS = [
@@ -111,8 +112,19 @@ OPTS = [
                        'set, neutron-keepalive-state-change will use that '
                        'path to write its logs, instead of loggin in '
                        '/var/log/neutron/ha_confs/<router-id>.')),
+    cfg.IntOpt('router_init_workers', default=0, min=0,
+               help=_('Number of threads initializing the routers fetched '
+                      'by the first full synchronization after the L3 '
+                      'agent start (namespace creation, HA port plugging '
+                      'and keepalived state change monitor spawning). They '
+                      'work ahead of the router processing threads, which '
+                      'configure the routing, iptables and keepalived of '
+                      'the already initialized routers. If set to 0, the '
+                      'default, the routers are initialized by the '
+                      'processing threads.')),
 ]
 
 
 def register_l3_agent_config_opts(opts, cfg=cfg.CONF):
     cfg.register_opts(opts)
+    common.register_resource_queue_opts(cfg)
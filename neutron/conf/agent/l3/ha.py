@@ -47,6 +47,18 @@ OPTS = [
                       'as primary, and a primary election will be repeated '
                       'in a round-robin fashion, until one of the routers '
                       'restores the gateway connection.')),
+    cfg.BoolOpt('ha_keepalived_floating_ips',
+                default=True,
+                help=_('Configure the floating IP addresses of the HA '
+                       'routers as keepalived virtual IP addresses. If set '
+                       'to False, the L3 agent adds them on the gateway '
+                       'interface of the primary router itself, which '
+                       'avoids a keepalived reload and VRRP re-evaluation '
+                       'on each floating IP association. On failover, the '
+                       'floating IP addresses are then configured once the '
+                       'L3 agent processed the state change, after the '
+                       'other router addresses, and not while the L3 agent '
+                       'is down.')),
     cfg.BoolOpt('ha_conntrackd_enabled',
                 default=False,
                 help=_("Enable conntrackd to synchronize connection "
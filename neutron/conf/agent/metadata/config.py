@@ -23,6 +23,9 @@ USER_MODE = 'user'
 GROUP_MODE = 'group'
 ALL_MODE = 'all'
 SOCKET_MODES = (DEDUCE_MODE, USER_MODE, GROUP_MODE, ALL_MODE)
+THREADS_SERVER = 'threads'
+ASYNCIO_SERVER = 'asyncio'
+SERVER_TYPES = (THREADS_SERVER, ASYNCIO_SERVER)
 RATE_LIMITING_GROUP = 'metadata_rate_limiting'
 HAPROXY_GROUP = 'metadata_haproxy'
 
@@ -75,7 +78,33 @@ METADATA_PROXY_HANDLER_OPTS = [
                help=_("Client certificate for Nova metadata api server.")),
     cfg.StrOpt('nova_client_priv_key',
                default='',
-               help=_("Private key of client certificate."))
+               help=_("Private key of client certificate.")),
+    cfg.IntOpt('nova_metadata_pool_size',
+               default=32,
+               min=1,
+               help=_("Maximum number of connections to the Nova metadata "
+                      "server kept alive and shared by the metadata proxy "
+                      "requests. When all of them are in use, a request "
+                      "opens a new connection, closed once the request "
+                      "completes.")),
+    cfg.IntOpt('metadata_cache_ttl',
+               default=0,
+               min=0,
+               help=_("Time, in seconds, the instance and project resolved "
+                      "for the source address of a metadata request are "
+                      "cached by the metadata proxy. 0, the default, "
+                      "disables the cache. The OVN metadata agent drops the "
+                      "entries of a port when its Port_Binding changes, but "
+                      "the metadata agent does not track the port updates "
+                      "and deletions: an address reused by another instance "
+                      "can be answered with the metadata of the previous "
+                      "one until its entry expires.")),
+    cfg.IntOpt('metadata_cache_size',
+               default=10000,
+               min=1,
+               help=_("Maximum number of source addresses whose instance "
+                      "lookup is cached by the metadata proxy. The least "
+                      "recently used entries are evicted first.")),
 ]
 
 
@@ -105,7 +134,21 @@ UNIX_DOMAIN_METADATA_PROXY_OPTS = [
                default=4096,
                min=1,
                help=_('Number of backlog requests to configure the '
-                      'metadata server socket with'))
+                      'metadata server socket with')),
+    cfg.StrOpt('metadata_server_type',
+               default=THREADS_SERVER,
+               choices=SERVER_TYPES,
+               help=_("Type of the metadata server listening on the Metadata "
+                      "Proxy UNIX domain socket. 'threads': each request is "
+                      "processed by a worker thread, blocked until the Nova "
+                      "metadata server answers. 'asyncio': the requests are "
+                      "processed by an asyncio event loop, which forwards "
+                      "them to the Nova metadata server concurrently, up to "
+                      "nova_metadata_pool_size connections; only the "
+                      "instance lookups are run in the worker threads. The "
+                      "'asyncio' server always connects directly to the "
+                      "Nova metadata server, ignoring the proxies set in "
+                      "the environment.")),
 ]
 
 
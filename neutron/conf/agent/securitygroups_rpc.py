@@ -42,7 +42,17 @@ security_group_opts = [
         default=[],
         help=_('Comma-separated list of ethertypes to be permitted, in '
                'hexadecimal (starting with "0x"). For example, "0x4008" '
-               'to permit InfiniBand.'))
+               'to permit InfiniBand.')),
+    cfg.BoolOpt(
+        'netlink_conntrack_deletion',
+        default=True,
+        help=_('Delete the conntrack entries of the changed security group '
+               'rules and members with a single netlink dump of the '
+               'conntrack table per IP version, shared by all the pending '
+               'updates, instead of running one "conntrack -D" command per '
+               'port address and rule. It requires the '
+               'libnetfilter_conntrack library; without it, or if the '
+               'netlink deletion fails, the conntrack command is used.')),
 ]
 
 
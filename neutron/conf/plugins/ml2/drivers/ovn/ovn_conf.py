@@ -121,6 +121,29 @@ ovn_opts = [
                          "OVS to OVN.")],
                help=_('The synchronization mode of OVN_Northbound OVSDB '
                       'with Neutron DB.')),
+    cfg.IntOpt('neutron_sync_batch_size',
+               min=0,
+               default=0,
+               help=_('If greater than 0, the synchronization of the '
+                      'OVN_Northbound OVSDB with the Neutron DB reads the '
+                      'Neutron ports, security groups and routers in '
+                      'batches of this size, ordered by ID, and compares '
+                      'each batch with the OVN rows it refers to. The '
+                      'repairs are committed batch by batch, so the Neutron '
+                      'ports are never all loaded at once. The OVN DHCP '
+                      'options and the DNS records of the ports are still '
+                      'loaded in full. If 0, all the resources are loaded '
+                      'at once.')),
+    cfg.IntOpt('neutron_sync_workers',
+               min=1,
+               default=1,
+               help=_('Number of threads used by the synchronization of the '
+                      'OVN_Northbound OVSDB with the Neutron DB. The sync '
+                      'phases which do not depend on each other (for '
+                      'example the ACLs and the routers, once the networks '
+                      'and ports are synchronized) run concurrently, each '
+                      'one with its own OVSDB transactions. If 1, the '
+                      'phases run one after the other.')),
     cfg.StrOpt("ovn_l3_scheduler",
                default=ovn_const.OVN_L3_SCHEDULER_LEASTLOADED,
                choices=[(ovn_const.OVN_L3_SCHEDULER_LEASTLOADED,
@@ -303,6 +326,23 @@ ovn_opts = [
                       'only if "ha_failover_strategy=%s"') %
                ovn_const.OVN_HA_FAILOVER_MANUAL,
                ),
+    cfg.IntOpt('maintenance_fix_workers',
+               min=1,
+               default=4,
+               help=_('Number of threads used by the maintenance task to '
+                      'fix the resources which are inconsistent between the '
+                      'Neutron and the OVN Northbound databases. The '
+                      'resources of the same type are fixed in parallel, '
+                      'the types are fixed one after the other.')),
+    cfg.IntOpt('maintenance_fix_batch_size',
+               min=1,
+               default=50,
+               help=_('Maximum number of inconsistent resources fixed in '
+                      'a single OVN Northbound database transaction by the '
+                      'maintenance task. Only the ports and the security '
+                      'group rules are fixed in batches; if a batch fails, '
+                      'its resources are fixed one by one. Set to 1 to use '
+                      'one transaction per resource.')),
 ]
 
 nb_global_opts = [
@@ -399,6 +439,14 @@ def get_ovn_neutron_sync_mode():
     return cfg.CONF.ovn.neutron_sync_mode
 
 
+def get_ovn_neutron_sync_batch_size():
+    return cfg.CONF.ovn.neutron_sync_batch_size
+
+
+def get_ovn_neutron_sync_workers():
+    return cfg.CONF.ovn.neutron_sync_workers
+
+
 def get_ovn_l3_scheduler():
     return cfg.CONF.ovn.ovn_l3_scheduler
 
@@ -482,3 +530,11 @@ def is_stateless_nat_enabled():
 
 def is_ovs_create_tap():
     return cfg.CONF.ovn.ovs_create_tap
+
+
+def get_maintenance_fix_workers():
+    return cfg.CONF.ovn.maintenance_fix_workers
+
+
+def get_maintenance_fix_batch_size():
+    return cfg.CONF.ovn.maintenance_fix_batch_size
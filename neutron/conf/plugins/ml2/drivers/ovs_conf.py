@@ -187,6 +187,21 @@ ovs_opts = [
                        'If disabled, the flows will be processed in batches '
                        'of ``_constants.AGENT_RES_PROCESSING_STEP`` number of '
                        'OpenFlow rules.')),
+    cfg.IntOpt('openflow_bundle_ports',
+               default=0,
+               min=0,
+               help=_('Number of ports whose OpenFlow rules installed by the '
+                      'OVS agent when they are wired (local switching, ARP '
+                      'and MAC spoofing protection) are sent in the same '
+                      'atomic OpenFlow bundle. The rules of a bundle are '
+                      'pipelined, without waiting for the completion of '
+                      'each one, and are committed before the ports are '
+                      'moved to their local VLAN. The default value, 0, '
+                      'disables the bundles and sends each OpenFlow rule '
+                      'independently. When ``openflow_processed_per_port`` '
+                      'is enabled, this is also the number of ports whose '
+                      'firewall rules are processed in the same transaction '
+                      '(one port if 0).')),
     cfg.BoolOpt('qos_meter_bandwidth', default=False,
                 help="Whether to enable the Openvswitch meter bandwidth "
                      "limit features which will add meter kbps rules "
@@ -208,6 +223,14 @@ agent_opts = [
                default=ovs_constants.DEFAULT_OVSDBMON_RESPAWN,
                help=_("The number of seconds to wait before respawning the "
                       "OVSDB monitor after losing communication with it.")),
+    cfg.IntOpt('port_processing_workers', default=1, min=1,
+               help=_("Number of worker threads used by each rpc_loop "
+                      "iteration to process added and updated ports. The "
+                      "device details are retrieved in parallel chunks and "
+                      "the ports are partitioned by network, so that all "
+                      "the ports of a network are wired by the same worker "
+                      "in order. The default value of 1 processes the ports "
+                      "serially.")),
     cfg.ListOpt('tunnel_types', default=DEFAULT_TUNNEL_TYPES,
                 help=_("Network types supported by the agent "
                        "(gre, vxlan and/or geneve).")),
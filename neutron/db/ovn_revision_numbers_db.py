@@ -208,6 +208,44 @@ def bump_revision(context, resource, resource_type):
               'rev_num': revision_number})
 
 
+@db_api.retry_if_session_inactive()
+def bump_revisions(context, resources, resource_type):
+    """Bump the revision numbers of several resources of the same type.
+
+    The revision numbers are updated with a single UPDATE statement. As in
+    bump_revision, a revision number is never decreased. The resources
+    without revision row are bumped one by one.
+    """
+    if not resources:
+        return
+
+    model = ovn_models.OVNRevisionNumbers
+    revision_numbers = {
+        resource['id']: ovn_utils.get_revision_number(resource, resource_type)
+        for resource in resources}
+    with db_api.CONTEXT_WRITER.using(context):
+        existing = {row.resource_uuid for row in context.session.query(
+            model.resource_uuid).filter(
+                model.resource_uuid.in_(revision_numbers),
+                model.resource_type == resource_type)}
+        if existing:
+            revision_number = sa.case(revision_numbers,
+                                      value=model.resource_uuid)
+            context.session.query(model).filter(
+                model.resource_uuid.in_(existing),
+                model.resource_type == resource_type,
+                model.revision_number < revision_number).update(
+                    {model.revision_number: revision_number},
+                    synchronize_session='fetch')
+    LOG.info('Successfully bumped revision number for %(count)d resources '
+             '(type: %(res_type)s)', {'count': len(existing),
+                                      'res_type': resource_type})
+
+    for resource in resources:
+        if resource['id'] not in existing:
+            bump_revision(context, resource, resource_type)
+
+
 def get_inconsistent_resources(context):
     """Get a list of inconsistent resources.
 
@@ -237,7 +237,8 @@ def list_dhcp_agent_opts():
          itertools.chain(
              neutron.conf.agent.dhcp.DHCP_AGENT_OPTS,
              neutron.conf.agent.dhcp.DHCP_OPTS,
-             neutron.conf.agent.dhcp.DNSMASQ_OPTS)
+             neutron.conf.agent.dhcp.DNSMASQ_OPTS,
+             neutron.conf.agent.common.RESOURCE_QUEUE_OPTS)
          ),
         (meta_conf.RATE_LIMITING_GROUP,
          meta_conf.METADATA_RATE_LIMITING_OPTS),
@@ -253,7 +254,8 @@ def list_l3_agent_opts():
              neutron.conf.agent.l3.config.OPTS,
              neutron.conf.service.SERVICE_OPTS,
              neutron.conf.agent.l3.ha.OPTS,
-             neutron.conf.agent.common.RA_OPTS)
+             neutron.conf.agent.common.RA_OPTS,
+             neutron.conf.agent.common.RESOURCE_QUEUE_OPTS)
          ),
         ('agent',
          neutron.conf.agent.agent_extensions_manager.AGENT_EXT_MANAGER_OPTS),
@@ -336,7 +338,8 @@ def list_ovs_opts():
          itertools.chain(
              neutron.conf.plugins.ml2.drivers.ovs_conf.agent_opts,
              neutron.conf.agent.agent_extensions_manager.
-             AGENT_EXT_MANAGER_OPTS)
+             AGENT_EXT_MANAGER_OPTS,
+             neutron.conf.agent.common.RESOURCE_CACHE_OPTS)
          ),
         ('securitygroup',
          neutron.conf.agent.securitygroups_rpc.security_group_opts),
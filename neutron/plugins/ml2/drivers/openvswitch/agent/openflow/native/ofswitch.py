@@ -14,6 +14,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import contextlib
 import functools
 import queue
 import secrets
@@ -59,6 +60,8 @@ class OpenFlowSwitchMixin:
     def __init__(self, *args, **kwargs):
         self._app = kwargs.pop('os_ken_app')
         self.active_bundles = set()
+        # Bundle opened by "bundle_flows", per thread.
+        self._local_bundle = threading.local()
         super().__init__(*args, **kwargs)
 
     def _get_dp_by_dpid(self, dpid_int):
@@ -87,8 +90,38 @@ class OpenFlowSwitchMixin:
     def _send_msg_retry(app, msg, reply_cls, reply_multi):
         return ofctl_api.send_msg(app, msg, reply_cls, reply_multi)
 
+    def _send_bundle_add_msg(self, msg, active_bundle):
+        """Send a message to a bundle without waiting for its completion.
+
+        There is no barrier after each message: the errors are reported when
+        the bundle is committed, as Open vSwitch discards a bundle if any
+        message could not be added to it.
+        """
+        (dp, _ofp, ofpp) = self._get_dp()
+        bundle_msg = ofpp.ONFBundleAddMsg(
+            dp, active_bundle['id'], active_bundle['bundle_flags'], msg, [])
+        if not dp.send_msg(bundle_msg):
+            m = _("ofctl request %(request)s could not be sent to the "
+                  "bundle 0x%(bundle_id)x") % {
+                "request": msg, "bundle_id": active_bundle['id']}
+            LOG.error(m)
+            # NOTE(yamamoto): use RuntimeError for compat with ovs_lib
+            raise RuntimeError(m)
+        LOG.debug("ofctl request %(request)s added to bundle 0x%(id)x",
+                  {"request": msg, "id": active_bundle['id']})
+
     def _send_msg(self, msg, reply_cls=None, reply_multi=False,
                   active_bundle=None):
+        local_bundle = getattr(self._local_bundle, 'active_bundle', None)
+        if (active_bundle is None and reply_cls is None and
+                local_bundle is not None and
+                isinstance(msg, msg.datapath.ofproto_parser.OFPFlowMod)):
+            # Only the flow modifications are added to the bundle opened
+            # with "bundle_flows".
+            active_bundle = local_bundle
+        if active_bundle is not None and active_bundle.get('pipelined'):
+            return self._send_bundle_add_msg(msg, active_bundle)
+
         timeout_sec = cfg.CONF.OVS.of_request_timeout
         qresult = queue.Queue()
 
@@ -276,15 +309,37 @@ class OpenFlowSwitchMixin:
                                   instructions=instructions,
                                   **match_kwargs)
 
-    def bundled(self, atomic=False, ordered=False):
-        return BundledOpenFlowBridge(self, atomic, ordered)
+    def bundled(self, atomic=False, ordered=False, pipelined=False):
+        return BundledOpenFlowBridge(self, atomic, ordered, pipelined)
+
+    @contextlib.contextmanager
+    def bundle_flows(self):
+        """Install all the flows of this thread in an atomic bundle.
+
+        Every flow modification sent by the calling thread, using any method
+        of the bridge, is added to the same atomic and ordered bundle, which
+        is committed when the context exits; the bundle is discarded if an
+        exception is raised. The flows are pipelined, there is no barrier
+        per flow. A nested call uses the bundle already opened.
+        """
+        if getattr(self._local_bundle, 'active_bundle', None) is not None:
+            yield self
+            return
+        with self.bundled(atomic=True, ordered=True,
+                          pipelined=True) as bundle:
+            self._local_bundle.active_bundle = bundle.bundle_info
+            try:
+                yield self
+            finally:
+                self._local_bundle.active_bundle = None
 
 
 class BundledOpenFlowBridge:
-    def __init__(self, br, atomic, ordered):
+    def __init__(self, br, atomic, ordered, pipelined=False):
         self.br = br
         self.active_bundle = None
         self.bundle_flags = 0
+        self.pipelined = pipelined
         if not atomic and not ordered:
             return
         (dp, ofp, ofpp) = self.br._get_dp()
@@ -298,11 +353,17 @@ class BundledOpenFlowBridge:
             under = getattr(self.br, name)
             if self.active_bundle is None:
                 return under
-            return functools.partial(under, active_bundle=dict(
-                id=self.active_bundle, bundle_flags=self.bundle_flags))
+            return functools.partial(under, active_bundle=self.bundle_info)
         raise AttributeError(_("Only install_* or uninstall_* methods "
                                "can be used"))
 
+    @property
+    def bundle_info(self):
+        if self.active_bundle is None:
+            return None
+        return dict(id=self.active_bundle, bundle_flags=self.bundle_flags,
+                    pipelined=self.pipelined)
+
     def __enter__(self):
         if self.active_bundle is not None:
             raise ActiveBundleRunning(bundle_id=self.active_bundle)
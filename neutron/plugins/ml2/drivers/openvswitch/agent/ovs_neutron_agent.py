@@ -15,6 +15,8 @@
 
 import base64
 import collections
+from concurrent import futures
+import contextlib
 import functools
 import hashlib
 import signal
@@ -284,6 +286,17 @@ class OVSNeutronAgent(l2population_rpc.L2populationRpcCallBackTunnelMixin,
         self.ovsdb_monitor_respawn_interval = (
             agent_conf.ovsdb_monitor_respawn_interval or
             ovs_const.DEFAULT_OVSDBMON_RESPAWN)
+        self.port_processing_workers = agent_conf.port_processing_workers
+        self._port_processing_pool = None
+        if self.port_processing_workers > 1:
+            self._port_processing_pool = futures.ThreadPoolExecutor(
+                max_workers=self.port_processing_workers,
+                thread_name_prefix='ovs-agent-ports')
+        # Serializes the local VLAN allocation and the agent extensions calls
+        # done by the port processing workers.
+        self._port_processing_lock = threading.RLock()
+        # Timing statistics of the last process_network_ports call.
+        self.port_processing_stats = {}
         self.local_ip = ovs_conf.local_ip
         self.tunnel_count = 0
         self.vxlan_udp_port = agent_conf.vxlan_udp_port
@@ -1239,20 +1252,21 @@ class OVSNeutronAgent(l2population_rpc.L2populationRpcCallBackTunnelMixin,
                                     restart or recreated physical bridges
                                     and requires to do local vlan provisioning
         '''
-        try:
-            lvm = self.vlan_manager.get(net_uuid, segmentation_id)
-        except vlanmanager.MappingNotFound:
-            lvm = None
-        if lvm is None or provisioning_needed:
-            self.provision_local_vlan(net_uuid, network_type,
-                                      physical_network, segmentation_id)
-            lvm = self.vlan_manager.get(net_uuid, segmentation_id)
+        with self._port_processing_lock:
+            try:
+                lvm = self.vlan_manager.get(net_uuid, segmentation_id)
+            except vlanmanager.MappingNotFound:
+                lvm = None
+            if lvm is None or provisioning_needed:
+                self.provision_local_vlan(net_uuid, network_type,
+                                          physical_network, segmentation_id)
+                lvm = self.vlan_manager.get(net_uuid, segmentation_id)
 
-        lvm.vif_ports[port.vif_id] = port
+            lvm.vif_ports[port.vif_id] = port
 
-        self.dvr_agent.bind_port_to_dvr(port, lvm,
-                                        fixed_ips,
-                                        device_owner)
+            self.dvr_agent.bind_port_to_dvr(port, lvm,
+                                            fixed_ips,
+                                            device_owner)
         port_other_config = self.int_br.db_get_val("Port", port.port_name,
                                                    "other_config")
         if port_other_config is None:
@@ -1285,25 +1299,21 @@ class OVSNeutronAgent(l2population_rpc.L2populationRpcCallBackTunnelMixin,
         port_info = self.int_br.get_ports_attributes(
             "Port", columns=["name", "tag"], ports=port_names, if_exists=True)
         tags_by_name = {x['name']: x['tag'] for x in port_info}
-        for port_detail in need_binding_ports:
-            try:
-                lvm = self.vlan_manager.get(port_detail['network_id'],
-                                            port_detail['segmentation_id'])
-            except vlanmanager.MappingNotFound:
-                # network for port was deleted. skip this port since it
-                # will need to be handled as a DEAD port in the next scan
-                continue
+        ports_to_bind = self._get_ports_to_bind(need_binding_ports,
+                                                tags_by_name)
+        if self.prevent_arp_spoofing:
+            # The flows are committed before the ports are moved to their
+            # local VLAN.
+            for ports in self._get_port_flows_bundles(ports_to_bind):
+                with self._bundle_port_flows():
+                    for port_detail, _lvm, _cur_tag in ports:
+                        self.setup_arp_spoofing_protection(
+                            self.int_br, port_detail['vif_port'],
+                            port_detail)
+
+        for port_detail, lvm, cur_tag in ports_to_bind:
             port = port_detail['vif_port']
             device = port_detail['device']
-            # Do not bind a port if it's already bound
-            cur_tag = tags_by_name.get(port.port_name)
-            if cur_tag is None:
-                LOG.info("During port binding, port %s was deleted "
-                         "concurrently, skipping it", port.port_name)
-                continue
-            if self.prevent_arp_spoofing:
-                self.setup_arp_spoofing_protection(self.int_br,
-                                                   port, port_detail)
             # Apply port hints
             try:
                 to_set = self.sanitize_ovs_iface_other_config(
@@ -1378,6 +1388,40 @@ class OVSNeutronAgent(l2population_rpc.L2populationRpcCallBackTunnelMixin,
                  {'up': devices_up, 'down': devices_down})
         return set(failed_devices)
 
+    def _get_port_flows_bundles(self, ports):
+        """Split the ports in groups sharing the same OpenFlow bundle."""
+        bundle_size = self.conf.OVS.openflow_bundle_ports or len(ports) or 1
+        for idx in range(0, len(ports), bundle_size):
+            yield ports[idx:idx + bundle_size]
+
+    def _bundle_port_flows(self):
+        if self.conf.OVS.openflow_bundle_ports:
+            return self.int_br.bundle_flows()
+        return contextlib.nullcontext()
+
+    def _get_ports_to_bind(self, need_binding_ports, tags_by_name):
+        """Return the (port details, local VLAN mapping, current tag) tuples
+        of the ports that can be bound.
+        """
+        ports_to_bind = []
+        for port_detail in need_binding_ports:
+            try:
+                lvm = self.vlan_manager.get(port_detail['network_id'],
+                                            port_detail['segmentation_id'])
+            except vlanmanager.MappingNotFound:
+                # network for port was deleted. skip this port since it
+                # will need to be handled as a DEAD port in the next scan
+                continue
+            port = port_detail['vif_port']
+            # Do not bind a port if it's already bound
+            cur_tag = tags_by_name.get(port.port_name)
+            if cur_tag is None:
+                LOG.info("During port binding, port %s was deleted "
+                         "concurrently, skipping it", port.port_name)
+                continue
+            ports_to_bind.append((port_detail, lvm, cur_tag))
+        return ports_to_bind
+
     @staticmethod
     def sanitize_ovs_iface_other_config(other_config):
         '''Take an other_config dict meant for an ovs interface.
@@ -2080,87 +2124,168 @@ class OVSNeutronAgent(l2population_rpc.L2populationRpcCallBackTunnelMixin,
 
     def treat_devices_added_or_updated(self, devices, provisioning_needed,
                                        re_added):
-        skipped_devices = []
-        need_binding_devices = []
-        binding_no_activated_devices = set()
-        migrating_devices = set()
         agent_restarted = self.iter_num == 0
-        devices_details_list = (
-            self.plugin_rpc.get_devices_details_list_and_failed_devices(
-                self.context,
-                devices,
-                self.agent_id,
-                self.conf.host,
-                agent_restarted))
+        start = time.time()
+        devices_details_list = self._get_devices_details_list(
+            devices, agent_restarted)
         failed_devices = set(devices_details_list.get('failed_devices'))
+        self._record_port_processing_time('devices_details', start)
 
+        start = time.time()
         devices = devices_details_list.get('devices')
         vif_by_id = self.int_br.get_vifs_by_ids(
             [vif['device'] for vif in devices])
+        partitions = self._partition_devices_by_network(devices)
+        if self._port_processing_pool and len(partitions) > 1:
+            fs = [self._port_processing_pool.submit(
+                      self._treat_devices_partition, partition, vif_by_id,
+                      provisioning_needed, re_added)
+                  for partition in partitions]
+            futures.wait(fs)
+            results = [f.result() for f in fs]
+        else:
+            results = [self._treat_devices_partition(
+                devices, vif_by_id, provisioning_needed, re_added)]
+        self.port_processing_stats['devices_partitions'] = len(partitions)
+        self._record_port_processing_time('devices_wiring', start)
+
+        skipped_devices = []
+        need_binding_devices = []
+        binding_no_activated_devices = set()
         devices_not_in_datapath = set()
+        migrating_devices = set()
+        for result in results:
+            skipped_devices += result['skipped']
+            need_binding_devices += result['need_binding']
+            binding_no_activated_devices |= result['no_activated_binding']
+            devices_not_in_datapath |= result['not_in_datapath']
+            migrating_devices |= result['migrating']
+        if len(results) > 1:
+            # Bind the devices in the order returned by the server, as done
+            # when the devices are processed serially.
+            devices_order = {details['device']: idx
+                             for idx, details in enumerate(devices)}
+            need_binding_devices.sort(
+                key=lambda details: devices_order[details['device']])
+        return (skipped_devices, binding_no_activated_devices,
+                need_binding_devices, failed_devices, devices_not_in_datapath,
+                migrating_devices)
+
+    def _get_devices_details_list(self, devices, agent_restarted):
+        if not self._port_processing_pool or len(devices) < 2:
+            return self.plugin_rpc.get_devices_details_list_and_failed_devices(
+                self.context, devices, self.agent_id, self.conf.host,
+                agent_restarted)
+
+        # The details of each chunk of devices are retrieved in parallel.
+        devices = list(devices)
+        chunk_size = -(-len(devices) // self.port_processing_workers)
+        fs = [self._port_processing_pool.submit(
+                  self.plugin_rpc.get_devices_details_list_and_failed_devices,
+                  self.context, devices[idx:idx + chunk_size], self.agent_id,
+                  self.conf.host, agent_restarted)
+              for idx in range(0, len(devices), chunk_size)]
+        futures.wait(fs)
+        devices_details_list = {'devices': [], 'failed_devices': []}
+        for f in fs:
+            chunk_details = f.result()
+            devices_details_list['devices'] += chunk_details.get('devices')
+            devices_details_list['failed_devices'] += chunk_details.get(
+                'failed_devices')
+        return devices_details_list
+
+    @staticmethod
+    def _partition_devices_by_network(devices):
+        """Group the devices details by network, keeping their order
+
+        All the devices of a network share the same local VLAN; they are
+        processed serially by the same worker.
+        """
+        partitions = collections.defaultdict(list)
         for details in devices:
-            device = details['device']
-            LOG.debug("Processing port: %s", device)
-            port = vif_by_id.get(device)
-            if not port:
-                # The port disappeared and cannot be processed
-                LOG.info("Port %s was not found on the integration bridge "
-                         "and will therefore not be processed", device)
-                self.ext_manager.delete_port(self.context, {'port_id': device})
-                skipped_devices.append(device)
-                continue
+            partitions[details.get('network_id')].append(details)
+        return list(partitions.values())
+
+    def _treat_devices_partition(self, devices, vif_by_id,
+                                 provisioning_needed, re_added):
+        result = {'skipped': [],
+                  'need_binding': [],
+                  'no_activated_binding': set(),
+                  'not_in_datapath': set(),
+                  'migrating': set()}
+        # The local switching flows of the ports are committed in the same
+        # OpenFlow bundles, before the ports are bound.
+        for devices_bundle in self._get_port_flows_bundles(devices):
+            with self._bundle_port_flows():
+                for details in devices_bundle:
+                    self._treat_device(details, vif_by_id,
+                                       provisioning_needed, re_added, result)
+        return result
+
+    def _treat_device(self, details, vif_by_id, provisioning_needed,
+                      re_added, result):
+        device = details['device']
+        LOG.debug("Processing port: %s", device)
+        port = vif_by_id.get(device)
+        if not port:
+            # The port disappeared and cannot be processed
+            LOG.info("Port %s was not found on the integration bridge "
+                     "and will therefore not be processed", device)
+            with self._port_processing_lock:
+                self.ext_manager.delete_port(self.context,
+                                             {'port_id': device})
+            result['skipped'].append(device)
+            return
 
-            if not port.ofport or port.ofport == ovs_lib.INVALID_OFPORT:
-                devices_not_in_datapath.add(device)
-
-            migrating_to = details.get('migrating_to')
-            if migrating_to and migrating_to != self.host:
-                LOG.info('Port %(device)s is being migrated to host %(host)s.',
-                         {'device': device, 'host': migrating_to})
-                migrating_devices.add(device)
-
-            if 'port_id' in details:
-                details['vif_port'] = port
-                details['local_vlan'] = self._get_net_local_vlan_or_none(
-                    details['network_id'], details['segmentation_id'])
-                LOG.info("Port %(device)s updated. Details: %(details)s",
-                         {'device': device, 'details': details})
-                need_binding = self.treat_vif_port(port, details['port_id'],
-                                                   details['network_id'],
-                                                   details['network_type'],
-                                                   details['physical_network'],
-                                                   details['segmentation_id'],
-                                                   details['admin_state_up'],
-                                                   details['fixed_ips'],
-                                                   details['device_owner'],
-                                                   provisioning_needed)
-                if need_binding:
-                    need_binding_devices.append(details)
+        if not port.ofport or port.ofport == ovs_lib.INVALID_OFPORT:
+            result['not_in_datapath'].add(device)
+
+        migrating_to = details.get('migrating_to')
+        if migrating_to and migrating_to != self.host:
+            LOG.info('Port %(device)s is being migrated to host %(host)s.',
+                     {'device': device, 'host': migrating_to})
+            result['migrating'].add(device)
+
+        if 'port_id' in details:
+            details['vif_port'] = port
+            details['local_vlan'] = self._get_net_local_vlan_or_none(
+                details['network_id'], details['segmentation_id'])
+            LOG.info("Port %(device)s updated. Details: %(details)s",
+                     {'device': device, 'details': details})
+            need_binding = self.treat_vif_port(port, details['port_id'],
+                                               details['network_id'],
+                                               details['network_type'],
+                                               details['physical_network'],
+                                               details['segmentation_id'],
+                                               details['admin_state_up'],
+                                               details['fixed_ips'],
+                                               details['device_owner'],
+                                               provisioning_needed)
+            if need_binding:
+                result['need_binding'].append(details)
+            with self._port_processing_lock:
                 self._update_port_network(details['port_id'],
                                           details['network_id'],
                                           details['segmentation_id'])
                 if details['device'] in re_added:
                     self.ext_manager.delete_port(self.context, details)
-                if device not in devices_not_in_datapath:
+                if device not in result['not_in_datapath']:
                     self.ext_manager.handle_port(self.context, details)
 
+        else:
+            if n_const.NO_ACTIVE_BINDING in details:
+                # Port was added to the bridge, but its binding in this
+                # agent hasn't been activated yet. It will be treated as
+                # added when binding is activated
+                result['no_activated_binding'].add(device)
+                LOG.debug("Device %s has no active binding in host",
+                          device)
             else:
-                if n_const.NO_ACTIVE_BINDING in details:
-                    # Port was added to the bridge, but its binding in this
-                    # agent hasn't been activated yet. It will be treated as
-                    # added when binding is activated
-                    binding_no_activated_devices.add(device)
-                    LOG.debug("Device %s has no active binding in host",
-                              device)
-                else:
-                    LOG.warning(
-                        "Device %s not defined on plugin or binding failed",
-                        device)
-                if (port and port.ofport != -1):
-                    self.port_dead(port)
-        return (skipped_devices, binding_no_activated_devices,
-                need_binding_devices, failed_devices, devices_not_in_datapath,
-                migrating_devices)
+                LOG.warning(
+                    "Device %s not defined on plugin or binding failed",
+                    device)
+            if (port and port.ofport != -1):
+                self.port_dead(port)
 
     def _update_port_network(self, port_id, network_id, segmentation_id):
         # TODO(sahid): This clean_network_ports should accept a net-id/seg_id.
@@ -2261,6 +2386,9 @@ class OVSNeutronAgent(l2population_rpc.L2populationRpcCallBackTunnelMixin,
         binding_no_activated_devices = set()
         devices_not_in_datapath = set()
         migrating_devices = set()
+        self.port_processing_stats = {
+            'iter_num': self.iter_num,
+            'workers': self.port_processing_workers}
         start = time.time()
         if re_added:
             # NOTE(slaweq): to make sure that devices which were deleted and
@@ -2313,22 +2441,27 @@ class OVSNeutronAgent(l2population_rpc.L2populationRpcCallBackTunnelMixin,
         # unnecessarily, (eg: when there are no IP address changes)
         added_ports = (port_info.get('added', set()) - skipped_devices -
                        binding_no_activated_devices - migrating_devices)
+        filters_start = time.time()
         self.process_install_ports_egress_flows(need_binding_devices)
         added_to_datapath = added_ports - devices_not_in_datapath
         self.sg_agent.setup_port_filters(
             added_to_datapath,
             port_info.get('updated', set()) - binding_no_activated_devices)
+        self._record_port_processing_time('port_filters', filters_start)
 
         LOG.info("process_network_ports - iteration:%(iter_num)d - "
                  "agent port security group processed in %(elapsed).3f",
                  {'iter_num': self.iter_num,
                   'elapsed': time.time() - start})
+        bind_start = time.time()
         failed_devices['added'] |= self._bind_devices(need_binding_devices)
+        self._record_port_processing_time('bind_devices', bind_start)
 
         if 'removed' in port_info and port_info['removed']:
             start = time.time()
             failed_devices['removed'] |= self.treat_devices_removed(
                 port_info['removed'])
+            self._record_port_processing_time('devices_removed', start)
             LOG.info("process_network_ports - iteration:%(iter_num)d - "
                      "treat_devices_removed completed in %(elapsed).3f",
                      {'iter_num': self.iter_num,
@@ -2340,8 +2473,15 @@ class OVSNeutronAgent(l2population_rpc.L2populationRpcCallBackTunnelMixin,
                      "treat_devices_skipped completed in %(elapsed).3f",
                      {'iter_num': self.iter_num,
                       'elapsed': time.time() - start})
+        LOG.info("process_network_ports - iteration:%(iter_num)d - "
+                 "timing statistics: %(stats)s",
+                 {'iter_num': self.iter_num,
+                  'stats': self.port_processing_stats})
         return failed_devices
 
+    def _record_port_processing_time(self, stage, start):
+        self.port_processing_stats[stage] = round(time.time() - start, 3)
+
     @property
     def direct_for_non_openflow_firewall(self):
         return ((self.sg_agent.noopfirewall_or_firewall_disabled or
@@ -2974,6 +3114,8 @@ class OVSNeutronAgent(l2population_rpc.L2populationRpcCallBackTunnelMixin,
                 bridge_names=bridge_names,
                 ovs=self.ovs) as pm:
             self.rpc_loop(polling_manager=pm)
+        if self._port_processing_pool:
+            self._port_processing_pool.shutdown()
         if self.plugin_rpc:
             self.plugin_rpc.stop()
 
@@ -970,6 +970,32 @@ class OVNMechanismDriver(api.MechanismDriver):
         self._ovn_client.create_port(context.plugin_context, port)
         self._notify_dhcp_updated(context.plugin_context, port['id'])
 
+    def create_port_bulk_postcommit(self, contexts):
+        """Create several ports.
+
+        :param contexts: list of PortContext instances describing the ports.
+
+        Called by Ml2Plugin.create_port_bulk after the transaction completes.
+        The ports are created in a single OVN NB transaction. Raising an
+        exception will result in create_port_postcommit being called for
+        each port, so only a failure of the OVN NB transaction is raised:
+        once it is committed, the logical switch ports must not be created
+        again.
+        """
+        ports = []
+        for context in contexts:
+            port = copy.deepcopy(context.current)
+            port['network'] = context.network.current
+            ports.append(port)
+        plugin_context = contexts[0].plugin_context
+        self._ovn_client.create_ports(plugin_context, ports)
+        for port in ports:
+            try:
+                self._notify_dhcp_updated(plugin_context, port['id'])
+            except Exception:
+                LOG.exception("Unable to complete the DHCP provisioning of "
+                              "the port %s", port['id'])
+
     def update_port_precommit(self, context):
         """Update resources of a port.
 
@@ -206,6 +206,16 @@ class OVNClientQosExtension:
 
         return ovn_qos_rule
 
+    def policy_has_ovn_qos_rules(self, context, policy_id):
+        """Return if the QoS policy rules are applied by OVN
+
+        The minimum bandwidth rules alone are not considered: they are only
+        applied, in the LSP.options, to the ports of physical networks.
+        """
+        qos_rules = self._qos_rules(context.elevated(), policy_id)
+        return any(rule_type != qos_consts.RULE_TYPE_MINIMUM_BANDWIDTH
+                   for rules in qos_rules.values() for rule_type in rules)
+
     def get_lsp_options_qos(self, port_id):
         """Return the current LSP.options QoS fields, passing the port ID"""
         qos_options = {}
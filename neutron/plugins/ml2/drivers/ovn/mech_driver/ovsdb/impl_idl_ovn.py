@@ -20,6 +20,7 @@ from neutron_lib.utils import helpers
 from oslo_log import log
 from oslo_utils import strutils
 from oslo_utils import uuidutils
+from ovs.db import custom_index
 from ovs import socket_util
 from ovs import stream
 from ovsdbapp.backend import ovs_idl
@@ -116,16 +117,119 @@ stream.Stream.register_method("tcp", TCPStream)
 stream.Stream.register_method("ssl", SSLStream)
 
 
+_MIN_UUID = uuid.UUID(int=0)
+_MAX_UUID = uuid.UUID(int=(1 << 128) - 1)
+
+
+def _index_name(column, key=None):
+    # Prefixed so that it never matches an index created by ovsdbapp, which
+    # would try to use it in db_find_rows() with its own search entries
+    if key is None:
+        return 'neutron:%s' % column
+    return 'neutron:%s:%s' % (column, key)
+
+
+def _index_value(value):
+    # Referenced rows are compared by UUID and optional or set columns, which
+    # are lists, as tuples
+    if isinstance(value, (list, tuple, set)):
+        return tuple(sorted(_index_value(v) for v in value))
+    return getattr(value, 'uuid', value)
+
+
+class _RowIndex(custom_index.MultiColumnIndex):
+    """Index of the rows of a table by a column (or map key) value
+
+    The entries are (value, row UUID) tuples, computed once when a row is
+    added and compared natively; the entries of a MultiColumnIndex are
+    compared calling the key function of each column, which makes loading a
+    big table much slower. The row UUID makes every entry unique; removing
+    an entry from an index with many equal values would be O(n) otherwise.
+    """
+
+    def __init__(self, name, column, key=None):
+        self.column = column
+        self.key = key
+        super().__init__(name)
+
+    def index_entry_from_row(self, row):
+        value = getattr(row, self.column)
+        if self.key is None:
+            return _index_value(value), row.uuid
+        return value.get(self.key, ''), row.uuid
+
+    def add(self, row):
+        try:
+            entry = self.index_entry_from_row(row)
+        except AttributeError:
+            # This is a new row without the column set yet, it is added
+            # again once set
+            return
+        self.values.add(entry)
+
+    def clear(self):
+        self.values = custom_index.sortedcontainers.SortedList()
+
+    def lookup(self, rows, value):
+        if self.key is None:
+            value = _index_value(value)
+        entries = list(self.values.irange((value, _MIN_UUID),
+                                          (value, _MAX_UUID)))
+        # The rows could be deleted by the IDL thread in the meantime
+        return [row for row in (rows.get(row_uuid) for __, row_uuid in entries)
+                if row is not None]
+
+
 # This version of Backend doesn't use a class variable for ovsdb_connection
 # and therefor allows networking-ovn to manage connection scope on its own
 class Backend(ovs_idl.Backend):
     lookup_table = {}
     ovsdb_connection = None
+    # Additional indexes, created with the IDL, for the (table, column, key)
+    # searched by the helpers below. "key" is the key of a map column, like
+    # "external_ids", or None to index the column value.
+    indexed_columns = ()
 
     def __init__(self, connection):
         self.ovsdb_connection = connection
         super().__init__(connection)
 
+    def autocreate_indices(self):
+        super().autocreate_indices()
+        for table, column, key in self.indexed_columns:
+            if (table not in self.idl.tables or
+                    column not in self.idl.tables[table].columns):
+                continue
+            name = _index_name(column, key)
+            rows = self.idl.tables[table].rows
+            if name in rows.indexes:
+                LOG.debug('Index %s.%s already exists', table, name)
+                continue
+            rows.indexes[name] = _RowIndex(name, column, key)
+
+    def _index_lookup(self, table, column, value, key=None):
+        """Return the rows of a table with a column (or map key) value
+
+        The index registered in "indexed_columns" is used; if it does not
+        exist, because the table was not monitored or the connection was
+        already started, the whole table is scanned.
+        """
+        rows = self.tables[table].rows
+        idx = rows.indexes.get(_index_name(column, key))
+        if idx is None:
+            if key is None:
+                value = _index_value(value)
+                return [row for row in list(rows.values()) if
+                        _index_value(getattr(row, column, None)) == value]
+            return [row for row in list(rows.values()) if
+                    getattr(row, column, {}).get(key, '') == value]
+        return idx.lookup(rows, value)
+
+    def _row_to_dict(self, table, row):
+        """Return a row as a dictionary, same as the db_find() results"""
+        return {column: idlutils.get_column_value(row, column)
+                for column in list(self.tables[table].columns) + ['_uuid']}
+
     def start_connection(self, connection):
         try:
             self.ovsdb_connection.start()
@@ -237,6 +341,16 @@ def get_ovn_idls(driver, trigger):
 
 
 class OvsdbNbOvnIdl(nb_impl_idl.OvnNbApiIdlImpl, Backend):
+    indexed_columns = (
+        ('DHCP_Options', 'external_ids', 'subnet_id'),
+        ('Gateway_Chassis', 'chassis_name', None),
+        ('Load_Balancer', 'external_ids', ovn_const.OVN_FIP_EXT_ID_KEY),
+        ('Load_Balancer', 'external_ids',
+         ovn_const.OVN_ROUTER_NAME_EXT_ID_KEY),
+        ('Logical_Router_Port', 'ha_chassis_group', None),
+        ('NAT', 'external_ids', ovn_const.OVN_FIP_EXT_ID_KEY),
+    )
+
     @n_utils.classproperty
     def connection_string(cls):
         return cfg.get_ovn_nb_connection()
@@ -315,8 +429,15 @@ class OvsdbNbOvnIdl(nb_impl_idl.OvnNbApiIdlImpl, Backend):
         raise RuntimeError(_("Currently only supports delete by lport-name"))
 
     def get_all_logical_switches_with_ports(self):
-        result = []
-        for lswitch in self._tables['Logical_Switch'].rows.values():
+        return list(self.iter_logical_switches_with_ports())
+
+    def iter_logical_switches_with_ports(self):
+        """Yield the logical Switches one at a time
+
+        Same as get_all_logical_switches_with_ports, without building the
+        list of all the logical Switches.
+        """
+        for lswitch in list(self._tables['Logical_Switch'].rows.values()):
             if ovn_const.OVN_NETWORK_NAME_EXT_ID_KEY not in (
                     lswitch.external_ids):
                 continue
@@ -329,10 +450,9 @@ class OvsdbNbOvnIdl(nb_impl_idl.OvnNbApiIdlImpl, Backend):
                 elif lport.name.startswith(
                         ovn_const.OVN_PROVNET_PORT_NAME_PREFIX):
                     provnet_ports.append(lport.name)
-            result.append({'name': lswitch.name,
-                           'ports': ports,
-                           'provnet_ports': provnet_ports})
-        return result
+            yield {'name': lswitch.name,
+                   'ports': ports,
+                   'provnet_ports': provnet_ports}
 
     def get_all_logical_routers_with_rports(self):
         """Get logical Router ports associated with all logical Routers
@@ -345,52 +465,81 @@ class OvsdbNbOvnIdl(nb_impl_idl.OvnNbApiIdlImpl, Backend):
                  - 'snats': list of snats dict
                  - 'dnat_and_snats': list of dnat_and_snats dict
         """
-        result = []
-        for lrouter in self._tables['Logical_Router'].rows.values():
+        return list(self.iter_logical_routers_with_rports())
+
+    def iter_logical_routers_with_rports(self):
+        """Yield the logical Routers one at a time
+
+        Same as get_all_logical_routers_with_rports, without building the
+        list of all the logical Routers.
+        """
+        for lrouter in list(self._tables['Logical_Router'].rows.values()):
             if ovn_const.OVN_ROUTER_NAME_EXT_ID_KEY not in (
                     lrouter.external_ids):
                 continue
-            lrports = {
-                lrport.name.replace('lrp-', ''): lrport.networks
-                for lrport in getattr(lrouter, 'ports', [])
-                if ovn_const.OVN_ROUTER_NAME_EXT_ID_KEY in lrport.external_ids
-            }
-            sroutes = [
-                {
-                    'destination': route.ip_prefix,
-                    'nexthop': route.nexthop,
-                    'external_ids': route.external_ids
-                }
-                for route in getattr(lrouter, 'static_routes', [])
-                if any(eid.startswith(constants.DEVICE_OWNER_NEUTRON_PREFIX)
-                       for eid in route.external_ids)
-            ]
-
-            dnat_and_snats = []
-            snat = []
-            for nat in getattr(lrouter, 'nat', []):
-                columns = {'logical_ip': nat.logical_ip,
-                           'external_ip': nat.external_ip,
-                           'type': nat.type}
-                if nat.type == 'dnat_and_snat':
-                    if nat.external_mac:
-                        columns['external_mac'] = nat.external_mac[0]
-                    if nat.logical_port:
-                        columns['logical_port'] = nat.logical_port[0]
-                    columns['external_ids'] = nat.external_ids
-                    columns['uuid'] = nat.uuid
-                    columns['gateway_port'] = nat.gateway_port
-                    dnat_and_snats.append(columns)
-                elif nat.type == 'snat':
-                    snat.append(columns)
+            yield self._get_lrouter_with_rports(lrouter)
 
-            result.append({'name': utils.get_neutron_name(lrouter.name),
-                           'static_routes': sroutes,
-                           'ports': lrports,
-                           'snats': snat,
-                           'dnat_and_snats': dnat_and_snats})
+    def get_logical_routers_with_rports(self, router_ids):
+        """Get logical Router ports associated with the given logical Routers
+
+        @param router_ids: list of router IDs in neutron
+        @return: list of dict, as returned by
+                 get_all_logical_routers_with_rports, for the routers found
+                 in the OVN NB DB
+        """
+        result = []
+        for router_id in router_ids:
+            lrouter = idlutils.row_by_value(
+                self.idl, 'Logical_Router', 'name', utils.ovn_name(router_id),
+                None)
+            if lrouter is None or ovn_const.OVN_ROUTER_NAME_EXT_ID_KEY not in (
+                    lrouter.external_ids):
+                continue
+            result.append(self._get_lrouter_with_rports(lrouter))
         return result
 
+    @staticmethod
+    def _get_lrouter_with_rports(lrouter):
+        lrports = {
+            lrport.name.replace('lrp-', ''): lrport.networks
+            for lrport in getattr(lrouter, 'ports', [])
+            if ovn_const.OVN_ROUTER_NAME_EXT_ID_KEY in lrport.external_ids
+        }
+        sroutes = [
+            {
+                'destination': route.ip_prefix,
+                'nexthop': route.nexthop,
+                'external_ids': route.external_ids
+            }
+            for route in getattr(lrouter, 'static_routes', [])
+            if any(eid.startswith(constants.DEVICE_OWNER_NEUTRON_PREFIX)
+                   for eid in route.external_ids)
+        ]
+
+        dnat_and_snats = []
+        snat = []
+        for nat in getattr(lrouter, 'nat', []):
+            columns = {'logical_ip': nat.logical_ip,
+                       'external_ip': nat.external_ip,
+                       'type': nat.type}
+            if nat.type == 'dnat_and_snat':
+                if nat.external_mac:
+                    columns['external_mac'] = nat.external_mac[0]
+                if nat.logical_port:
+                    columns['logical_port'] = nat.logical_port[0]
+                columns['external_ids'] = nat.external_ids
+                columns['uuid'] = nat.uuid
+                columns['gateway_port'] = nat.gateway_port
+                dnat_and_snats.append(columns)
+            elif nat.type == 'snat':
+                snat.append(columns)
+
+        return {'name': utils.get_neutron_name(lrouter.name),
+                'static_routes': sroutes,
+                'ports': lrports,
+                'snats': snat,
+                'dnat_and_snats': dnat_and_snats}
+
     def get_all_logical_routers_static_routes(self):
         """Get static routes associated with all logical Routers
 
@@ -593,9 +742,8 @@ class OvsdbNbOvnIdl(nb_impl_idl.OvnNbApiIdlImpl, Backend):
         return az_string.split(",")
 
     def get_chassis_gateways(self, chassis_name):
-        gw_chassis = self.db_find_rows(
-            'Gateway_Chassis', ('chassis_name', '=', chassis_name))
-        return gw_chassis.execute(check_error=True)
+        return self._index_lookup('Gateway_Chassis', 'chassis_name',
+                                  chassis_name)
 
     def get_ha_chassis_group_from_chassis(self, chassis_name):
         """Return the HA_Chassis_Group that contains a particular Chassis
@@ -619,9 +767,8 @@ class OvsdbNbOvnIdl(nb_impl_idl.OvnNbApiIdlImpl, Backend):
         """Return the Logical_Router_Ports associated to the HCGs"""
         ret = []
         for hcg in ha_chassis_groups:
-            ret += self.db_find_rows(
-                'Logical_Router_Port',
-                ('ha_chassis_group', '=', hcg.uuid)).execute(check_error=True)
+            ret += self._index_lookup('Logical_Router_Port',
+                                      'ha_chassis_group', [hcg.uuid])
         return ret
 
     def get_unhosted_gateways(self, port_physnet_dict, chassis_with_physnets,
@@ -687,10 +834,8 @@ class OvsdbNbOvnIdl(nb_impl_idl.OvnNbApiIdlImpl, Backend):
     def get_subnet_dhcp_options(self, subnet_id, with_ports=False):
         subnet = {}
         ports = []
-        for row in self.db_find_rows(
-                'DHCP_Options',
-                ('external_ids', '=', {'subnet_id': subnet_id})
-        ).execute(check_error=True):
+        for row in self._index_lookup('DHCP_Options', 'external_ids',
+                                      subnet_id, key='subnet_id'):
             port_id = row.external_ids.get('port_id')
             if with_ports and port_id:
                 ports.append(self._format_dhcp_row(row))
@@ -703,10 +848,8 @@ class OvsdbNbOvnIdl(nb_impl_idl.OvnNbApiIdlImpl, Backend):
     def get_subnets_dhcp_options(self, subnet_ids):
         ret_opts = []
         for subnet_id in subnet_ids:
-            for row in self.db_find_rows(
-                    'DHCP_Options',
-                    ('external_ids', '=', {'subnet_id': subnet_id})
-            ).execute(check_error=True):
+            for row in self._index_lookup('DHCP_Options', 'external_ids',
+                                          subnet_id, key='subnet_id'):
                 if not row.external_ids.get('port_id'):
                     ret_opts.append(self._format_dhcp_row(row))
                     break
@@ -808,24 +951,24 @@ class OvsdbNbOvnIdl(nb_impl_idl.OvnNbApiIdlImpl, Backend):
         return (ls, None)
 
     def get_router_floatingip_lbs(self, lrouter_name):
-        rc = self.db_find_rows('Load_Balancer', (
-            'external_ids', '=',
-            {ovn_const.OVN_DEVICE_OWNER_EXT_ID_KEY:
-             pf_const.PORT_FORWARDING_PLUGIN,
-             ovn_const.OVN_ROUTER_NAME_EXT_ID_KEY: lrouter_name}))
-        return [ovn_obj for ovn_obj in rc.execute(check_error=True)
-                if ovn_const.OVN_FIP_EXT_ID_KEY in ovn_obj.external_ids]
+        return [ovn_obj for ovn_obj in self._index_lookup(
+                    'Load_Balancer', 'external_ids', lrouter_name,
+                    key=ovn_const.OVN_ROUTER_NAME_EXT_ID_KEY)
+                if ovn_obj.external_ids.get(
+                    ovn_const.OVN_DEVICE_OWNER_EXT_ID_KEY) ==
+                pf_const.PORT_FORWARDING_PLUGIN and
+                ovn_const.OVN_FIP_EXT_ID_KEY in ovn_obj.external_ids]
 
     def get_floatingip_in_nat_or_lb(self, fip_id):
         fip = self.get_floatingip(fip_id)
         if fip:
             return fip
-        result = self.db_find('Load_Balancer', (
-            'external_ids', '=',
-            {ovn_const.OVN_DEVICE_OWNER_EXT_ID_KEY:
-             pf_const.PORT_FORWARDING_PLUGIN,
-             ovn_const.OVN_FIP_EXT_ID_KEY: fip_id})).execute(check_error=True)
-        return result[0] if result else None
+        for lb in self._index_lookup('Load_Balancer', 'external_ids', fip_id,
+                                     key=ovn_const.OVN_FIP_EXT_ID_KEY):
+            if (lb.external_ids.get(ovn_const.OVN_DEVICE_OWNER_EXT_ID_KEY) ==
+                    pf_const.PORT_FORWARDING_PLUGIN):
+                return self._row_to_dict('Load_Balancer', lb)
+        return None
 
     def get_floatingip(self, fip_id):
         fip = self.lookup('NAT', fip_id, default=None)
@@ -837,11 +980,9 @@ class OvsdbNbOvnIdl(nb_impl_idl.OvnNbApiIdlImpl, Backend):
         # new NAT registers use the floating IP UUID. For previously created
         # NAT registers, the following search for
         # ``external_ids:neutron:fip_id`` is still needed.
-        fip = self.db_find(
-            'NAT',
-            ('external_ids', '=', {ovn_const.OVN_FIP_EXT_ID_KEY: fip_id}))
-        result = fip.execute(check_error=True)
-        return result[0] if result else None
+        result = self._index_lookup('NAT', 'external_ids', fip_id,
+                                    key=ovn_const.OVN_FIP_EXT_ID_KEY)
+        return self._row_to_dict('NAT', result[0]) if result else None
 
     def get_floatingips(self):
         cmd = self.db_find('NAT',
@@ -899,6 +1040,15 @@ class OvsdbNbOvnIdl(nb_impl_idl.OvnNbApiIdlImpl, Backend):
         if not lrp:
             return None
 
+        # The Neutron router ports store the name of their router and the
+        # Logical_Router rows are indexed by name.
+        lr_name = lrp.external_ids.get(ovn_const.OVN_ROUTER_NAME_EXT_ID_KEY)
+        if lr_name:
+            lr = idlutils.row_by_value(self.idl, 'Logical_Router', 'name',
+                                       lr_name, None)
+            if lr and lrp in getattr(lr, 'ports', set()):
+                return lr
+
         # NOTE(fnordahl) This could be replaced by something like:
         #
         #     lr = self.db_find_rows(
@@ -906,7 +1056,7 @@ class OvsdbNbOvnIdl(nb_impl_idl.OvnNbApiIdlImpl, Backend):
         #         ('ports', '{>}', lrp.uuid))
         #
         # However, ovsdbapp does not currently support the '{>}' operator.
-        for lr in self._tables['Logical_Router'].rows.values():
+        for lr in list(self._tables['Logical_Router'].rows.values()):
             lr_ports = getattr(lr, 'ports', set())
             if lrp in lr_ports:
                 return lr
@@ -985,6 +1135,13 @@ class OvsdbNbOvnIdl(nb_impl_idl.OvnNbApiIdlImpl, Backend):
 
 
 class OvsdbSbOvnIdl(sb_impl_idl.OvnSbApiIdlImpl, Backend):
+    indexed_columns = (
+        ('Chassis', 'hostname', None),
+        ('Datapath_Binding', 'external_ids', 'name'),
+        ('Port_Binding', 'chassis', None),
+        ('Port_Binding', 'datapath', None),
+    )
+
     @n_utils.classproperty
     def connection_string(cls):
         return cfg.get_ovn_sb_connection()
@@ -1006,8 +1163,7 @@ class OvsdbSbOvnIdl(sb_impl_idl.OvnSbApiIdlImpl, Backend):
         return list(mapping_dict.keys())
 
     def chassis_exists(self, hostname):
-        cmd = self.db_find('Chassis', ('hostname', '=', hostname))
-        return bool(cmd.execute(check_error=True))
+        return bool(self._index_lookup('Chassis', 'hostname', hostname))
 
     def get_chassis_hostname_and_physnets(self):
         chassis_info_dict = {}
@@ -1062,12 +1218,13 @@ class OvsdbSbOvnIdl(sb_impl_idl.OvnSbApiIdlImpl, Backend):
             dp = self.lookup('Datapath_Binding', uuid.UUID(datapath_uuid))
         except idlutils.RowNotFound:
             return None
-        cmd = self.db_find_rows('Port_Binding', ('datapath', '=', dp),
-                                ('type', '=', ovn_const.LSP_TYPE_LOCALPORT),
-                                ('external_ids', '=', {
-                                    ovn_const.OVN_DEVICE_OWNER_EXT_ID_KEY:
-                                        constants.DEVICE_OWNER_DISTRIBUTED}))
-        return next(iter(cmd.execute(check_error=True)), None)
+        for pb in self._index_lookup('Port_Binding', 'datapath', dp):
+            if (pb.type == ovn_const.LSP_TYPE_LOCALPORT and
+                    pb.external_ids.get(
+                        ovn_const.OVN_DEVICE_OWNER_EXT_ID_KEY) ==
+                    constants.DEVICE_OWNER_DISTRIBUTED):
+                return pb
+        return None
 
     def set_chassis_neutron_description(self, chassis, description,
                                         agent_type):
@@ -1078,9 +1235,11 @@ class OvsdbSbOvnIdl(sb_impl_idl.OvnSbApiIdlImpl, Backend):
             self, chassis, {desc_key: description}, if_exists=False)
 
     def get_network_port_bindings_by_ip(self, network, ip_address, mac=None):
-        rows = self.db_list_rows('Port_Binding').execute(check_error=True)
-        # TODO(twilson) It would be useful to have a db_find that takes a
-        # comparison function
+        rows = []
+        for name in {utils.ovn_name(network), network}:
+            for dp in self._index_lookup('Datapath_Binding', 'external_ids',
+                                         name, key='name'):
+                rows += self._index_lookup('Port_Binding', 'datapath', dp)
 
         def check_net_and_ip(port):
             # If the port is not bound to any chassis it is not relevant
@@ -1114,13 +1273,16 @@ class OvsdbSbOvnIdl(sb_impl_idl.OvnSbApiIdlImpl, Backend):
     def get_ports_on_chassis(self, chassis, include_additional_chassis=False):
         # TODO(twilson) Some day it would be nice to stop passing names around
         # and just start using chassis objects so db_find_rows could be used
-        rows = self.db_list_rows('Port_Binding').execute(check_error=True)
         if include_additional_chassis:
+            # "additional_chassis" is a set, it cannot be searched in an index
+            rows = self.db_list_rows('Port_Binding').execute(check_error=True)
             return [r for r in rows
                     if r.chassis and r.chassis[0].name == chassis or
                     chassis in [ch.name for ch in r.additional_chassis]]
-        return [r for r in rows
-                if r.chassis and r.chassis[0].name == chassis]
+        ch = idlutils.row_by_value(self.idl, 'Chassis', 'name', chassis, None)
+        if ch is None:
+            return []
+        return self._index_lookup('Port_Binding', 'chassis', [ch])
 
     def get_chassis_host_for_port(self, port_id):
         chassis = set()
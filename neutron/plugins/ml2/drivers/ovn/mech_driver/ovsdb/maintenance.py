@@ -14,8 +14,10 @@
 #    under the License.
 
 import abc
+from concurrent import futures
 import functools
 import inspect
+import itertools
 import threading
 
 import futurist
@@ -56,6 +58,14 @@ LOG = log.getLogger(__name__)
 
 INCONSISTENCY_TYPE_CREATE_UPDATE = 'create/update'
 INCONSISTENCY_TYPE_DELETE = 'delete'
+FIX_DBG_LOG_MSG = ('Maintenance task: Fixing resource %(res_uuid)s '
+                   '(type: %(res_type)s) at %(type_)s')
+# Maximum number of resource IDs per query, when retrieving the inconsistent
+# resources from the Neutron database.
+BULK_QUERY_SIZE = 1000
+# Resource types fixed in batches, in one OVN database transaction per batch.
+BATCHED_RESOURCE_TYPES = (ovn_const.TYPE_PORTS,
+                          ovn_const.TYPE_SECURITY_GROUP_RULES)
 
 
 def has_lock_periodic(*args, periodic_run_limit=0, **kwargs):
@@ -237,6 +247,7 @@ class DBInconsistenciesPeriodics(SchemaAwarePeriodicsBase):
         self._resources_func_map = {
             ovn_const.TYPE_NETWORKS: {
                 'neutron_get': self._ovn_client._plugin.get_network,
+                'neutron_get_all': self._ovn_client._plugin.get_networks,
                 'ovn_get': self._nb_idl.get_lswitch,
                 'ovn_create': self._ovn_client.create_network,
                 'ovn_update': self._ovn_client.update_network,
@@ -244,6 +255,7 @@ class DBInconsistenciesPeriodics(SchemaAwarePeriodicsBase):
             },
             ovn_const.TYPE_PORTS: {
                 'neutron_get': self._ovn_client._plugin.get_port,
+                'neutron_get_all': self._ovn_client._plugin.get_ports,
                 'ovn_get': self._nb_idl.get_lswitch_port,
                 'ovn_create': self._ovn_client.create_port,
                 'ovn_update': self._ovn_client.update_port,
@@ -251,6 +263,8 @@ class DBInconsistenciesPeriodics(SchemaAwarePeriodicsBase):
             },
             ovn_const.TYPE_FLOATINGIPS: {
                 'neutron_get': self._ovn_client._l3_plugin.get_floatingip,
+                'neutron_get_all':
+                    self._ovn_client._l3_plugin.get_floatingips,
                 'ovn_get': self._nb_idl.get_floatingip_in_nat_or_lb,
                 'ovn_create': self._create_floatingip_and_pf,
                 'ovn_update': self._update_floatingip_and_pf,
@@ -258,6 +272,7 @@ class DBInconsistenciesPeriodics(SchemaAwarePeriodicsBase):
             },
             ovn_const.TYPE_ROUTERS: {
                 'neutron_get': self._ovn_client._l3_plugin.get_router,
+                'neutron_get_all': self._ovn_client._l3_plugin.get_routers,
                 'ovn_get': self._nb_idl.get_lrouter,
                 'ovn_create': self._ovn_client.create_router,
                 'ovn_update': self._ovn_client.update_router,
@@ -265,6 +280,8 @@ class DBInconsistenciesPeriodics(SchemaAwarePeriodicsBase):
             },
             ovn_const.TYPE_ADDRESS_GROUPS: {
                 'neutron_get': self._ovn_client._plugin.get_address_group,
+                'neutron_get_all':
+                    self._ovn_client._plugin.get_address_groups,
                 'ovn_get': self._nb_idl.get_address_set,
                 'ovn_create': self._ovn_client.create_address_group,
                 'ovn_update': self._ovn_client.update_address_group,
@@ -272,6 +289,8 @@ class DBInconsistenciesPeriodics(SchemaAwarePeriodicsBase):
             },
             ovn_const.TYPE_SECURITY_GROUPS: {
                 'neutron_get': self._ovn_client._plugin.get_security_group,
+                'neutron_get_all':
+                    self._ovn_client._plugin.get_security_groups,
                 'ovn_get': self._nb_idl.get_port_group,
                 'ovn_create': self._ovn_client.create_security_group,
                 'ovn_delete': self._ovn_client.delete_security_group,
@@ -279,6 +298,8 @@ class DBInconsistenciesPeriodics(SchemaAwarePeriodicsBase):
             ovn_const.TYPE_SECURITY_GROUP_RULES: {
                 'neutron_get':
                     self._ovn_client._plugin.get_security_group_rule,
+                'neutron_get_all':
+                    self._ovn_client._plugin.get_security_group_rules,
                 'ovn_get': self._nb_idl.get_acl_by_id,
                 'ovn_create': self._ovn_client.create_security_group_rule,
                 'ovn_delete': self._ovn_client.delete_security_group_rule,
@@ -286,6 +307,7 @@ class DBInconsistenciesPeriodics(SchemaAwarePeriodicsBase):
             ovn_const.TYPE_ROUTER_PORTS: {
                 'neutron_get':
                     self._ovn_client._plugin.get_port,
+                'neutron_get_all': self._ovn_client._plugin.get_ports,
                 'ovn_get': self._nb_idl.get_lrouter_port,
                 'ovn_create': self._create_lrouter_port,
                 'ovn_update': self._ovn_client.update_router_port,
@@ -312,22 +334,34 @@ class DBInconsistenciesPeriodics(SchemaAwarePeriodicsBase):
                 LOG.exception(
                     'Unknown error while executing "%s"', func.__name__)
 
-    def _fix_create_update(self, context, row):
+    @staticmethod
+    def _log_skip_deleted_resource(row):
+        LOG.warning('Skip fixing resource %(res_uuid)s (type: '
+                    '%(res_type)s). Resource does not exist in Neutron '
+                    'database anymore', {'res_uuid': row.resource_uuid,
+                                         'res_type': row.resource_type})
+
+    def _fix_create_update(self, context, row, n_obj=None):
+        """Fix a create/update inconsistency of a resource.
+
+        :param n_obj: the Neutron resource, if already retrieved
+        :returns: True if the resource was created or updated in the OVN
+                  database
+        """
         res_map = self._resources_func_map[row.resource_type]
-        try:
-            # Get the latest version of the resource in Neutron DB
-            n_obj = res_map['neutron_get'](context, row.resource_uuid)
-        except n_exc.NotFound:
-            LOG.warning('Skip fixing resource %(res_uuid)s (type: '
-                        '%(res_type)s). Resource does not exist in Neutron '
-                        'database anymore', {'res_uuid': row.resource_uuid,
-                                             'res_type': row.resource_type})
-            return
+        if n_obj is None:
+            try:
+                # Get the latest version of the resource in Neutron DB
+                n_obj = res_map['neutron_get'](context, row.resource_uuid)
+            except n_exc.NotFound:
+                self._log_skip_deleted_resource(row)
+                return False
 
         ovn_obj = res_map['ovn_get'](row.resource_uuid)
         try:
             if not ovn_obj:
                 res_map['ovn_create'](context, n_obj)
+                return True
             else:
                 if row.resource_type == ovn_const.TYPE_SECURITY_GROUP_RULES:
                     LOG.error("SG rule %s found with a revision number while "
@@ -346,8 +380,7 @@ class DBInconsistenciesPeriodics(SchemaAwarePeriodicsBase):
                             # NOTE(liushy): We create two Address_Sets for
                             # one Address_Group at one ovn_create func.
                             res_map['ovn_create'](context, n_obj)
-                            need_bump = False
-                            break
+                            return True
                         ext_ids = getattr(obj, 'external_ids', {})
                         ovn_revision = int(ext_ids.get(
                             ovn_const.OVN_REV_NUM_EXT_ID_KEY, -1))
@@ -356,8 +389,7 @@ class DBInconsistenciesPeriodics(SchemaAwarePeriodicsBase):
                         # them at one ovn_update func.
                         if ovn_revision != n_obj['revision_number']:
                             res_map['ovn_update'](context, n_obj)
-                            need_bump = False
-                            break
+                            return True
                         need_bump = True
                     if need_bump:
                         revision_numbers_db.bump_revision(context, n_obj,
@@ -370,6 +402,7 @@ class DBInconsistenciesPeriodics(SchemaAwarePeriodicsBase):
                     # number is different from Neutron DB, updated it.
                     if ovn_revision != n_obj['revision_number']:
                         res_map['ovn_update'](context, n_obj)
+                        return True
                     else:
                         # If the resource exist and the revision number
                         # is equal on both databases just bump the revision on
@@ -379,6 +412,7 @@ class DBInconsistenciesPeriodics(SchemaAwarePeriodicsBase):
         except revision_numbers_db.StandardAttributeIDNotFound:
             LOG.error('Standard attribute ID not found for object ID %s',
                       n_obj['id'])
+        return False
 
     def _fix_delete(self, context, row):
         res_map = self._resources_func_map[row.resource_type]
@@ -389,12 +423,15 @@ class DBInconsistenciesPeriodics(SchemaAwarePeriodicsBase):
         else:
             res_map['ovn_delete'](context, row.resource_uuid)
 
-    def _fix_create_update_subnet(self, context, row):
+    def _fix_create_update_subnet(self, context, row, sn_db_obj=None,
+                                  n_db_obj=None):
         # Get the lasted version of the port in Neutron DB
-        sn_db_obj = self._ovn_client._plugin.get_subnet(
-            context, row.resource_uuid)
-        n_db_obj = self._ovn_client._plugin.get_network(
-            context, sn_db_obj['network_id'])
+        if sn_db_obj is None:
+            sn_db_obj = self._ovn_client._plugin.get_subnet(
+                context, row.resource_uuid)
+        if n_db_obj is None:
+            n_db_obj = self._ovn_client._plugin.get_network(
+                context, sn_db_obj['network_id'])
 
         if row.revision_number == ovn_const.INITIAL_REV_NUM:
             self._ovn_client.create_subnet(context, sn_db_obj, n_db_obj)
@@ -444,13 +481,141 @@ class DBInconsistenciesPeriodics(SchemaAwarePeriodicsBase):
         self._log_maintenance_inconsistencies(create_update_inconsistencies,
                                               delete_inconsistencies)
 
-        dbg_log_msg = ('Maintenance task: Fixing resource %(res_uuid)s '
-                       '(type: %(res_type)s) at %(type_)s')
-        # Fix the create/update resources inconsistencies
-        for row in create_update_inconsistencies:
-            LOG.debug(dbg_log_msg, {'res_uuid': row.resource_uuid,
-                                    'res_type': row.resource_type,
-                                    'type_': INCONSISTENCY_TYPE_CREATE_UPDATE})
+        # NOTE: the inconsistencies are sorted by resource type, in the order
+        # the types must be fixed (e.g.: the networks before the ports). The
+        # resources of a type are fixed in parallel; a type is fixed once all
+        # the resources of the previous type have been.
+        with futurist.ThreadPoolExecutor(
+                max_workers=ovn_conf.get_maintenance_fix_workers()) as pool:
+            for res_type, rows in itertools.groupby(
+                    create_update_inconsistencies,
+                    key=lambda row: row.resource_type):
+                self._fix_inconsistencies(
+                    pool, admin_context, res_type, list(rows),
+                    INCONSISTENCY_TYPE_CREATE_UPDATE)
+            for res_type, rows in itertools.groupby(
+                    delete_inconsistencies,
+                    key=lambda row: row.resource_type):
+                self._fix_inconsistencies(
+                    pool, admin_context, res_type, list(rows),
+                    INCONSISTENCY_TYPE_DELETE)
+
+    def _get_neutron_objects(self, context, res_type, resource_ids):
+        """Return the Neutron resources of a type, indexed by ID.
+
+        The resources are retrieved with one query per BULK_QUERY_SIZE IDs;
+        a deleted resource is not returned. For the subnets, a
+        (subnet, network) tuple is returned.
+        """
+        if res_type == ovn_const.TYPE_SUBNETS:
+            get_all = self._ovn_client._plugin.get_subnets
+        else:
+            get_all = self._resources_func_map[res_type]['neutron_get_all']
+        objs = {}
+        for idx in range(0, len(resource_ids), BULK_QUERY_SIZE):
+            filters = {'id': resource_ids[idx:idx + BULK_QUERY_SIZE]}
+            objs.update((obj['id'], obj) for obj in get_all(
+                context, filters=filters))
+
+        if res_type == ovn_const.TYPE_SUBNETS:
+            networks = self._get_neutron_objects(
+                context, ovn_const.TYPE_NETWORKS,
+                list({subnet['network_id'] for subnet in objs.values()}))
+            objs = {subnet_id: (subnet, networks[subnet['network_id']])
+                    for subnet_id, subnet in objs.items()
+                    if subnet['network_id'] in networks}
+        return objs
+
+    def _fix_inconsistencies(self, pool, context, res_type, rows, type_):
+        """Fix the inconsistencies of a resource type, in parallel batches"""
+        start = timeutils.now()
+        skipped = 0
+        if type_ == INCONSISTENCY_TYPE_CREATE_UPDATE:
+            n_objs = self._get_neutron_objects(
+                context, res_type, [row.resource_uuid for row in rows])
+            items = []
+            for row in rows:
+                if row.resource_uuid in n_objs:
+                    items.append((row, n_objs[row.resource_uuid]))
+                else:
+                    self._log_skip_deleted_resource(row)
+                    skipped += 1
+            fix_batch = self._fix_create_update_batch
+        else:
+            items = [(row, None) for row in rows]
+            fix_batch = self._fix_delete_batch
+
+        batch_size = 1
+        if res_type in BATCHED_RESOURCE_TYPES:
+            batch_size = ovn_conf.get_maintenance_fix_batch_size()
+        batches = [
+            pool.submit(fix_batch, res_type, items[idx:idx + batch_size])
+            for idx in range(0, len(items), batch_size)]
+        done = failed = 0
+        for batch in futures.as_completed(batches):
+            batch_items, batch_failed = batch.result()
+            done += batch_items
+            failed += batch_failed
+            LOG.debug('Maintenance task: Fixed %(done)d of %(total)d '
+                      'resources (type: %(res_type)s) at %(type_)s',
+                      {'done': done, 'total': len(items),
+                       'res_type': res_type, 'type_': type_})
+
+        elapsed = timeutils.now() - start
+        LOG.info('Maintenance task: Fixed %(fixed)d resources (type: '
+                 '%(res_type)s) at %(type_)s in %(elapsed).2f seconds '
+                 '(%(rate).1f resources/s); %(failed)d failed, %(skipped)d '
+                 'skipped', {'fixed': done - failed, 'res_type': res_type,
+                             'type_': type_, 'elapsed': elapsed,
+                             'rate': done / elapsed if elapsed else 0,
+                             'failed': failed, 'skipped': skipped})
+
+    def _fix_create_update_batch(self, res_type, items):
+        """Fix the create/update inconsistencies of a batch of resources.
+
+        If the batch has several resources, they are created or updated in
+        a single OVN database transaction, that is committed before bumping
+        their revision numbers. If this transaction fails, the resources are
+        fixed one by one.
+
+        :param items: list of (revision row, Neutron resource) tuples
+        :returns: a (number of resources, number of failures) tuple
+        """
+        context = n_context.get_admin_context()
+        fallback = False
+        if len(items) > 1:
+            try:
+                n_objs = []
+                with self._nb_idl.transaction(check_error=True,
+                                              revision_mismatch_raise=True):
+                    for row, n_obj in items:
+                        LOG.debug(FIX_DBG_LOG_MSG, {
+                            'res_uuid': row.resource_uuid,
+                            'res_type': res_type,
+                            'type_': INCONSISTENCY_TYPE_CREATE_UPDATE})
+                        if self._fix_create_update(context, row, n_obj):
+                            n_objs.append(n_obj)
+                for n_obj in n_objs:
+                    try:
+                        revision_numbers_db.bump_revision(context, n_obj,
+                                                          res_type)
+                    except revision_numbers_db.StandardAttributeIDNotFound:
+                        LOG.error('Standard attribute ID not found for '
+                                  'object ID %s', n_obj['id'])
+                return len(items), 0
+            except Exception as e:
+                LOG.warning('Maintenance task: Failed to fix %(count)d '
+                            'resources (type: %(res_type)s) in one '
+                            'transaction, fixing them one by one. Reason: '
+                            '%(error)s', {'count': len(items),
+                                          'res_type': res_type, 'error': e})
+                fallback = True
+
+        failed = 0
+        for row, n_obj in items:
+            LOG.debug(FIX_DBG_LOG_MSG, {
+                'res_uuid': row.resource_uuid, 'res_type': res_type,
+                'type_': INCONSISTENCY_TYPE_CREATE_UPDATE})
             try:
                 # NOTE(lucasagomes): The way to fix subnets is bit
                 # different than other resources. A subnet in OVN language
@@ -458,35 +623,66 @@ class DBInconsistenciesPeriodics(SchemaAwarePeriodicsBase):
                 # subnet in Neutron has the "enable_dhcp" attribute set
                 # to True. So, it's possible to have a consistent subnet
                 # resource even when it does not exist in the OVN database.
-                if row.resource_type == ovn_const.TYPE_SUBNETS:
-                    self._fix_create_update_subnet(admin_context, row)
+                if res_type == ovn_const.TYPE_SUBNETS:
+                    self._fix_create_update_subnet(context, row, *n_obj)
+                elif fallback:
+                    # The resource could have been updated meanwhile.
+                    self._fix_create_update(context, row)
                 else:
-                    self._fix_create_update(admin_context, row)
+                    self._fix_create_update(context, row, n_obj)
             except Exception:
                 LOG.exception('Maintenance task: Failed to fix resource '
                               '%(res_uuid)s (type: %(res_type)s)',
                               {'res_uuid': row.resource_uuid,
-                               'res_type': row.resource_type})
-
-        # Fix the deleted resources inconsistencies
-        for row in delete_inconsistencies:
-            LOG.debug(dbg_log_msg, {'res_uuid': row.resource_uuid,
-                                    'res_type': row.resource_type,
-                                    'type_': INCONSISTENCY_TYPE_DELETE})
+                               'res_type': res_type})
+                failed += 1
+                if fallback:
+                    self._restore_revision(context, row)
+        return len(items), failed
+
+    @staticmethod
+    def _restore_revision(context, row):
+        # NOTE: the revision number of a resource created in an aborted
+        # transaction is bumped before the commit. Restore it, to fix the
+        # resource again in the next run.
+        try:
+            revision_numbers_db.create_initial_revision(
+                context, row.resource_uuid, row.resource_type,
+                revision_number=row.revision_number, may_exist=True,
+                std_attr_id=row.standard_attr_id)
+        except Exception:
+            LOG.exception('Maintenance task: Failed to restore the revision '
+                          'number of resource %(res_uuid)s (type: '
+                          '%(res_type)s)', {'res_uuid': row.resource_uuid,
+                                            'res_type': row.resource_type})
+
+    def _fix_delete_batch(self, res_type, items):
+        """Fix the delete inconsistencies of a batch of resources.
+
+        :param items: list of (revision row, None) tuples
+        :returns: a (number of resources, number of failures) tuple
+        """
+        context = n_context.get_admin_context()
+        failed = 0
+        for row, _ in items:
+            LOG.debug(FIX_DBG_LOG_MSG, {
+                'res_uuid': row.resource_uuid, 'res_type': res_type,
+                'type_': INCONSISTENCY_TYPE_DELETE})
             try:
-                if row.resource_type == ovn_const.TYPE_SUBNETS:
-                    self._ovn_client.delete_subnet(admin_context,
+                if res_type == ovn_const.TYPE_SUBNETS:
+                    self._ovn_client.delete_subnet(context,
                                                    row.resource_uuid)
-                elif row.resource_type == ovn_const.TYPE_PORTS:
-                    self._ovn_client.delete_port(admin_context,
-                                                 row.resource_uuid)
+                elif res_type == ovn_const.TYPE_PORTS:
+                    self._ovn_client.delete_port(context, row.resource_uuid)
                 else:
-                    self._fix_delete(admin_context, row)
+                    self._fix_delete(context, row)
             except Exception:
                 LOG.exception('Maintenance task: Failed to fix deleted '
                               'resource %(res_uuid)s (type: %(res_type)s)',
                               {'res_uuid': row.resource_uuid,
-                               'res_type': row.resource_type})
+                               'res_type': res_type})
+                failed += 1
+        return len(items), failed
 
     def _create_lrouter_port(self, context, port):
         router_id = port['device_id']
@@ -610,6 +610,47 @@ class OVNClient:
         if utils.is_lsp_ignored(port):
             return
 
+        with self._nb_idl.transaction(check_error=True) as txn:
+            self._add_txns_to_create_port(context, txn, port)
+            if self.is_dns_required_for_port(port):
+                self.add_txns_to_sync_port_dns_records(txn, port)
+
+        db_rev.bump_revision(context, port, ovn_const.TYPE_PORTS)
+
+    def create_ports(self, context, ports):
+        """Create several ports in a single OVN NB transaction.
+
+        The DNS records of the ports are merged by logical switch. Once the
+        transaction is committed, the revision numbers of the ports are
+        bumped with a single DB statement.
+
+        Only a failure of the OVN NB transaction is raised: once it is
+        committed, the logical switch ports exist and the callers must not
+        create them again. If the revision numbers can not be bumped, the
+        maintenance task will update the ports.
+        """
+        ports = [port for port in ports if not utils.is_lsp_ignored(port)]
+        if not ports:
+            return
+
+        dns_records = collections.defaultdict(dict)
+        with self._nb_idl.transaction(check_error=True) as txn:
+            for port in ports:
+                self._add_txns_to_create_port(context, txn, port)
+                if self.is_dns_required_for_port(port):
+                    dns_records[port['network_id']].update(
+                        self.get_port_dns_records(port))
+            for network_id, records in dns_records.items():
+                self._add_txns_to_sync_dns_records(txn, network_id, records)
+
+        try:
+            db_rev.bump_revisions(context, ports, ovn_const.TYPE_PORTS)
+        except Exception:
+            LOG.exception("Unable to bump the revision numbers of the ports "
+                          "%s created in the OVN NB database",
+                          [port['id'] for port in ports])
+
+    def _add_txns_to_create_port(self, context, txn, port):
         port_info, external_ids = self.get_external_ids_from_port(
             context, port)
         lswitch_name = utils.ovn_name(port['network_id'])
@@ -625,75 +666,69 @@ class OVNClient:
             self._nb_idl.check_for_row_by_value_and_retry(
                 'Logical_Switch', 'name', lswitch_name)
 
-        with self._nb_idl.transaction(check_error=True) as txn:
-            dhcpv4_options, dhcpv6_options = self.update_port_dhcp_options(
-                port_info, txn=txn)
-            # The lport_name *must* be neutron port['id'].  It must match the
-            # iface-id set in the Interfaces table of the Open_vSwitch
-            # database which nova sets to be the port ID.
-
-            kwargs = {
-                'lport_name': port['id'],
-                'lswitch_name': lswitch_name,
-                'network_id': port['network_id'],
-                'addresses': port_info.addresses,
-                'external_ids': external_ids,
-                'parent_name': port_info.parent_name,
-                'tag': port_info.tag,
-                'enabled': port.get('admin_state_up'),
-                'options': port_info.options,
-                'type': port_info.type,
-                'port_security': port_info.port_security,
-                'dhcpv4_options': dhcpv4_options,
-                'dhcpv6_options': dhcpv6_options
-            }
-
-            if port_info.type == ovn_const.LSP_TYPE_EXTERNAL:
-                kwargs['ha_chassis_group'], _ = (
-                    utils.sync_ha_chassis_group_network(
-                        context, self._nb_idl, self._sb_idl, port['id'],
-                        port['network_id'], None))
-
-            # NOTE(mjozefcz): Do not set addresses if the port is not
-            # bound, has no device_owner and it is OVN LB VIP port.
-            # For more details check related bug #1789686.
-            if (port.get('name').startswith(ovn_const.LB_VIP_PORT_PREFIX) and
-                    not port.get('device_owner') and
-                    port.get(portbindings.VIF_TYPE) ==
-                    portbindings.VIF_TYPE_UNBOUND):
-                kwargs['addresses'] = []
-
-            # Check if the parent port was created with the
-            # allowed_address_pairs already set
-            allowed_address_pairs = port.get('allowed_address_pairs', [])
-            if (allowed_address_pairs and
-                    port_info.type != ovn_const.LSP_TYPE_VIRTUAL):
-                addrs = [addr['ip_address'] for addr in allowed_address_pairs]
-                self._set_unset_virtual_port_type(context, txn, port, addrs)
-
-            port_cmd = txn.add(self._nb_idl.create_lswitch_port(
-                **kwargs))
-
-            sg_ids = utils.get_lsp_security_groups(port)
-            # If this is not a trusted port and port security is enabled,
-            # add it to the default drop Port Group so that all traffic
-            # is dropped by default.
-            if not utils.is_lsp_trusted(port) and port_info.port_security:
-                self._add_port_to_drop_port_group(port_cmd, txn)
-            # Just add the port to its Port Group.
-            for sg in sg_ids:
-                txn.add(self._nb_idl.pg_add_ports(
-                    utils.ovn_port_group_name(sg), port_cmd))
-
-            if self.is_dns_required_for_port(port):
-                self.add_txns_to_sync_port_dns_records(txn, port)
-
-            self._qos_driver.create_port(context, txn, port, port_cmd)
-
-            if port.get('pvlan_type') and self.pvlan_driver:
-                self.pvlan_driver.create_port(context, txn, port)
+        dhcpv4_options, dhcpv6_options = self.update_port_dhcp_options(
+            port_info, txn=txn)
+        # The lport_name *must* be neutron port['id'].  It must match the
+        # iface-id set in the Interfaces table of the Open_vSwitch
+        # database which nova sets to be the port ID.
+
+        kwargs = {
+            'lport_name': port['id'],
+            'lswitch_name': lswitch_name,
+            'network_id': port['network_id'],
+            'addresses': port_info.addresses,
+            'external_ids': external_ids,
+            'parent_name': port_info.parent_name,
+            'tag': port_info.tag,
+            'enabled': port.get('admin_state_up'),
+            'options': port_info.options,
+            'type': port_info.type,
+            'port_security': port_info.port_security,
+            'dhcpv4_options': dhcpv4_options,
+            'dhcpv6_options': dhcpv6_options
+        }
 
-        db_rev.bump_revision(context, port, ovn_const.TYPE_PORTS)
+        if port_info.type == ovn_const.LSP_TYPE_EXTERNAL:
+            kwargs['ha_chassis_group'], _ = (
+                utils.sync_ha_chassis_group_network(
+                    context, self._nb_idl, self._sb_idl, port['id'],
+                    port['network_id'], None))
+
+        # NOTE(mjozefcz): Do not set addresses if the port is not
+        # bound, has no device_owner and it is OVN LB VIP port.
+        # For more details check related bug #1789686.
+        if (port.get('name').startswith(ovn_const.LB_VIP_PORT_PREFIX) and
+                not port.get('device_owner') and
+                port.get(portbindings.VIF_TYPE) ==
+                portbindings.VIF_TYPE_UNBOUND):
+            kwargs['addresses'] = []
+
+        # Check if the parent port was created with the
+        # allowed_address_pairs already set
+        allowed_address_pairs = port.get('allowed_address_pairs', [])
+        if (allowed_address_pairs and
+                port_info.type != ovn_const.LSP_TYPE_VIRTUAL):
+            addrs = [addr['ip_address'] for addr in allowed_address_pairs]
+            self._set_unset_virtual_port_type(context, txn, port, addrs)
+
+        port_cmd = txn.add(self._nb_idl.create_lswitch_port(
+            **kwargs))
+
+        sg_ids = utils.get_lsp_security_groups(port)
+        # If this is not a trusted port and port security is enabled,
+        # add it to the default drop Port Group so that all traffic
+        # is dropped by default.
+        if not utils.is_lsp_trusted(port) and port_info.port_security:
+            self._add_port_to_drop_port_group(port_cmd, txn)
+        # Just add the port to its Port Group.
+        for sg in sg_ids:
+            txn.add(self._nb_idl.pg_add_ports(
+                utils.ovn_port_group_name(sg), port_cmd))
+
+        self._qos_driver.create_port(context, txn, port, port_cmd)
+
+        if port.get('pvlan_type') and self.pvlan_driver:
+            self.pvlan_driver.create_port(context, txn, port)
 
     def _set_unset_virtual_port_type(self, context, txn, parent_port,
                                      addresses, unset=False):
@@ -3116,8 +3151,16 @@ class OVNClient:
         #  - We will have issues if two ports have same dns name
         #  - If a port is deleted with dns name 'd1' and a new port is
         #    added with the same dns name 'd1'.
-        records_to_add = self.get_port_dns_records(port)
-        lswitch_name = utils.ovn_name(port['network_id'])
+        old_records = None
+        if original_port:
+            old_records = self.get_port_dns_records(original_port)
+        self._add_txns_to_sync_dns_records(
+            txn, port['network_id'], self.get_port_dns_records(port),
+            old_records=old_records)
+
+    def _add_txns_to_sync_dns_records(self, txn, network_id, records_to_add,
+                                      old_records=None):
+        lswitch_name = utils.ovn_name(network_id)
         ls, ls_dns_record = self._nb_idl.get_ls_and_dns_record(lswitch_name)
 
         # If ls_dns_record is None, then we need to create a DNS row for the
@@ -3136,9 +3179,7 @@ class OVNClient:
             txn.add(self._nb_idl.dns_set_options(ls_dns_record.uuid,
                     **dns_options))
 
-        if original_port:
-            old_records = self.get_port_dns_records(original_port)
-
+        if old_records:
             for old_hostname, old_ips in old_records.items():
                 if records_to_add.get(old_hostname) != old_ips:
                     txn.add(self._nb_idl.dns_remove_record(
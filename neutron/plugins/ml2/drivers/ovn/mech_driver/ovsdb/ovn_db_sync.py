@@ -10,8 +10,13 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
+from concurrent import futures
 from datetime import datetime
+import itertools
+import threading
 
+import futurist
 from neutron_lib.api.definitions import portbindings
 from neutron_lib.api.definitions import segment as segment_def
 from neutron_lib import constants
@@ -25,6 +30,7 @@ from neutron_lib.plugins import directory
 from neutron_lib.utils import helpers
 from oslo_log import log
 from oslo_utils import strutils
+from oslo_utils import timeutils
 from ovsdbapp.backend.ovs_idl import idlutils
 
 from neutron.common.ovn import acl as acl_utils
@@ -44,6 +50,15 @@ from neutron.services.segments import db as segments_db
 LOG = log.getLogger(__name__)
 
 
+def _chunks(iterable, chunk_size):
+    """Yield lists of at most chunk_size items of iterable."""
+    iterator = iter(iterable)
+    chunk = list(itertools.islice(iterator, chunk_size))
+    while chunk:
+        yield chunk
+        chunk = list(itertools.islice(iterator, chunk_size))
+
+
 class OvnNbSynchronizer(db_sync_base.BaseOvnDbSynchronizer):
     """Synchronizer class for NB."""
 
@@ -84,6 +99,11 @@ class OvnNbSynchronizer(db_sync_base.BaseOvnDbSynchronizer):
         if not hasattr(self, 'ovn_log_driver'):
             self.ovn_log_driver = log_driver.OVNDriver()
             self.log_plugin.driver_manager.register_driver(self.ovn_log_driver)
+        # Number of inconsistencies found by each sync phase. A phase is run
+        # by a single thread, the name of the phase it runs is stored in
+        # _running_phase.
+        self._inconsistencies = collections.Counter()
+        self._running_phase = threading.local()
 
     def stop(self):
         if utils.is_ovn_l3(self.l3_plugin):
@@ -100,20 +120,126 @@ class OvnNbSynchronizer(db_sync_base.BaseOvnDbSynchronizer):
         LOG.debug("OVN-Northbound DB sync process started @ %s",
                   str(datetime.now()))
 
-        ctx = context.get_admin_context()
-        self.sync_port_groups(ctx)
-        self.sync_networks_ports_and_dhcp_opts(ctx)
-        self.sync_port_dns_records(ctx)
-        self.sync_acls(ctx)
-        self.sync_routers_and_rports(ctx)
-        self.sync_port_qos_policies(ctx)
-        self.sync_fip_qos_policies(ctx)
-        self.sync_fip_dnat_rules()
-        self.sync_fip_distributed_nat(ctx)
+        # The sync phases, in the order they run with a single worker, and
+        # the phases each of them depends on. The phases which do not depend
+        # on each other can run concurrently, in separate OVSDB
+        # transactions; a phase which reads or references the rows written
+        # by another one depends on it. For instance, the ACLs are set on the
+        # port groups and the logical switch ports, which are created by the
+        # port groups and the networks and ports phases.
+        networks = 'networks_ports_and_dhcp_opts'
+        phases = [
+            ('port_groups', self.sync_port_groups, ()),
+            (networks, self.sync_networks_ports_and_dhcp_opts,
+             ('port_groups',)),
+            ('port_dns_records', self.sync_port_dns_records, (networks,)),
+            ('acls', self.sync_acls, ('port_groups', networks)),
+            ('routers_and_rports', self.sync_routers_and_rports,
+             (networks,)),
+            ('port_qos_policies', self.sync_port_qos_policies, (networks,)),
+            ('fip_qos_policies', self.sync_fip_qos_policies,
+             ('routers_and_rports',)),
+            ('fip_dnat_rules', lambda ctx: self.sync_fip_dnat_rules(),
+             ('routers_and_rports',)),
+            ('fip_distributed_nat', self.sync_fip_distributed_nat,
+             ('fip_dnat_rules',)),
+        ]
+        self._inconsistencies.clear()
+        elapsed = self._run_sync_phases(
+            phases, ovn_conf.get_ovn_neutron_sync_workers())
+        for name, __, __ in phases:
+            LOG.info('OVN-NB Sync phase %(phase)s: %(count)d '
+                     'inconsistencies found in %(elapsed).2f seconds',
+                     {'phase': name, 'count': self._inconsistencies[name],
+                      'elapsed': elapsed[name]})
 
         LOG.debug("OVN-Northbound DB sync process completed @ %s",
                   str(datetime.now()))
 
+    def _run_sync_phases(self, phases, workers):
+        """Run the sync phases, each one once its dependencies completed.
+
+        Up to "workers" phases run concurrently, in separate threads: each
+        phase uses its own admin context and its own OVSDB transactions. If
+        a phase fails, no other phase is started and the exception is
+        raised once the running phases completed.
+
+        :param phases: list of (name, sync method, dependencies) tuples; the
+                       sync method is called with an admin context
+        :param workers: maximum number of phases running concurrently
+        :returns: a dict with the time spent by each phase, in seconds
+        """
+        if workers > 1:
+            executor = futurist.ThreadPoolExecutor(max_workers=workers)
+        else:
+            executor = futurist.SynchronousExecutor()
+        pending = list(phases)
+        running = {}
+        elapsed = {}
+        with executor:
+            while pending or running:
+                for phase in list(pending):
+                    if len(running) >= workers:
+                        break
+                    name, sync, requires = phase
+                    if all(req in elapsed for req in requires):
+                        pending.remove(phase)
+                        running[executor.submit(
+                            self._run_sync_phase, name, sync)] = name
+                done, __ = futures.wait(
+                    running, return_when=futures.FIRST_COMPLETED)
+                for future in done:
+                    elapsed[running.pop(future)] = future.result()
+        return elapsed
+
+    def _run_sync_phase(self, name, sync):
+        """Run a sync phase and return the time spent, in seconds"""
+        LOG.debug('OVN-NB Sync phase %s started', name)
+        start = timeutils.now()
+        self._running_phase.name = name
+        try:
+            # NOTE: a context (and its DB session) cannot be shared between
+            # threads, each phase creates its own one.
+            sync(context.get_admin_context())
+        finally:
+            self._running_phase.name = None
+        return timeutils.now() - start
+
+    def _count_inconsistencies(self, count=1):
+        """Count the inconsistencies found by the running sync phase"""
+        name = getattr(self._running_phase, 'name', None)
+        if name:
+            self._inconsistencies[name] += count
+
+    def _get_db_batches(self, get_all, ctx, filters=None):
+        """Yield the Neutron resources returned by get_all, by batches.
+
+        The resources are sorted by ID and each batch of
+        "[ovn] neutron_sync_batch_size" resources is read with one query,
+        using the last ID of the previous batch as the pagination marker.
+        """
+        batch_size = ovn_conf.get_ovn_neutron_sync_batch_size()
+        marker = None
+        while True:
+            batch = get_all(ctx, filters=filters, sorts=[('id', True)],
+                            limit=batch_size, marker=marker)
+            if batch:
+                yield batch
+            if len(batch) < batch_size:
+                return
+            marker = batch[-1]['id']
+
+    def _get_db_port_batches(self, ctx):
+        """Yield the Neutron ports by batches.
+
+        All the ports are returned in one batch if the batched sync is
+        disabled.
+        """
+        if ovn_conf.get_ovn_neutron_sync_batch_size():
+            yield from self._get_db_batches(self.core_plugin.get_ports, ctx)
+        else:
+            yield self.core_plugin.get_ports(ctx)
+
     def _create_port_in_ovn(self, ctx, port):
         # Remove any old ACLs for the port to avoid creating duplicate ACLs.
         self.ovn_nb_api.delete_acl(
@@ -154,6 +280,7 @@ class OvnNbSynchronizer(db_sync_base.BaseOvnDbSynchronizer):
 
         add_pgs = neutron_pgs.difference(ovn_pgs)
         remove_pgs = ovn_pgs.difference(neutron_pgs)
+        self._count_inconsistencies(len(add_pgs) + len(remove_pgs))
 
         if add_pgs or remove_pgs:
             LOG.warning('Number of Port Groups to add: %d, remove: %d',
@@ -161,44 +288,55 @@ class OvnNbSynchronizer(db_sync_base.BaseOvnDbSynchronizer):
 
         if self.mode == n_lib_ovn_const.OVN_DB_SYNC_MODE_REPAIR and (
                 add_pgs or remove_pgs):
-            if add_pgs:
-                db_ports = self.core_plugin.get_ports(ctx)
+            if not add_pgs:
+                db_port_batches = []
+            elif ovn_conf.get_ovn_neutron_sync_batch_size():
+                db_port_batches = self._get_db_port_batches(ctx)
+                is_port_in_ovn = self._is_port_in_ovn
+            else:
+                db_port_batches = [self.core_plugin.get_ports(ctx)]
                 ovn_ports = {p.name for p in
                              self.ovn_nb_api.lsp_list().execute()}
+                is_port_in_ovn = ovn_ports.__contains__
+            drop_pg = ovn_const.OVN_DROP_PORT_GROUP_NAME
+            add_drop_pg = drop_pg in add_pgs
+            add_sg_pgs = add_pgs - {drop_pg}
             with self.ovn_nb_api.transaction(check_error=True) as txn:
-                pg = ovn_const.OVN_DROP_PORT_GROUP_NAME
                 # Process default drop port group first
-                if pg in add_pgs:
-                    txn.add(self.ovn_nb_api.pg_add(name=pg, acls=[]))
-                    add_pgs.remove(pg)
-                    # Add ports to the drop port group. Only add those that
-                    # already exists in OVN. The rest will be added during the
-                    # ports sync operation later.
-                    for n_port in db_ports:
-                        if ((utils.is_security_groups_enabled(n_port) or
-                             utils.is_port_security_enabled(n_port)) and
-                                n_port['id'] in ovn_ports):
-                            txn.add(self.ovn_nb_api.pg_add_ports(
-                                pg, n_port['id']))
-
-                for pg in add_pgs:
+                if add_drop_pg:
+                    txn.add(self.ovn_nb_api.pg_add(name=drop_pg, acls=[]))
+                for pg in add_sg_pgs:
                     # If it's a security group PG, add the ext id
                     ext_ids = {ovn_const.OVN_SG_EXT_ID_KEY: neutron_sgs[pg]}
                     txn.add(self.ovn_nb_api.pg_add(name=pg, acls=[],
                                                 external_ids=ext_ids))
-                    # Add the ports belonging to the SG to this port group
-                    for n_port in db_ports:
-                        if (neutron_sgs[pg] in n_port['security_groups'] and
-                                n_port['id'] in ovn_ports):
-                            txn.add(self.ovn_nb_api.pg_add_ports(
-                                pg, n_port['id']))
                 for pg in remove_pgs:
                     txn.add(self.ovn_nb_api.pg_del(pg))
 
+            # Add the ports to the new port groups. Only add those that
+            # already exists in OVN. The rest will be added during the ports
+            # sync operation later.
+            for db_ports in db_port_batches:
+                with self.ovn_nb_api.transaction(check_error=True) as txn:
+                    for n_port in db_ports:
+                        if not is_port_in_ovn(n_port['id']):
+                            continue
+                        if add_drop_pg and (
+                                utils.is_security_groups_enabled(n_port) or
+                                utils.is_port_security_enabled(n_port)):
+                            txn.add(self.ovn_nb_api.pg_add_ports(
+                                drop_pg, n_port['id']))
+                        # Add the ports belonging to the SG to its port group
+                        for sg_id in n_port['security_groups']:
+                            pg = utils.ovn_port_group_name(sg_id)
+                            if pg in add_sg_pgs:
+                                txn.add(self.ovn_nb_api.pg_add_ports(
+                                    pg, n_port['id']))
+
         LOG.debug('OVN-NB Sync port groups completed @ %s',
                   str(datetime.now()))
 
-    def _get_acls_from_port_groups(self):
+    def _get_acls_from_port_groups(self, port_groups):
         ovn_acls = []
         # Options and label columns are only present for OVN >= 22.03.
         # Furthermore label is a randint so it cannot be compared with any
@@ -207,7 +345,7 @@ class OvnNbSynchronizer(db_sync_base.BaseOvnDbSynchronizer):
                        set(ovn_const.ACL_EXPECTED_COLUMNS_NBDB))
         acl_columns.discard('external_ids')
         id_key = ovn_const.OVN_SG_RULE_EXT_ID_KEY
-        for pg in self.ovn_nb_api.db_list_rows('Port_Group').execute():
+        for pg in port_groups:
             acls = getattr(pg, 'acls', [])
             for acl in acls:
                 acl_string = {k: getattr(acl, k) for k in acl_columns}
@@ -231,44 +369,37 @@ class OvnNbSynchronizer(db_sync_base.BaseOvnDbSynchronizer):
 
         return ovn_acls
 
-    def sync_acls(self, ctx):
-        """Sync ACLs between neutron and NB.
-
-        @param ctx: neutron_lib.context
-        @type  ctx: object of type neutron_lib.context.Context
-        @return: Nothing
-        """
-        LOG.debug('OVN-NB Sync ACLs started @ %s', str(datetime.now()))
+    def _get_acls_from_lswitches(self):
+        return [
+            (row.name, row.acls)
+            for row in self.ovn_nb_api._tables['Logical_Switch'].rows.values()
+            if ovn_const.OVN_NETWORK_NAME_EXT_ID_KEY in row.external_ids]
 
-        neutron_acls = []
-        # we have to fetch groups to determine if stateful is set
-        for sg in self.core_plugin.get_security_groups(ctx):
-            stateful = sg.get("stateful", True)
-            pg_name = utils.ovn_port_group_name(sg['id'])
-            for sgr in self.core_plugin.get_security_group_rules(
-                    ctx, {'security_group_id': sg['id']}):
-                neutron_acls.append(
-                    acl_utils._add_sg_rule_acl_for_port_group(
-                        pg_name, stateful, sgr)
-                )
+    def _calculate_acls_differences(self, neutron_acls, ovn_acls):
+        """Compare the ACLs of Neutron and of the OVN NB DB.
 
+        @return: tuple of the list of ACLs to add, the list of ACLs to
+                 remove and the list of OVN ACLs without security group
+                 rule ID (the default ACLs, compared separately)
+        """
         # Sort the acls in the Neutron database according to the security
         # group rule ID for easy comparison in the future.
-        neutron_acls.sort(key=lambda x: x[ovn_const.OVN_SG_RULE_EXT_ID_KEY])
-        neutron_default_acls = acl_utils.add_acls_for_drop_port_group(
-            ovn_const.OVN_DROP_PORT_GROUP_NAME)
-
-        # Add logging options
-        self.ovn_log_driver.add_logging_options_to_acls(neutron_acls, ctx)
-        self.ovn_log_driver.add_logging_options_to_acls(neutron_default_acls,
-                                                        ctx)
-        ovn_acls = self._get_acls_from_port_groups()
+        neutron_acls = sorted(
+            neutron_acls, key=lambda x: x[ovn_const.OVN_SG_RULE_EXT_ID_KEY])
+        # There may be some ACLs in the OVN database that do not have
+        # security group rule id. These are the default rules, which
+        # will be specially compared and processed later.
+        ovn_default_acls = [
+            oa for oa in ovn_acls
+            if not oa.get(ovn_const.OVN_SG_RULE_EXT_ID_KEY)]
         # Sort the acls in the ovn database according to the security
         # group rule id for easy comparison in the future.
-        ovn_acls.sort(key=lambda x: x.get(
-            ovn_const.OVN_SG_RULE_EXT_ID_KEY, ""))
+        ovn_acls = sorted(
+            (oa for oa in ovn_acls
+             if oa.get(ovn_const.OVN_SG_RULE_EXT_ID_KEY)),
+            key=lambda x: x[ovn_const.OVN_SG_RULE_EXT_ID_KEY])
         neutron_num, ovn_num = len(neutron_acls), len(ovn_acls)
-        add_acls, remove_acls, ovn_default_acls = [], [], []
+        add_acls, remove_acls = [], []
         n_index = o_index = 0
         # neutron_acls and ovn_acls have been sorted, and we need to traverse
         # both arrays from scratch until we reach the end of one of them.
@@ -283,14 +414,8 @@ class OvnNbSynchronizer(db_sync_base.BaseOvnDbSynchronizer):
         while n_index < neutron_num and o_index < ovn_num:
             na, oa = neutron_acls[n_index], ovn_acls[o_index]
             n_id = na[ovn_const.OVN_SG_RULE_EXT_ID_KEY]
-            o_id = oa.get(ovn_const.OVN_SG_RULE_EXT_ID_KEY)
-            if not o_id:
-                # There may be some ACLs in the OVN database that do not have
-                # security group rule id. These are the default rules, which
-                # will be specially compared and processed later.
-                ovn_default_acls.append(oa)
-                o_index += 1
-            elif n_id == o_id:
+            o_id = oa[ovn_const.OVN_SG_RULE_EXT_ID_KEY]
+            if n_id == o_id:
                 if any(item not in na.items() for item in oa.items()):
                     for item in oa.items():
                         if item not in na.items():
@@ -326,8 +451,7 @@ class OvnNbSynchronizer(db_sync_base.BaseOvnDbSynchronizer):
             add_rem_acls = []
             # Make a list of non-default rule ACLs (they have a security group
             # rule id). See ovn_default_acls code/comment above for more info.
-            nd_ovn_acls = [copy_acl_rem_id_key(oa) for oa in ovn_acls
-                           if ovn_const.OVN_SG_RULE_EXT_ID_KEY in oa]
+            nd_ovn_acls = [copy_acl_rem_id_key(oa) for oa in ovn_acls]
             # We must copy here since we need to keep the original
             # 'add_acl' intact for removal
             for add_acl in add_acls:
@@ -348,27 +472,33 @@ class OvnNbSynchronizer(db_sync_base.BaseOvnDbSynchronizer):
             # Any OVN ACLs not matching the Neutron ACLs is removed.
             remove_acls.extend(ovn_acls[o_index:])
 
-        # We need to remove also all the ACLs applied to Logical Switches
-        def get_num_acls(ovn_acls):
-            return len([item for sublist in ovn_acls for item in sublist[1]])
+        return add_acls, remove_acls, ovn_default_acls
 
-        ovn_acls_from_ls = [
-            (row.name, row.acls)
-            for row in self.ovn_nb_api._tables['Logical_Switch'].rows.values()
-            if ovn_const.OVN_NETWORK_NAME_EXT_ID_KEY in row.external_ids]
-        num_acls_to_remove_from_ls = get_num_acls(ovn_acls_from_ls)
-
-        # Remove the common ones
+    @staticmethod
+    def _remove_common_default_acls(neutron_default_acls, ovn_default_acls):
+        """Remove the default ACLs present in Neutron and in the OVN NB DB"""
         for na in list(neutron_default_acls):
             for ovn_a in ovn_default_acls.copy():
                 if all(item in na.items() for item in ovn_a.items()):
                     neutron_default_acls.remove(na)
                     ovn_default_acls.remove(ovn_a)
                     break
-        neutron_acls = add_acls + neutron_default_acls
-        ovn_acls = remove_acls + ovn_default_acls
+
+    def _apply_acls_differences(self, ctx, neutron_acls, ovn_acls,
+                                ovn_acls_from_ls=()):
+        """Add and remove the ACLs of port groups in the OVN NB DB.
+
+        @param neutron_acls: list of ACLs to add
+        @param ovn_acls: list of ACLs to remove
+        @param ovn_acls_from_ls: list of (lswitch_name, list_of_acls) tuples;
+                                 these ACLs of Logical Switches are removed
+        """
+        def get_num_acls(ovn_acls):
+            return len([item for sublist in ovn_acls for item in sublist[1]])
+
         num_acls_to_add = len(neutron_acls)
-        num_acls_to_remove = len(ovn_acls) + num_acls_to_remove_from_ls
+        num_acls_to_remove = len(ovn_acls) + get_num_acls(ovn_acls_from_ls)
+        self._count_inconsistencies(num_acls_to_add + num_acls_to_remove)
         if num_acls_to_add or num_acls_to_remove:
             LOG.warning('ACLs to be added: %(add)d '
                         'ACLs to be removed: %(remove)d',
@@ -430,6 +560,105 @@ class OvnNbSynchronizer(db_sync_base.BaseOvnDbSynchronizer):
                         raise
                 break
 
+    def sync_acls(self, ctx):
+        """Sync ACLs between neutron and NB.
+
+        @param ctx: neutron_lib.context
+        @type  ctx: object of type neutron_lib.context.Context
+        @return: Nothing
+        """
+        if ovn_conf.get_ovn_neutron_sync_batch_size():
+            self._sync_acls_in_batches(ctx)
+            return
+
+        LOG.debug('OVN-NB Sync ACLs started @ %s', str(datetime.now()))
+
+        neutron_acls = []
+        # we have to fetch groups to determine if stateful is set
+        for sg in self.core_plugin.get_security_groups(ctx):
+            stateful = sg.get("stateful", True)
+            pg_name = utils.ovn_port_group_name(sg['id'])
+            for sgr in self.core_plugin.get_security_group_rules(
+                    ctx, {'security_group_id': sg['id']}):
+                neutron_acls.append(
+                    acl_utils._add_sg_rule_acl_for_port_group(
+                        pg_name, stateful, sgr)
+                )
+
+        neutron_default_acls = acl_utils.add_acls_for_drop_port_group(
+            ovn_const.OVN_DROP_PORT_GROUP_NAME)
+
+        # Add logging options
+        self.ovn_log_driver.add_logging_options_to_acls(neutron_acls, ctx)
+        self.ovn_log_driver.add_logging_options_to_acls(neutron_default_acls,
+                                                        ctx)
+        ovn_acls = self._get_acls_from_port_groups(
+            self.ovn_nb_api.db_list_rows('Port_Group').execute())
+        add_acls, remove_acls, ovn_default_acls = (
+            self._calculate_acls_differences(neutron_acls, ovn_acls))
+
+        # We need to remove also all the ACLs applied to Logical Switches
+        ovn_acls_from_ls = self._get_acls_from_lswitches()
+
+        # Remove the common ones
+        self._remove_common_default_acls(neutron_default_acls,
+                                         ovn_default_acls)
+        self._apply_acls_differences(ctx, add_acls + neutron_default_acls,
+                                     remove_acls + ovn_default_acls,
+                                     ovn_acls_from_ls)
+
+        LOG.debug('OVN-NB Sync ACLs completed @ %s', str(datetime.now()))
+
+    def _sync_acls_in_batches(self, ctx):
+        """Sync the ACLs, by batches of security groups.
+
+        The ACLs of the security group rules of each batch of security
+        groups are compared with the ACLs of their port groups. Then the
+        ACLs of the other port groups (the default drop port group and the
+        port groups of security groups not found in Neutron) are checked.
+        """
+        LOG.debug('OVN-NB Sync ACLs started @ %s', str(datetime.now()))
+
+        neutron_pg_names = {ovn_const.OVN_DROP_PORT_GROUP_NAME}
+        for sgs in self._get_db_batches(self.core_plugin.get_security_groups,
+                                        ctx):
+            # we have to fetch groups to determine if stateful is set
+            stateful = {sg['id']: sg.get("stateful", True) for sg in sgs}
+            pg_names = [utils.ovn_port_group_name(sg_id)
+                        for sg_id in stateful]
+            neutron_pg_names.update(pg_names)
+            neutron_acls = [
+                acl_utils._add_sg_rule_acl_for_port_group(
+                    utils.ovn_port_group_name(sgr['security_group_id']),
+                    stateful[sgr['security_group_id']], sgr)
+                for sgr in self.core_plugin.get_security_group_rules(
+                    ctx, {'security_group_id': list(stateful)})]
+            self.ovn_log_driver.add_logging_options_to_acls(neutron_acls, ctx)
+
+            port_groups = [self.ovn_nb_api.get_port_group(pg_name)
+                           for pg_name in pg_names]
+            ovn_acls = self._get_acls_from_port_groups(
+                pg for pg in port_groups if pg)
+            add_acls, remove_acls, __ = self._calculate_acls_differences(
+                neutron_acls, ovn_acls)
+            self._apply_acls_differences(ctx, add_acls, remove_acls)
+
+        neutron_default_acls = acl_utils.add_acls_for_drop_port_group(
+            ovn_const.OVN_DROP_PORT_GROUP_NAME)
+        self.ovn_log_driver.add_logging_options_to_acls(neutron_default_acls,
+                                                        ctx)
+        port_groups = [
+            pg for pg in self.ovn_nb_api.db_list_rows('Port_Group').execute()
+            if pg.name == ovn_const.OVN_DROP_PORT_GROUP_NAME or
+            pg.name not in neutron_pg_names]
+        __, remove_acls, ovn_default_acls = self._calculate_acls_differences(
+            [], self._get_acls_from_port_groups(port_groups))
+        self._remove_common_default_acls(neutron_default_acls,
+                                         ovn_default_acls)
+        self._apply_acls_differences(ctx, neutron_default_acls,
+                                     remove_acls + ovn_default_acls,
+                                     self._get_acls_from_lswitches())
+
         LOG.debug('OVN-NB Sync ACLs completed @ %s', str(datetime.now()))
 
     def _calculate_routes_differences(self, ovn_routes, db_routes):
@@ -580,6 +809,7 @@ class OvnNbSynchronizer(db_sync_base.BaseOvnDbSynchronizer):
         for lrouter in del_lrouters_list:
             LOG.warning("Router found in OVN NB DB but not in "
                         "Neutron, router id=%s", lrouter['name'])
+            self._count_inconsistencies()
             if self.mode != n_lib_ovn_const.OVN_DB_SYNC_MODE_REPAIR:
                 continue
             LOG.warning("Deleting the router %s from OVN NB DB",
@@ -591,6 +821,7 @@ class OvnNbSynchronizer(db_sync_base.BaseOvnDbSynchronizer):
         for lrport_info in del_lrouter_ports_list:
             LOG.warning("Router Port found in OVN NB DB but not in "
                         "Neutron, port_id=%s", lrport_info['port'])
+            self._count_inconsistencies()
             if self.mode != n_lib_ovn_const.OVN_DB_SYNC_MODE_REPAIR:
                 continue
             LOG.warning("Deleting the port %s from OVN NB DB",
@@ -606,6 +837,7 @@ class OvnNbSynchronizer(db_sync_base.BaseOvnDbSynchronizer):
                 LOG.warning("Router %(id)s static routes %(route)s "
                             "found in Neutron but not in OVN NB DB",
                             {'id': sroute['id'], 'route': sroute['add']})
+                self._count_inconsistencies(len(sroute['add']))
                 if self.mode != n_lib_ovn_const.OVN_DB_SYNC_MODE_REPAIR:
                     continue
                 LOG.warning("Add static routes %s to OVN NB DB", sroute['add'])
@@ -623,6 +855,7 @@ class OvnNbSynchronizer(db_sync_base.BaseOvnDbSynchronizer):
                 LOG.warning("Router %(id)s static routes %(route)s "
                             "found in OVN NB DB but not in Neutron",
                             {'id': sroute['id'], 'route': sroute['del']})
+                self._count_inconsistencies(len(sroute['del']))
                 if self.mode != n_lib_ovn_const.OVN_DB_SYNC_MODE_REPAIR:
                     continue
                 LOG.warning("Delete static routes %s from OVN NB DB",
@@ -640,6 +873,7 @@ class OvnNbSynchronizer(db_sync_base.BaseOvnDbSynchronizer):
                 LOG.warning("Router %(id)s floating IPs %(fip)s "
                             "found in OVN NB DB but not in Neutron",
                             {'id': fip['id'], 'fip': fip['del']})
+                self._count_inconsistencies(len(fip['del']))
                 if self.mode != n_lib_ovn_const.OVN_DB_SYNC_MODE_REPAIR:
                     continue
                 LOG.warning(
@@ -651,6 +885,7 @@ class OvnNbSynchronizer(db_sync_base.BaseOvnDbSynchronizer):
                 LOG.warning("Router %(id)s floating IPs %(fip)s "
                             "found in Neutron but not in OVN NB DB",
                             {'id': fip['id'], 'fip': fip['add']})
+                self._count_inconsistencies(len(fip['add']))
                 if self.mode != n_lib_ovn_const.OVN_DB_SYNC_MODE_REPAIR:
                     continue
                 LOG.warning("Add floating IPs %s to OVN NB DB", fip['add'])
@@ -665,6 +900,7 @@ class OvnNbSynchronizer(db_sync_base.BaseOvnDbSynchronizer):
                             "IPs %(fip)s found in OVN NB DB but not in "
                             "Neutron",
                             {'id': pf['id'], 'fip': pf['del']})
+                self._count_inconsistencies(len(pf['del']))
                 if self.mode != n_lib_ovn_const.OVN_DB_SYNC_MODE_REPAIR:
                     continue
                 LOG.warning(
@@ -677,6 +913,7 @@ class OvnNbSynchronizer(db_sync_base.BaseOvnDbSynchronizer):
                             "IPs %(fip)s Neutron out of sync or missing "
                             "in OVN NB DB",
                             {'id': pf['id'], 'fip': pf['add']})
+                self._count_inconsistencies(len(pf['add']))
                 if self.mode != n_lib_ovn_const.OVN_DB_SYNC_MODE_REPAIR:
                     continue
                 LOG.warning("Add port forwarding for floating IPs %s "
@@ -691,6 +928,7 @@ class OvnNbSynchronizer(db_sync_base.BaseOvnDbSynchronizer):
                 LOG.warning("Router %(id)s SNAT %(snat)s "
                             "found in OVN NB DB but not in Neutron",
                             {'id': snat['id'], 'snat': snat['del']})
+                self._count_inconsistencies(len(snat['del']))
                 if self.mode != n_lib_ovn_const.OVN_DB_SYNC_MODE_REPAIR:
                     continue
                 LOG.warning("Delete SNATs %s from OVN NB DB", snat['del'])
@@ -704,6 +942,7 @@ class OvnNbSynchronizer(db_sync_base.BaseOvnDbSynchronizer):
                 LOG.warning("Router %(id)s SNAT %(snat)s "
                             "found in Neutron but not in OVN NB DB",
                             {'id': snat['id'], 'snat': snat['add']})
+                self._count_inconsistencies(len(snat['add']))
                 if self.mode != n_lib_ovn_const.OVN_DB_SYNC_MODE_REPAIR:
                     continue
                 LOG.warning("Add SNATs %s to OVN NB DB", snat['add'])
@@ -735,13 +974,70 @@ class OvnNbSynchronizer(db_sync_base.BaseOvnDbSynchronizer):
                       "sync routers and router ports")
             return
 
+        if ovn_conf.get_ovn_neutron_sync_batch_size():
+            self._sync_routers_and_rports_in_batches(ctx)
+            return
+
+        LOG.debug('OVN-NB Sync routers and router ports started @ %s',
+                  str(datetime.now()))
+
+        db_routers, db_extends, db_router_ports = (
+            self._get_db_routers_and_rports(
+                ctx, self.l3_plugin.get_routers(ctx)))
+        lrouters = self.ovn_nb_api.get_all_logical_routers_with_rports()
+        self._sync_routers_and_rports_differences(
+            ctx, db_routers, db_extends, db_router_ports, lrouters)
+
+        LOG.debug('OVN-NB Sync routers and router ports completed @ %s',
+                  str(datetime.now()))
+
+    def _sync_routers_and_rports_in_batches(self, ctx):
+        """Sync the routers and router ports, by batches of routers.
+
+        Each batch of Neutron routers is compared with the corresponding
+        logical routers, looked up by name in the OVN NB DB. Then the OVN
+        logical routers are checked against the Neutron DB by batches, to
+        delete the ones not found in Neutron.
+        """
         LOG.debug('OVN-NB Sync routers and router ports started @ %s',
                   str(datetime.now()))
 
+        for routers in self._get_db_batches(self.l3_plugin.get_routers, ctx):
+            db_routers, db_extends, db_router_ports = (
+                self._get_db_routers_and_rports(ctx, routers))
+            lrouters = self.ovn_nb_api.get_logical_routers_with_rports(
+                list(db_routers))
+            self._sync_routers_and_rports_differences(
+                ctx, db_routers, db_extends, db_router_ports, lrouters)
+
+        del_lrouters_list = []
+        for lrouters in _chunks(
+                self.ovn_nb_api.iter_logical_routers_with_rports(),
+                ovn_conf.get_ovn_neutron_sync_batch_size()):
+            db_router_ids = {
+                router['id'] for router in self.l3_plugin.get_routers(
+                    ctx, filters={'id': [lr['name'] for lr in lrouters]})
+                if utils.is_ovn_provider_router(router)}
+            del_lrouters_list.extend(
+                {'name': lr['name']} for lr in lrouters
+                if lr['name'] not in db_router_ids)
+        with self.ovn_nb_api.transaction(check_error=True) as txn:
+            self._add_routers_del_txn(txn, del_lrouters_list)
+
+        LOG.debug('OVN-NB Sync routers and router ports completed @ %s',
+                  str(datetime.now()))
+
+    def _get_db_routers_and_rports(self, ctx, routers):
+        """Get the Neutron data of routers to compare with the OVN NB DB.
+
+        @return: tuple of the dict of routers, the dict of their routes,
+                 SNATs, floating IPs and port forwardings and the dict of
+                 their router ports; all of them indexed by ID
+        """
         db_routers = {}
         db_extends = {}
         db_router_ports = {}
-        for router in self.l3_plugin.get_routers(ctx):
+        for router in routers:
             if not utils.is_ovn_provider_router(router):
                 continue
             db_routers[router['id']] = router
@@ -806,9 +1102,11 @@ class OvnNbSynchronizer(db_sync_base.BaseOvnDbSynchronizer):
             db_router_ports[interface['id']]['networks'] = networks
             db_router_ports[interface['id']][
                 'ipv6_ra_configs'] = ipv6_ra_configs
+        return db_routers, db_extends, db_router_ports
 
-        lrouters = self.ovn_nb_api.get_all_logical_routers_with_rports()
-
+    def _sync_routers_and_rports_differences(self, ctx, db_routers,
+                                             db_extends, db_router_ports,
+                                             lrouters):
         del_lrouters_list = []
         del_lrouter_ports_list = []
         update_sroutes_list = []
@@ -870,6 +1168,7 @@ class OvnNbSynchronizer(db_sync_base.BaseOvnDbSynchronizer):
                 continue
             LOG.warning("Router found in Neutron but not in "
                         "OVN NB DB, router id=%s", router['id'])
+            self._count_inconsistencies()
             if self.mode != n_lib_ovn_const.OVN_DB_SYNC_MODE_REPAIR:
                 continue
             LOG.warning("Creating the router %s in OVN NB DB", router['id'])
@@ -909,6 +1208,7 @@ class OvnNbSynchronizer(db_sync_base.BaseOvnDbSynchronizer):
         for rp_id, rrport in db_router_ports.items():
             LOG.warning("Router Port found in Neutron but not in OVN NB "
                         "DB, router port_id=%s", rrport['id'])
+            self._count_inconsistencies()
             if self.mode != n_lib_ovn_const.OVN_DB_SYNC_MODE_REPAIR:
                 continue
             LOG.warning("Creating the router port %s in OVN NB DB",
@@ -924,6 +1224,7 @@ class OvnNbSynchronizer(db_sync_base.BaseOvnDbSynchronizer):
             LOG.warning("Router Port port_id=%s needs to be updated in OVN NB "
                         "DB as network(s) have changed",
                         rport['id'])
+            self._count_inconsistencies()
             if self.mode != n_lib_ovn_const.OVN_DB_SYNC_MODE_REPAIR:
                 continue
             LOG.warning(
@@ -943,9 +1244,6 @@ class OvnNbSynchronizer(db_sync_base.BaseOvnDbSynchronizer):
             self._add_pfs_update_txn(ctx, txn, update_pfs_list)
             self._add_snats_update_txn(txn, update_snats_list)
 
-        LOG.debug('OVN-NB Sync routers and router ports completed @ %s',
-                  str(datetime.now()))
-
     def _sync_subnet_dhcp_options(self, ctx, db_networks,
                                   ovn_subnet_dhcp_options):
         LOG.debug('OVN-NB Sync DHCP options for Neutron subnets started')
@@ -982,6 +1280,7 @@ class OvnNbSynchronizer(db_sync_base.BaseOvnDbSynchronizer):
         for subnet_id, subnet in db_subnets.items():
             LOG.warning('DHCP options for subnet %s present in '
                         'Neutron but out of sync with OVN NB DB', subnet_id)
+            self._count_inconsistencies()
             if self.mode == n_lib_ovn_const.OVN_DB_SYNC_MODE_REPAIR:
                 # If neutron-server is running we could race and find a
                 # subnet without a cached network, just skip it to avoid
@@ -1011,6 +1310,7 @@ class OvnNbSynchronizer(db_sync_base.BaseOvnDbSynchronizer):
             LOG.warning('Out of sync DHCP options for subnet %s '
                         'found in OVN NB DB which need to be deleted',
                         dhcp_opt['external_ids']['subnet_id'])
+            self._count_inconsistencies()
             if self.mode == n_lib_ovn_const.OVN_DB_SYNC_MODE_REPAIR:
                 LOG.warning('Deleting DHCP options for subnet %s ',
                             dhcp_opt['external_ids']['subnet_id'])
@@ -1025,7 +1325,14 @@ class OvnNbSynchronizer(db_sync_base.BaseOvnDbSynchronizer):
                   '%s', str(datetime.now()))
 
     def _sync_port_dhcp_options(self, ports_need_sync_dhcp_opts,
-                                ovn_port_dhcpv4_opts, ovn_port_dhcpv6_opts):
+                                ovn_port_dhcpv4_opts, ovn_port_dhcpv6_opts,
+                                delete_stale=True):
+        """Sync the DHCP options of the ports.
+
+        The port DHCP options updated are removed from ovn_port_dhcpv4_opts
+        and ovn_port_dhcpv6_opts. If delete_stale is True, the remaining
+        ones are deleted from the OVN NB DB.
+        """
         LOG.debug('OVN-NB Sync DHCP options for Neutron ports with extra '
                   'dhcp options assigned started')
 
@@ -1064,22 +1371,26 @@ class OvnNbSynchronizer(db_sync_base.BaseOvnDbSynchronizer):
                     txn_commands.append(self.ovn_nb_api.set_lswitch_port(
                         lport_name=port['id'], **set_lsp))
 
-        for ip_v in [constants.IP_VERSION_4, constants.IP_VERSION_6]:
-            for port_id, dhcp_opt in ovn_port_dhcp_opts[ip_v].items():
-                LOG.warning(
-                    'Out of sync port DHCPv%(ip_version)d options for '
-                    '(subnet %(subnet_id)s port %(port_id)s) found in OVN '
-                    'NB DB which needs to be deleted',
-                    {'ip_version': ip_v,
-                     'subnet_id': dhcp_opt['external_ids']['subnet_id'],
-                     'port_id': port_id})
+        if delete_stale:
+            for ip_v in [constants.IP_VERSION_4, constants.IP_VERSION_6]:
+                for port_id, dhcp_opt in ovn_port_dhcp_opts[ip_v].items():
+                    LOG.warning(
+                        'Out of sync port DHCPv%(ip_version)d options for '
+                        '(subnet %(subnet_id)s port %(port_id)s) found in OVN '
+                        'NB DB which needs to be deleted',
+                        {'ip_version': ip_v,
+                         'subnet_id': dhcp_opt['external_ids']['subnet_id'],
+                         'port_id': port_id})
+                    self._count_inconsistencies()
 
-                if self.mode == n_lib_ovn_const.OVN_DB_SYNC_MODE_REPAIR:
-                    LOG.warning('Deleting port DHCPv%d options for '
-                                '(subnet %s, port %s)', ip_v,
-                                dhcp_opt['external_ids']['subnet_id'], port_id)
-                    txn_commands.append(self.ovn_nb_api.delete_dhcp_options(
-                        dhcp_opt['uuid']))
+                    if self.mode == n_lib_ovn_const.OVN_DB_SYNC_MODE_REPAIR:
+                        LOG.warning('Deleting port DHCPv%d options for '
+                                    '(subnet %s, port %s)', ip_v,
+                                    dhcp_opt['external_ids']['subnet_id'],
+                                    port_id)
+                        txn_commands.append(
+                            self.ovn_nb_api.delete_dhcp_options(
+                                dhcp_opt['uuid']))
 
         if txn_commands:
             with self.ovn_nb_api.transaction(check_error=True) as txn:
@@ -1106,6 +1417,7 @@ class OvnNbSynchronizer(db_sync_base.BaseOvnDbSynchronizer):
             if not metadata_ports:
                 LOG.warning('Missing metadata port found in Neutron for '
                             'network %s', net['id'])
+                self._count_inconsistencies()
                 if self.mode == n_lib_ovn_const.OVN_DB_SYNC_MODE_REPAIR:
                     try:
                         # Create the missing port in both Neutron and OVN.
@@ -1123,6 +1435,7 @@ class OvnNbSynchronizer(db_sync_base.BaseOvnDbSynchronizer):
                 for port in metadata_ports[1:]:
                     LOG.warning('Unnecessary DHCP port %s for network %s '
                                 'found in Neutron', port['id'], net['id'])
+                    self._count_inconsistencies()
                     if self.mode == n_lib_ovn_const.OVN_DB_SYNC_MODE_REPAIR:
                         LOG.warning('Deleting unnecessary DHCP port %s for '
                                     'network %s', port['id'], net['id'])
@@ -1133,6 +1446,7 @@ class OvnNbSynchronizer(db_sync_base.BaseOvnDbSynchronizer):
                     LOG.warning('Metadata port %s for network %s found in '
                                 'Neutron but not in OVN NB DB',
                                 port['id'], net['id'])
+                    self._count_inconsistencies()
                     if self.mode == n_lib_ovn_const.OVN_DB_SYNC_MODE_REPAIR:
                         LOG.warning('Creating metadata port %s for network '
                                     '%s in OVN NB DB',
@@ -1150,7 +1464,149 @@ class OvnNbSynchronizer(db_sync_base.BaseOvnDbSynchronizer):
                               'metadata port in network %s', net['id'])
         LOG.debug('OVN-NB Sync metadata ports completed')
 
+    def _calculate_provnet_ports_differences(self, ctx, lswitch, db_network,
+                                             add_provnet_ports_list,
+                                             del_provnet_ports_list):
+        db_segments = self.segments_plugin.get_segments(
+            ctx, filters={'network_id': [db_network['id']],
+                          'is_dynamic': False})
+        segments_provnet_port_names = []
+        for db_segment in db_segments:
+            physnet = db_segment.get(segment_def.PHYSICAL_NETWORK)
+            pname = utils.ovn_provnet_port_name(db_segment['id'])
+            segments_provnet_port_names.append(pname)
+            if physnet and pname not in lswitch['provnet_ports']:
+                add_provnet_ports_list.append(
+                    {'network': db_network,
+                     'segment': db_segment,
+                     'lswitch': lswitch['name']})
+        # Delete orphaned provnet ports
+        for provnet_port in lswitch['provnet_ports']:
+            if provnet_port in segments_provnet_port_names:
+                continue
+            if provnet_port not in [
+                    utils.ovn_provnet_port_name(v['segment'])
+                    for v in add_provnet_ports_list]:
+                del_provnet_ports_list.append(
+                    {'network': db_network,
+                     'lport': provnet_port,
+                     'lswitch': lswitch['name']})
+
+    def _create_networks_in_ovn(self, ctx, networks):
+        for network in networks:
+            LOG.warning("Network found in Neutron but not in "
+                        "OVN NB DB, network_id=%s", network['id'])
+            self._count_inconsistencies()
+            if self.mode == n_lib_ovn_const.OVN_DB_SYNC_MODE_REPAIR:
+                try:
+                    LOG.warning('Creating network %s in OVN NB DB',
+                                network['id'])
+                    self._ovn_client.create_network(ctx, network)
+                except RuntimeError:
+                    LOG.warning("Create network in OVN NB DB failed for "
+                                "network %s", network['id'])
+                except n_exc.IpAddressGenerationFailure:
+                    LOG.warning("No more IP addresses available during "
+                                "implicit port creation while creating "
+                                "network %s", network['id'])
+
+    def _create_missing_port_in_ovn(self, ctx, port, ovn_all_dhcp_options):
+        LOG.warning("Port found in Neutron but not in OVN NB "
+                    "DB, port_id=%s", port['id'])
+        self._count_inconsistencies()
+        if self.mode != n_lib_ovn_const.OVN_DB_SYNC_MODE_REPAIR:
+            return
+        try:
+            LOG.warning('Creating the port %s in OVN NB DB', port['id'])
+            self._create_port_in_ovn(ctx, port)
+            if port['id'] in ovn_all_dhcp_options['ports_v4']:
+                __, lsp_opts = utils.get_lsp_dhcp_opts(
+                    port, constants.IP_VERSION_4)
+                if lsp_opts:
+                    ovn_all_dhcp_options['ports_v4'].pop(port['id'])
+            if port['id'] in ovn_all_dhcp_options['ports_v6']:
+                __, lsp_opts = utils.get_lsp_dhcp_opts(
+                    port, constants.IP_VERSION_6)
+                if lsp_opts:
+                    ovn_all_dhcp_options['ports_v6'].pop(port['id'])
+        except RuntimeError:
+            LOG.warning("Create port in OVN NB DB failed for"
+                        " port %s", port['id'])
+
+    def _add_lswitches_del_txn(self, txn, del_lswitchs_list):
+        for lswitch in del_lswitchs_list:
+            LOG.warning("Network found in OVN NB DB but not in "
+                        "Neutron, network_id=%s", lswitch['name'])
+            self._count_inconsistencies()
+            if self.mode == n_lib_ovn_const.OVN_DB_SYNC_MODE_REPAIR:
+                LOG.warning('Deleting network %s from OVN NB DB',
+                            lswitch['name'])
+                txn.add(self.ovn_nb_api.ls_del(lswitch['name']))
+
+    def _add_provnet_ports_update_txn(self, ctx, txn, add_provnet_ports_list,
+                                      del_provnet_ports_list):
+        for provnet_port_info in add_provnet_ports_list:
+            network = provnet_port_info['network']
+            segment = provnet_port_info['segment']
+            LOG.warning("Provider network found in Neutron but "
+                        "provider network port not found in OVN NB DB, "
+                        "network_id=%(net)s segment_id=%(seg)s",
+                        {'net': network['id'],
+                         'seg': segment['id']})
+            self._count_inconsistencies()
+            if self.mode == n_lib_ovn_const.OVN_DB_SYNC_MODE_REPAIR:
+                LOG.warning('Creating provider network port %s in '
+                            'OVN NB DB',
+                            utils.ovn_provnet_port_name(segment['id']))
+                self._ovn_client.create_provnet_port(
+                    ctx, network['id'], segment, txn=txn, network=network)
+
+        for provnet_port_info in del_provnet_ports_list:
+            network = provnet_port_info['network']
+            lport = provnet_port_info['lport']
+            lswitch = provnet_port_info['lswitch']
+            LOG.warning("Provider network port found in OVN NB DB, "
+                        "but not in Neutron network_id=%(net)s "
+                        "port_name=%(lport)s",
+                        {'net': network,
+                         'seg': lport})
+            self._count_inconsistencies()
+            if self.mode == n_lib_ovn_const.OVN_DB_SYNC_MODE_REPAIR:
+                LOG.warning('Deleting provider network port %s from '
+                            'OVN NB DB', lport)
+                txn.add(self.ovn_nb_api.delete_lswitch_port(
+                    lport_name=lport,
+                    lswitch_name=lswitch))
+
+    def _add_lports_del_txn(self, txn, del_lports_list, ovn_all_dhcp_options):
+        for lport_info in del_lports_list:
+            LOG.warning("Port found in OVN NB DB but not in "
+                        "Neutron, port_id=%s", lport_info['port'])
+            self._count_inconsistencies()
+            if self.mode == n_lib_ovn_const.OVN_DB_SYNC_MODE_REPAIR:
+                LOG.warning('Deleting port %s from OVN NB DB',
+                            lport_info['port'])
+                txn.add(self.ovn_nb_api.delete_lswitch_port(
+                    lport_name=lport_info['port'],
+                    lswitch_name=lport_info['lswitch']))
+                if lport_info['port'] in ovn_all_dhcp_options['ports_v4']:
+                    LOG.warning('Deleting port DHCPv4 options for '
+                                '(port %s)', lport_info['port'])
+                    txn.add(self.ovn_nb_api.delete_dhcp_options(
+                        ovn_all_dhcp_options['ports_v4'].pop(
+                            lport_info['port'])['uuid']))
+                if lport_info['port'] in ovn_all_dhcp_options['ports_v6']:
+                    LOG.warning('Deleting port DHCPv6 options for '
+                                '(port %s)', lport_info['port'])
+                    txn.add(self.ovn_nb_api.delete_dhcp_options(
+                        ovn_all_dhcp_options['ports_v6'].pop(
+                            lport_info['port'])['uuid']))
+
     def sync_networks_ports_and_dhcp_opts(self, ctx):
+        if ovn_conf.get_ovn_neutron_sync_batch_size():
+            self._sync_networks_ports_and_dhcp_opts_in_batches(ctx)
+            return
+
         LOG.debug('OVN-NB Sync networks, ports and DHCP options started @ %s',
                   str(datetime.now()))
         db_networks = {}
@@ -1182,140 +1638,29 @@ class OvnNbSynchronizer(db_sync_base.BaseOvnDbSynchronizer):
                     else:
                         del_lports_list.append({'port': lport,
                                                 'lswitch': lswitch['name']})
-                db_network = db_networks[lswitch['name']]
-                db_segments = self.segments_plugin.get_segments(
-                    ctx, filters={'network_id': [db_network['id']],
-                                  'is_dynamic': False})
-                segments_provnet_port_names = []
-                for db_segment in db_segments:
-                    physnet = db_segment.get(segment_def.PHYSICAL_NETWORK)
-                    pname = utils.ovn_provnet_port_name(db_segment['id'])
-                    segments_provnet_port_names.append(pname)
-                    if physnet and pname not in lswitch['provnet_ports']:
-                        add_provnet_ports_list.append(
-                            {'network': db_network,
-                             'segment': db_segment,
-                             'lswitch': lswitch['name']})
-                # Delete orphaned provnet ports
-                for provnet_port in lswitch['provnet_ports']:
-                    if provnet_port in segments_provnet_port_names:
-                        continue
-                    if provnet_port not in [
-                            utils.ovn_provnet_port_name(v['segment'])
-                            for v in add_provnet_ports_list]:
-                        del_provnet_ports_list.append(
-                            {'network': db_network,
-                             'lport': provnet_port,
-                             'lswitch': lswitch['name']})
-
+                self._calculate_provnet_ports_differences(
+                    ctx, lswitch, db_networks[lswitch['name']],
+                    add_provnet_ports_list, del_provnet_ports_list)
                 del db_networks[lswitch['name']]
             else:
                 del_lswitchs_list.append(lswitch)
 
-        for network in db_networks.values():
-            LOG.warning("Network found in Neutron but not in "
-                        "OVN NB DB, network_id=%s", network['id'])
-            if self.mode == n_lib_ovn_const.OVN_DB_SYNC_MODE_REPAIR:
-                try:
-                    LOG.warning('Creating network %s in OVN NB DB',
-                                network['id'])
-                    self._ovn_client.create_network(ctx, network)
-                except RuntimeError:
-                    LOG.warning("Create network in OVN NB DB failed for "
-                                "network %s", network['id'])
-                except n_exc.IpAddressGenerationFailure:
-                    LOG.warning("No more IP addresses available during "
-                                "implicit port creation while creating "
-                                "network %s", network['id'])
+        self._create_networks_in_ovn(ctx, db_networks.values())
 
         self._sync_metadata_ports(ctx, db_ports)
 
         self._sync_subnet_dhcp_options(
             ctx, db_network_cache, ovn_all_dhcp_options['subnets'])
 
-        for port_id, port in db_ports.items():
-            LOG.warning("Port found in Neutron but not in OVN NB "
-                        "DB, port_id=%s", port['id'])
-            if self.mode == n_lib_ovn_const.OVN_DB_SYNC_MODE_REPAIR:
-                try:
-                    LOG.warning('Creating the port %s in OVN NB DB',
-                                port['id'])
-                    self._create_port_in_ovn(ctx, port)
-                    if port_id in ovn_all_dhcp_options['ports_v4']:
-                        __, lsp_opts = utils.get_lsp_dhcp_opts(
-                            port, constants.IP_VERSION_4)
-                        if lsp_opts:
-                            ovn_all_dhcp_options['ports_v4'].pop(port_id)
-                    if port_id in ovn_all_dhcp_options['ports_v6']:
-                        __, lsp_opts = utils.get_lsp_dhcp_opts(
-                            port, constants.IP_VERSION_6)
-                        if lsp_opts:
-                            ovn_all_dhcp_options['ports_v6'].pop(port_id)
-                except RuntimeError:
-                    LOG.warning("Create port in OVN NB DB failed for"
-                                " port %s", port['id'])
+        for port in db_ports.values():
+            self._create_missing_port_in_ovn(ctx, port, ovn_all_dhcp_options)
 
         with self.ovn_nb_api.transaction(check_error=True) as txn:
-            for lswitch in del_lswitchs_list:
-                LOG.warning("Network found in OVN NB DB but not in "
-                            "Neutron, network_id=%s", lswitch['name'])
-                if self.mode == n_lib_ovn_const.OVN_DB_SYNC_MODE_REPAIR:
-                    LOG.warning('Deleting network %s from OVN NB DB',
-                                lswitch['name'])
-                    txn.add(self.ovn_nb_api.ls_del(lswitch['name']))
-
-            for provnet_port_info in add_provnet_ports_list:
-                network = provnet_port_info['network']
-                segment = provnet_port_info['segment']
-                LOG.warning("Provider network found in Neutron but "
-                            "provider network port not found in OVN NB DB, "
-                            "network_id=%(net)s segment_id=%(seg)s",
-                            {'net': network['id'],
-                             'seg': segment['id']})
-                if self.mode == n_lib_ovn_const.OVN_DB_SYNC_MODE_REPAIR:
-                    LOG.warning('Creating provider network port %s in '
-                                'OVN NB DB',
-                                utils.ovn_provnet_port_name(segment['id']))
-                    self._ovn_client.create_provnet_port(
-                        ctx, network['id'], segment, txn=txn, network=network)
-
-            for provnet_port_info in del_provnet_ports_list:
-                network = provnet_port_info['network']
-                lport = provnet_port_info['lport']
-                lswitch = provnet_port_info['lswitch']
-                LOG.warning("Provider network port found in OVN NB DB, "
-                            "but not in Neutron network_id=%(net)s "
-                            "port_name=%(lport)s",
-                            {'net': network,
-                             'seg': lport})
-                if self.mode == n_lib_ovn_const.OVN_DB_SYNC_MODE_REPAIR:
-                    LOG.warning('Deleting provider network port %s from '
-                                'OVN NB DB', lport)
-                    txn.add(self.ovn_nb_api.delete_lswitch_port(
-                        lport_name=lport,
-                        lswitch_name=lswitch))
-
-            for lport_info in del_lports_list:
-                LOG.warning("Port found in OVN NB DB but not in "
-                            "Neutron, port_id=%s", lport_info['port'])
-                if self.mode == n_lib_ovn_const.OVN_DB_SYNC_MODE_REPAIR:
-                    LOG.warning('Deleting port %s from OVN NB DB',
-                                lport_info['port'])
-                    txn.add(self.ovn_nb_api.delete_lswitch_port(
-                        lport_name=lport_info['port'],
-                        lswitch_name=lport_info['lswitch']))
-                    if lport_info['port'] in ovn_all_dhcp_options['ports_v4']:
-                        LOG.warning('Deleting port DHCPv4 options for '
-                                    '(port %s)', lport_info['port'])
-                        txn.add(self.ovn_nb_api.delete_dhcp_options(
-                            ovn_all_dhcp_options['ports_v4'].pop(
-                                lport_info['port'])['uuid']))
-                    if lport_info['port'] in ovn_all_dhcp_options['ports_v6']:
-                        LOG.warning('Deleting port DHCPv6 options for '
-                                    '(port %s)', lport_info['port'])
-                        txn.add(self.ovn_nb_api.delete_dhcp_options(
-                            ovn_all_dhcp_options['ports_v6'].pop(
-                                lport_info['port'])['uuid']))
+            self._add_lswitches_del_txn(txn, del_lswitchs_list)
+            self._add_provnet_ports_update_txn(
+                ctx, txn, add_provnet_ports_list, del_provnet_ports_list)
+            self._add_lports_del_txn(txn, del_lports_list,
+                                     ovn_all_dhcp_options)
 
         self._sync_port_dhcp_options(ports_need_sync_dhcp_opts,
                                      ovn_all_dhcp_options['ports_v4'],
@@ -1323,24 +1668,129 @@ class OvnNbSynchronizer(db_sync_base.BaseOvnDbSynchronizer):
         LOG.debug('OVN-NB Sync networks, ports and DHCP options completed @ '
                   '%s', str(datetime.now()))
 
+    def _is_port_in_ovn(self, port_id):
+        lsp = self.ovn_nb_api.get_lswitch_port(port_id)
+        return bool(lsp and
+                    ovn_const.OVN_PORT_NAME_EXT_ID_KEY in lsp.external_ids)
+
+    def _sync_networks_ports_and_dhcp_opts_in_batches(self, ctx):
+        """Sync the networks, ports and DHCP options, by batches of ports.
+
+        The networks, subnets and metadata ports are processed at once, as
+        in sync_networks_ports_and_dhcp_opts. The Neutron ports are read by
+        batches and looked up by name in the OVN NB DB to create the missing
+        ones. Then the OVN logical switch ports are checked against the
+        Neutron DB by batches, to delete the ones not found in Neutron.
+        """
+        LOG.debug('OVN-NB Sync networks, ports and DHCP options started @ %s',
+                  str(datetime.now()))
+        db_networks = {}
+        for net in self.core_plugin.get_networks(ctx):
+            db_networks[utils.ovn_name(net['id'])] = net
+
+        ovn_all_dhcp_options = self.ovn_nb_api.get_all_dhcp_options()
+        db_network_cache = dict(db_networks)
+
+        del_lswitchs_list = []
+        add_provnet_ports_list = []
+        del_provnet_ports_list = []
+        for lswitch in self.ovn_nb_api.iter_logical_switches_with_ports():
+            if lswitch['name'] in db_networks:
+                self._calculate_provnet_ports_differences(
+                    ctx, lswitch, db_networks.pop(lswitch['name']),
+                    add_provnet_ports_list, del_provnet_ports_list)
+            else:
+                del_lswitchs_list.append({'name': lswitch['name']})
+
+        self._create_networks_in_ovn(ctx, db_networks.values())
+
+        # The metadata ports are synced by _sync_metadata_ports, which only
+        # needs the ones missing in the OVN NB DB.
+        sync_metadata_ports = ovn_conf.is_ovn_metadata_enabled()
+        db_metadata_ports = {}
+        if sync_metadata_ports:
+            db_metadata_ports = {
+                port['id']: port for port in self.core_plugin.get_ports(
+                    ctx, filters={'device_owner': [
+                        constants.DEVICE_OWNER_DISTRIBUTED]})
+                if not self._is_port_in_ovn(port['id'])}
+        self._sync_metadata_ports(ctx, db_metadata_ports)
+
+        self._sync_subnet_dhcp_options(
+            ctx, db_network_cache, ovn_all_dhcp_options['subnets'])
+
+        for db_ports in self._get_db_batches(self.core_plugin.get_ports, ctx):
+            ports_need_sync_dhcp_opts = []
+            for port in db_ports:
+                # Ignore the floating ip ports with device_owner set to
+                # constants.DEVICE_OWNER_FLOATINGIP
+                if utils.is_lsp_ignored(port) or (
+                        sync_metadata_ports and port['device_owner'] ==
+                        constants.DEVICE_OWNER_DISTRIBUTED):
+                    continue
+                if not self._is_port_in_ovn(port['id']):
+                    self._create_missing_port_in_ovn(ctx, port,
+                                                     ovn_all_dhcp_options)
+                elif not utils.is_network_device_port(port):
+                    ports_need_sync_dhcp_opts.append(port)
+            self._sync_port_dhcp_options(ports_need_sync_dhcp_opts,
+                                         ovn_all_dhcp_options['ports_v4'],
+                                         ovn_all_dhcp_options['ports_v6'],
+                                         delete_stale=False)
+
+        with self.ovn_nb_api.transaction(check_error=True) as txn:
+            self._add_lswitches_del_txn(txn, del_lswitchs_list)
+            self._add_provnet_ports_update_txn(
+                ctx, txn, add_provnet_ports_list, del_provnet_ports_list)
+
+        def get_lports():
+            for lswitch in self.ovn_nb_api.iter_logical_switches_with_ports():
+                if lswitch['name'] in db_network_cache:
+                    for lport in lswitch['ports']:
+                        yield {'port': lport, 'lswitch': lswitch['name']}
+
+        # The ports to delete are only collected while iterating over the
+        # OVN NB DB, and deleted afterwards.
+        batch_size = ovn_conf.get_ovn_neutron_sync_batch_size()
+        del_lports_list = []
+        for lports in _chunks(get_lports(), batch_size):
+            db_port_ids = {
+                port['id'] for port in self.core_plugin.get_ports(
+                    ctx, filters={'id': [lport['port'] for lport in lports]},
+                    fields=['id', 'device_owner'])
+                if not utils.is_lsp_ignored(port)}
+            del_lports_list.extend(lport for lport in lports
+                                   if lport['port'] not in db_port_ids)
+        for lports in _chunks(del_lports_list, batch_size):
+            with self.ovn_nb_api.transaction(check_error=True) as txn:
+                self._add_lports_del_txn(txn, lports, ovn_all_dhcp_options)
+
+        self._sync_port_dhcp_options([], ovn_all_dhcp_options['ports_v4'],
+                                     ovn_all_dhcp_options['ports_v6'])
+        LOG.debug('OVN-NB Sync networks, ports and DHCP options completed @ '
+                  '%s', str(datetime.now()))
+
     def sync_port_dns_records(self, ctx):
         if self.mode != n_lib_ovn_const.OVN_DB_SYNC_MODE_REPAIR:
             return
         LOG.debug('OVN-NB Sync port DNS records started @ %s',
                   str(datetime.now()))
-        # Ignore the floating ip ports with device_owner set to
-        # constants.DEVICE_OWNER_FLOATINGIP
-        db_ports = [port for port in
-                    self.core_plugin.get_ports(ctx) if not
-                    port.get('device_owner', '').startswith(
-                        constants.DEVICE_OWNER_FLOATINGIP)]
+        # The records of all the ports of a network are set at once, only
+        # the records are kept while the ports are read by batches.
         dns_records = {}
-        for port in db_ports:
-            if self._ovn_client.is_dns_required_for_port(port):
-                port_dns_records = self._ovn_client.get_port_dns_records(port)
-                if port['network_id'] not in dns_records:
-                    dns_records[port['network_id']] = {}
-                dns_records[port['network_id']].update(port_dns_records)
+        for db_ports in self._get_db_port_batches(ctx):
+            for port in db_ports:
+                # Ignore the floating ip ports with device_owner set to
+                # constants.DEVICE_OWNER_FLOATINGIP
+                if port.get('device_owner', '').startswith(
+                        constants.DEVICE_OWNER_FLOATINGIP):
+                    continue
+                if self._ovn_client.is_dns_required_for_port(port):
+                    port_dns_records = self._ovn_client.get_port_dns_records(
+                        port)
+                    if port['network_id'] not in dns_records:
+                        dns_records[port['network_id']] = {}
+                    dns_records[port['network_id']].update(port_dns_records)
 
         for network_id, port_dns_records in dns_records.items():
             self._set_dns_records(network_id, port_dns_records)
@@ -1362,56 +1812,107 @@ class OvnNbSynchronizer(db_sync_base.BaseOvnDbSynchronizer):
                 txn.add(self.ovn_nb_api.dns_set_records(ls_dns_record.uuid,
                                                         **dns_records))
 
+    def _get_ovn_qos_rule_ids(self):
+        """Return the port and floating IP IDs of the OVN QoS rules"""
+        ids = set()
+        for ovn_qos_rule in self.ovn_nb_api._tables['QoS'].rows.values():
+            for key in (ovn_const.OVN_PORT_EXT_ID_KEY,
+                        ovn_const.OVN_FIP_EXT_ID_KEY):
+                if key in ovn_qos_rule.external_ids:
+                    ids.add(ovn_qos_rule.external_ids[key])
+        return ids
+
     def sync_port_qos_policies(self, ctx):
         """Sync port QoS policies.
 
         This method reads the port QoS policy assigned or the one inherited
         from the network. Does not apply to "network" owned ports.
+
+        A port is out of sync when its QoS policy rules are applied by OVN
+        but the port has neither OVN QoS rules nor LSP.options QoS values.
+        In repair mode, the QoS policies of all the ports are applied again.
         """
         LOG.debug('OVN-NB Sync port QoS policies started @ %s',
                   str(datetime.now()))
         ovn_qos_ext = ovn_qos.OVNClientQosExtension(nb_idl=self.ovn_nb_api)
-        _ports = []
-        with db_api.CONTEXT_READER.using(ctx):
-            for port in self.core_plugin.get_ports(ctx):
-                if not ovn_qos_ext.port_effective_qos_policy_id(port)[0]:
-                    continue
-                _ports.append(port)
-
-        if not _ports:
-            # Nothing to do.
-            pass
-        elif not (self.mode == n_lib_ovn_const.OVN_DB_SYNC_MODE_REPAIR or
-                  self.is_maintenance):
-            for port in _ports:
-                LOG.warning('Port QoS policy missing in OVN NB DB, port_id=%s',
-                            port['id'])
-        else:
-            with self.ovn_nb_api.transaction(check_error=True) as txn:
-                for port in _ports:
-                    ovn_qos_ext.create_port(ctx, txn, port, None)
+        ovn_qos_rule_ids = self._get_ovn_qos_rule_ids()
+        policies_with_rules = {}
+        for db_ports in self._get_db_port_batches(ctx):
+            _ports = []
+            missing_ports = []
+            with db_api.CONTEXT_READER.using(ctx):
+                for port in db_ports:
+                    policy_id = ovn_qos_ext.port_effective_qos_policy_id(
+                        port)[0]
+                    if not policy_id:
+                        continue
+                    _ports.append(port)
+                    if (port['id'] in ovn_qos_rule_ids or
+                            utils.is_port_external(port)):
+                        continue
+                    if policy_id not in policies_with_rules:
+                        policies_with_rules[policy_id] = (
+                            ovn_qos_ext.policy_has_ovn_qos_rules(
+                                ctx, policy_id))
+                    if (policies_with_rules[policy_id] and
+                            not ovn_qos_ext.get_lsp_options_qos(port['id'])):
+                        missing_ports.append(port)
+
+            self._count_inconsistencies(len(missing_ports))
+
+            if not _ports:
+                # Nothing to do.
+                pass
+            elif not (self.mode == n_lib_ovn_const.OVN_DB_SYNC_MODE_REPAIR or
+                      self.is_maintenance):
+                for port in missing_ports:
+                    LOG.warning('Port QoS policy missing in OVN NB DB, '
+                                'port_id=%s', port['id'])
+            else:
+                with self.ovn_nb_api.transaction(check_error=True) as txn:
+                    for port in _ports:
+                        ovn_qos_ext.create_port(ctx, txn, port, None)
 
         LOG.debug('OVN-NB Sync port QoS policies completed @ %s',
                   str(datetime.now()))
 
     def sync_fip_qos_policies(self, ctx):
-        """Sync floating IP QoS policies."""
+        """Sync floating IP QoS policies.
+
+        A floating IP is out of sync when it is associated to a router, its
+        QoS policy rules are applied by OVN but it has no OVN QoS rules. In
+        repair mode, the QoS policies of all the floating IPs are applied
+        again.
+        """
         LOG.debug('OVN-NB Sync Floating IP QoS policies started @ %s',
                   str(datetime.now()))
         ovn_qos_ext = ovn_qos.OVNClientQosExtension(nb_idl=self.ovn_nb_api)
+        ovn_qos_rule_ids = self._get_ovn_qos_rule_ids()
+        policies_with_rules = {}
         _fips = []
+        missing_fips = []
         with db_api.CONTEXT_READER.using(ctx):
             for fip in self.l3_plugin.get_floatingips(ctx):
-                if not fip.get('qos_policy_id'):
+                policy_id = fip.get('qos_policy_id')
+                if not policy_id:
                     continue
                 _fips.append(fip)
+                if not fip.get('router_id') or fip['id'] in ovn_qos_rule_ids:
+                    continue
+                if policy_id not in policies_with_rules:
+                    policies_with_rules[policy_id] = (
+                        ovn_qos_ext.policy_has_ovn_qos_rules(ctx, policy_id))
+                if policies_with_rules[policy_id]:
+                    missing_fips.append(fip)
+
+        self._count_inconsistencies(len(missing_fips))
 
         if not _fips:
             # Nothing to do.
             pass
         elif not (self.mode == n_lib_ovn_const.OVN_DB_SYNC_MODE_REPAIR or
                   self.is_maintenance):
-            for fip in _fips:
+            for fip in missing_fips:
                 LOG.warning('Floating IP QoS policy missing in OVN NB DB, '
                             'fip_id=%s', fip['id'])
         else:
@@ -1436,6 +1937,8 @@ class OvnNbSynchronizer(db_sync_base.BaseOvnDbSynchronizer):
             if nat_rule.get('options', {}).get('stateless') != stateless_nat:
                 nat_rules.append(nat_rule)
 
+        self._count_inconsistencies(len(nat_rules))
+
         if not nat_rules:
             # Nothing to do.
             pass
@@ -1490,6 +1993,8 @@ class OvnNbSynchronizer(db_sync_base.BaseOvnDbSynchronizer):
                     continue
                 nat_rules_to_set.append((nat_rule, expected_mac))
 
+        self._count_inconsistencies(len(nat_rules_to_set))
+
         if not nat_rules_to_set:
             pass
         elif not (self.mode == n_lib_ovn_const.OVN_DB_SYNC_MODE_REPAIR or
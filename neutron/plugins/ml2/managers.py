@@ -783,6 +783,49 @@ class MechanismManager(stevedore.named.NamedExtensionManager):
         """
         self._call_on_drivers("create_port_postcommit", context)
 
+    def create_port_bulk_postcommit(self, contexts):
+        """Notify all mechanism drivers of the creation of several ports.
+
+        :param contexts: list of PortContext instances of the ports created
+        :returns: a dict with the MechanismDriverError raised for each port
+        which could not be created by a mechanism driver, by port ID.
+
+        Called after the database transaction. The mechanism drivers which
+        implement create_port_bulk_postcommit receive all the port contexts
+        at once; create_port_postcommit is called for each port on the other
+        mechanism drivers, or if create_port_bulk_postcommit fails. Once a
+        mechanism driver failed to create a port, the next mechanism drivers
+        are not called for this port, which is left to the caller to delete.
+        """
+        errors = {}
+        for driver in self.ordered_mech_drivers:
+            pending = [context for context in contexts
+                       if context.current['id'] not in errors]
+            if not pending:
+                break
+            if (len(pending) > 1 and
+                    hasattr(driver.obj, 'create_port_bulk_postcommit')):
+                try:
+                    driver.obj.create_port_bulk_postcommit(pending)
+                    continue
+                except Exception:
+                    LOG.exception(
+                        "Mechanism driver '%(name)s' failed in "
+                        "create_port_bulk_postcommit, calling "
+                        "create_port_postcommit for each port",
+                        {'name': driver.name})
+            for context in pending:
+                try:
+                    driver.obj.create_port_postcommit(context)
+                except Exception as e:
+                    LOG.exception(
+                        "Mechanism driver '%(name)s' failed in "
+                        "create_port_postcommit", {'name': driver.name})
+                    errors[context.current['id']] = (
+                        ml2_exc.MechanismDriverError(
+                            method='create_port_postcommit', errors=[e]))
+        return errors
+
     def update_port_precommit(self, context):
         """Notify all mechanism drivers during port update.
 
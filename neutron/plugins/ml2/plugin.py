@@ -1678,6 +1678,17 @@ class Ml2Plugin(db_base_plugin_v2.NeutronDbPluginV2,
         return self._after_create_port(context, result, mech_context)
 
     def _after_create_port(self, context, result, mech_context):
+        self._publish_port_after_create(context, result, mech_context)
+        try:
+            self.mechanism_manager.create_port_postcommit(mech_context)
+        except ml2_exc.MechanismDriverError:
+            with excutils.save_and_reraise_exception():
+                LOG.error("mechanism_manager.create_port_postcommit "
+                          "failed, deleting port '%s'", result['id'])
+                self.delete_port(context, result['id'], l3_port_check=False)
+        return self._bind_created_port(context, result, mech_context)
+
+    def _publish_port_after_create(self, context, result, mech_context):
         # add network to port dict to save a DB call on dhcp notification
         result['network'] = mech_context.network.current
         # notify any plugin that is interested in port create events
@@ -1686,13 +1697,7 @@ class Ml2Plugin(db_base_plugin_v2.NeutronDbPluginV2,
                              context, states=(result,),
                              resource_id=result['id']))
 
-        try:
-            self.mechanism_manager.create_port_postcommit(mech_context)
-        except ml2_exc.MechanismDriverError:
-            with excutils.save_and_reraise_exception():
-                LOG.error("mechanism_manager.create_port_postcommit "
-                          "failed, deleting port '%s'", result['id'])
-                self.delete_port(context, result['id'], l3_port_check=False)
+    def _bind_created_port(self, context, result, mech_context):
         try:
             bound_context = self._bind_port_if_needed(mech_context)
         except ml2_exc.MechanismDriverError:
@@ -1886,16 +1891,29 @@ class Ml2Plugin(db_base_plugin_v2.NeutronDbPluginV2,
                     })
 
         # Perform actions after the transaction is committed
-        completed_ports = []
         for port in port_data:
             resource_extend.apply_funcs('ports',
                                         port['port_dict'],
                                         port['port_obj'].db_obj)
-            completed_ports.append(
-                self._after_create_port(context,
-                                        port['port_dict'],
-                                        port['mech_context']))
-        return completed_ports
+            self._publish_port_after_create(context, port['port_dict'],
+                                            port['mech_context'])
+        # The mechanism drivers can create all the ports at once.
+        errors = self.mechanism_manager.create_port_bulk_postcommit(
+            [port['mech_context'] for port in port_data])
+        if errors:
+            # Delete every port the mechanism drivers failed to create, then
+            # raise the error of the first one.
+            for port in port_data:
+                port_id = port['id']
+                if port_id in errors:
+                    LOG.error("mechanism_manager.create_port_bulk_postcommit "
+                              "failed, deleting port '%s'", port_id)
+                    self.delete_port(context, port_id, l3_port_check=False)
+            raise next(errors[port['id']] for port in port_data
+                       if port['id'] in errors)
+        return [self._bind_created_port(context, port['port_dict'],
+                                        port['mech_context'])
+                for port in port_data]
 
     # TODO(yalei) - will be simplified after security group and address pair be
     # converted to ext driver too.
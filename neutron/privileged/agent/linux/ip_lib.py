@@ -838,6 +838,113 @@ def delete_ip_route(namespace, cidr, ip_version, device=None, via=None,
         raise
 
 
+# Netlink errors ignored by the batched operations, as done by the
+# equivalent single operation functions above
+_BATCH_IGNORED_ERRORS = {
+    'addr_del': errno.EADDRNOTAVAIL,
+    'route_del': errno.ESRCH,
+    'neigh_del': errno.ENOENT,
+    'rule_add': errno.EEXIST,
+    'rule_del': errno.ENOENT,
+}
+
+
+def _get_batch_link_id(ip, device, namespace, link_ids):
+    if device not in link_ids:
+        link_id = ip.link_lookup(ifname=device)
+        if not link_id:
+            raise NetworkInterfaceNotFound(device=device, namespace=namespace)
+        link_ids[device] = link_id[0]
+    return link_ids[device]
+
+
+def _run_batch_operation(ip, namespace, link_ids, command, args):
+    device = args.pop('device', None)
+    if command in ('addr_add', 'addr_del'):
+        net = netaddr.IPNetwork(args['cidr'])
+        kwargs = {'index': _get_batch_link_id(ip, device, namespace,
+                                              link_ids),
+                  'address': str(net.ip),
+                  'mask': net.prefixlen,
+                  'family': _IP_VERSION_FAMILY_MAP[net.version]}
+        if command == 'addr_add':
+            kwargs['scope'] = get_scope_name(args['scope'])
+            kwargs['broadcast'] = args['broadcast']
+            ip.addr('add', **kwargs)
+        else:
+            ip.addr('delete', **kwargs)
+    elif command in ('route_replace', 'route_del'):
+        kwargs = dict(args.pop('kwargs'))
+        kwargs.update(_make_pyroute2_route_args(
+            namespace, args['ip_version'], args['cidr'], None, args['via'],
+            args['table'], args.get('metric'), args['scope'],
+            args.get('proto')))
+        if device and 'multipath' not in kwargs:
+            kwargs['oif'] = _get_batch_link_id(ip, device, namespace,
+                                               link_ids)
+        ip.route('replace' if command == 'route_replace' else 'del',
+                 **kwargs)
+    elif command in ('neigh_replace', 'neigh_del'):
+        kwargs = dict(args.pop('kwargs'))
+        kwargs.update(
+            ifindex=_get_batch_link_id(ip, device, namespace, link_ids),
+            dst=args['ip_address'],
+            lladdr=args['mac_address'],
+            family=_IP_VERSION_FAMILY_MAP[args['ip_version']])
+        if command == 'neigh_replace':
+            kwargs['state'] = ndmsg.states[args['nud_state']]
+            ip.neigh('replace', **kwargs)
+        else:
+            ip.neigh('delete', **kwargs)
+    elif command in ('rule_add', 'rule_del'):
+        ip.rule('add' if command == 'rule_add' else 'del', **args['kwargs'])
+    elif command == 'link_set':
+        ip.link('set',
+                index=_get_batch_link_id(ip, device, namespace, link_ids),
+                **args['attributes'])
+    else:
+        raise ValueError(_('Unknown netlink batch operation %s') % command)
+
+
+@privileged.default.entrypoint
+def execute_batch(namespace, operations):
+    """Execute a list of netlink operations over a single netlink socket.
+
+    The operations are executed in order; a failed operation does not stop
+    the execution of the following ones.
+
+    :param namespace: The name of the namespace in which to execute the
+                      operations
+    :param operations: A list of (command, arguments) pairs, as built by
+                       neutron.agent.linux.ip_lib.NetlinkBatch
+    :returns: A list with one element per operation: None if it succeeded,
+              else the (errno, message) pair of its error
+    """
+    results = []
+    link_ids = {}
+    try:
+        with get_iproute(namespace) as ip:
+            for command, args in operations:
+                try:
+                    _run_batch_operation(ip, namespace, link_ids, command,
+                                         dict(args))
+                except netlink_exceptions.NetlinkError as e:
+                    if e.code == _BATCH_IGNORED_ERRORS.get(command):
+                        results.append(None)
+                    else:
+                        results.append((e.code, str(e)))
+                    continue
+                except NetworkInterfaceNotFound as e:
+                    results.append((errno.ENODEV, str(e)))
+                    continue
+                results.append(None)
+    except OSError as e:
+        if e.errno == errno.ENOENT:
+            raise NetworkNamespaceNotFound(netns_name=namespace)
+        raise
+    return results
+
+
 @tenacity.retry(
     retry=tenacity.retry_if_exception_type(
         netlink_exceptions.NetlinkDumpInterrupted),
@@ -62,6 +62,7 @@ ATTR_ICMP_CODE = 13
 ATTR_ICMP_ID = 14
 ATTR_L3PROTO = 15
 ATTR_L4PROTO = 17
+ATTR_MARK = 25
 ATTR_ZONE = 61
 
 NFCT_T_NEW_BIT = 0
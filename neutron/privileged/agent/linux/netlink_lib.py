@@ -37,8 +37,10 @@
 
 import ctypes
 from ctypes import util
+import functools
 import re
 
+import netaddr
 from neutron_lib import constants
 from neutron_lib import exceptions
 from oslo_log import log as logging
@@ -74,7 +76,21 @@ if nfct_lib:
                                    ctypes.c_uint,
                                    ctypes.c_uint,
                                    ctypes.c_uint]
+    nfct.nfct_get_attr.argtypes = [ctypes.c_void_p,
+                                   ctypes.c_int]
+    nfct.nfct_get_attr.restype = ctypes.c_void_p
+    nfct.nfct_get_attr_u8.argtypes = [ctypes.c_void_p,
+                                      ctypes.c_int]
+    nfct.nfct_get_attr_u8.restype = ctypes.c_uint8
+    nfct.nfct_get_attr_u16.argtypes = [ctypes.c_void_p,
+                                       ctypes.c_int]
+    nfct.nfct_get_attr_u16.restype = ctypes.c_uint16
+    nfct.nfct_get_attr_u32.argtypes = [ctypes.c_void_p,
+                                       ctypes.c_int]
+    nfct.nfct_get_attr_u32.restype = ctypes.c_uint32
     nfct.nfct_new.restype = ctypes.c_void_p
+    nfct.nfct_clone.argtypes = [ctypes.c_void_p]
+    nfct.nfct_clone.restype = ctypes.c_void_p
     nfct.nfct_destroy.argtypes = [ctypes.c_void_p]
     nfct.nfct_query.argtypes = [ctypes.c_void_p,
                                 ctypes.c_int,
@@ -185,6 +201,37 @@ class ConntrackManager:
         self._query(nl_constants.NFCT_Q_DUMP, data_ref)
         return entries
 
+    def delete_matching_entries(self, match):
+        """Dump the entries of the family and delete the matching ones
+
+        :param match: function called with each dumped entry, returning True
+                      if the entry must be deleted
+        :return: the number of matching entries
+        """
+        matching = []
+
+        @NFCT_CALLBACK
+        def callback(type_, conntrack, data):
+            if match(conntrack):
+                # The dumped entry is freed when the callback returns
+                matching.append(nfct.nfct_clone(conntrack))
+            return nl_constants.NFCT_CB_CONTINUE
+
+        self._callback_register(nl_constants.NFCT_T_ALL,
+                                callback, DATA_CALLBACK)
+        data_ref = self._get_ref(self.family_socket or
+                                 nl_constants.IPVERSION_SOCKET[4])
+        self._query(nl_constants.NFCT_Q_DUMP, data_ref)
+        # The entries can only be deleted once the dump is over, the handler
+        # does not accept a new query before
+        try:
+            for conntrack in matching:
+                self._query(nl_constants.NFCT_Q_DESTROY, conntrack)
+        finally:
+            for conntrack in matching:
+                nfct.nfct_destroy(conntrack)
+        return len(matching)
+
     def delete_entries(self, entries):
         conntrack = nfct.nfct_new()
         try:
@@ -312,3 +359,79 @@ def delete_entries(entries):
 
     with ConntrackManager() as conntrack:
         conntrack.delete_entries(entry_args)
+
+
+def _get_address(conntrack, attr, ipversion):
+    address = nfct.nfct_get_attr(conntrack, attr)
+    if not address:
+        return -1
+    return int.from_bytes(
+        ctypes.string_at(address, nl_constants.IPVERSION_BUFFER[ipversion]),
+        'big')
+
+
+def _match_entry(zone_filters, ipversion, conntrack):
+    filters = zone_filters.get(
+        nfct.nfct_get_attr_u16(conntrack, nl_constants.ATTR_ZONE))
+    if not filters:
+        return False
+    protocol = nfct.nfct_get_attr_u8(conntrack, nl_constants.ATTR_L4PROTO)
+    mark = nfct.nfct_get_attr_u32(conntrack, nl_constants.ATTR_MARK)
+    src = _get_address(conntrack, TARGET['src'][ipversion], ipversion)
+    dst = _get_address(conntrack, TARGET['dst'][ipversion], ipversion)
+    for f_protocol, f_mark, f_src, f_dst in filters:
+        if ((f_protocol is None or f_protocol == protocol) and
+                (f_mark is None or f_mark[0] == mark & f_mark[1]) and
+                (f_src is None or f_src[0] <= src <= f_src[1]) and
+                (f_dst is None or f_dst[0] <= dst <= f_dst[1])):
+            return True
+    return False
+
+
+def _parse_filter(protocol, mark, src, dst):
+    """Convert a filter to the values compared with the dumped entries
+
+    The mark is converted to a (value, mask) tuple, the addresses to the
+    (first, last) integer range of their CIDR.
+    """
+    if mark is not None:
+        value, _sep, mask = str(mark).partition('/')
+        mark = (int(value, 0), int(mask, 0) if mask else 0xffffffff)
+    addresses = []
+    for address in (src, dst):
+        if address is not None:
+            address = netaddr.IPNetwork(address)
+            address = (address.first, address.last)
+        addresses.append(address)
+    return (protocol, mark) + tuple(addresses)
+
+
+@privileged.conntrack_cmd.entrypoint
+def delete_entries_by_filters(filters):
+    """Delete the entries matching any of the filters
+
+    The table is dumped once per IP version and the entries are matched in
+    memory, instead of dumping it once per filter as "conntrack -D" does.
+
+    :param filters: list of (ipversion, zone, protocol, mark, src, dst)
+                    filters, matching like the "conntrack -D" parameters: the
+                    protocol is an IP protocol number, the mark a
+                    "value[/mask]" string, src and dst are the addresses or
+                    CIDRs of the original direction. A None value matches any
+                    entry.
+    :return: the number of deleted entries
+    """
+    deleted = 0
+    for ipversion in IP_VERSIONS:
+        zone_filters = {}
+        for version, zone, protocol, mark, src, dst in filters:
+            if version == ipversion:
+                zone_filters.setdefault(zone, []).append(
+                    _parse_filter(protocol, mark, src, dst))
+        if not zone_filters:
+            continue
+        with ConntrackManager(nl_constants.IPVERSION_SOCKET[ipversion]) \
+                as conntrack:
+            deleted += conntrack.delete_matching_entries(
+                functools.partial(_match_entry, zone_filters, ipversion))
+    return deleted
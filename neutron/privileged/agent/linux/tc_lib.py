@@ -190,6 +190,40 @@ def add_tc_filter_policy(device, parent, priority, rate, burst, mtu, action,
         raise
 
 
+@privileged.default.entrypoint
+def update_tc_filters_policy(device, parent, priority, handles, filters, mtu,
+                             action, protocol=None, flowid=1, namespace=None):
+    """Delete and add TC filters, type: policy filter, in one netlink session
+
+    The filters with the given "handles" are deleted first; the filters
+    already deleted are skipped. Then a filter is added for each
+    (keys, rate, burst) tuple of "filters".
+    """
+    protocol = protocol or pyroute2_protocols.ETH_P_ALL
+    # NOTE: without "kind", pyroute2 does not build the "info" field (the
+    # filter protocol and priority) needed to find the filter to delete.
+    info = socket.htons(protocol) | (priority << 16)
+    try:
+        index = ip_lib.get_link_id(device, namespace)
+        with ip_lib.get_iproute(namespace) as ip:
+            for handle in handles:
+                try:
+                    ip.tc('del-filter', index=index, parent=parent,
+                          handle=handle, info=info)
+                except pyroute2.NetlinkError as e:
+                    if e.code != errno.ENOENT:
+                        raise
+            for keys, rate, burst in filters:
+                ip.tc('add-filter', kind='u32', index=index,
+                      parent=parent, prio=priority, protocol=protocol,
+                      rate=rate, burst=burst, mtu=mtu, action=action,
+                      keys=keys, target=flowid)
+    except OSError as e:
+        if e.errno == errno.ENOENT:
+            raise ip_lib.NetworkNamespaceNotFound(netns_name=namespace)
+        raise
+
+
 @privileged.default.entrypoint
 def list_tc_filters(device, parent, namespace=None, **kwargs):
     """List TC filters"""
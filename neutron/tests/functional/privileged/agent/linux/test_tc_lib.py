@@ -310,3 +310,28 @@ class TcFilterClassTestCase(functional_base.BaseSudoTestCase):
         self.assertEqual(2560, filters[0]['rate_kbps'])
         self.assertEqual(1536, filters[0]['burst_kb'])
         self.assertEqual(1200, filters[0]['mtu'])
+
+    def test_update_tc_filters_policy(self):
+        priv_tc_lib.add_tc_qdisc(self.device, kind='ingress',
+                                 namespace=self.namespace)
+        filters = [(['0xac100501/0xffffffff+16'], 320000, 192000),
+                   (['0xac100502/0xffffffff+16'], 160000, 96000)]
+        priv_tc_lib.update_tc_filters_policy(
+            self.device, 'ffff:', 1, [], filters, 1200, 'drop',
+            protocol=0x0800, namespace=self.namespace)
+        filters = tc_lib.list_tc_filters(
+            self.device, 'ffff:', namespace=self.namespace)
+        self.assertEqual([2560, 1280],
+                         [_filter['rate_kbps'] for _filter in filters])
+
+        # The first filter is replaced, a deleted filter is skipped
+        handle = filters[0]['handle']
+        priv_tc_lib.update_tc_filters_policy(
+            self.device, 'ffff:', 1, [handle, handle],
+            [(['0xac100501/0xffffffff+16'], 80000, 48000)], 1200, 'drop',
+            protocol=0x0800, namespace=self.namespace)
+        filters = tc_lib.list_tc_filters(
+            self.device, 'ffff:', namespace=self.namespace)
+        self.assertEqual([1280, 640],
+                         [_filter['rate_kbps'] for _filter in filters])
+        self.assertEqual({1}, {_filter['priority'] for _filter in filters})
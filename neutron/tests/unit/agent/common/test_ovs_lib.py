@@ -452,6 +452,44 @@ class OVS_Lib_Test(base.BaseTestCase):
         self.assertRaises(exceptions.InvalidInput,
                           deferred_br.apply_flows)
 
+    def _test_do_action_flows_by_group_id(self, flows_per_port,
+                                          ports_per_transaction,
+                                          expected_calls):
+        self.br._flows_per_port = flows_per_port
+        self.br._ports_per_transaction = ports_per_transaction
+        flows_by_group_id = {1: [{'in_port': 1}], 2: [{'in_port': 2}],
+                             None: [{'table': 3}], 4: [{'in_port': 4}],
+                             5: [{'in_port': 5}], 6: [{'in_port': 6}]}
+        with mock.patch.object(self.br, 'do_action_flows') as mock_do:
+            self.br.do_action_flows_by_group_id('add', flows_by_group_id,
+                                                use_bundle=True)
+        mock_do.assert_has_calls(expected_calls)
+        self.assertEqual(len(expected_calls), mock_do.call_count)
+
+    def test_do_action_flows_by_group_id_not_per_port(self):
+        self._test_do_action_flows_by_group_id(False, 1, [
+            mock.call('add', [{'in_port': 1}, {'in_port': 2}, {'table': 3},
+                              {'in_port': 4}, {'in_port': 5}, {'in_port': 6}],
+                      use_bundle=True)])
+
+    def test_do_action_flows_by_group_id_per_port(self):
+        self._test_do_action_flows_by_group_id(True, 1, [
+            mock.call('add', [{'in_port': group_id} if group_id else
+                              {'table': 3}],
+                      use_bundle=True, flow_group_id=group_id)
+            for group_id in (1, 2, None, 4, 5, 6)])
+
+    def test_do_action_flows_by_group_id_several_ports(self):
+        self._test_do_action_flows_by_group_id(True, 2, [
+            mock.call('add', [{'in_port': 1}, {'in_port': 2}],
+                      use_bundle=True, flow_group_id=[1, 2]),
+            mock.call('add', [{'table': 3}], use_bundle=True,
+                      flow_group_id=None),
+            mock.call('add', [{'in_port': 4}, {'in_port': 5}],
+                      use_bundle=True, flow_group_id=[4, 5]),
+            mock.call('add', [{'in_port': 6}], use_bundle=True,
+                      flow_group_id=6)])
+
     def test_dump_flows(self):
         table = 23
         nxst_flow = "NXST_FLOW reply (xid=0x4):"
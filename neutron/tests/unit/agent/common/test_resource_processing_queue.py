@@ -14,6 +14,7 @@
 #
 
 import datetime
+from unittest import mock
 
 from oslo_utils import timeutils
 from oslo_utils import uuidutils
@@ -141,5 +142,133 @@ class TestExclusiveResourceProcessor(base.BaseTestCase):
             rpqueue.add(queue.ResourceUpdate(FAKE_ID, PRIORITY_RPC))
             self.assertEqual(idx + 1, rpqueue.qsize)
         for idx in reversed(range(5)):
-            rpqueue._queue.get()
+            rpqueue._get()
             self.assertEqual(idx, rpqueue.qsize)
+
+
+class TestResourceProcessingQueue(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.now = 1000.0
+        mock.patch.object(queue.time, 'monotonic',
+                          side_effect=lambda: self.now).start()
+
+    def _get_all(self, rpqueue):
+        updates = []
+        while rpqueue.qsize:
+            updates.append(rpqueue._get())
+        return updates
+
+    def test_order(self):
+        rpqueue = queue.ResourceProcessingQueue()
+        ts = timeutils.utcnow()
+        updates = [
+            queue.ResourceUpdate(FAKE_ID, 1, timestamp=ts),
+            queue.ResourceUpdate(FAKE_ID, 0,
+                                 timestamp=ts + datetime.timedelta(1)),
+            queue.ResourceUpdate(FAKE_ID_2, 0, timestamp=ts)]
+        for update in updates:
+            rpqueue.add(update)
+        self.assertEqual([updates[2], updates[1], updates[0]],
+                         self._get_all(rpqueue))
+
+    def test_coalesce(self):
+        rpqueue = queue.ResourceProcessingQueue(coalesce=True)
+        first = queue.ResourceUpdate(FAKE_ID, 1, action='update')
+        other = queue.ResourceUpdate(FAKE_ID_2, 1, action='update')
+        second = queue.ResourceUpdate(FAKE_ID, 2, action='update')
+        for update in (first, other, second):
+            rpqueue.add(update)
+        self.assertEqual(2, rpqueue.qsize)
+        # The newest update, with the priority and position of the first one
+        self.assertEqual([second, other], self._get_all(rpqueue))
+        self.assertEqual(1, second.priority)
+        self.assertEqual(first.create_time, second.create_time)
+        self.assertEqual(1, rpqueue.get_stats()['coalesced_updates'])
+
+    def test_coalesce_after_served(self):
+        rpqueue = queue.ResourceProcessingQueue(coalesce=True)
+        first = queue.ResourceUpdate(FAKE_ID, 1, action='update')
+        rpqueue.add(first)
+        self.assertEqual(first, rpqueue._get())
+        second = queue.ResourceUpdate(FAKE_ID, 1, action='update')
+        rpqueue.add(second)
+        self.assertEqual([second], self._get_all(rpqueue))
+
+    def test_no_coalesce(self):
+        for coalesce, resource, action in ((False, None, 'update'),
+                                           (True, {'id': FAKE_ID}, 'update'),
+                                           (True, None, 'delete')):
+            rpqueue = queue.ResourceProcessingQueue(coalesce=coalesce)
+            rpqueue.add(queue.ResourceUpdate(FAKE_ID, 1, action='update'))
+            rpqueue.add(queue.ResourceUpdate(FAKE_ID, 1, action=action,
+                                             resource=resource))
+            self.assertEqual(2, rpqueue.qsize)
+            self.assertEqual(2, len(self._get_all(rpqueue)))
+
+    def test_aging(self):
+        rpqueue = queue.ResourceProcessingQueue(aging_interval=10)
+        low = queue.ResourceUpdate(FAKE_ID, 2)
+        rpqueue.add(low)
+        self.now += 5
+        high = queue.ResourceUpdate(FAKE_ID_2, 1)
+        rpqueue.add(high)
+        self.assertEqual([high, low], self._get_all(rpqueue))
+
+        rpqueue.add(low)
+        self.now += 15
+        rpqueue.add(high)
+        self.assertEqual([low, high], self._get_all(rpqueue))
+
+    def test_aging_keeps_resource_order(self):
+        rpqueue = queue.ResourceProcessingQueue(aging_interval=10)
+        low = queue.ResourceUpdate(FAKE_ID, 1)
+        rpqueue.add(low)
+        self.now += 30
+        high = queue.ResourceUpdate(FAKE_ID, 0)
+        rpqueue.add(high)
+        self.assertEqual([high, low], self._get_all(rpqueue))
+
+    def test_min_interval(self):
+        rpqueue = queue.ResourceProcessingQueue(min_interval=10)
+        update = queue.ResourceUpdate(FAKE_ID, 0)
+        rpqueue.add(update)
+        self.assertEqual(update, rpqueue._get())
+
+        update_2 = queue.ResourceUpdate(FAKE_ID, 0)
+        other = queue.ResourceUpdate(FAKE_ID_2, 1)
+        rpqueue.add(update_2)
+        rpqueue.add(other)
+        self.now += 5
+        self.assertEqual(other, rpqueue._get())
+        self.assertEqual(1, rpqueue.qsize)
+        self.now += 5
+        self.assertEqual(update_2, rpqueue._get())
+        self.assertEqual(1, rpqueue.get_stats()['delayed_updates'])
+
+    def test_min_interval_forgets_served_resources(self):
+        rpqueue = queue.ResourceProcessingQueue(min_interval=10)
+        rpqueue.add(queue.ResourceUpdate(FAKE_ID, 0))
+        rpqueue._get()
+        self.now += 20
+        rpqueue.add(queue.ResourceUpdate(FAKE_ID_2, 0))
+        rpqueue._get()
+        self.assertEqual([FAKE_ID_2], list(rpqueue._served))
+
+    def test_get_stats(self):
+        rpqueue = queue.ResourceProcessingQueue()
+        for _i in range(12):
+            rpqueue.add(queue.ResourceUpdate(FAKE_ID, 0))
+        update = queue.ResourceUpdate(FAKE_ID, 0)
+        update.create_time -= 30
+        rpqueue.add(update)
+        self._get_all(rpqueue)
+        stats = rpqueue.get_stats()
+        self.assertEqual(0, stats['queue_depth'])
+        self.assertEqual({'<=10': 10, '<=100': 3, '<=1000': 0,
+                          '<=10000': 0, '>10000': 0},
+                         stats['queue_depth_histogram'])
+        self.assertEqual({'<=0.1': 12, '<=1': 0, '<=10': 0, '<=60': 1,
+                          '<=300': 0, '>300': 0},
+                         stats['wait_time_histogram'])
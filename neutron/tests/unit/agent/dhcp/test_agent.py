@@ -517,6 +517,41 @@ class TestDhcpAgent(base.BaseTestCase):
             'iface0',
             agent.call_driver('get_metadata_bind_interface', network))
 
+    def test_call_driver_reload_allocations_coalesced(self):
+        cfg.CONF.set_override('reload_allocations_debounce', 0.5)
+        network = mock.MagicMock()
+        network.id = '1'
+        agent = dhcp_agent.DhcpAgent(cfg.CONF)
+        agent.init_host()
+        for _i in range(3):
+            self.assertTrue(agent.call_driver('reload_allocations', network))
+        self.driver.assert_not_called()
+        self.assertEqual(
+            {'reload_allocations_queue_depth': 1,
+             'reload_allocations_requests': 3,
+             'reload_allocations_reloads': 0,
+             'reload_allocations_coalescing_ratio': 0},
+            agent._reload_coalescer.get_stats())
+
+    def test_reload_bulk_allocations(self):
+        cfg.CONF.set_override('bulk_reload_interval', 1)
+        network = mock.MagicMock()
+        network.id = '1'
+        agent = dhcp_agent.DhcpAgent(cfg.CONF)
+        agent.init_host()
+        agent.cache.put(network)
+
+        def get_ready(timeout=None):
+            agent._stopping_event.set()
+            return ['1', 'unknown']
+
+        with mock.patch.object(agent._reload_coalescer, 'get_ready',
+                               side_effect=get_ready), \
+                mock.patch.object(agent, 'call_driver') as call_driver:
+            agent._reload_bulk_allocations()
+        call_driver.assert_called_once_with('bulk_reload_allocations',
+                                            network)
+
     def _test_sync_state_helper(self, known_net_ids, active_net_ids):
         active_networks = {mock.Mock(id=netid) for netid in active_net_ids}
 
@@ -2717,3 +2752,78 @@ class TestDHCPResourceUpdate(base.BaseTestCase):
         # In this case, both "port" events have matching IPs. "__lt__" method
         # uses the timestamp: date2 < date1
         self.assertLess(update2, update1)
+
+    def test_coalesce_key(self):
+        network = {'network': {'id': 'net1'}}
+        self.assertEqual(
+            ('net1', '_network_update'),
+            dhcp_agent.DHCPResourceUpdate(
+                'net1', 1, action='_network_update', resource=network,
+                obj_type='network').coalesce_key)
+        self.assertEqual(
+            ('net1', '_port_update', 'port1'),
+            dhcp_agent.DHCPResourceUpdate(
+                'net1', 6, action='_port_update',
+                resource={'id': 'port1'}, obj_type='port').coalesce_key)
+        self.assertEqual(
+            ('net1', '_port_delete', 'port1'),
+            dhcp_agent.DHCPResourceUpdate(
+                'net1', 6, action='_port_delete',
+                resource={'network_id': 'net1', 'port_id': 'port1'},
+                obj_type='port').coalesce_key)
+        self.assertIsNone(
+            dhcp_agent.DHCPResourceUpdate(
+                'net1', 4, action='_subnet_delete',
+                resource={'network_id': 'net1', 'subnet_id': 'subnet1'},
+                obj_type='subnet').coalesce_key)
+
+
+class TestReloadAllocationsCoalescer(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.now = 100
+        mock.patch.object(dhcp_agent.time, 'monotonic',
+                          side_effect=lambda: self.now).start()
+        self.coalescer = dhcp_agent.ReloadAllocationsCoalescer(2, 5)
+
+    def test_get_ready_debounce(self):
+        self.coalescer.add('net1')
+        self.now += 1
+        self.coalescer.add('net1')
+        self.coalescer.add('net2')
+        self.assertEqual([], self.coalescer.get_ready(timeout=0))
+        self.now += 2
+        self.assertEqual(['net1', 'net2'],
+                         self.coalescer.get_ready(timeout=0))
+        self.assertEqual(
+            {'reload_allocations_queue_depth': 0,
+             'reload_allocations_requests': 3,
+             'reload_allocations_reloads': 2,
+             'reload_allocations_coalescing_ratio': 1.5},
+            self.coalescer.get_stats())
+
+    def test_get_ready_max_delay(self):
+        # The requests keep arriving within the debounce window, the network
+        # is reloaded when the first one reaches the maximum delay.
+        for _i in range(5):
+            self.coalescer.add('net1')
+            self.assertEqual([], self.coalescer.get_ready(timeout=0))
+            self.now += 1
+        self.coalescer.add('net1')
+        self.assertEqual(['net1'], self.coalescer.get_ready(timeout=0))
+        self.assertEqual(6, self.coalescer.get_stats()[
+            'reload_allocations_coalescing_ratio'])
+
+    def test_get_ready_timeout(self):
+        with mock.patch.object(self.coalescer._cond, 'wait') as wait:
+            def advance(timeout):
+                self.now += timeout
+            wait.side_effect = advance
+            self.assertEqual([], self.coalescer.get_ready(timeout=1))
+            wait.assert_called_once_with(1)
+
+            wait.reset_mock()
+            self.coalescer.add('net1')
+            self.assertEqual(['net1'], self.coalescer.get_ready(timeout=10))
+            wait.assert_called_once_with(2)
@@ -22,6 +22,7 @@ from neutron_lib.services.qos import constants as qos_consts
 from oslo_utils import uuidutils
 
 from neutron.agent.l3 import agent as l3_agent
+from neutron.agent.l3.extensions.qos import base as qos_base
 from neutron.agent.l3.extensions.qos import fip as fip_qos
 from neutron.agent.l3 import l3_agent_extension_api as l3_ext_api
 from neutron.agent.l3 import router_info as l3router
@@ -182,11 +183,11 @@ class FipQosExtensionTestCase(QosExtensionBaseTestCase):
         with mock.patch.object(self.fip_qos_ext, '_get_tc_wrapper',
                                return_value=tc_wrapper):
             func(self.context, self.router)
-            tc_wrapper.set_ip_rate_limit.assert_has_calls(
+            tc_wrapper.update_ip_rate_limits.assert_has_calls(
                 [mock.call(lib_const.INGRESS_DIRECTION,
-                           TEST_QOS_FIP, 1111, 2222),
+                           {TEST_QOS_FIP: (1111, 2222)}),
                  mock.call(lib_const.EGRESS_DIRECTION,
-                           TEST_QOS_FIP, 3333, 4444)],
+                           {TEST_QOS_FIP: (3333, 4444)})],
                 any_order=True)
 
     def test_add_router(self):
@@ -200,39 +201,39 @@ class FipQosExtensionTestCase(QosExtensionBaseTestCase):
         with mock.patch.object(self.fip_qos_ext, '_get_tc_wrapper',
                                return_value=tc_wrapper):
             self.fip_qos_ext.update_router(self.context, self.router)
-            tc_wrapper.set_ip_rate_limit.assert_has_calls(
+            tc_wrapper.update_ip_rate_limits.assert_has_calls(
                 [mock.call(lib_const.INGRESS_DIRECTION,
-                           TEST_QOS_FIP, 1111, 2222),
+                           {TEST_QOS_FIP: (1111, 2222)}),
                  mock.call(lib_const.EGRESS_DIRECTION,
-                           TEST_QOS_FIP, 3333, 4444)],
+                           {TEST_QOS_FIP: (3333, 4444)})],
                 any_order=True)
             # the policy of floating IP has been changed to
             # which only has one egress rule
             self.fip[qos_consts.QOS_POLICY_ID] = self.policy3.id
             self.fip_qos_ext.update_router(self.context, self.router)
-            tc_wrapper.clear_ip_rate_limit.assert_has_calls(
+            tc_wrapper.update_ip_rate_limits.assert_has_calls(
                 [mock.call(lib_const.INGRESS_DIRECTION,
-                           TEST_QOS_FIP)])
+                           {TEST_QOS_FIP: None})])
 
     def test_update_router_fip_policy_changed_to_none(self):
         tc_wrapper = mock.Mock()
         with mock.patch.object(self.fip_qos_ext, '_get_tc_wrapper',
                                return_value=tc_wrapper):
             self.fip_qos_ext.update_router(self.context, self.router)
-            tc_wrapper.set_ip_rate_limit.assert_has_calls(
+            tc_wrapper.update_ip_rate_limits.assert_has_calls(
                 [mock.call(lib_const.INGRESS_DIRECTION,
-                           TEST_QOS_FIP, 1111, 2222),
+                           {TEST_QOS_FIP: (1111, 2222)}),
                  mock.call(lib_const.EGRESS_DIRECTION,
-                           TEST_QOS_FIP, 3333, 4444)],
+                           {TEST_QOS_FIP: (3333, 4444)})],
                 any_order=True)
             # floating IP remove the qos_policy bonding
             self.fip[qos_consts.QOS_POLICY_ID] = None
             self.fip_qos_ext.update_router(self.context, self.router)
-            tc_wrapper.clear_ip_rate_limit.assert_has_calls(
+            tc_wrapper.update_ip_rate_limits.assert_has_calls(
                 [mock.call(lib_const.INGRESS_DIRECTION,
-                           TEST_QOS_FIP),
+                           {TEST_QOS_FIP: None}),
                  mock.call(lib_const.EGRESS_DIRECTION,
-                           TEST_QOS_FIP)],
+                           {TEST_QOS_FIP: None})],
                 any_order=True)
 
     def test__process_update_policy(self):
@@ -240,20 +241,20 @@ class FipQosExtensionTestCase(QosExtensionBaseTestCase):
         with mock.patch.object(self.fip_qos_ext, '_get_tc_wrapper',
                                return_value=tc_wrapper):
             self.fip_qos_ext.update_router(self.context, self.router)
-            tc_wrapper.set_ip_rate_limit.assert_has_calls(
+            tc_wrapper.update_ip_rate_limits.assert_has_calls(
                 [mock.call(lib_const.INGRESS_DIRECTION,
-                           TEST_QOS_FIP, 1111, 2222),
+                           {TEST_QOS_FIP: (1111, 2222)}),
                  mock.call(lib_const.EGRESS_DIRECTION,
-                           TEST_QOS_FIP, 3333, 4444)],
+                           {TEST_QOS_FIP: (3333, 4444)})],
                 any_order=True)
             # the rules of floating IP policy has been changed
             self.fip_qos_ext._policy_rules_modified = mock.Mock(
                 return_value=True)
             self.policy.rules = [self.new_ingress_rule, self.egress_rule]
             self.fip_qos_ext._process_update_policy(self.policy)
-            tc_wrapper.set_ip_rate_limit.assert_has_calls(
+            tc_wrapper.update_ip_rate_limits.assert_has_calls(
                 [mock.call(lib_const.INGRESS_DIRECTION,
-                           TEST_QOS_FIP, 5555, 6666)])
+                           {TEST_QOS_FIP: (5555, 6666)})])
 
     def _test_qos_policy_scenarios(self, fip_removed=True,
                                    qos_rules_removed=False):
@@ -262,11 +263,11 @@ class FipQosExtensionTestCase(QosExtensionBaseTestCase):
         with mock.patch.object(self.fip_qos_ext, '_get_tc_wrapper',
                                return_value=tc_wrapper):
             self.fip_qos_ext.update_router(self.context, self.router)
-            tc_wrapper.set_ip_rate_limit.assert_has_calls(
+            tc_wrapper.update_ip_rate_limits.assert_has_calls(
                 [mock.call(lib_const.INGRESS_DIRECTION,
-                           TEST_QOS_FIP, 1111, 2222),
+                           {TEST_QOS_FIP: (1111, 2222)}),
                  mock.call(lib_const.EGRESS_DIRECTION,
-                           TEST_QOS_FIP, 3333, 4444)],
+                           {TEST_QOS_FIP: (3333, 4444)})],
                 any_order=True)
             if fip_removed:
                 # floating IP dissociated, then it does not belong to
@@ -275,11 +276,11 @@ class FipQosExtensionTestCase(QosExtensionBaseTestCase):
             if qos_rules_removed:
                 self.policy.rules = []
             self.fip_qos_ext.update_router(self.context, self.router)
-            tc_wrapper.clear_ip_rate_limit.assert_has_calls(
+            tc_wrapper.clear_ip_rate_limits.assert_has_calls(
                 [mock.call(lib_const.INGRESS_DIRECTION,
-                           TEST_QOS_FIP),
+                           [TEST_QOS_FIP]),
                  mock.call(lib_const.EGRESS_DIRECTION,
-                           TEST_QOS_FIP)],
+                           [TEST_QOS_FIP])],
                 any_order=True)
 
     def test_delete_router(self):
@@ -287,11 +288,11 @@ class FipQosExtensionTestCase(QosExtensionBaseTestCase):
         with mock.patch.object(self.fip_qos_ext, '_get_tc_wrapper',
                                return_value=tc_wrapper):
             self.fip_qos_ext.update_router(self.context, self.router)
-            tc_wrapper.set_ip_rate_limit.assert_has_calls(
+            tc_wrapper.update_ip_rate_limits.assert_has_calls(
                 [mock.call(lib_const.INGRESS_DIRECTION,
-                           TEST_QOS_FIP, 1111, 2222),
+                           {TEST_QOS_FIP: (1111, 2222)}),
                  mock.call(lib_const.EGRESS_DIRECTION,
-                           TEST_QOS_FIP, 3333, 4444)],
+                           {TEST_QOS_FIP: (3333, 4444)})],
                 any_order=True)
             self.fip_qos_ext.delete_router(self.context, self.router)
             self.assertEqual(
@@ -324,11 +325,11 @@ class FipQosExtensionTestCase(QosExtensionBaseTestCase):
                 func(self.context, self.router)
                 if direction == lib_const.INGRESS_DIRECTION:
                     calls = [mock.call(lib_const.INGRESS_DIRECTION,
-                                       TEST_QOS_FIP, 1111, 2222)]
+                                       {TEST_QOS_FIP: (1111, 2222)})]
                 else:
                     calls = [mock.call(lib_const.EGRESS_DIRECTION,
-                                       TEST_QOS_FIP, 3333, 4444)]
-                tc_wrapper.set_ip_rate_limit.assert_has_calls(calls)
+                                       {TEST_QOS_FIP: (3333, 4444)})]
+                tc_wrapper.update_ip_rate_limits.assert_has_calls(calls)
 
     def test_add_router_only_ingress(self):
         self._test_only_one_direction_rule(self.fip_qos_ext.add_router,
@@ -355,19 +356,19 @@ class FipQosExtensionTestCase(QosExtensionBaseTestCase):
         with mock.patch.object(self.fip_qos_ext, '_get_tc_wrapper',
                                return_value=tc_wrapper):
             self.fip_qos_ext.update_router(self.context, self.router)
-            tc_wrapper.set_ip_rate_limit.assert_has_calls(
+            tc_wrapper.update_ip_rate_limits.assert_has_calls(
                 [mock.call(lib_const.INGRESS_DIRECTION,
-                           TEST_QOS_FIP, 1111, 2222),
+                           {TEST_QOS_FIP: (1111, 2222)}),
                  mock.call(lib_const.EGRESS_DIRECTION,
-                           TEST_QOS_FIP, 3333, 4444)],
+                           {TEST_QOS_FIP: (3333, 4444)})],
                 any_order=True)
             # policy ingress rule changed to only has one max_kbps value
             self.policy.rules = [self.ingress_rule_only_has_max_kbps,
                                  self.egress_rule]
             self.fip_qos_ext.update_router(self.context, self.router)
-            tc_wrapper.set_ip_rate_limit.assert_has_calls(
+            tc_wrapper.update_ip_rate_limits.assert_has_calls(
                 [mock.call(lib_const.INGRESS_DIRECTION,
-                           TEST_QOS_FIP, 5555, 0)])
+                           {TEST_QOS_FIP: (5555, 0)})])
 
     def test_qos_policy_has_no_bandwidth_limit_rule(self):
         tc_wrapper = mock.Mock()
@@ -375,33 +376,76 @@ class FipQosExtensionTestCase(QosExtensionBaseTestCase):
                                return_value=tc_wrapper):
             self.fip['qos_policy_id'] = self.policy4.id
             self.fip_qos_ext.add_router(self.context, self.router)
-            tc_wrapper.set_ip_rate_limit.assert_not_called()
+            tc_wrapper.update_ip_rate_limits.assert_not_called()
 
-    def _test_process_ip_rates(self, with_cache):
+    def _test_process_ip_rate_limits(self, with_cache):
         rates = {'egress': {'rate': 333, 'burst': 444},
                  'ingress': {'rate': 111, 'burst': 222}}
-        fip_res = fip_qos.FipResource('fip1', '123.123.123.123')
+        default_rates = {
+            'egress': {'rate': qos_base.IP_DEFAULT_RATE,
+                       'burst': qos_base.IP_DEFAULT_BURST},
+            'ingress': {'rate': qos_base.IP_DEFAULT_RATE,
+                        'burst': qos_base.IP_DEFAULT_BURST}}
+        fip_res1 = fip_qos.FipResource('fip1', '123.123.123.123')
+        fip_res2 = fip_qos.FipResource('fip2', '123.123.123.124')
+        fip_res3 = fip_qos.FipResource('fip3', '123.123.123.125')
+        self.fip_qos_ext.fip_qos_map.set_fip_ratelimit_cache(
+            'egress', 'fip3', 1, 2)
+        self.fip_qos_ext.fip_qos_map.set_fip_ratelimit_cache(
+            'ingress', 'fip3', 1, 2)
         device = mock.Mock()
         tc_wrapper = mock.Mock()
         with mock.patch.object(
                 self.fip_qos_ext, '_get_tc_wrapper',
                 return_value=tc_wrapper) as get_tc_wrapper:
-            with mock.patch.object(
-                    self.fip_qos_ext, 'process_ip_rate_limit') as process_ip:
-                self.fip_qos_ext.process_ip_rates(
-                    fip_res, device, rates, with_cache=with_cache)
-                if with_cache:
-                    self.assertEqual(2, process_ip.call_count)
-                else:
-                    self.assertEqual(2, get_tc_wrapper.call_count)
-                    self.assertEqual(
-                        2, tc_wrapper.set_ip_rate_limit.call_count)
+            self.fip_qos_ext.process_ip_rate_limits(
+                device, [(fip_res1, rates), (fip_res2, default_rates),
+                         (fip_res3, default_rates)],
+                with_cache=with_cache)
+        get_tc_wrapper.assert_called_once_with(device)
+        calls = []
+        for direction in lib_const.VALID_DIRECTIONS:
+            rate_limits = {'123.123.123.123': (rates[direction]['rate'],
+                                               rates[direction]['burst']),
+                           '123.123.123.125': None}
+            if not with_cache:
+                # The default (no limit) rates of fip2 are not cached
+                rate_limits['123.123.123.124'] = None
+            calls.append(mock.call(direction, rate_limits))
+        tc_wrapper.update_ip_rate_limits.assert_has_calls(calls)
+        self.assertEqual(2, tc_wrapper.update_ip_rate_limits.call_count)
+        cache_rates = (
+            self.fip_qos_ext.fip_qos_map.get_fip_ratelimit_cache(
+                'ingress', 'fip1'),
+            self.fip_qos_ext.fip_qos_map.get_fip_ratelimit_cache(
+                'ingress', 'fip3'))
+        if with_cache:
+            self.assertEqual(((111, 222), (0, 0)), cache_rates)
+        else:
+            self.assertEqual(((0, 0), (1, 2)), cache_rates)
+
+    def test_process_ip_rate_limits_with_cache(self):
+        self._test_process_ip_rate_limits(with_cache=True)
 
-    def test_process_ip_rates_with_cache(self):
-        self._test_process_ip_rates(with_cache=True)
+    def test_process_ip_rate_limits_without_cache(self):
+        self._test_process_ip_rate_limits(with_cache=False)
 
-    def test_process_ip_rates_without_cache(self):
-        self._test_process_ip_rates(with_cache=False)
+    def test_update_router_several_fips(self):
+        fip2 = dict(self.fip, id=_uuid(), floating_ip_address='3.3.3.4')
+        self.router[lib_const.FLOATINGIP_KEY].append(fip2)
+        tc_wrapper = mock.Mock()
+        with mock.patch.object(self.fip_qos_ext, '_get_tc_wrapper',
+                               return_value=tc_wrapper):
+            self.fip_qos_ext.update_router(self.context, self.router)
+            tc_wrapper.update_ip_rate_limits.assert_has_calls(
+                [mock.call(lib_const.INGRESS_DIRECTION,
+                           {TEST_QOS_FIP: (1111, 2222),
+                            '3.3.3.4': (1111, 2222)}),
+                 mock.call(lib_const.EGRESS_DIRECTION,
+                           {TEST_QOS_FIP: (3333, 4444),
+                            '3.3.3.4': (3333, 4444)})],
+                any_order=True)
+            self.assertEqual(2, tc_wrapper.update_ip_rate_limits.call_count)
 
 
 class RouterFipRateLimitMapsTestCase(base.BaseTestCase):
@@ -101,6 +101,9 @@ class BasicRouterOperationsFramework(base.BaseTestCase):
 
         # Enable conntrackd support for tests for it to get full test coverage
         self.conf.set_override('ha_conntrackd_enabled', True)
+        # The routers are initialized by the processing threads, unless a
+        # test enables the router_init_workers
+        self.conf.set_override('router_init_workers', 0)
 
         self.device_exists_p = mock.patch(
             'neutron.agent.linux.ip_lib.device_exists')
@@ -159,6 +162,9 @@ class BasicRouterOperationsFramework(base.BaseTestCase):
         ip_dev = mock.patch('neutron.agent.linux.ip_lib.IPDevice').start()
         self.mock_ip_dev = mock.MagicMock()
         ip_dev.return_value = self.mock_ip_dev
+        netlink_batch = mock.patch.object(ip_lib, 'NetlinkBatch').start()
+        self.mock_netlink_batch = netlink_batch.return_value
+        self.mock_netlink_batch.execute.return_value = []
         self.lladdr = "fe80::f816:3eff:fe5f:9d67"
         get_ipv6_lladdr = mock.patch("neutron.agent.linux.ip_lib."
                                      "get_ipv6_lladdr").start()
@@ -488,6 +494,261 @@ class TestBasicRouterOperations(BasicRouterOperationsFramework):
             agent._report_state()
             self.assertFalse(agent.fullsync)
 
+    def _init_agent_with_init_workers(self):
+        self.conf.set_override('router_init_workers', 1)
+        agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
+        agent.init_host()
+        agent._queue = mock.Mock()
+        # Run the initialization in the caller thread
+        agent._init_pool = mock.Mock()
+        agent._init_pool.submit.side_effect = (
+            lambda func, *args: func(*args))
+        return agent
+
+    def test_fetch_and_sync_all_routers_initializes_routers(self):
+        agent = self._init_agent_with_init_workers()
+        router = {'id': _uuid(), 'routes': [],
+                  'external_gateway_info': {'network_id': _uuid()}}
+        self.plugin_api.get_router_ids.return_value = [router['id']]
+        self.plugin_api.get_routers.return_value = [router]
+        ri = mock.Mock()
+        with mock.patch.object(agent, '_create_router',
+                               return_value=ri) as create_router:
+            agent.periodic_sync_routers_task(agent.context)
+
+        create_router.assert_called_once_with(router['id'], router)
+        ri.initialize.assert_called_once_with(agent.process_monitor)
+        self.assertEqual({router['id']: ri}, agent._prepared_routers)
+        update = agent._queue.add.call_args[0][0]
+        self.assertEqual(router['id'], update.id)
+        self.assertEqual(router, update.resource)
+        self.assertEqual(l3_agent.ADD_UPDATE_ROUTER, update.action)
+
+    def test_fetch_and_sync_all_routers_initializes_first_sync_only(self):
+        agent = self._init_agent_with_init_workers()
+        router = {'id': _uuid(), 'routes': [],
+                  'external_gateway_info': {'network_id': _uuid()}}
+        self.plugin_api.get_router_ids.return_value = [router['id']]
+        self.plugin_api.get_routers.return_value = [router]
+        agent._initial_sync_fetched = True
+        with mock.patch.object(agent, '_initialize_router') as init_router:
+            agent.periodic_sync_routers_task(agent.context)
+        init_router.assert_not_called()
+        agent._queue.add.assert_called_once_with(mock.ANY)
+
+    def test_fetch_and_sync_all_routers_retry_keeps_prepared_router(self):
+        agent = self._init_agent_with_init_workers()
+        router = {'id': _uuid(), 'routes': [],
+                  'external_gateway_info': {'network_id': _uuid()}}
+        self.plugin_api.get_router_ids.return_value = [router['id']]
+        self.plugin_api.get_routers.return_value = [router]
+        ri = mock.Mock()
+        agent._prepared_routers[router['id']] = ri
+        # A full sync retried after a MessagingTimeout
+        with mock.patch.object(agent, '_create_router') as create_router:
+            agent.periodic_sync_routers_task(agent.context)
+
+        create_router.assert_not_called()
+        agent._init_pool.submit.assert_not_called()
+        self.assertEqual({router['id']: ri}, agent._prepared_routers)
+        agent._queue.add.assert_called_once_with(mock.ANY)
+
+    def test__initialize_router_already_prepared(self):
+        agent = self._init_agent_with_init_workers()
+        router = {'id': _uuid(), 'routes': [],
+                  'external_gateway_info': {'network_id': _uuid()}}
+        update = resource_processing_queue.ResourceUpdate(
+            router['id'], l3_agent.PRIORITY_SYNC_ROUTERS_TASK,
+            resource=router)
+        ri = mock.Mock()
+        agent._prepared_routers[router['id']] = ri
+        with mock.patch.object(agent, '_create_router') as create_router:
+            agent._initialize_router(update)
+        create_router.assert_not_called()
+        self.assertEqual({router['id']: ri}, agent._prepared_routers)
+        agent._queue.add.assert_called_once_with(update)
+
+    def test__initialize_router_failure(self):
+        agent = self._init_agent_with_init_workers()
+        router = {'id': _uuid(), 'routes': [],
+                  'external_gateway_info': {'network_id': _uuid()}}
+        update = resource_processing_queue.ResourceUpdate(
+            router['id'], l3_agent.PRIORITY_SYNC_ROUTERS_TASK,
+            resource=router)
+        ri = mock.Mock()
+        ri.initialize.side_effect = RuntimeError
+        with mock.patch.object(agent, '_create_router', return_value=ri), \
+                mock.patch.object(agent.namespaces_manager,
+                                  'ensure_router_cleanup') as cleanup:
+            agent._initialize_router(update)
+        cleanup.assert_called_once_with(router['id'])
+        self.assertEqual({}, agent._prepared_routers)
+        agent._queue.add.assert_called_once_with(update)
+
+    def test__initialize_router_not_compatible(self):
+        agent = self._init_agent_with_init_workers()
+        router = {'id': _uuid(), 'routes': [], 'external_gateway_info': {}}
+        agent.conf.set_override('handle_internal_only_routers', False)
+        update = resource_processing_queue.ResourceUpdate(
+            router['id'], l3_agent.PRIORITY_SYNC_ROUTERS_TASK,
+            resource=router)
+        with mock.patch.object(agent, '_create_router') as create_router:
+            agent._initialize_router(update)
+        create_router.assert_not_called()
+        agent._queue.add.assert_called_once_with(update)
+
+    def test__initialize_router_being_processed(self):
+        agent = self._init_agent_with_init_workers()
+        router = {'id': _uuid(), 'routes': [],
+                  'external_gateway_info': {'network_id': _uuid()}}
+        update = resource_processing_queue.ResourceUpdate(
+            router['id'], l3_agent.PRIORITY_SYNC_ROUTERS_TASK,
+            resource=router)
+        with resource_processing_queue.ExclusiveResourceProcessor(
+                router['id']), \
+                mock.patch.object(agent, '_create_router') as create_router:
+            agent._initialize_router(update)
+        create_router.assert_not_called()
+        agent._queue.add.assert_called_once_with(update)
+
+    def test__initialize_router_requeues_received_updates(self):
+        agent = self._init_agent_with_init_workers()
+        router = {'id': _uuid(), 'routes': [],
+                  'external_gateway_info': {'network_id': _uuid()}}
+        update = resource_processing_queue.ResourceUpdate(
+            router['id'], l3_agent.PRIORITY_SYNC_ROUTERS_TASK,
+            resource=router)
+        received = resource_processing_queue.ResourceUpdate(
+            router['id'], l3_agent.PRIORITY_RPC)
+
+        def _create_router(router_id, router):
+            # An update processed by another worker meanwhile
+            with resource_processing_queue.ExclusiveResourceProcessor(
+                    router_id) as rp:
+                rp.queue_update(received)
+            return mock.Mock()
+
+        with mock.patch.object(agent, '_create_router',
+                               side_effect=_create_router):
+            agent._initialize_router(update)
+        agent._queue.add.assert_has_calls([mock.call(received),
+                                           mock.call(update)])
+
+    def test__router_added_prepared_router(self):
+        agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
+        agent.init_host()
+        router = {'id': _uuid(), 'ha': False, 'distributed': False}
+        ri = mock.Mock(router=router)
+        agent._prepared_routers[router['id']] = ri
+        with mock.patch.object(agent, '_create_router') as create_router:
+            agent._router_added(router['id'], router)
+        create_router.assert_not_called()
+        ri.initialize.assert_not_called()
+        self.assertIs(ri, agent.router_info[router['id']])
+        self.assertEqual({}, agent._prepared_routers)
+
+    def test__router_added_prepared_router_type_changed(self):
+        agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
+        agent.init_host()
+        router = {'id': _uuid(), 'ha': False, 'distributed': False}
+        prepared_ri = mock.Mock(router=dict(router, ha=True))
+        agent._prepared_routers[router['id']] = prepared_ri
+        ri = mock.Mock()
+        with mock.patch.object(agent, '_create_router',
+                               return_value=ri) as create_router:
+            agent._router_added(router['id'], router)
+        prepared_ri.delete.assert_called_once_with()
+        create_router.assert_called_once_with(router['id'], router)
+        ri.initialize.assert_called_once_with(agent.process_monitor)
+        self.assertIs(ri, agent.router_info[router['id']])
+
+    def test__router_added_prepared_router_type_changed_delete_fails(self):
+        agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
+        agent.init_host()
+        router = {'id': _uuid(), 'ha': False, 'distributed': False}
+        prepared_ri = mock.Mock(router=dict(router, distributed=True))
+        prepared_ri.delete.side_effect = RuntimeError
+        agent._prepared_routers[router['id']] = prepared_ri
+        with mock.patch.object(agent, '_create_router'), \
+                mock.patch.object(agent.namespaces_manager,
+                                  'ensure_router_cleanup') as cleanup:
+            agent._router_added(router['id'], router)
+        cleanup.assert_called_once_with(router['id'])
+
+    def test__router_removed_prepared_router(self):
+        agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
+        agent.init_host()
+        router_id = _uuid()
+        ri = mock.Mock()
+        agent._prepared_routers[router_id] = ri
+        with mock.patch.object(agent.namespaces_manager,
+                               'ensure_router_cleanup') as cleanup:
+            agent._router_removed(None, router_id)
+        ri.delete.assert_called_once_with()
+        cleanup.assert_not_called()
+        self.assertEqual({}, agent._prepared_routers)
+
+    def test_initial_sync_duration(self):
+        agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
+        agent.init_host()
+        agent._queue = mock.Mock()
+        routers = [{'id': _uuid(), 'routes': []},
+                   {'id': _uuid(), 'routes': []}]
+        self.plugin_api.get_router_ids.return_value = [r['id']
+                                                       for r in routers]
+        self.plugin_api.get_routers.return_value = routers
+        agent._initial_sync_router_done(routers[0]['id'])
+        agent.periodic_sync_routers_task(agent.context)
+        self.assertEqual(2, agent._queue.add.call_count)
+        self.assertIsNone(agent.initial_sync_duration)
+
+        agent._initial_sync_router_done(routers[0]['id'])
+        self.assertIsNone(agent.initial_sync_duration)
+        agent._initial_sync_router_done(routers[1]['id'])
+        self.assertIsNotNone(agent.initial_sync_duration)
+
+        # Only the first full sync is measured
+        duration = agent.initial_sync_duration
+        agent.fullsync = True
+        agent.periodic_sync_routers_task(agent.context)
+        self.assertEqual(duration, agent.initial_sync_duration)
+
+    def test_initial_sync_duration_no_routers(self):
+        agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
+        agent.init_host()
+        self.plugin_api.get_router_ids.return_value = []
+        agent.periodic_sync_routers_task(agent.context)
+        self.assertIsNotNone(agent.initial_sync_duration)
+
+    def test_report_state_initial_sync_duration(self):
+        with mock.patch.object(agent_rpc.PluginReportStateAPI,
+                               'report_state'):
+            agent = l3_agent.L3NATAgentWithStateReport(host=HOSTNAME,
+                                                       conf=self.conf)
+            agent.init_host()
+            agent._report_state()
+            self.assertNotIn('initial_sync_duration',
+                             agent.agent_state['configurations'])
+            agent.initial_sync_duration = 12.3456
+            agent._report_state()
+            self.assertEqual(
+                12.346,
+                agent.agent_state['configurations']['initial_sync_duration'])
+
+    def test_report_state_update_queue(self):
+        with mock.patch.object(agent_rpc.PluginReportStateAPI,
+                               'report_state'):
+            agent = l3_agent.L3NATAgentWithStateReport(host=HOSTNAME,
+                                                       conf=self.conf)
+            agent.init_host()
+            agent._queue.add(resource_processing_queue.ResourceUpdate(
+                _uuid(), l3_agent.PRIORITY_RPC))
+            agent._report_state()
+            self.assertEqual(
+                1,
+                agent.agent_state['configurations']['update_queue'][
+                    'queue_depth'])
+
     def test_periodic_sync_routers_task_call_clean_stale_namespaces(self):
         agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
         agent.init_host()
@@ -3713,6 +3974,14 @@ class TestBasicRouterOperations(BasicRouterOperationsFramework):
         self.assertTrue(router.delete.called)
         self.assertTrue(agent._exiting)
 
+    def test_stop_shuts_down_init_pool(self):
+        self.conf.set_override('router_init_workers', 2)
+        agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
+        agent.init_host()
+        with mock.patch.object(agent._init_pool, 'shutdown') as shutdown:
+            agent.stop()
+        shutdown.assert_called_once_with(cancel_futures=True)
+
     @ddt.data(['fip-AAA', 'snat-BBB', 'qrouter-CCC'], [])
     def test_check_ha_router_process_status(self, namespaces):
         agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
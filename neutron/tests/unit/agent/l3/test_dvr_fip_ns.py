@@ -279,10 +279,11 @@ class TestDvrFipNs(base.BaseTestCase):
             exists.assert_called_once_with(self.fip_ns.name)
             self.assertFalse(delete.called)
 
+    @mock.patch.object(ip_lib, 'NetlinkBatch')
     @mock.patch.object(ip_lib, 'IPWrapper')
     @mock.patch.object(ip_lib, 'IPDevice')
     def _test_create_rtr_2_fip_link(self, dev_exists, addr_exists,
-                                    IPDevice, IPWrapper):
+                                    IPDevice, IPWrapper, NetlinkBatch):
         ri = mock.Mock()
         ri.router_id = _uuid()
         ri.rtr_fip_subnet = None
@@ -320,15 +321,18 @@ class TestDvrFipNs(base.BaseTestCase):
             device.addr.add.assert_has_calls(expected)
             self.assertEqual(2, device.addr.add.call_count)
 
-        expected = [mock.call(n_utils.cidr_to_ip(addr_pair[1]), mock.ANY),
-                    mock.call(n_utils.cidr_to_ip(addr_pair[0]), mock.ANY)]
-        device.neigh.add.assert_has_calls(expected)
-        self.assertEqual(2, device.neigh.add.call_count)
+        rtr_batch = NetlinkBatch.return_value
+        NetlinkBatch.assert_called_once_with(ri.ns_name)
+        rtr_batch.add_neigh_entry.assert_called_once_with(
+            n_utils.cidr_to_ip(addr_pair[1]), mock.ANY, device.name)
+        device.neigh.add.assert_called_once_with(
+            n_utils.cidr_to_ip(addr_pair[0]), mock.ANY)
 
-        expected_calls = [mock.call('169.254.31.29', table=16),
-                          mock.call(self.lladdr)]
+        expected_calls = [mock.call('169.254.31.29', device.name, table=16),
+                          mock.call(self.lladdr, device.name)]
         self.assertEqual(expected_calls,
-                         device.route.add_gateway.mock_calls)
+                         rtr_batch.add_gateway.mock_calls)
+        rtr_batch.execute.assert_called_once_with(raise_on_error=True)
         self.assertTrue(
             self.fip_ns._add_rtr_ext_route_rule_to_route_table.called)
 
@@ -110,6 +110,9 @@ class TestDvrRouterOperations(base.BaseTestCase):
         ip_dev = mock.patch('neutron.agent.linux.ip_lib.IPDevice').start()
         self.mock_ip_dev = mock.MagicMock()
         ip_dev.return_value = self.mock_ip_dev
+        netlink_batch = mock.patch.object(ip_lib, 'NetlinkBatch').start()
+        self.mock_netlink_batch = netlink_batch.return_value
+        self.mock_netlink_batch.execute.return_value = []
 
         self.l3pluginApi_cls_p = mock.patch(
             'neutron.agent.l3.agent.L3PluginApi')
@@ -470,6 +473,60 @@ class TestDvrRouterOperations(base.BaseTestCase):
                                                           via=str(s.ip))
         ri.fip_ns.local_subnets.allocate.assert_not_called()
 
+    @mock.patch.object(ip_lib, 'send_ip_addr_adv_notif')
+    @mock.patch.object(ip_lib, 'IPDevice')
+    @mock.patch.object(ip_lib, 'add_ip_rule')
+    def test_floating_ip_added_dist_batched(self, mock_add_ip_rule,
+                                            mIPDevice, mock_adv_notif):
+        ri = self._create_router(mock.MagicMock())
+        fip = {'id': _uuid(),
+               'host': HOSTNAME,
+               'floating_ip_address': '15.1.2.3',
+               'fixed_ip_address': '192.168.0.1',
+               'port_id': _uuid()}
+        ri.fip_ns = mock.Mock()
+        ri.fip_ns.get_name.return_value = 'fip_ns_name'
+        ri.fip_ns.get_int_device_name.return_value = 'fpr-fake'
+        ri.fip_ns.agent_gateway_port = {'id': _uuid()}
+        ri.fip_ns.allocate_rule_priority.return_value = FIP_PRI
+        s = lla.LinkLocalAddressPair('169.254.30.42/31')
+        ri.rtr_fip_subnet = s
+        with ri._batch_netlink_operations():
+            self.assertEqual(
+                lib_constants.FLOATINGIP_STATUS_ACTIVE,
+                ri.floating_ip_added_dist(fip, '15.1.2.3/32'))
+            mock_adv_notif.assert_not_called()
+
+        self.mock_netlink_batch.add_ip_rule.assert_called_once_with(
+            '192.168.0.1', table=16, priority=FIP_PRI)
+        self.mock_netlink_batch.add_ip_route.assert_called_once_with(
+            '15.1.2.3/32', device='fpr-fake', via=str(s.ip))
+        mock_add_ip_rule.assert_not_called()
+        mIPDevice.return_value.route.add_route.assert_not_called()
+        mock_adv_notif.assert_called_once_with(
+            'fip_ns_name', ri.fip_ns.get_ext_device_name.return_value,
+            '15.1.2.3')
+
+    @mock.patch.object(ip_lib, 'IPDevice')
+    def test_floating_ip_removed_dist_batched(self, mIPDevice):
+        ri = self._create_router(mock.MagicMock())
+        fixed_ip = '20.0.0.30'
+        fip_cidr = '11.22.33.44/32'
+        ri.fip_ns = mock.Mock()
+        ri.fip_ns.get_name.return_value = 'fip_ns_name'
+        ri.floating_ips_dict['11.22.33.44'] = (fixed_ip, FIP_PRI)
+        s = lla.LinkLocalAddressPair('169.254.30.42/31')
+        ri.rtr_fip_subnet = s
+        with ri._batch_netlink_operations():
+            ri.floating_ip_removed_dist(fip_cidr)
+
+        self.mock_netlink_batch.delete_ip_rule.assert_called_once_with(
+            fixed_ip, table=16, priority=FIP_PRI)
+        self.mock_netlink_batch.delete_ip_route.assert_called_once_with(
+            fip_cidr, via=str(s.ip))
+        self.mock_delete_ip_rule.assert_not_called()
+        mIPDevice.return_value.route.delete_route.assert_not_called()
+
     @mock.patch.object(ip_lib, 'add_ip_rule')
     def test_floating_ip_moved_dist(self, mock_add_ip_rule):
         router = mock.MagicMock()
@@ -611,10 +668,14 @@ class TestDvrRouterOperations(base.BaseTestCase):
                                '_process_arp_cache_for_internal_port') as parp:
             ri._set_subnet_arp_info(subnet)
         self.assertEqual(1, parp.call_count)
-        self.mock_ip_dev.neigh.add.assert_has_calls([
-            mock.call('1.2.3.4', '00:11:22:33:44:55'),
-            mock.call('10.20.30.40', '00:11:22:33:44:55'),
-            mock.call('1.2.3.10', 'fa:16:3e:80:8d:80')])
+        self.mock_netlink_batch.add_neigh_entry.assert_has_calls([
+            mock.call('1.2.3.4', '00:11:22:33:44:55', self.mock_ip_dev.name),
+            mock.call('10.20.30.40', '00:11:22:33:44:55',
+                      self.mock_ip_dev.name),
+            mock.call('1.2.3.10', 'fa:16:3e:80:8d:80',
+                      self.mock_ip_dev.name)])
+        self.mock_netlink_batch.execute.assert_called_once_with()
+        self.mock_ip_dev.neigh.add.assert_not_called()
 
         # Test negative case
         router['distributed'] = False
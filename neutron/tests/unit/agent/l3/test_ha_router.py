@@ -22,6 +22,7 @@ from oslo_utils import uuidutils
 
 from neutron.agent.l3 import ha_router
 from neutron.agent.l3 import router_info
+from neutron.agent.linux import ip_lib
 from neutron.common import utils as common_utils
 from neutron.tests import base
 from neutron.tests.common import l3_test_common
@@ -127,6 +128,76 @@ class TestBasicRouterOperations(base.BaseTestCase):
         ri.remove_floating_ip(device, fip_cidr)
         self.assertTrue(super_remove_floating_ip.called)
 
+    def _create_router_agent_fips(self, ha_state):
+        ri = self._create_router(mock.MagicMock())
+        ri.agent_conf.ha_keepalived_floating_ips = False
+        ri._ha_state = ha_state
+        ri._get_keepalived_instance = mock.Mock()
+        self.ip_device = mock.patch.object(ip_lib, 'IPDevice').start()
+        self.send_adv_notif = mock.patch.object(
+            ip_lib, 'send_ip_addr_adv_notif').start()
+        return ri
+
+    def test_add_floating_ip_agent_primary(self):
+        ri = self._create_router_agent_fips('primary')
+        self.assertEqual(n_consts.FLOATINGIP_STATUS_ACTIVE,
+                         ri.add_floating_ip(
+                             {'floating_ip_address': '15.1.2.3'}, 'qg-1',
+                             mock.Mock()))
+        self.ip_device.assert_called_once_with('qg-1', namespace=ri.ns_name)
+        self.ip_device.return_value.addr.add.assert_called_once_with(
+            '15.1.2.3/32')
+        self.send_adv_notif.assert_called_once_with(ri.ns_name, 'qg-1',
+                                                    '15.1.2.3')
+        ri._get_keepalived_instance.return_value.add_vip.assert_not_called()
+        instance = ri._get_keepalived_instance.return_value
+        instance.get_existing_vip_ip_addresses.return_value = ['15.1.2.1/24']
+        device = mock.Mock()
+        device.name = 'qg-1'
+        self.assertEqual({'15.1.2.1/24', '15.1.2.3/32'},
+                         ri.get_router_cidrs(device))
+
+    def test_add_floating_ip_agent_primary_error(self):
+        ri = self._create_router_agent_fips('primary')
+        self.ip_device.return_value.addr.add.side_effect = RuntimeError
+        self.assertEqual(n_consts.FLOATINGIP_STATUS_ERROR,
+                         ri.add_floating_ip(
+                             {'floating_ip_address': '15.1.2.3'}, 'qg-1',
+                             mock.Mock()))
+        self.send_adv_notif.assert_not_called()
+
+    def test_add_floating_ip_agent_backup(self):
+        ri = self._create_router_agent_fips('backup')
+        self.assertEqual(n_consts.FLOATINGIP_STATUS_ACTIVE,
+                         ri.add_floating_ip(
+                             {'floating_ip_address': '15.1.2.3'}, 'qg-1',
+                             mock.Mock()))
+        self.ip_device.assert_not_called()
+        self.assertEqual({'15.1.2.3/32': 'qg-1'}, ri.agent_floating_ips)
+
+        ri.remove_floating_ip(mock.Mock(), '15.1.2.3/32')
+        self.assertEqual({}, ri.agent_floating_ips)
+
+    def test_update_agent_floating_ips(self):
+        ri = self._create_router_agent_fips('backup')
+        ri.agent_floating_ips = {'15.1.2.3/32': 'qg-1',
+                                 '15.1.2.4/32': 'qg-1'}
+        device = self.ip_device.return_value
+        device.addr.list.return_value = [{'cidr': '15.1.2.3/32'}]
+        ri.update_agent_floating_ips('primary')
+        device.addr.add.assert_called_once_with('15.1.2.4/32')
+
+        ri.update_agent_floating_ips('backup')
+        device.addr.delete_multiple.assert_called_once_with(
+            {'15.1.2.3/32', '15.1.2.4/32'})
+
+    def test_clear_vips_agent_floating_ips(self):
+        ri = self._create_router_agent_fips('backup')
+        ri.agent_floating_ips = {'15.1.2.3/32': 'qg-1',
+                                 '15.1.2.4/32': 'qg-2'}
+        ri._clear_vips('qg-1')
+        self.assertEqual({'15.1.2.4/32': 'qg-2'}, ri.agent_floating_ips)
+
     @mock.patch.object(ha_router.LOG, 'debug')
     def test_spawn_state_change_monitor(self, mock_log):
         ri = self._create_router(mock.MagicMock())
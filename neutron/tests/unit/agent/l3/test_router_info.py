@@ -18,6 +18,7 @@ from oslo_utils import uuidutils
 
 from neutron.agent.l3 import router_info
 from neutron.agent.linux import ip_lib
+from neutron.agent.linux import namespace_mirror
 from neutron.conf.agent import common as config
 from neutron.conf.agent.l3 import config as l3_config
 from neutron.tests import base
@@ -161,7 +162,10 @@ class TestRouterInfo(base.BaseTestCase):
                                                          fake_route1,
                                                          netns)
 
-    def test_routes_updated(self):
+    @mock.patch.object(ip_lib, 'NetlinkBatch')
+    def test_routes_updated(self, NetlinkBatch):
+        batch = NetlinkBatch.return_value
+        batch.execute.return_value = []
         ri = router_info.RouterInfo(mock.Mock(), _uuid(), {}, **self.ri_kwargs)
         ri.router = {}
 
@@ -174,22 +178,33 @@ class TestRouterInfo(base.BaseTestCase):
         ri.router['routes'] = fake_new_routes
         ri.routes_updated(fake_old_routes, fake_new_routes)
 
-        expected = {'replace': [('110.100.30.0/24', '10.100.10.30'),
-                                ('110.100.31.0/24', '10.100.10.30')]}
-        self._check_agent_method_called(ri, expected)
+        NetlinkBatch.assert_called_once_with(ri.ns_name)
+        batch.add_ip_route.assert_has_calls(
+            [mock.call('110.100.30.0/24', via='10.100.10.30'),
+             mock.call('110.100.31.0/24', via='10.100.10.30')],
+            any_order=True)
+        batch.execute.assert_called_once_with()
+        self.mock_add_ip_route.assert_not_called()
         ri.routes = fake_new_routes
         fake_new_routes = [{'destination': "110.100.30.0/24",
                             'nexthop': "10.100.10.30"}]
         ri.router['routes'] = fake_new_routes
         ri.routes_updated(ri.routes, fake_new_routes)
-        expected = {'delete': [('110.100.31.0/24', '10.100.10.30')]}
-        self._check_agent_method_called(ri, expected)
+        batch.delete_ip_route.assert_called_once_with(
+            '110.100.31.0/24', via='10.100.10.30')
         fake_new_routes = []
         ri.router['routes'] = fake_new_routes
         ri.routes_updated(ri.routes, fake_new_routes)
 
-        expected = {'delete': [('110.100.30.0/24', '10.100.10.30')]}
-        self._check_agent_method_called(ri, expected)
+        batch.delete_ip_route.assert_called_with(
+            '110.100.30.0/24', via='10.100.10.30')
+        self.assertEqual(3, batch.execute.call_count)
+        self.mock_delete_ip_route.assert_not_called()
+        # The routing table updates are not batched outside routes_updated
+        ri.update_routing_table('replace', {'destination': '110.100.32.0/24',
+                                            'nexthop': '10.100.10.30'})
+        self.mock_add_ip_route.assert_called_once_with(
+            ri.ns_name, '110.100.32.0/24', via='10.100.10.30')
 
     def test_add_ports_address_scope_iptables(self):
         ri = router_info.RouterInfo(mock.Mock(), _uuid(), {}, **self.ri_kwargs)
@@ -458,6 +473,28 @@ class TestBasicRouterOperations(BasicRouterTestCaseFramework):
                                          {'cidr': addresses[1]}]
         self.assertEqual(set(addresses), ri.get_router_cidrs(device))
 
+    @mock.patch.object(namespace_mirror, 'get_mirror')
+    def test_get_router_cidrs_namespace_mirror(self, get_mirror):
+        ri = self._create_router()
+        self.agent_conf.namespace_mirror = True
+        addresses = ['15.1.2.2/24', '15.1.2.3/32']
+        mirror = get_mirror.return_value
+        mirror.get_addresses.return_value = [{'cidr': addresses[0]},
+                                             {'cidr': addresses[1]}]
+        device = mock.MagicMock(namespace=ri.ns_name)
+        self.assertEqual(set(addresses), ri.get_router_cidrs(device))
+        get_mirror.assert_called_once_with(ri.ns_name)
+        mirror.get_addresses.assert_called_once_with(device.name)
+        device.addr.list.assert_not_called()
+
+    @mock.patch.object(namespace_mirror, 'get_mirror')
+    def test__get_existing_devices_namespace_mirror(self, get_mirror):
+        ri = self._create_router()
+        self.agent_conf.namespace_mirror = True
+        get_mirror.return_value.get_device_names.return_value = ['qr-1']
+        self.assertEqual(['qr-1'], ri._get_existing_devices())
+        get_mirror.assert_called_once_with(ri.ns_name)
+
 
 @mock.patch.object(ip_lib, 'IPDevice')
 class TestFloatingIpWithMockDevice(BasicRouterTestCaseFramework):
@@ -576,3 +613,72 @@ class TestFloatingIpWithMockDevice(BasicRouterTestCaseFramework):
 
         ri.process_floating_ip_addresses("qg-fake-device")
         ri.remove_floating_ip.assert_called_once_with(device, '4.4.4.4/32')
+
+    def _test_process_floating_ip_addresses_batched(self, IPDevice,
+                                                    NetlinkBatch, errors):
+        IPDevice.return_value = device = mock.Mock()
+        device.addr.list.return_value = [{'cidr': '15.1.2.4/32'}]
+        batch = NetlinkBatch.return_value
+        batch.execute.return_value = errors
+        fip_id = _uuid()
+        fip = {
+            'id': fip_id, 'port_id': _uuid(),
+            'floating_ip_address': '15.1.2.3',
+            'fixed_ip_address': '192.168.0.2',
+            'status': 'DOWN'
+        }
+        ri = self._create_router()
+        ri.agent_conf.namespace_mirror = False
+        device.namespace = ri.ns_name
+        ri.get_floating_ips = mock.Mock(return_value=[fip])
+        ri.add_floating_ip = mock.Mock(
+            side_effect=lambda fip, interface_name, device: (
+                lib_constants.FLOATINGIP_STATUS_ACTIVE if
+                ri._add_fip_addr_to_device(fip, device) else
+                lib_constants.FLOATINGIP_STATUS_ERROR))
+
+        fip_statuses = ri.process_floating_ip_addresses(
+            mock.sentinel.interface_name)
+
+        NetlinkBatch.assert_called_once_with(ri.ns_name)
+        batch.add_ip_address.assert_called_once_with('15.1.2.3/32',
+                                                     device.name)
+        batch.delete_ip_address.assert_called_once_with('15.1.2.4/32',
+                                                        device.name)
+        batch.execute.assert_called_once_with()
+        device.addr.add.assert_not_called()
+        device.delete_addr_and_conntrack_state.assert_not_called()
+        device.delete_conntrack_state.assert_called_once_with('15.1.2.4/32')
+        return fip_id, fip_statuses
+
+    @mock.patch.object(ip_lib, 'NetlinkBatch')
+    def test_process_floating_ip_addresses_batched(self, NetlinkBatch,
+                                                   IPDevice):
+        fip_id, fip_statuses = (
+            self._test_process_floating_ip_addresses_batched(
+                IPDevice, NetlinkBatch, []))
+        self.assertEqual({fip_id: lib_constants.FLOATINGIP_STATUS_ACTIVE},
+                         fip_statuses)
+
+    @mock.patch.object(ip_lib, 'NetlinkBatch')
+    def test_process_floating_ip_addresses_batched_error(self, NetlinkBatch,
+                                                         IPDevice):
+        errors = [(('addr_add', {'cidr': '15.1.2.3/32'}), OSError()),
+                  (('addr_del', {'cidr': '15.1.2.4/32'}), OSError())]
+        fip_id, fip_statuses = (
+            self._test_process_floating_ip_addresses_batched(
+                IPDevice, NetlinkBatch, errors))
+        self.assertEqual({fip_id: lib_constants.FLOATINGIP_STATUS_ERROR},
+                         fip_statuses)
+
+    @mock.patch.object(ip_lib, 'NetlinkBatch')
+    def test_process_floating_ip_addresses_batched_already_exists(
+            self, NetlinkBatch, IPDevice):
+        errors = [(('addr_add', {'cidr': '15.1.2.3/32'}),
+                   ip_lib.IpAddressAlreadyExists(ip='15.1.2.3',
+                                                 device='qg-fake'))]
+        fip_id, fip_statuses = (
+            self._test_process_floating_ip_addresses_batched(
+                IPDevice, NetlinkBatch, errors))
+        self.assertEqual({fip_id: lib_constants.FLOATINGIP_STATUS_ACTIVE},
+                         fip_statuses)
@@ -489,29 +489,94 @@ class TestConjIPFlowManager(base.BaseTestCase):
                              constants.INGRESS_DIRECTION, constants.IPv4, 0)
             self.manager.flow_state[self.vlan_tag][(
                 constants.INGRESS_DIRECTION, constants.IPv4)] = {
-                    ('10.22.3.4', 'ff:ee:dd:cc:bb:aa'): [self.conj_id]}
+                    ('10.22.3.4/32', None): {0: (self.conj_id,)}}
 
             self.manager.sg_removed(sg_name)
 
     def test_sg_removed(self):
         self._sg_removed('sg')
         self.driver._add_flow.assert_not_called()
-        self.driver.delete_flows_for_flow_state.assert_called_once_with(
-            {('10.22.3.4', 'ff:ee:dd:cc:bb:aa'): [self.conj_id]}, {},
-            constants.INGRESS_DIRECTION, constants.IPv4, self.vlan_tag)
-        self.driver.delete_flow_for_ip_and_mac.assert_not_called()
+        self.driver.delete_flow_for_ip_and_mac.assert_called_once_with(
+            '10.22.3.4/32', None, 'ingress', 'IPv4', 100, [0])
+        self.assertEqual({}, self.manager.flow_state[self.vlan_tag][(
+            constants.INGRESS_DIRECTION, constants.IPv4)])
 
     def test_remote_sg_removed(self):
         self._sg_removed('remote_id')
         self.driver._add_flow.assert_not_called()
-        self.driver.delete_flows_for_flow_state.assert_called_once_with(
-            {('10.22.3.4', 'ff:ee:dd:cc:bb:aa'): [self.conj_id]}, {},
-            constants.INGRESS_DIRECTION, constants.IPv4, self.vlan_tag)
-        # "conj_id_to_remove" is populated with the remote_sg conj_id assigned,
-        # "_update_flows_for_vlan_subr" will call "delete_flow_for_ip_and_mac".
         self.driver.delete_flow_for_ip_and_mac.assert_called_once_with(
-            '10.22.3.4', 'ff:ee:dd:cc:bb:aa', 'ingress', 'IPv4', 100,
-            {self.conj_id})
+            '10.22.3.4/32', None, 'ingress', 'IPv4', 100, [0])
+
+    def _update_members(self, members, offsets=(0,)):
+        remote_group = self.driver.sg_port_map.get_sg.return_value
+        remote_group.get_ethertype_filtered_addresses.return_value = members
+        with mock.patch.object(self.manager.conj_id_map,
+                               'get_conj_id') as get_conj_id_mock:
+            get_conj_id_mock.return_value = self.conj_id
+            self.manager.conj_ids[self.vlan_tag].clear()
+            for offset in offsets:
+                self.manager.add(self.vlan_tag, 'sg', 'remote_id',
+                                 constants.INGRESS_DIRECTION, constants.IPv4,
+                                 offset)
+            self.driver.reset_mock()
+            self.manager.update_flows_for_vlan(self.vlan_tag, 'ofport1')
+
+    def _added_ips(self):
+        return sorted({call[1]['nw_src'] for call in
+                       self.driver._add_flow.call_args_list})
+
+    def test_update_flows_for_vlan_no_changes(self):
+        members = [('10.22.3.4', 'fa:16:3e:aa:bb:cc'),
+                   ('10.22.3.5', 'fa:16:3e:aa:bb:cd')]
+        self._update_members(members)
+        self._update_members(members)
+        self.driver._add_flow.assert_not_called()
+        self.driver.delete_flow_for_ip_and_mac.assert_not_called()
+
+    def test_update_flows_for_vlan_member_added(self):
+        self._update_members([('10.22.3.4', 'fa:16:3e:aa:bb:cc')])
+        self._update_members([('10.22.3.4', 'fa:16:3e:aa:bb:cc'),
+                              ('10.22.3.5', 'fa:16:3e:aa:bb:cd')])
+        self.assertEqual(['10.22.3.5/32'], self._added_ips())
+        self.driver.delete_flow_for_ip_and_mac.assert_not_called()
+
+    def test_update_flows_for_vlan_member_removed(self):
+        self._update_members([('10.22.3.4', 'fa:16:3e:aa:bb:cc'),
+                              ('10.22.3.5', 'fa:16:3e:aa:bb:cd')])
+        self._update_members([('10.22.3.4', 'fa:16:3e:aa:bb:cc')])
+        self.driver._add_flow.assert_not_called()
+        self.driver.delete_flow_for_ip_and_mac.assert_called_once_with(
+            '10.22.3.5/32', None, 'ingress', 'IPv4', 100, [0])
+
+    def test_update_flows_for_vlan_priority_offset_added(self):
+        members = [('10.22.3.4', 'fa:16:3e:aa:bb:cc')]
+        self._update_members(members, offsets=(0,))
+        self._update_members(members, offsets=(0, 3))
+        # Only the flows of the new priority are added
+        self.assertEqual(
+            {73}, {call[1]['priority'] for call in
+                   self.driver._add_flow.call_args_list})
+        self.driver.delete_flow_for_ip_and_mac.assert_not_called()
+
+    def test_update_flows_for_vlan_priority_offset_removed(self):
+        members = [('10.22.3.4', 'fa:16:3e:aa:bb:cc')]
+        self._update_members(members, offsets=(0, 3))
+        self._update_members(members, offsets=(0,))
+        # All the address flows are deleted, the remaining ones are restored
+        self.driver.delete_flow_for_ip_and_mac.assert_called_once_with(
+            '10.22.3.4/32', None, 'ingress', 'IPv4', 100, [0])
+        self.assertEqual(
+            {70}, {call[1]['priority'] for call in
+                   self.driver._add_flow.call_args_list})
+
+    def test_update_flows_for_vlan_any_address_priority_offset_removed(self):
+        members = [('0.0.0.0/0', None)]
+        self._update_members(members, offsets=(0, 3))
+        self._update_members(members, offsets=(0,))
+        # Only the flows of the removed priority are deleted
+        self.driver.delete_flow_for_ip_and_mac.assert_called_once_with(
+            '0.0.0.0/0', None, 'ingress', 'IPv4', 100, [self.conj_id + 3 * 2])
+        self.driver._add_flow.assert_not_called()
 
 
 class FakeOVSPort:
@@ -1276,57 +1341,6 @@ class TestOVSFirewallDriver(base.BaseTestCase):
         """Check that exception is not propagated outside."""
         self.firewall.remove_trusted_ports(['port_id'])
 
-    def _test_delete_flows_for_flow_state(self, addr_to_conj,
-                                          explicitly_egress_direct=True):
-        direction = 'one_direction'
-        ethertype = 'ethertype'
-        vlan_tag = 'taaag'
-        with mock.patch.object(self.firewall,
-                               'delete_flow_for_ip_and_mac') as mock_del_flow:
-            flow_state = {
-                ('addr1', 'mac1'): {8, 16, 24},
-                ('addr2', 'mac2'): {32, 40},
-            }
-            cfg.CONF.set_override('explicitly_egress_direct',
-                                  explicitly_egress_direct, 'AGENT')
-            self.firewall.delete_flows_for_flow_state(
-                flow_state, addr_to_conj, direction, ethertype, vlan_tag)
-        calls = []
-        for removed_ip, removed_mac in flow_state.keys() - addr_to_conj.keys():
-            calls.append(mock.call(removed_ip, removed_mac, direction,
-                                   ethertype, vlan_tag,
-                                   flow_state[(removed_ip, removed_mac)]))
-            if explicitly_egress_direct:
-                calls.append(mock.call(removed_ip, removed_mac, direction,
-                                       ethertype, vlan_tag, [0]))
-        mock_del_flow.assert_has_calls(calls, any_order=True)
-
-    def test_delete_flows_for_flow_state_no_removed_ips_exp_egress(self):
-        addr_to_conj = {
-            ('addr1', 'mac1'): {8, 16, 24},
-            ('addr2', 'mac2'): {32, 40},
-        }
-        self._test_delete_flows_for_flow_state(addr_to_conj)
-
-    def test_delete_flows_for_flow_state_no_removed_ips_no_exp_egress(self):
-        addr_to_conj = {
-            ('addr1', 'mac1'): {8, 16, 24},
-            ('addr2', 'mac2'): {32, 40},
-        }
-        self._test_delete_flows_for_flow_state(addr_to_conj, False)
-
-    def test_delete_flows_for_flow_state_removed_ips_exp_egress(self):
-        addr_to_conj = {
-            ('mac2', 'addr2'): {32, 40},
-        }
-        self._test_delete_flows_for_flow_state(addr_to_conj)
-
-    def test_delete_flows_for_flow_state_removed_ips_no_exp_egress(self):
-        addr_to_conj = {
-            ('mac1', 'addr1'): {8, 16, 24},
-        }
-        self._test_delete_flows_for_flow_state(addr_to_conj, False)
-
     def test_delete_flow_for_ip_and_mac_using_cookie_any(self):
         with mock.patch.object(self.firewall, '_delete_flows') as \
                 mock_delete_flows:
@@ -1337,6 +1351,29 @@ class TestOVSFirewallDriver(base.BaseTestCase):
             self.assertIn('cookie', kwargs)
             self.assertIs(ovs_lib.COOKIE_ANY, kwargs['cookie'])
 
+    def test_delete_flow_for_ip_and_mac_any_address_is_strict(self):
+        with mock.patch.object(self.firewall, '_delete_flows') as \
+                mock_delete_flows:
+            self.firewall.delete_flow_for_ip_and_mac(
+                '0.0.0.0/0', None, constants.INGRESS_DIRECTION,
+                constants.IPv4, 100, [8 + 3 * 2])
+            _, kwargs = mock_delete_flows.call_args
+            self.assertTrue(kwargs['strict'])
+            self.assertFalse(kwargs['deferred'])
+            self.assertEqual(73, kwargs['priority'])
+            self.assertNotIn('actions', kwargs)
+
+    def test_delete_flow_for_ip_and_mac_any_address_with_mac(self):
+        with mock.patch.object(self.firewall, '_delete_flows') as \
+                mock_delete_flows:
+            self.firewall.delete_flow_for_ip_and_mac(
+                '0.0.0.0/0', 'fa:16:3e:aa:bb:cc', constants.INGRESS_DIRECTION,
+                constants.IPv4, 100, [0])
+            _, kwargs = mock_delete_flows.call_args
+            self.assertEqual('fa:16:3e:aa:bb:cc', kwargs['dl_src'])
+            self.assertNotIn('strict', kwargs)
+            self.assertNotIn('priority', kwargs)
+
 
 class TestCookieContext(base.BaseTestCase):
     def setUp(self):
@@ -1124,6 +1124,7 @@ class TestConfBase(base.BaseTestCase):
         self.conf.register_opts(config.DHCP_PROTOCOL_OPTS)
         config.register_external_process_opts(self.conf)
         config.register_interface_driver_opts_helper(self.conf)
+        config.register_interface_opts(self.conf)
 
 
 class TestBase(TestConfBase):
@@ -1434,6 +1435,7 @@ class TestDnsmasq(TestBase):
             ip_lib, 'get_devices_with_ip')
         self.mock_get_devices_with_ip = self._mock_get_devices_with_ip.start()
         self.addCleanup(self._stop_mocks)
+        mock.patch.dict(dhcp.Dnsmasq._FRAGMENTS_CACHE, clear=True).start()
 
     def _stop_mocks(self):
         self._mock_get_devices_with_ip.stop()
@@ -2428,6 +2430,84 @@ class TestDnsmasq(TestBase):
             mock.call(exp_opt_name, exp_opt_data),
         ])
 
+    def _get_dict_model_network(self, num_ports=3):
+        subnet = {'id': 'dddddddd-dddd-dddd-dddd-dddddddddddd',
+                  'ip_version': constants.IP_VERSION_4,
+                  'cidr': '192.168.0.0/24', 'gateway_ip': '192.168.0.1',
+                  'enable_dhcp': True, 'host_routes': [],
+                  'dns_nameservers': []}
+        ports = [{'id': 'port-%d' % i,
+                  'revision_number': 1,
+                  'mac_address': '00:00:80:aa:bb:%02x' % i,
+                  'device_owner': 'compute:nova',
+                  'extra_dhcp_opts': [],
+                  'fixed_ips': [{'subnet_id': subnet['id'],
+                                 'ip_address': '192.168.0.%d' % (i + 10)}]}
+                 for i in range(num_ports)]
+        return dhcp.NetModel({'id': 'cccccccc-cccc-cccc-cccc-cccccccccccc',
+                              'subnets': [subnet], 'non_local_subnets': [],
+                              'ports': ports})
+
+    @mock.patch.object(checks, 'dnsmasq_host_tag_support', return_value=False)
+    def test_output_config_files_unchanged_network(self, *args):
+        net = self._get_dict_model_network()
+        self._get_dnsmasq(net)._output_config_files()
+        self.assertEqual(3, self.safe.call_count)
+        host_data = self.safe.call_args_list[0][0][1]
+        self.assertEqual(3, len(host_data.splitlines()))
+
+        self.safe.reset_mock()
+        dm = self._get_dnsmasq(net)
+        with mock.patch.object(os.path, 'exists', return_value=True), \
+                mock.patch.object(dm, '_render_host_lines') as render:
+            dm._output_config_files()
+        render.assert_not_called()
+        self.safe.assert_not_called()
+
+    @mock.patch.object(checks, 'dnsmasq_host_tag_support', return_value=False)
+    def test_output_config_files_port_updated(self, *args):
+        net = self._get_dict_model_network()
+        self._get_dnsmasq(net)._output_config_files()
+
+        self.safe.reset_mock()
+        net.ports[1].fixed_ips[0].ip_address = '192.168.0.100'
+        net.ports[1].revision_number = 2
+        net.ports.pop(2)
+        dm = self._get_dnsmasq(net)
+        with mock.patch.object(os.path, 'exists', return_value=True), \
+                mock.patch.object(dm, '_render_host_lines',
+                                  wraps=dm._render_host_lines) as render:
+            dm._output_config_files()
+        render.assert_called_once_with(net.ports[1], {}, mock.ANY)
+        host_name = '/dhcp/%s/host' % net.id
+        addn_name = '/dhcp/%s/addn_hosts' % net.id
+        self.safe.assert_has_calls([
+            mock.call(host_name,
+                      '00:00:80:aa:bb:00,host-192-168-0-10.openstacklocal,'
+                      '192.168.0.10\n'
+                      '00:00:80:aa:bb:01,host-192-168-0-100.openstacklocal,'
+                      '192.168.0.100\n'),
+            mock.call(addn_name,
+                      '192.168.0.10\thost-192-168-0-10.openstacklocal '
+                      'host-192-168-0-10\n'
+                      '192.168.0.100\thost-192-168-0-100.openstacklocal '
+                      'host-192-168-0-100\n')])
+        # The options file did not change.
+        self.assertEqual(2, self.safe.call_count)
+
+    @mock.patch.object(checks, 'dnsmasq_host_tag_support', return_value=False)
+    def test_output_config_files_port_without_revision_number(self, *args):
+        net = self._get_dict_model_network()
+        del net.ports[0]['revision_number']
+        self._get_dnsmasq(net)._output_config_files()
+
+        dm = self._get_dnsmasq(net)
+        with mock.patch.object(os.path, 'exists', return_value=True), \
+                mock.patch.object(dm, '_render_host_lines',
+                                  wraps=dm._render_host_lines) as render:
+            dm._output_config_files()
+        render.assert_called_once_with(net.ports[0], {}, mock.ANY)
+
     def test_release_unused_leases(self):
         dnsmasq = self._get_dnsmasq(FakeDualNetwork())
 
@@ -2963,6 +3043,18 @@ class TestDnsmasq(TestBase):
                 {FakeV4Subnet().id: '192.168.0.1'}
             )
 
+    @mock.patch.object(dhcp.namespace_mirror, 'get_mirror')
+    def test_make_subnet_interface_ip_map_namespace_mirror(self,
+                                                           get_mirror):
+        self.conf.set_override('namespace_mirror', True)
+        mirror = get_mirror.return_value
+        mirror.get_addresses.return_value = [{'cidr': '192.168.0.1/24'}]
+        dm = self._get_dnsmasq(FakeDualNetwork())
+        self.assertEqual({FakeV4Subnet().id: '192.168.0.1'},
+                         dm._make_subnet_interface_ip_map())
+        get_mirror.assert_called_once_with(dm.network.namespace)
+        mirror.get_addresses.assert_called_once_with(dm.interface_name)
+
     def test_remove_config_files(self):
         net = FakeV4Network()
         path = '/opt/data/neutron/dhcp'
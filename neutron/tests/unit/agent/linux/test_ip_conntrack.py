@@ -14,7 +14,10 @@
 
 from unittest import mock
 
+from oslo_config import cfg
+
 from neutron.agent.linux import ip_conntrack
+from neutron.privileged.agent.linux import netlink_lib
 from neutron.tests import base
 
 
@@ -22,6 +25,8 @@ class IPConntrackTestCase(base.BaseTestCase):
 
     def setUp(self):
         super().setUp()
+        cfg.CONF.set_override('netlink_conntrack_deletion', False,
+                              'SECURITYGROUP')
         self.execute = mock.Mock()
         self.filtered_port = {}
         self.unfiltered_port = {}
@@ -45,6 +50,100 @@ class IPConntrackTestCase(base.BaseTestCase):
         self.mgr._delete_conntrack_state(dev_info_list, rule)
         self.assertEqual(1, len(self.execute.mock_calls))
 
+    def test_process_queue_dedupes_updates(self):
+        rule = {'ethertype': 'IPv4', 'direction': 'ingress'}
+        dev_info = {'device': 'device', 'fixed_ips': ['1.2.3.4'],
+                    'of_port': mock.Mock(vlan_tag=100)}
+        for _i in range(10):
+            self.mgr.delete_conntrack_state_by_rule([dev_info], rule)
+        self.mgr._process_queue()
+        self.assertTrue(self.mgr._queue.empty())
+        self.execute.assert_called_once_with(
+            ['conntrack', '-D', '-f', 'ipv4', '-d', '1.2.3.4/32', '-w', 100],
+            run_as_root=True, privsep_exec=True, check_exit_code=True,
+            extra_ok_codes=[1])
+
+
+class IPConntrackNetlinkTestCase(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        mock.patch.object(netlink_lib, 'nfct_lib',
+                          'libnetfilter_conntrack.so').start()
+        self.delete_entries = mock.patch.object(
+            netlink_lib, 'delete_entries_by_filters').start()
+        self.execute = mock.Mock()
+        mock.patch.object(ip_conntrack.IpConntrackManager,
+                          '_process_queue_worker').start()
+        self.mgr = ip_conntrack.IpConntrackManager(
+            lambda table: ['test --physdev-in tapdevice -j CT --zone 100'],
+            {}, {}, self.execute, zone_per_port=True)
+        self.dev_info = {'device': 'device',
+                         'fixed_ips': ['1.2.3.4', 'fe80::1'],
+                         'allowed_address_pairs': [
+                             {'ip_address': '10.0.0.0/24'}]}
+
+    def _process_queue(self):
+        self.mgr._process_queue()
+        self.assertTrue(self.mgr._queue.empty())
+        self.delete_entries.assert_called_once_with(mock.ANY)
+        return sorted(self.delete_entries.call_args[0][0], key=str)
+
+    def test_delete_conntrack_state_by_rule(self):
+        for _i in range(3):
+            self.mgr.delete_conntrack_state_by_rule(
+                [self.dev_info],
+                {'ethertype': 'IPv4', 'direction': 'ingress',
+                 'protocol': 'tcp'})
+        self.mgr.delete_conntrack_state_by_rule(
+            [self.dev_info],
+            {'ethertype': 'IPv6', 'direction': 'egress', 'protocol': '58'})
+        self.assertEqual(
+            [(4, 100, 6, None, None, '1.2.3.4/32'),
+             (4, 100, 6, None, None, '10.0.0.0/24'),
+             (6, 100, 58, None, 'fe80::1/128', None)],
+            self._process_queue())
+        self.execute.assert_not_called()
+
+    def test_delete_conntrack_state_by_remote_ips(self):
+        self.mgr.delete_conntrack_state_by_remote_ips(
+            [self.dev_info], 'IPv4', ['5.6.7.8', '5.6.7.9'], mark=1)
+        self.assertEqual(
+            [(4, 100, None, '1', '1.2.3.4/32', '5.6.7.8'),
+             (4, 100, None, '1', '1.2.3.4/32', '5.6.7.9'),
+             (4, 100, None, '1', '10.0.0.0/24', '5.6.7.8'),
+             (4, 100, None, '1', '10.0.0.0/24', '5.6.7.9'),
+             (4, 100, None, '1', '5.6.7.8', '1.2.3.4/32'),
+             (4, 100, None, '1', '5.6.7.8', '10.0.0.0/24'),
+             (4, 100, None, '1', '5.6.7.9', '1.2.3.4/32'),
+             (4, 100, None, '1', '5.6.7.9', '10.0.0.0/24')],
+            self._process_queue())
+
+    def test_delete_conntrack_state_unknown_device(self):
+        self.mgr.delete_conntrack_state_by_rule(
+            [{'device': 'unknown', 'fixed_ips': ['1.2.3.4']}],
+            {'ethertype': 'IPv4', 'direction': 'ingress'})
+        self.mgr._process_queue()
+        self.delete_entries.assert_not_called()
+        self.execute.assert_not_called()
+
+    def test_netlink_failure_uses_conntrack_command(self):
+        self.delete_entries.side_effect = OSError
+        self.mgr.delete_conntrack_state_by_rule(
+            [self.dev_info], {'ethertype': 'IPv6', 'direction': 'ingress'})
+        self.mgr._process_queue()
+        self.execute.assert_called_once_with(
+            ['conntrack', '-D', '-f', 'ipv6', '-d', 'fe80::1/128',
+             '-w', 100],
+            run_as_root=True, privsep_exec=True, check_exit_code=True,
+            extra_ok_codes=[1])
+
+    def test_namespace_uses_conntrack_command(self):
+        mgr = ip_conntrack.IpConntrackManager(
+            lambda table: [], {}, {}, self.execute, namespace='ns')
+        self.assertFalse(mgr._netlink)
+        self.assertTrue(self.mgr._netlink)
+
 
 class IPConntrackZonePerPortRestoreTestCase(base.BaseTestCase):
     """Regression test for bug where zones are not restored after restart.
@@ -84,6 +183,8 @@ class OvsIPConntrackTestCase(IPConntrackTestCase):
 
     def setUp(self):
         super(IPConntrackTestCase, self).setUp()
+        cfg.CONF.set_override('netlink_conntrack_deletion', False,
+                              'SECURITYGROUP')
         self.execute = mock.Mock()
         mock.patch.object(ip_conntrack.IpConntrackManager,
                           '_process_queue_worker').start()
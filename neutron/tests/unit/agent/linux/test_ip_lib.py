@@ -1511,3 +1511,133 @@ class GetDevicesInfoTestCase(base.BaseTestCase):
             break
         else:
             self.fail('No VETH device found')
+
+
+class NetlinkBatchTestCase(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.execute_batch = mock.patch.object(priv_lib,
+                                               'execute_batch').start()
+        self.execute_batch.side_effect = lambda namespace, ops: [None] * len(
+            ops)
+        self.namespace_changed = mock.patch.object(
+            ip_lib, '_namespace_changed').start()
+        self.batch = ip_lib.NetlinkBatch('ns')
+
+    def test_execute(self):
+        self.batch.add_ip_address('10.0.0.1/24', 'qr-1')
+        self.batch.delete_ip_address('10.0.0.2/24', 'qr-1')
+        self.batch.add_ip_route('10.1.0.0/24', via='10.0.0.254',
+                                table='main')
+        self.batch.delete_ip_route(None, device='qr-1', via='10.0.0.254')
+        self.batch.add_gateway('10.0.0.254', 'qr-1', table=16)
+        self.batch.add_neigh_entry('10.0.0.3', 'fa:16:3e:00:00:01', 'qr-1')
+        self.batch.delete_neigh_entry('10.0.0.3', 'fa:16:3e:00:00:01',
+                                      'qr-1')
+        self.batch.delete_ip_rule('10.0.0.0/24', table=16, priority=16)
+        self.batch.set_link_attribute('qr-1', mtu=1400)
+        self.assertEqual(9, len(self.batch))
+
+        self.assertEqual([], self.batch.execute())
+        self.assertEqual(0, len(self.batch))
+        self.namespace_changed.assert_called_once_with('ns')
+        self.execute_batch.assert_called_once_with('ns', [
+            ('addr_add', {'cidr': '10.0.0.1/24', 'device': 'qr-1',
+                          'scope': 'global', 'broadcast': '10.0.0.255'}),
+            ('addr_del', {'cidr': '10.0.0.2/24', 'device': 'qr-1'}),
+            ('route_replace', {'cidr': '10.1.0.0/24', 'ip_version': 4,
+                               'device': None, 'via': '10.0.0.254',
+                               'table': 254, 'metric': None, 'scope': None,
+                               'proto': 'static', 'kwargs': {}}),
+            ('route_del', {'cidr': None, 'ip_version': 4, 'device': 'qr-1',
+                           'via': '10.0.0.254', 'table': None,
+                           'scope': None, 'kwargs': {}}),
+            ('route_replace', {'cidr': None, 'ip_version': 4,
+                               'device': 'qr-1', 'via': '10.0.0.254',
+                               'table': 16, 'metric': None,
+                               'scope': 'global', 'proto': 'static',
+                               'kwargs': {}}),
+            ('neigh_replace', {'ip_address': '10.0.0.3',
+                               'mac_address': 'fa:16:3e:00:00:01',
+                               'device': 'qr-1', 'ip_version': 4,
+                               'nud_state': 'permanent', 'kwargs': {}}),
+            ('neigh_del', {'ip_address': '10.0.0.3',
+                           'mac_address': 'fa:16:3e:00:00:01',
+                           'device': 'qr-1', 'ip_version': 4,
+                           'kwargs': {}}),
+            ('rule_del', {'kwargs': {'family': socket.AF_INET,
+                                     'src': '10.0.0.0', 'src_len': 24,
+                                     'table': 16, 'priority': 16}}),
+            ('link_set', {'device': 'qr-1', 'attributes': {'mtu': 1400}})])
+
+    def test_execute_empty(self):
+        self.assertEqual([], self.batch.execute())
+        self.execute_batch.assert_not_called()
+        self.namespace_changed.assert_not_called()
+
+    def test_execute_errors(self):
+        self.batch.add_ip_address('10.0.0.1/24', 'qr-1')
+        self.batch.add_ip_address('10.0.0.2/24', 'qr-2')
+        self.batch.add_ip_route('10.1.0.0/24', via='10.0.0.254')
+        self.batch.set_link_attribute('qr-1', mtu=1400)
+        self.execute_batch.side_effect = None
+        self.execute_batch.return_value = [
+            [errno.EEXIST, 'File exists'],
+            [errno.ENODEV, 'Network interface qr-2 not found'],
+            [errno.ENETUNREACH, 'Network is unreachable'],
+            None]
+        errors = self.batch.execute()
+        self.assertEqual(['addr_add', 'addr_add', 'route_replace'],
+                         [operation[0] for operation, __ in errors])
+        self.assertIsInstance(errors[0][1], priv_lib.IpAddressAlreadyExists)
+        self.assertIsInstance(errors[1][1],
+                              priv_lib.NetworkInterfaceNotFound)
+        self.assertIsInstance(errors[2][1], netlink_exceptions.NetlinkError)
+        self.assertEqual(errno.ENETUNREACH, errors[2][1].code)
+
+    def test_execute_raise_on_error(self):
+        self.batch.add_ip_route('10.1.0.0/24', via='10.0.0.254')
+        self.batch.set_link_attribute('qr-1', mtu=1400)
+        self.execute_batch.side_effect = None
+        self.execute_batch.return_value = [
+            None, [errno.ENODEV, 'Network interface qr-1 not found']]
+        self.assertRaises(priv_lib.NetworkInterfaceNotFound,
+                          self.batch.execute, raise_on_error=True)
+        self.assertEqual(0, len(self.batch))
+
+    @mock.patch.object(ip_lib, 'list_ip_rules')
+    def test_add_ip_rule(self, list_ip_rules):
+        list_ip_rules.return_value = [
+            {'from': '10.0.0.1', 'table': '16', 'priority': '100',
+             'type': 'unicast'}]
+        self.batch.add_ip_rule('10.0.0.1', table=16, priority=100)
+        self.batch.add_ip_rule('10.0.0.2', table=16, priority=101)
+        self.batch.add_ip_rule('10.0.0.3', table=16, priority=102)
+        # The existing rules are listed once
+        list_ip_rules.assert_called_once_with('ns', 4)
+        self.batch.execute()
+        self.execute_batch.assert_called_once_with('ns', [
+            ('rule_add', {'kwargs': {'family': socket.AF_INET,
+                                     'src': '10.0.0.2', 'src_len': 32,
+                                     'table': 16, 'priority': 101}}),
+            ('rule_add', {'kwargs': {'family': socket.AF_INET,
+                                     'src': '10.0.0.3', 'src_len': 32,
+                                     'table': 16, 'priority': 102}})])
+
+    @mock.patch.object(ip_lib, 'list_ip_rules', return_value=[])
+    def test_add_ip_rule_queued(self, list_ip_rules):
+        rule_args = {'kwargs': {'family': socket.AF_INET, 'src': '10.0.0.1',
+                                'src_len': 32, 'table': 16,
+                                'priority': 100}}
+        self.batch.add_ip_rule('10.0.0.1', table=16, priority=100)
+        # Already queued in the batch
+        self.batch.add_ip_rule('10.0.0.1', table=16, priority=100)
+        self.batch.delete_ip_rule('10.0.0.1', table=16, priority=100)
+        # Deleted in the batch, added again
+        self.batch.add_ip_rule('10.0.0.1', table=16, priority=100)
+        list_ip_rules.assert_called_once_with('ns', 4)
+        self.batch.execute()
+        self.execute_batch.assert_called_once_with('ns', [
+            ('rule_add', rule_args), ('rule_del', rule_args),
+            ('rule_add', rule_args)])
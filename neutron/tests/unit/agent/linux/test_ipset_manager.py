@@ -164,3 +164,67 @@ class IpsetManagerTestCase(BaseIpsetManagerTest):
         self.expect_destroy()
         self.ipset.destroy(TEST_SET_ID, ETHERTYPE)
         self.verify_mock_calls()
+
+
+class IpsetManagerDeferApplyTestCase(BaseIpsetManagerTest):
+
+    def setUp(self):
+        super().setUp()
+        self.expected_calls = []
+        self.ipset.defer_apply_on()
+
+    def _expect_restore(self, process_input):
+        self.expected_calls.append(
+            mock.call(['ipset', 'restore', '-exist'],
+                      process_input='\n'.join(process_input),
+                      run_as_root=True, check_exit_code=True,
+                      privsep_exec=True))
+
+    def _refresh_input(self, set_name, addresses):
+        new_set_name = set_name + ipset_manager.SWAP_SUFFIX
+        return (['create %s hash:net family inet' % new_set_name] +
+                ['add %s %s' % (new_set_name, ip) for ip in
+                 self.ipset._sanitize_addresses(addresses)] +
+                ['swap %s %s' % (new_set_name, set_name),
+                 'destroy %s' % new_set_name])
+
+    def test_set_members_deferred(self):
+        other_set_name = self.ipset.get_name('other_sgid', ETHERTYPE)
+        self.ipset.set_members(TEST_SET_ID, ETHERTYPE, FAKE_IPS[0:1])
+        self.ipset.set_members('other_sgid', ETHERTYPE, FAKE_IPS)
+        self.ipset.set_members(TEST_SET_ID, ETHERTYPE, FAKE_IPS[1:2])
+        self.execute.assert_not_called()
+        self.assertTrue(self.ipset.set_name_exists(other_set_name))
+
+        self._expect_restore(
+            ['create %s hash:net family inet' % TEST_SET_NAME] +
+            self._refresh_input(TEST_SET_NAME, FAKE_IPS[0:1]) +
+            ['create %s hash:net family inet' % other_set_name] +
+            self._refresh_input(other_set_name, FAKE_IPS) +
+            ['add %s 10.0.0.2/32' % TEST_SET_NAME,
+             'del %s 10.0.0.1/32' % TEST_SET_NAME])
+        self.ipset.defer_apply_off()
+        self.assertEqual(1, self.execute.call_count)
+        self.verify_mock_calls()
+
+    def test_set_members_deferred_refresh(self):
+        self.ipset.set_members(TEST_SET_ID, ETHERTYPE, FAKE_IPS[0:1])
+        self.ipset.defer_apply_off()
+        self.execute.reset_mock()
+
+        self.ipset.defer_apply_on()
+        self.ipset.set_members(TEST_SET_ID, ETHERTYPE, FAKE_IPS)
+        self._expect_restore(self._refresh_input(TEST_SET_NAME, FAKE_IPS))
+        self.ipset.defer_apply_off()
+        self.assertEqual(1, self.execute.call_count)
+        self.verify_mock_calls()
+
+    def test_defer_apply_off_without_changes(self):
+        self.ipset.defer_apply_off()
+        self.execute.assert_not_called()
+
+    def test_defer_apply_off_failure(self):
+        self.execute.side_effect = RuntimeError
+        self.ipset.set_members(TEST_SET_ID, ETHERTYPE, FAKE_IPS[0:1])
+        self.assertRaises(RuntimeError, self.ipset.defer_apply_off)
+        self.assertFalse(self.ipset.set_name_exists(TEST_SET_NAME))
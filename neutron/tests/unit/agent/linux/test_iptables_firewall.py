@@ -73,6 +73,8 @@ class BaseIptablesFirewallTestCase(base.BaseTestCase):
         security_config.register_securitygroups_opts()
         agent_config.register_root_helper(cfg.CONF)
         cfg.CONF.set_override('comment_iptables_rules', False, 'AGENT')
+        cfg.CONF.set_override('netlink_conntrack_deletion', False,
+                              'SECURITYGROUP')
         self.utils_exec_p = mock.patch(
             'neutron.agent.linux.utils.execute')
         self.utils_exec = self.utils_exec_p.start()
@@ -2437,6 +2439,21 @@ class IptablesFirewallEnhancedIpsetTestCase(BaseIptablesFirewallTestCase):
 
         self.firewall.ipset.assert_has_calls(calls, any_order=True)
 
+    def test_filter_defer_apply_ipsets_before_iptables(self):
+        manager = mock.Mock()
+        manager.attach_mock(self.firewall.ipset, 'ipset')
+        manager.attach_mock(self.firewall.iptables, 'iptables')
+        self.firewall.filter_defer_apply_on()
+        self.firewall.ipset.defer_apply_on.assert_called_once_with()
+        self.firewall.update_security_group_members(
+            'fake_sgid', {'IPv4': [('10.0.0.1', None)]})
+        self.firewall.filter_defer_apply_off()
+        calls = [call for call in manager.mock_calls
+                 if call in (mock.call.ipset.defer_apply_off(),
+                             mock.call.iptables.defer_apply_off())]
+        self.assertEqual([mock.call.ipset.defer_apply_off(),
+                          mock.call.iptables.defer_apply_off()], calls)
+
     def test_filter_defer_apply_off_with_sg_only_ipv6_rule(self):
         self.firewall.sg_rules = self._fake_sg_rules()
         self.firewall.pre_sg_rules = self._fake_sg_rules()
@@ -1349,6 +1349,84 @@ class IptablesManagerStateFulTestCaseEmptyCustomBinaryNameIPv6(
     use_ipv6 = True
 
 
+class IptablesManagerCachedStateTestCase(IptablesManagerBaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        cfg.CONF.set_override('iptables_cache_state', True, 'AGENT')
+        self.iptables = iptables_manager.IptablesManager(namespace='ns')
+        self.execute.return_value = ''
+        self.iptables._apply_synchronized()
+        self.execute.reset_mock()
+
+    def _get_calls(self, command):
+        return [call for call in self.execute.call_args_list
+                if command in call[0][0]]
+
+    def test_no_changes(self):
+        self.assertEqual([], self.iptables._apply_synchronized())
+        self.execute.assert_not_called()
+
+    def test_changes_applied_over_cached_state(self):
+        self.iptables.ipv4['filter'].add_rule('INPUT', '-j DROP')
+        commands = self.iptables._apply_synchronized()
+
+        self.assertEqual([], self._get_calls('iptables-save'))
+        restore = self._get_calls('iptables-restore')
+        self.assertEqual(1, len(restore))
+        bn = iptables_manager.binary_name
+        self.assertEqual(['# Generated by iptables_manager',
+                          '*filter',
+                          '-I %s-INPUT 1 -j DROP' % bn,
+                          'COMMIT',
+                          '# Completed by iptables_manager'], commands)
+        self.assertEqual('\n'.join(commands + ['']),
+                         restore[0][1]['process_input'])
+
+        self.iptables.ipv4['filter'].remove_rule('INPUT', '-j DROP')
+        commands = self.iptables._apply_synchronized()
+        self.assertIn('-D %s-INPUT 1' % bn, commands)
+        self.assertEqual([], self._get_calls('iptables-save'))
+
+    def test_cached_state_not_used_without_namespace(self):
+        iptables = iptables_manager.IptablesManager()
+        iptables._apply_synchronized()
+        self.execute.reset_mock()
+        iptables._apply_synchronized()
+        self.assertEqual(1, len(self._get_calls('iptables-save')))
+
+    def test_cached_state_not_used_with_debug_iptables_rules(self):
+        cfg.CONF.set_override('debug_iptables_rules', True, 'AGENT')
+        self.iptables._apply_synchronized()
+        self.assertEqual(1, len(self._get_calls('iptables-save')))
+
+    def test_restore_failure_reads_kernel_state(self):
+        def _execute(args, **kwargs):
+            if ('iptables-restore' in args and
+                    not self._get_calls('iptables-save')):
+                raise RuntimeError()
+            return ''
+
+        self.execute.side_effect = _execute
+        self.iptables.ipv4['filter'].add_rule('INPUT', '-j DROP')
+        self.iptables._apply_synchronized()
+        self.assertEqual(1, len(self._get_calls('iptables-save')))
+        self.assertEqual(2, len(self._get_calls('iptables-restore')))
+
+    def test_audit_interval(self):
+        cfg.CONF.set_override('iptables_cache_audit_interval', 10, 'AGENT')
+        timestamp = self.iptables._cached_state['iptables']['timestamp']
+        with mock.patch.object(iptables_manager.time, 'monotonic',
+                               return_value=timestamp + 5):
+            self.iptables._apply_synchronized()
+        self.execute.assert_not_called()
+
+        with mock.patch.object(iptables_manager.time, 'monotonic',
+                               return_value=timestamp + 10):
+            self.iptables._apply_synchronized()
+        self.assertEqual(1, len(self._get_calls('iptables-save')))
+
+
 class IptablesManagerStateLessTestCase(base.BaseTestCase):
 
     def setUp(self):
@@ -224,6 +224,48 @@ class KeepalivedConfTestCase(KeepalivedBaseTestCase,
         self.assertEqual(['192.168.2.0/24', '192.168.3.0/24'], current_vips)
 
 
+class KeepalivedConfDiffTestCase(KeepalivedConfTestCase):
+
+    def test_get_config_sections(self):
+        sections = keepalived.get_config_sections(self.expected)
+        self.assertEqual(
+            frozenset(['192.168.2.0/24 dev eth2 no_track',
+                       '192.168.3.0/24 dev eth6 no_track',
+                       '192.168.55.0/24 dev eth10 no_track']),
+            sections[('vrrp_instance VR_2', 'virtual_ipaddress_excluded')])
+        self.assertEqual(frozenset(['eth0']),
+                         sections[('vrrp_instance VR_1', 'track_interface')])
+        self.assertEqual(frozenset(), sections[()])
+
+    def test_diff_config_unchanged(self):
+        self.assertEqual(
+            [], keepalived.diff_config(self.expected, self.expected))
+
+    def test_diff_config_ignores_order_and_indentation(self):
+        reordered = self.expected.replace(
+            '192.168.1.0/24 dev eth1 no_track\n'
+            '        192.168.2.0/24 dev eth2 no_track',
+            '192.168.2.0/24 dev eth2 no_track\n'
+            '      192.168.1.0/24 dev eth1 no_track')
+        self.assertNotEqual(self.expected, reordered)
+        self.assertEqual([], keepalived.diff_config(self.expected, reordered))
+
+    def test_diff_config_changed(self):
+        changed = self.expected.replace('192.168.3.0/24 dev eth6',
+                                        '192.168.4.0/24 dev eth6')
+        changed = changed.replace('via 192.168.1.1 ', 'via 192.168.1.254 ')
+        self.assertEqual(
+            [('vrrp_instance VR_1', 'virtual_routes'),
+             ('vrrp_instance VR_2', 'virtual_ipaddress_excluded')],
+            keepalived.diff_config(self.expected, changed))
+
+    def test_diff_config_no_previous_config(self):
+        self.assertEqual([()], keepalived.diff_config(None, ''))
+        self.assertEqual([()], keepalived.diff_config('', None))
+        self.assertIn(('vrrp_instance VR_1',),
+                      keepalived.diff_config(None, self.expected))
+
+
 class KeepalivedInstanceRoutesTestCase(KeepalivedBaseTestCase):
     @classmethod
     def _get_instance_routes(cls):
@@ -564,3 +606,69 @@ class KeepalivedManagerTestCase(base.BaseTestCase):
             process.disable.assert_has_calls([
                 mock.call(sig=str(int(signal.SIGTERM))),
                 mock.call(sig=str(int(signal.SIGKILL)))])
+
+    def _test_spawn(self, active=True, conf_on_disk=None,
+                    config_str='config', throttle_restart_value=None):
+        manager = keepalived.KeepalivedManager(
+            self.uuid, mock.Mock(), self.process_monitor, '/tmp',
+            throttle_restart_value=throttle_restart_value)
+        manager.config.get_config_str.return_value = config_str
+        manager.config.instances = {}
+        process = mock.Mock(active=active)
+        mock.patch.object(manager, 'get_process',
+                          return_value=process).start()
+        mock.patch.object(manager, '_get_vrrp_process').start()
+        mock.patch.object(manager, 'get_conf_on_disk',
+                          return_value=conf_on_disk).start()
+        mock.patch.object(manager, 'get_full_config_file_path',
+                          return_value='/tmp/keepalived.conf').start()
+        self.replace_file = mock.patch.object(
+            keepalived.file_utils, 'replace_file').start()
+        manager.spawn()
+        return manager, process
+
+    def test_spawn_not_active(self):
+        manager, process = self._test_spawn(active=False,
+                                            conf_on_disk='config')
+        process.enable.assert_called_once_with()
+        process.reload_cfg.assert_not_called()
+        self.replace_file.assert_not_called()
+
+    def test_spawn_config_unchanged(self):
+        manager, process = self._test_spawn(conf_on_disk='config')
+        self.replace_file.assert_not_called()
+        process.enable.assert_not_called()
+        process.reload_cfg.assert_not_called()
+
+    def test_spawn_config_changed(self):
+        manager, process = self._test_spawn(conf_on_disk='old config')
+        self.replace_file.assert_called_once_with('/tmp/keepalived.conf',
+                                                  'config')
+        process.reload_cfg.assert_called_once_with()
+        manager.spawn()
+        process.reload_cfg.assert_called_once_with()
+
+    def test_spawn_config_changed_reloads_batched(self):
+        manager, process = self._test_spawn(throttle_restart_value=60)
+        process.reload_cfg.assert_called_once_with()
+        with mock.patch.object(keepalived.threading, 'Timer') as timer:
+            for config_str in ('config 2', 'config 3'):
+                manager.config.get_config_str.return_value = config_str
+                manager.spawn()
+            timer.assert_called_once_with(mock.ANY,
+                                          manager._scheduled_reload)
+            self.assertLessEqual(timer.call_args[0][0], 60)
+            timer.return_value.start.assert_called_once_with()
+            self.assertEqual(3, self.replace_file.call_count)
+            process.reload_cfg.assert_called_once_with()
+
+            manager._scheduled_reload()
+            self.assertEqual(2, process.reload_cfg.call_count)
+            self.assertIsNone(manager._reload_timer)
+
+            manager.config.get_config_str.return_value = 'config 4'
+            manager.spawn()
+            self.assertEqual(2, timer.call_count)
+            manager.disable()
+            timer.return_value.cancel.assert_called_once_with()
+            self.assertIsNone(manager._reload_timer)
@@ -12,6 +12,7 @@
 
 from unittest import mock
 
+import netaddr
 from neutron_lib import constants
 from neutron_lib import exceptions
 
@@ -130,6 +131,24 @@ INGRESS_QSIC_ID = "ffff:"
 EGRESS_QDISC_ID = "1:"
 QDISC_IDS = {constants.INGRESS_DIRECTION: INGRESS_QSIC_ID,
              constants.EGRESS_DIRECTION: EGRESS_QDISC_ID}
+FILTER_HANDLE_1 = 0x80000800
+FILTER_HANDLE_2 = 0x80000801
+FILTER_HANDLE_3 = 0x80000802
+TC_FILTERS_LIST = [
+    {'keys': [{'value': int(netaddr.IPAddress(FLOATING_IP_1)),
+               'mask': 0xffffffff, 'offset': 16}],
+     'handle': FILTER_HANDLE_1, 'priority': 1},
+    {'keys': [{'value': int(netaddr.IPAddress(FLOATING_IP_2)),
+               'mask': 0xffffffff, 'offset': 16}],
+     'handle': FILTER_HANDLE_2, 'priority': 1},
+    # Filter added by others, with another priority
+    {'keys': [{'value': int(netaddr.IPAddress(FLOATING_IP_2)),
+               'mask': 0xffffffff, 'offset': 16}],
+     'handle': FILTER_HANDLE_3, 'priority': 2},
+    # Filter matching the IPv4 protocol number
+    {'keys': [{'value': 0x60000, 'mask': 0xff0000, 'offset': 8}],
+     'handle': FILTER_HANDLE_3, 'priority': 1},
+]
 TC_QDISCS = [{'handle': '1:', 'qdisc_type': 'htb', 'parent': 'root'},
              {'handle': 'ffff:', 'qdisc_type': 'ingress', 'parent': 'ingress'}]
 
@@ -312,6 +331,17 @@ class TestFloatingIPTcCommandBase(base.BaseTestCase):
             privsep_exec=True
         )
 
+    def test__get_ip_filter_ids(self):
+        with mock.patch.object(base_tc_lib, 'list_tc_filters',
+                               return_value=TC_FILTERS_LIST) as list_filters:
+            self.assertEqual(
+                {FLOATING_IP_1: [FILTER_HANDLE_1],
+                 FLOATING_IP_2: [FILTER_HANDLE_2]},
+                self.tc._get_ip_filter_ids(INGRESS_QSIC_ID))
+            list_filters.assert_called_once_with(
+                FLOATING_IP_DEVICE_NAME, INGRESS_QSIC_ID,
+                namespace=FLOATING_IP_ROUTER_NAMESPACE)
+
     def test__get_or_create_qdisc(self):
         with mock.patch.object(tc_lib.FloatingIPTcCommandBase,
                                '_get_qdisc_id_for_filter') as get_disc1:
@@ -477,3 +507,68 @@ class TestFloatingIPTcCommand(base.BaseTestCase):
                 del_filter_id.assert_has_calls(
                     [mock.call(EGRESS_QDISC_ID, FILETER_ID_1),
                      mock.call(EGRESS_QDISC_ID, FILETER_ID_2)])
+
+    def test_update_ip_rate_limits(self):
+        ip = '111.111.111.111'
+        with mock.patch.object(tc_lib.FloatingIPTcCommandBase,
+                               '_get_or_create_qdisc',
+                               return_value=EGRESS_QDISC_ID), \
+                mock.patch.object(base_tc_lib, 'list_tc_filters',
+                                  return_value=TC_FILTERS_LIST), \
+                mock.patch.object(base_tc_lib,
+                                  'update_tc_filters_policy') as update:
+            self.tc.update_ip_rate_limits(
+                constants.EGRESS_DIRECTION,
+                {FLOATING_IP_1: (1, 2), FLOATING_IP_2: None, ip: (10, 0)})
+            update.assert_called_once_with(
+                FLOATING_IP_DEVICE_NAME, EGRESS_QDISC_ID,
+                [FILTER_HANDLE_1, FILTER_HANDLE_2],
+                [{'keys': ['0xac100592/0xffffffff+12'],
+                  'rate_kbps': 1, 'burst_kb': 2},
+                 {'keys': ['0x6f6f6f6f/0xffffffff+12'],
+                  'rate_kbps': 10, 'burst_kb': 8.0}],
+                base_tc_lib.MAX_MTU_VALUE, 'drop', priority=1,
+                protocol=constants.ETHERTYPE_IP,
+                namespace=FLOATING_IP_ROUTER_NAMESPACE)
+
+    def test_update_ip_rate_limits_no_change(self):
+        with mock.patch.object(tc_lib.FloatingIPTcCommandBase,
+                               '_get_qdisc_id_for_filter',
+                               return_value=INGRESS_QSIC_ID), \
+                mock.patch.object(base_tc_lib, 'list_tc_filters',
+                                  return_value=TC_FILTERS_LIST), \
+                mock.patch.object(base_tc_lib,
+                                  'update_tc_filters_policy') as update:
+            self.tc.update_ip_rate_limits(constants.INGRESS_DIRECTION,
+                                          {'111.111.111.111': None})
+            update.assert_not_called()
+
+    def test_clear_ip_rate_limits_no_qdisc(self):
+        with mock.patch.object(tc_lib.FloatingIPTcCommandBase,
+                               '_get_qdisc_id_for_filter',
+                               return_value=None), \
+                mock.patch.object(tc_lib.FloatingIPTcCommandBase,
+                                  '_add_qdisc') as add_qdisc, \
+                mock.patch.object(base_tc_lib,
+                                  'list_tc_filters') as list_filters:
+            self.tc.clear_ip_rate_limits(constants.INGRESS_DIRECTION,
+                                         [FLOATING_IP_1])
+            add_qdisc.assert_not_called()
+            list_filters.assert_not_called()
+
+    def test_clear_ip_rate_limits(self):
+        with mock.patch.object(tc_lib.FloatingIPTcCommandBase,
+                               '_get_qdisc_id_for_filter',
+                               return_value=INGRESS_QSIC_ID), \
+                mock.patch.object(base_tc_lib, 'list_tc_filters',
+                                  return_value=TC_FILTERS_LIST), \
+                mock.patch.object(base_tc_lib,
+                                  'update_tc_filters_policy') as update:
+            self.tc.clear_ip_rate_limits(constants.INGRESS_DIRECTION,
+                                         [FLOATING_IP_1, FLOATING_IP_2])
+            update.assert_called_once_with(
+                FLOATING_IP_DEVICE_NAME, INGRESS_QSIC_ID,
+                [FILTER_HANDLE_1, FILTER_HANDLE_2], [],
+                base_tc_lib.MAX_MTU_VALUE, 'drop', priority=1,
+                protocol=constants.ETHERTYPE_IP,
+                namespace=FLOATING_IP_ROUTER_NAMESPACE)
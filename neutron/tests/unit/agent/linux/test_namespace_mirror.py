@@ -0,0 +1,232 @@
+# Copyright 2026 Red Hat, Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from unittest import mock
+
+from neutron_lib import constants
+
+from neutron.agent.common import async_process
+from neutron.agent.linux import ip_lib
+from neutron.agent.linux import namespace_mirror
+from neutron.tests import base
+
+NAMESPACE = 'qrouter-id'
+
+
+class TestNamespaceMonitor(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.monitor = namespace_mirror.NamespaceMonitor()
+
+    def test_cmd(self):
+        self.assertEqual(
+            ['ip', '-o', 'monitor', 'all-nsid', 'link', 'address', 'route'],
+            self.monitor._cmd)
+        self.assertTrue(self.monitor.run_as_root)
+
+    def test_read_stdout_counts_events(self):
+        self.monitor._process = mock.Mock()
+        self.monitor._process.stdout.readline.side_effect = [
+            '[nsid 3]2: qr-1 inet 10.0.0.1/24\n',
+            '[nsid 3]Deleted 2: qr-1 inet 10.0.0.1/24\n',
+            '[nsid 4]3: qg-1 inet 172.24.4.10/24\n',
+            '[nsid current]2: eth0 inet 192.0.2.1/24\n',
+            '']
+        state = self.monitor.get_state('3')
+        for __ in range(5):
+            self.monitor._read_stdout()
+        self.assertEqual((0, 2), self.monitor.get_state('3'))
+        self.assertEqual((0, 1), self.monitor.get_state('4'))
+        self.assertEqual((0, 0), self.monitor.get_state('5'))
+        self.assertNotEqual(state, self.monitor.get_state('3'))
+
+    def test_spawn_increments_generation(self):
+        with mock.patch.object(async_process.AsyncProcess, '_spawn'):
+            self.monitor._spawn()
+            self.monitor._spawn()
+        self.assertEqual((2, 0), self.monitor.get_state('3'))
+
+
+class TestGetNamespaceId(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.execute = mock.patch.object(
+            namespace_mirror.linux_utils, 'execute').start()
+
+    def test_id_already_set(self):
+        self.execute.return_value = (
+            'qdhcp-id (id: 2)\n%s (id: 3)\nqrouter-other\n' % NAMESPACE)
+        self.assertEqual('3', namespace_mirror.get_namespace_id(NAMESPACE))
+        self.execute.assert_called_once_with(['ip', 'netns', 'list'],
+                                             run_as_root=True)
+
+    def test_id_set(self):
+        self.execute.side_effect = [
+            '%s\n' % NAMESPACE, '', '%s (id: 5)\n' % NAMESPACE]
+        self.assertEqual('5', namespace_mirror.get_namespace_id(NAMESPACE))
+        self.execute.assert_any_call(
+            ['ip', 'netns', 'set', NAMESPACE, 'auto'], run_as_root=True,
+            check_exit_code=False, log_fail_as_error=False)
+
+    def test_id_not_set(self):
+        self.execute.return_value = '%s\n' % NAMESPACE
+        self.assertIsNone(namespace_mirror.get_namespace_id(NAMESPACE))
+
+
+class TestNamespaceMirror(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.monitor = mock.Mock(is_running=True)
+        self.monitor.get_state.return_value = (1, 0)
+        self.get_namespace_id = mock.patch.object(
+            namespace_mirror, 'get_namespace_id', return_value='3').start()
+        self.mirror = namespace_mirror.NamespaceMirror(NAMESPACE,
+                                                       self.monitor)
+        self.mirror.start()
+        self.get_devices_with_ip = mock.patch.object(
+            ip_lib, 'get_devices_with_ip').start()
+        self.get_devices_with_ip.return_value = [
+            {'name': 'qr-1', 'cidr': '10.0.0.1/24'},
+            {'name': 'qr-1', 'cidr': '10.0.1.1/24'},
+            {'name': 'qg-1', 'cidr': '172.24.4.10/24'}]
+        self.list_ip_routes = mock.patch.object(
+            ip_lib, 'list_ip_routes').start()
+        self.list_ip_routes.return_value = [
+            {'cidr': '0.0.0.0/0', 'device': 'qg-1', 'via': '172.24.4.1',
+             'scope': 'global'},
+            {'cidr': '10.0.0.0/24', 'device': 'qr-1', 'via': None,
+             'scope': 'link'}]
+
+    def test_get_addresses_cached(self):
+        self.assertEqual(
+            ['10.0.0.1/24', '10.0.1.1/24'],
+            [addr['cidr'] for addr in self.mirror.get_addresses('qr-1')])
+        self.assertEqual(
+            ['172.24.4.10/24'],
+            [addr['cidr'] for addr in self.mirror.get_addresses('qg-1')])
+        self.assertEqual([], self.mirror.get_addresses('qr-2'))
+        self.get_devices_with_ip.assert_called_once_with(NAMESPACE)
+
+    def test_get_routes_filtered(self):
+        self.assertEqual(
+            ['0.0.0.0/0'],
+            [route['cidr'] for route in
+             self.mirror.get_routes(constants.IP_VERSION_4, device='qg-1')])
+        self.assertEqual(
+            ['10.0.0.0/24'],
+            [route['cidr'] for route in
+             self.mirror.get_routes(constants.IP_VERSION_4, scope='link')])
+        self.assertEqual(
+            2, len(self.mirror.get_routes(constants.IP_VERSION_4)))
+        self.list_ip_routes.assert_called_once_with(
+            NAMESPACE, constants.IP_VERSION_4)
+
+    def test_get_device_names(self):
+        with mock.patch.object(ip_lib.IPWrapper, 'get_devices') as get_devs:
+            get_devs.return_value = [ip_lib.IPDevice('qr-1'),
+                                     ip_lib.IPDevice('qg-1')]
+            self.assertEqual(['qr-1', 'qg-1'],
+                             self.mirror.get_device_names())
+            self.assertEqual(['qr-1', 'qg-1'],
+                             self.mirror.get_device_names())
+            get_devs.assert_called_once_with()
+
+    def test_event_invalidates(self):
+        self.mirror.get_addresses('qr-1')
+        self.monitor.get_state.return_value = (1, 1)
+        self.mirror.get_addresses('qr-1')
+        self.assertEqual(2, self.get_devices_with_ip.call_count)
+        self.monitor.get_state.assert_called_with('3')
+
+    def test_respawn_invalidates(self):
+        self.mirror.get_addresses('qr-1')
+        self.monitor.get_state.return_value = (2, 0)
+        self.mirror.get_addresses('qr-1')
+        self.assertEqual(2, self.get_devices_with_ip.call_count)
+
+    def test_invalidate(self):
+        self.mirror.get_addresses('qr-1')
+        self.mirror.invalidate()
+        self.mirror.get_addresses('qr-1')
+        self.assertEqual(2, self.get_devices_with_ip.call_count)
+
+    def test_monitor_not_running(self):
+        self.monitor.is_running = False
+        self.mirror.get_addresses('qr-1')
+        self.mirror.get_addresses('qr-1')
+        self.assertEqual(2, self.get_devices_with_ip.call_count)
+
+    def test_returned_values_are_copies(self):
+        self.mirror.get_addresses('qr-1')[0]['cidr'] = '10.0.2.1/24'
+        self.assertEqual(
+            '10.0.0.1/24', self.mirror.get_addresses('qr-1')[0]['cidr'])
+
+    def test_namespace_without_id(self):
+        self.get_namespace_id.return_value = None
+        mirror = namespace_mirror.NamespaceMirror('qdhcp-id', self.monitor)
+        mirror.start()
+        mirror.start()
+        mirror.get_addresses('qr-1')
+        mirror.get_addresses('qr-1')
+        self.assertEqual(2, self.get_devices_with_ip.call_count)
+        self.assertEqual(2, self.get_namespace_id.call_count)
+
+
+class TestMirrorsRegistry(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        mock.patch.object(namespace_mirror, '_MIRRORS', {}).start()
+        mock.patch.object(namespace_mirror, '_MONITOR', None).start()
+        self.monitor_cls = mock.patch.object(
+            namespace_mirror, 'NamespaceMonitor').start()
+        mock.patch.object(namespace_mirror.common_utils,
+                          'wait_until_true').start()
+        mock.patch.object(namespace_mirror.NamespaceMirror, 'start').start()
+
+    def test_get_mirror(self):
+        mirror = namespace_mirror.get_mirror(NAMESPACE)
+        self.assertIs(mirror, namespace_mirror.get_mirror(NAMESPACE))
+        self.assertIsNot(mirror, namespace_mirror.get_mirror('qdhcp-id'))
+        # A single monitor is shared by all the namespaces
+        self.monitor_cls.assert_called_once_with(
+            respawn_interval=namespace_mirror.MONITOR_RESPAWN_INTERVAL)
+        self.monitor_cls.return_value.start.assert_called_once_with()
+
+    def test_ip_lib_change_invalidates(self):
+        mirror = namespace_mirror.get_mirror(NAMESPACE)
+        with mock.patch.object(mirror, 'invalidate') as invalidate:
+            ip_lib._namespace_changed(NAMESPACE)
+            ip_lib._namespace_changed('qdhcp-id')
+            invalidate.assert_called_once_with()
+
+    def test_namespace_deleted_removes_mirror(self):
+        mirror = namespace_mirror.get_mirror(NAMESPACE)
+        namespace_mirror.get_mirror('qdhcp-id')
+        monitor = self.monitor_cls.return_value
+        ip_lib._namespace_changed(NAMESPACE, deleted=True)
+        monitor.stop.assert_not_called()
+        self.assertIsNot(mirror, namespace_mirror.get_mirror(NAMESPACE))
+
+    def test_last_namespace_deleted_stops_monitor(self):
+        namespace_mirror.get_mirror(NAMESPACE)
+        monitor = self.monitor_cls.return_value
+        monitor.stop.side_effect = async_process.AsyncProcessException
+        ip_lib._namespace_changed(NAMESPACE, deleted=True)
+        monitor.stop.assert_called_once_with()
+        self.assertIsNone(namespace_mirror._MONITOR)
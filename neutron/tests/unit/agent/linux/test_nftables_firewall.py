@@ -0,0 +1,242 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from unittest import mock
+
+from neutron_lib import constants
+
+from neutron.agent.linux import ip_conntrack
+from neutron.agent.linux import nftables_firewall
+from neutron.tests import base
+
+FAKE_SGID = 'fake_sgid'
+OTHER_SGID = 'other_sgid'
+TABLE = nftables_firewall.TABLE
+
+ZONES_OUTPUT = """{"nftables": [
+{"metainfo": {"version": "1.0.9", "json_schema_version": 1}},
+{"map": {"family": "bridge", "name": "zones", "table": "neutron",
+         "type": "ifname", "handle": 3, "map": "ct zone",
+         "elem": [["tapfake_dev1", 4100], ["qvbfake_dev1", 4100]]}}]}
+"""
+
+
+class NftablesFirewallTestCase(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.execute = mock.patch(
+            'neutron.agent.linux.utils.execute', return_value='').start()
+        mock.patch.object(ip_conntrack.IpConntrackManager,
+                          '_process_queue_worker').start()
+        self.firewall = nftables_firewall.NftablesFirewallDriver()
+        self.execute.reset_mock()
+
+    def _fake_port(self, device='fake_dev1', sg_ids=(FAKE_SGID,)):
+        return {'device': device,
+                'mac_address': 'FA:16:3E:00:00:01',
+                'fixed_ips': ['10.0.0.1', 'fe80::1'],
+                'security_groups': list(sg_ids),
+                'security_group_rules': []}
+
+    def _get_batches(self):
+        return [call[1]['process_input'].split('\n')
+                for call in self.execute.call_args_list
+                if call[0][0] == ['nft', '-f', '-']]
+
+    def _prepare_port(self, port=None, rules=None, members=None):
+        port = port or self._fake_port()
+        with self.firewall.defer_apply():
+            self.firewall.update_security_group_rules(
+                FAKE_SGID, rules if rules is not None else [
+                    {'ethertype': 'IPv4', 'direction': 'ingress',
+                     'protocol': 'tcp', 'port_range_min': 22,
+                     'port_range_max': 22}])
+            if members is not None:
+                self.firewall.update_security_group_members(
+                    OTHER_SGID, members)
+            self.firewall.prepare_port_filter(port)
+        return port
+
+    def test_initial_zone_map(self):
+        self.execute.return_value = ZONES_OUTPUT
+        firewall = nftables_firewall.NftablesFirewallDriver()
+        self.assertEqual({'fake_dev1': 4100},
+                         firewall.ipconntrack._device_zone_map)
+
+    def test_prepare_port_filter_single_transaction(self):
+        self._prepare_port()
+
+        batches = self._get_batches()
+        self.assertEqual(1, len(batches))
+        batch = batches[0]
+        # The whole table is built in the first transaction
+        self.assertEqual('add table %s' % TABLE, batch[0])
+        self.assertEqual('delete table %s' % TABLE, batch[1])
+        self.assertIn('add rule %s sg-%s-ingress meta protocol ip '
+                      'meta l4proto 6 th dport 22 accept' %
+                      (TABLE, FAKE_SGID), batch)
+        self.assertIn('add rule %s i-fake_dev1 jump sg-%s-ingress' %
+                      (TABLE, FAKE_SGID), batch)
+        self.assertIn('add rule %s s-fake_dev1 ether saddr '
+                      'fa:16:3e:00:00:01 ip saddr 10.0.0.1/32 return' %
+                      TABLE, batch)
+        self.assertIn('add element %s ingress-ports '
+                      '{ "tapfake_dev1" : jump i-fake_dev1 }' % TABLE, batch)
+        self.assertIn('add element %s egress-ports '
+                      '{ "tapfake_dev1" : jump o-fake_dev1 }' % TABLE, batch)
+        self.assertIn('add element %s zones { "tapfake_dev1" : %s, '
+                      '"qvbfake_dev1" : %s }' %
+                      (TABLE, ip_conntrack.ZONE_START,
+                       ip_conntrack.ZONE_START), batch)
+
+    def test_update_port_filter_incremental(self):
+        port = self._prepare_port()
+        self.execute.reset_mock()
+
+        with self.firewall.defer_apply():
+            self.firewall.update_security_group_rules(
+                FAKE_SGID, [{'ethertype': 'IPv4', 'direction': 'ingress',
+                             'protocol': 'tcp', 'port_range_min': 22,
+                             'port_range_max': 22}])
+            self.firewall.update_port_filter(port)
+
+        batch = self._get_batches()[0]
+        self.assertNotIn('delete table %s' % TABLE, batch)
+        # The security group rules did not change
+        self.assertNotIn('flush chain %s sg-%s-ingress' % (TABLE, FAKE_SGID),
+                         batch)
+        self.assertIn('flush chain %s i-fake_dev1' % TABLE, batch)
+        self.assertIn('delete element %s ingress-ports { "tapfake_dev1" }' %
+                      TABLE, batch)
+
+    def test_security_group_rules_updated(self):
+        port = self._prepare_port()
+        self.execute.reset_mock()
+
+        with self.firewall.defer_apply():
+            self.firewall.update_security_group_rules(
+                FAKE_SGID, [{'ethertype': 'IPv6', 'direction': 'egress',
+                             'protocol': 'icmp', 'port_range_min': 128,
+                             'port_range_max': 0}])
+            self.firewall.update_port_filter(port)
+
+        batch = self._get_batches()[0]
+        self.assertIn('flush chain %s sg-%s-egress' % (TABLE, FAKE_SGID),
+                      batch)
+        self.assertIn('add rule %s sg-%s-egress meta protocol ip6 '
+                      'meta l4proto 58 icmpv6 type 128 icmpv6 code 0 accept' %
+                      (TABLE, FAKE_SGID), batch)
+
+    def test_remote_group_members(self):
+        rules = [{'ethertype': 'IPv4', 'direction': 'ingress',
+                  'remote_group_id': OTHER_SGID}]
+        self._prepare_port(
+            rules=rules,
+            members={'IPv4': [('10.0.0.2', None), ('10.0.0.3', None)]})
+        batch = self._get_batches()[0]
+        set_name = 'sg-%s-ipv4' % OTHER_SGID
+        self.assertIn('add set %s %s { type ipv4_addr; flags interval; }' %
+                      (TABLE, set_name), batch)
+        self.assertIn('add element %s %s { 10.0.0.2/31 }' %
+                      (TABLE, set_name), batch)
+        self.assertIn('add rule %s sg-%s-ingress meta protocol ip '
+                      'ip saddr @%s accept' % (TABLE, FAKE_SGID, set_name),
+                      batch)
+
+        self.execute.reset_mock()
+        port = self.firewall.filtered_ports['fake_dev1']
+        with self.firewall.defer_apply():
+            self.firewall.update_security_group_rules(FAKE_SGID, rules)
+            self.firewall.update_security_group_members(
+                OTHER_SGID, {'IPv4': [('10.0.0.2', None)]})
+            self.firewall.update_port_filter(port)
+        batch = self._get_batches()[0]
+        self.assertIn('delete element %s %s { 10.0.0.2/31 }' %
+                      (TABLE, set_name), batch)
+        self.assertIn('add element %s %s { 10.0.0.2/32 }' %
+                      (TABLE, set_name), batch)
+        self.assertNotIn('add set %s %s { type ipv4_addr; flags interval; }' %
+                         (TABLE, set_name), batch)
+
+    def test_remove_port_filter(self):
+        port = self._prepare_port()
+        self.execute.reset_mock()
+
+        with self.firewall.defer_apply():
+            self.firewall.remove_port_filter(port)
+
+        batch = self._get_batches()[0]
+        self.assertIn('delete element %s ingress-ports { "tapfake_dev1" }' %
+                      TABLE, batch)
+        for chain in ('i-fake_dev1', 'o-fake_dev1', 's-fake_dev1',
+                      'sg-%s-ingress' % FAKE_SGID):
+            self.assertIn('delete chain %s %s' % (TABLE, chain), batch)
+        self.assertEqual({}, self.firewall.ports)
+        self.assertEqual({}, self.firewall.sg_rules)
+
+    def test_unfiltered_port(self):
+        port = self._fake_port()
+        port['port_security_enabled'] = False
+        self._prepare_port(port=port)
+
+        batch = self._get_batches()[0]
+        self.assertIn('add element %s ingress-ports '
+                      '{ "tapfake_dev1" : accept }' % TABLE, batch)
+        self.assertNotIn('add chain %s i-fake_dev1' % TABLE, batch)
+
+    def test_stateless_port(self):
+        self._prepare_port(rules=[{'ethertype': 'IPv4',
+                                   'direction': 'ingress',
+                                   'stateful': False}])
+        batch = self._get_batches()[0]
+        self.assertIn('add element %s notrack-ports { "tapfake_dev1", '
+                      '"qvbfake_dev1" }' % TABLE, batch)
+
+    def test_trusted_ports(self):
+        self.firewall.process_trusted_ports(['trusted_dev'])
+        batch = self._get_batches()[0]
+        self.assertIn('add element %s egress-ports '
+                      '{ "taptrusted_dev" : accept }' % TABLE, batch)
+
+        self.execute.reset_mock()
+        self.firewall.remove_trusted_ports(['trusted_dev'])
+        batch = self._get_batches()[0]
+        self.assertIn('delete element %s egress-ports { "taptrusted_dev" }' %
+                      TABLE, batch)
+
+    def test_apply_failure_resyncs_table(self):
+        port = self._prepare_port()
+        self.execute.reset_mock()
+        self.execute.side_effect = RuntimeError
+        self.assertRaises(RuntimeError,
+                          self.firewall.update_port_filter, port)
+
+        self.execute.side_effect = None
+        self.execute.reset_mock()
+        self.firewall.update_port_filter(port)
+        batch = self._get_batches()[0]
+        self.assertIn('delete table %s' % TABLE, batch)
+        self.assertIn('add element %s ingress-ports '
+                      '{ "tapfake_dev1" : jump i-fake_dev1 }' % TABLE, batch)
+
+    def test_conntrack_deleted_after_apply(self):
+        port = self._prepare_port()
+        with mock.patch.object(
+                self.firewall.ipconntrack,
+                'delete_conntrack_state_by_remote_ips') as delete_ct:
+            with self.firewall.defer_apply():
+                self.firewall.remove_port_filter(port)
+                delete_ct.assert_not_called()
+        delete_ct.assert_has_calls([
+            mock.call([port], constants.IPv4, set()),
+            mock.call([port], constants.IPv6, set())])
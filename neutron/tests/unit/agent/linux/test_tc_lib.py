@@ -396,3 +396,15 @@ class TcFilterTestCase(base.BaseTestCase):
                 '0x90ab0000/0xffff0000+46']
         mock_add_filter.assert_called_once_with(
             'device', 'parent', 1, 'classid', keys, namespace='ns')
+
+    @mock.patch.object(priv_tc_lib, 'update_tc_filters_policy')
+    def test_update_tc_filters_policy(self, mock_update_filters):
+        policies = [{'keys': ['0xac100592/0xffffffff+16'],
+                     'rate_kbps': 1000, 'burst_kb': 800}]
+        tc_lib.update_tc_filters_policy(
+            'device', 'ffff:', [0x80000800], policies, 65535, 'drop',
+            priority=1, protocol=0x0800, namespace='ns')
+        mock_update_filters.assert_called_once_with(
+            'device', 0xffff0000, 1, [0x80000800],
+            [(['0xac100592/0xffffffff+16'], 125000, 100000)], 65535, 'drop',
+            protocol=0x0800, namespace='ns')
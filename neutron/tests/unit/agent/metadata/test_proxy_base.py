@@ -12,6 +12,9 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import asyncio
+import socket
+import threading
 from unittest import mock
 
 import requests
@@ -77,7 +80,7 @@ class TestMetadataProxyHandlerBase(base.BaseTestCase):
         req.response = resp
         with mock.patch.object(utils, 'sign_instance_id') as sign:
             sign.return_value = 'signed'
-            with mock.patch('requests.request') as mock_request:
+            with mock.patch('requests.Session.request') as mock_request:
                 resp.headers = {'content-type': 'text/plain'}
                 mock_request.return_value = resp
                 retval = self.handler._proxy_request('the_id', 'project_id',
@@ -147,11 +150,274 @@ class TestMetadataProxyHandlerBase(base.BaseTestCase):
     def test_proxy_request_connection_error(self):
         req = mock.Mock(path_info='/the_path', query_string='', headers={},
                         method='GET', body='')
-        with mock.patch('requests.request') as mock_request:
+        with mock.patch('requests.Session.request') as mock_request:
             mock_request.side_effect = requests.ConnectionError()
             retval = self.handler._proxy_request('the_id', 'project_id', req)
             self.assertIsInstance(retval, webob.exc.HTTPServiceUnavailable)
 
+    def test_proxy_request_session_reused(self):
+        self.addCleanup(setattr, proxy_base, '_SESSION', None)
+        proxy_base._SESSION = None
+        self.fake_conf_fixture.config(nova_metadata_pool_size=4)
+        session = proxy_base.get_nova_metadata_session(self.fake_conf)
+        self.assertIs(session,
+                      proxy_base.get_nova_metadata_session(self.fake_conf))
+        for prefix in ('http://', 'https://'):
+            adapter = session.get_adapter(prefix)
+            self.assertEqual(4, adapter._pool_maxsize)
+            self.assertFalse(adapter._pool_block)
+
+    def test_nova_metadata_session_rejects_cookies(self):
+        self.addCleanup(setattr, proxy_base, '_SESSION', None)
+        proxy_base._SESSION = None
+        session = proxy_base.get_nova_metadata_session(self.fake_conf)
+        headers = mock.Mock()
+        headers.get_all.side_effect = lambda name, default: (
+            ['sessionid=abc; Path=/'] if name == 'Set-Cookie' else default)
+        response = mock.Mock(_original_response=mock.Mock(msg=headers))
+        request = requests.Request('GET', 'http://10.0.0.1/').prepare()
+        requests.cookies.extract_cookies_to_jar(session.cookies, request,
+                                                response)
+        self.assertEqual(0, len(session.cookies))
+
+    def test_get_port_lookup_cache_disabled_by_default(self):
+        self.assertIsNone(proxy_base.get_port_lookup_cache(self.fake_conf))
+        self.fake_conf_fixture.config(metadata_cache_ttl=30)
+        port_cache = proxy_base.get_port_lookup_cache(self.fake_conf)
+        self.assertEqual(30, port_cache.ttl)
+
+    def test__get_instance_and_project_id_cached(self):
+        req = mock.Mock(headers={'X-Forwarded-For': '192.168.1.1',
+                                 'X-Neutron-Network-ID': 'net_id'})
+        self.handler.NETWORK_ID_HEADER = 'X-Neutron-Network-ID'
+        self.handler.ROUTER_ID_HEADER = 'X-Neutron-Router-ID'
+        self.handler._port_cache = proxy_base.PortLookupCache(10, 60)
+        with mock.patch.object(self.handler, 'get_port',
+                               return_value=('the_id', 'project_id')) as gp:
+            for skip_cache in (False, False, True):
+                self.assertEqual(
+                    ('the_id', 'project_id'),
+                    self.handler._get_instance_and_project_id(
+                        req, skip_cache=skip_cache))
+        self.assertEqual(
+            [mock.call('192.168.1.1', network_id='net_id', remote_mac=None,
+                       router_id=None, skip_cache=False),
+             mock.call('192.168.1.1', network_id='net_id', remote_mac=None,
+                       router_id=None, skip_cache=True)],
+            gp.call_args_list)
+
+
+class TestPortLookupCache(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.now = 100
+        mock.patch.object(proxy_base.time, 'monotonic',
+                          side_effect=lambda: self.now).start()
+        self.cache = proxy_base.PortLookupCache(2, 10)
+
+    def test_get_ttl(self):
+        self.cache.put('key', 'value')
+        self.now += 9
+        self.assertEqual('value', self.cache.get('key'))
+        self.now += 1
+        self.assertIsNone(self.cache.get('key'))
+        self.assertEqual({'metadata_cache_entries': 0,
+                          'metadata_cache_hits': 1,
+                          'metadata_cache_misses': 1,
+                          'metadata_cache_invalidations': 0},
+                         self.cache.get_stats())
+
+    def test_put_lru(self):
+        self.cache.put('key1', 'value1')
+        self.cache.put('key2', 'value2')
+        # key1 becomes the most recently used entry
+        self.cache.get('key1')
+        self.cache.put('key3', 'value3')
+        self.assertIsNone(self.cache.get('key2'))
+        self.assertEqual('value1', self.cache.get('key1'))
+        self.assertEqual('value3', self.cache.get('key3'))
+
+    def test_invalidate(self):
+        key1 = self.cache.get_key('10.0.0.1', None, 'net1', None)
+        key2 = self.cache.get_key('fe80::1', 'fa:16:3e:00:00:01', 'net1',
+                                  None)
+        self.cache.put(key1, 'value1')
+        self.cache.put(key2, 'value2')
+        self.cache.invalidate(addresses={'10.0.0.2'},
+                              macs={'fa:16:3e:00:00:01'})
+        self.assertEqual('value1', self.cache.get(key1))
+        self.assertIsNone(self.cache.get(key2))
+        self.cache.clear()
+        self.assertIsNone(self.cache.get(key1))
+        self.assertEqual(2, self.cache.get_stats()[
+            'metadata_cache_invalidations'])
+
+
+class TestAsyncNovaMetadataClient(base.BaseTestCase):
+    fake_conf = cfg.CONF
+    fake_conf_fixture = ConfFixture(fake_conf)
+
+    def setUp(self):
+        super().setUp()
+        self.useFixture(self.fake_conf_fixture)
+        self.fake_conf_fixture.config(nova_metadata_host='127.0.0.1',
+                                      nova_metadata_pool_size=1)
+        self.requests = []
+        self.connections = 0
+
+    def _run(self, responses, *requests_args):
+        """Send the requests to a server answering the given responses.
+
+        The connection is closed by the server when a response is None.
+        """
+        async def handle(reader, writer):
+            self.connections += 1
+            while responses:
+                self.requests.append(await reader.readuntil(b'\r\n\r\n'))
+                response = responses.pop(0)
+                if response is None:
+                    break
+                writer.write(response)
+            writer.close()
+
+        async def run():
+            server = await asyncio.start_server(handle, '127.0.0.1', 0)
+            self.fake_conf_fixture.config(
+                nova_metadata_port=server.sockets[0].getsockname()[1])
+            client = proxy_base.AsyncNovaMetadataClient(self.fake_conf)
+            async with server:
+                results = [await client.request(*args)
+                           for args in requests_args]
+            client.close()
+            return results
+
+        return asyncio.run(run())
+
+    def test_request_keep_alive(self):
+        responses = [b'HTTP/1.1 200 OK\r\nContent-Type: text/plain\r\n'
+                     b'Content-Length: 4\r\n\r\nbody',
+                     b'HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\n\r\n']
+        resp1, resp2 = self._run(
+            responses,
+            ('GET', 'http://127.0.0.1/latest/meta-data?a=b',
+             {'X-Instance-ID': 'instance_id', 'X-Forwarded-For': None}),
+            ('GET', 'http://127.0.0.1/latest', {}))
+        self.assertEqual(200, resp1.status_code)
+        self.assertEqual(b'body', resp1.content)
+        self.assertEqual('text/plain', resp1.headers['content-type'])
+        self.assertEqual(404, resp2.status_code)
+        self.assertEqual(1, self.connections)
+        self.assertEqual(
+            b'GET /latest/meta-data?a=b HTTP/1.1\r\n'
+            b'X-Instance-ID: instance_id\r\n'
+            b'Host: 127.0.0.1:%d\r\n\r\n' % self.fake_conf.nova_metadata_port,
+            self.requests[0])
+
+    def test_request_chunked(self):
+        responses = [b'HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n'
+                     b'4\r\nbody\r\n5\r\n-data\r\n0\r\n\r\n']
+        resp, = self._run(responses, ('GET', 'http://127.0.0.1/', {}))
+        self.assertEqual(b'body-data', resp.content)
+
+    def test_request_idle_connection_closed(self):
+        responses = [b'HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok',
+                     None,
+                     b'HTTP/1.1 200 OK\r\nContent-Length: 3\r\n\r\nok2']
+        resp1, resp2 = self._run(responses,
+                                 ('GET', 'http://127.0.0.1/', {}),
+                                 ('GET', 'http://127.0.0.1/', {}))
+        self.assertEqual(b'ok2', resp2.content)
+        self.assertEqual(2, self.connections)
+
+    def test_request_head(self):
+        responses = [b'HTTP/1.1 200 OK\r\nContent-Length: 4\r\n\r\n',
+                     b'HTTP/1.1 200 OK\r\nContent-Length: 4\r\n\r\nbody']
+        resp1, resp2 = self._run(responses,
+                                 ('HEAD', 'http://127.0.0.1/', {}),
+                                 ('GET', 'http://127.0.0.1/', {}))
+        self.assertEqual(200, resp1.status_code)
+        self.assertEqual(b'', resp1.content)
+        self.assertEqual(b'body', resp2.content)
+        self.assertEqual(1, self.connections)
+
+    def test_request_no_body_status(self):
+        # The responses have neither Content-Length nor body, and the
+        # connection is kept open by the server.
+        responses = [b'HTTP/1.1 304 Not Modified\r\n\r\n',
+                     b'HTTP/1.1 204 No Content\r\n\r\n',
+                     b'HTTP/1.1 100 Continue\r\n\r\n'
+                     b'HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok']
+        resp1, resp2, resp3 = self._run(responses,
+                                        ('GET', 'http://127.0.0.1/', {}),
+                                        ('GET', 'http://127.0.0.1/', {}),
+                                        ('POST', 'http://127.0.0.1/', {},
+                                         b'data'))
+        self.assertEqual((304, b''), (resp1.status_code, resp1.content))
+        self.assertEqual((204, b''), (resp2.status_code, resp2.content))
+        self.assertEqual((200, b'ok'), (resp3.status_code, resp3.content))
+        self.assertEqual(1, self.connections)
+
+    def test_environment_proxy_ignored(self):
+        with mock.patch.dict('os.environ', {'http_proxy': 'http://proxy:3128',
+                                            'no_proxy': ''}), \
+                mock.patch.object(proxy_base.LOG, 'warning') as warning:
+            proxy_base.AsyncNovaMetadataClient(self.fake_conf)
+        warning.assert_called_once_with(mock.ANY, 'http://127.0.0.1:8775/')
+
+    def test_request_connection_refused(self):
+        self.fake_conf_fixture.config(nova_metadata_port=1)
+        client = proxy_base.AsyncNovaMetadataClient(self.fake_conf)
+        self.assertRaises(OSError, asyncio.run,
+                          client.request('GET', 'http://127.0.0.1/', {}))
+
+
+class FakeAsyncHandler:
+    def __init__(self, request, client_address, server):
+        self.conf = cfg.CONF
+
+    async def handle_async(self, reader, writer):
+        await reader.readuntil(b'\r\n\r\n')
+        writer.write(b'%d' % threading.get_ident())
+        await writer.drain()
+        writer.close()
+
+
+class TestAsyncMetadataProxyServer(base.BaseTestCase):
+    fake_conf = cfg.CONF
+    fake_conf_fixture = ConfFixture(fake_conf)
+
+    def setUp(self):
+        super().setUp()
+        self.useFixture(self.fake_conf_fixture)
+
+    def test_get_metadata_proxy_server_class(self):
+        self.assertEqual(
+            proxy_base.MetadataProxyServer,
+            proxy_base.get_metadata_proxy_server_class(self.fake_conf))
+        self.fake_conf_fixture.config(
+            metadata_server_type=meta_conf.ASYNCIO_SERVER)
+        self.assertEqual(
+            proxy_base.AsyncMetadataProxyServer,
+            proxy_base.get_metadata_proxy_server_class(self.fake_conf))
+
+    def test_serve_forever(self):
+        socket_path = self.get_temp_file_path('metadata_proxy')
+        server = proxy_base.AsyncMetadataProxyServer(0, socket_path,
+                                                     FakeAsyncHandler)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.connect(socket_path)
+                sock.sendall(b'GET / HTTP/1.1\r\n\r\n')
+                self.assertEqual(b'%d' % thread.ident, sock.recv(64))
+        finally:
+            server.server_close()
+            thread.join(10)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(-1, server.socket.fileno())
+
 
 class FakeUnixDomainMetadataProxy(proxy_base.UnixDomainMetadataProxyBase):
     def run(self):
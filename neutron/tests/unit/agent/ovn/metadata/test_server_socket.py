@@ -12,17 +12,21 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
 import io
 import socketserver
 from unittest import mock
 
 from oslo_config import cfg
 from oslo_config import fixture as config_fixture
+import requests
+from requests import structures
 import webob
 
 from neutron.agent.metadata import proxy_base
 from neutron.agent.ovn.metadata import server_socket as agent
 from neutron.common import metadata as common_metadata
+from neutron.conf.agent.metadata import config as meta_conf
 from neutron.tests import base
 
 
@@ -135,3 +139,171 @@ class TestMetadataProxyHandler(base.BaseTestCase):
                                              remote_mac='02:00:00:00:00:99',
                                              router_id=None,
                                              skip_cache=False)
+
+    def test__get_instance_id_cached(self):
+        req = mock.Mock(headers={'X-Forwarded-For': '192.168.1.1',
+                                 'X-OVN-Network-ID': 'net_id'})
+        self.mock_fromfile.return_value = req
+        port_cache = proxy_base.PortLookupCache(10, 60)
+        with mock.patch.object(agent.MetadataProxyHandler,
+                               '_port_cache', port_cache), \
+                mock.patch.object(agent.MetadataProxyHandler,
+                                  'get_port') as get_port, \
+                mock.patch.object(agent.MetadataProxyHandler,
+                                  '_proxy_request') as proxy:
+            get_port.return_value = ('device_id', 'project_id')
+            proxy.return_value = b'HTTP/1.1 200 OK\r\n\r\n'
+            agent.MetadataProxyHandler(req, 'client_address', 'server')
+            agent.MetadataProxyHandler(req, 'client_address', 'server')
+            get_port.assert_called_once_with('192.168.1.1',
+                                             network_id='net_id',
+                                             remote_mac=None,
+                                             router_id=None,
+                                             skip_cache=False)
+
+            # Nova does not know the cached instance anymore
+            proxy.side_effect = [b'HTTP/1.1 404 Not Found\r\n\r\n',
+                                 b'HTTP/1.1 200 OK\r\n\r\n']
+            get_port.reset_mock()
+            agent.MetadataProxyHandler(req, 'client_address', 'server')
+            get_port.assert_called_once_with('192.168.1.1',
+                                             network_id='net_id',
+                                             remote_mac=None,
+                                             router_id=None,
+                                             skip_cache=True)
+            self.mock_sfile.return_value.write.assert_called_with(
+                b'HTTP/1.1 200 OK\r\n\r\n')
+        self.assertEqual({'metadata_cache_entries': 1,
+                          'metadata_cache_hits': 2,
+                          'metadata_cache_misses': 1,
+                          'metadata_cache_invalidations': 0},
+                         port_cache.get_stats())
+
+
+class TestMetadataProxyHandlerAsync(base.BaseTestCase):
+    fake_conf = cfg.CONF
+    fake_conf_fixture = ConfFixture(fake_conf)
+
+    def setUp(self):
+        super().setUp()
+        self.useFixture(self.fake_conf_fixture)
+        self.fake_conf.register_opts(meta_conf.SHARED_OPTS)
+        self.fake_conf.register_opts(meta_conf.METADATA_PROXY_HANDLER_OPTS)
+        mock.patch.object(proxy_base, 'LOG').start()
+        mock.patch.object(common_metadata, 'LOG').start()
+        agent.MetadataProxyHandler._conf = self.fake_conf
+        agent.MetadataProxyHandler._chassis = 'chassis1'
+        agent.MetadataProxyHandler._sb_idl = mock.Mock()
+        self.server = mock.Mock()
+        self.server.nova_client.request = mock.AsyncMock()
+        self.writer = mock.Mock(drain=mock.AsyncMock())
+
+    @staticmethod
+    def _nova_response(status_code, content):
+        response = requests.Response()
+        response.status_code = status_code
+        response.headers = structures.CaseInsensitiveDict(
+            {'Content-Type': 'text/plain'})
+        response.encoding = 'ISO-8859-1'
+        response._content = content
+        return response
+
+    def _handle_async(self, request):
+        # Not bound to a connection, does not handle a request on creation
+        handler = agent.MetadataProxyHandler(None, None, self.server)
+
+        async def handle():
+            reader = asyncio.StreamReader()
+            reader.feed_data(request)
+            reader.feed_eof()
+            await handler.handle_async(reader, self.writer)
+
+        asyncio.run(handle())
+        self.writer.close.assert_called_once_with()
+
+    def test_handle_async(self):
+        self.server.nova_client.request.return_value = self._nova_response(
+            200, b'i-00000001')
+        with mock.patch.object(agent.MetadataProxyHandler,
+                               'get_port') as get_port:
+            get_port.return_value = ('device_id', 'project_id')
+            self._handle_async(b'POST /openstack/latest/password HTTP/1.1\r\n'
+                               b'X-Forwarded-For: 192.168.1.1\r\n'
+                               b'X-OVN-Network-ID: net_id\r\n'
+                               b'Content-Length: 8\r\n\r\npassword')
+            get_port.assert_called_once_with('192.168.1.1',
+                                             network_id='net_id',
+                                             remote_mac=None,
+                                             router_id=None,
+                                             skip_cache=False)
+
+        url = 'http://%s:%s/openstack/latest/password' % (
+            self.fake_conf.nova_metadata_host,
+            self.fake_conf.nova_metadata_port)
+        self.server.nova_client.request.assert_called_once_with(
+            'POST', url,
+            {'X-Forwarded-For': '192.168.1.1',
+             'X-Instance-ID': 'device_id',
+             'X-Tenant-ID': 'project_id',
+             'X-Instance-ID-Signature': mock.ANY},
+            data=b'password')
+        response = self.writer.write.call_args[0][0]
+        self.assertTrue(response.startswith(b'HTTP/1.1 200 OK\r\n'))
+        self.assertTrue(response.endswith(b'\r\n\r\ni-00000001'))
+
+    def test_handle_async_no_instance(self):
+        with mock.patch.object(agent.MetadataProxyHandler,
+                               'get_port') as get_port:
+            get_port.return_value = (None, None)
+            self._handle_async(b'GET / HTTP/1.1\r\n'
+                               b'X-Forwarded-For: 192.168.1.1\r\n'
+                               b'X-OVN-Network-ID: net_id\r\n\r\n')
+        self.server.nova_client.request.assert_not_called()
+        title = '404 Not Found'
+        msg = 'Instance was not found on network net_id.'
+        self.writer.write.assert_called_once_with(
+            common_metadata.encode_http_reponse(title, title, msg))
+
+    def _test_handle_async_nova_unavailable(self, error):
+        self.server.nova_client.request.side_effect = error
+        with mock.patch.object(agent.MetadataProxyHandler,
+                               'get_port') as get_port:
+            get_port.return_value = ('device_id', 'project_id')
+            self._handle_async(b'GET / HTTP/1.1\r\n'
+                               b'X-Forwarded-For: 192.168.1.1\r\n'
+                               b'X-OVN-Network-ID: net_id\r\n\r\n')
+        response = self.writer.write.call_args[0][0]
+        self.assertTrue(response.startswith(b'HTTP/1.1 503 '))
+
+    def test_handle_async_nova_unavailable(self):
+        self._test_handle_async_nova_unavailable(ConnectionRefusedError)
+
+    def test_handle_async_nova_incomplete_response(self):
+        self._test_handle_async_nova_unavailable(
+            asyncio.IncompleteReadError(b'HTTP/1.1 200 OK\r\n', None))
+
+    def test_handle_async_nova_timeout(self):
+        self._test_handle_async_nova_unavailable(asyncio.TimeoutError)
+
+
+class TestUnixDomainMetadataProxy(base.BaseTestCase):
+
+    def test_invalidate_port_cache(self):
+        with mock.patch.object(
+                agent.agent_utils, 'ensure_directory_exists_without_file'):
+            proxy = agent.UnixDomainMetadataProxy(mock.Mock(), 'chassis1')
+        proxy._port_cache = proxy_base.PortLookupCache(10, 60)
+        for key in (('10.0.0.1', None, 'net1', None),
+                    ('fe80::1', 'fa:16:3e:00:00:01', 'net1', None),
+                    ('10.0.0.2', None, 'net1', None),
+                    ('10.0.0.3', None, 'net1', None)):
+            proxy._port_cache.put(key, ('device_id', 'project_id'))
+        row = mock.Mock(mac=['fa:16:3e:00:00:01 10.0.0.1 2001:db8::1'])
+        old = mock.Mock(mac=['fa:16:3e:00:00:02 10.0.0.2'])
+
+        proxy.invalidate_port_cache((row, old, None))
+        self.assertEqual(
+            ('device_id', 'project_id'),
+            proxy._port_cache.get(('10.0.0.3', None, 'net1', None)))
+        self.assertEqual(1, proxy._port_cache.get_stats()[
+            'metadata_cache_entries'])
@@ -17,6 +17,7 @@ from unittest import mock
 from neutron_lib.callbacks import events
 from neutron_lib.callbacks import registry
 from neutron_lib import context
+import oslo_messaging
 
 from neutron.agent import resource_cache
 from neutron.api.rpc.callbacks import events as events_rpc
@@ -38,6 +39,13 @@ class OVOLikeThing:
     def get(self, k):
         return getattr(self, k, None)
 
+    def obj_to_primitive(self):
+        return self.to_dict()
+
+    @classmethod
+    def clean_obj_from_primitive(cls, primitive):
+        return cls(**primitive)
+
 
 class RemoteResourceCacheTestCase(base.BaseTestCase):
     def setUp(self):
@@ -113,6 +121,70 @@ class RemoteResourceCacheTestCase(base.BaseTestCase):
         self.assertCountEqual([geese[3]],
                               self.rcache.get_resources('goose', is_small))
 
+    def test_get_resources_indexed(self):
+        rcache = resource_cache.RemoteResourceCache(
+            ['goose'], indexed_attributes={'goose': ('size', 'colors')})
+        rcache._puller = self._pullmock
+        geese = [OVOLikeThing(3, size='large', colors=['white', 'grey']),
+                 OVOLikeThing(4, size='large', colors=['grey']),
+                 OVOLikeThing(5, size='small', colors=['white'])]
+        for goose in geese:
+            rcache.record_resource_update(self.ctx, 'goose', goose)
+
+        with mock.patch.object(rcache, 'match_resources_with_func') as scan:
+            # the resources are returned in the cache order
+            self.assertEqual(
+                [geese[0], geese[1]],
+                rcache.get_resources('goose', {'size': ('large', )}))
+            self.assertCountEqual(
+                [geese[0], geese[2]],
+                rcache.get_resources('goose', {'colors': ('white', )}))
+            self.assertCountEqual(
+                [geese[0]],
+                rcache.get_resources('goose', {'size': ('large', ),
+                                               'colors': ('white', )}))
+            self.assertEqual(
+                [], rcache.get_resources('goose', {'size': ('medium', )}))
+            scan.assert_not_called()
+
+        # the indexes follow the updates and the deletions
+        rcache.record_resource_update(
+            self.ctx, 'goose', OVOLikeThing(3, size='small', colors=['grey'],
+                                            revision_number=11))
+        rcache.record_resource_delete(self.ctx, 'goose', 4)
+        rcache.record_resource_remove('goose', 5)
+        self.assertEqual(
+            [], rcache.get_resources('goose', {'size': ('large', )}))
+        self.assertEqual(
+            [3], [goose.id for goose in rcache.get_resources(
+                'goose', {'size': ('small', )})])
+        self.assertEqual(
+            {'size': {'small': {3}}, 'colors': {'grey': {3}}},
+            rcache._indexes['goose'])
+
+    def test_record_resource_remove_indexed_by_cache_key(self):
+        rcache = resource_cache.RemoteResourceCache(
+            ['goose'], indexed_attributes={'goose': ('size', )})
+        # the removal only relies on the cache key, not on the cached value
+        rcache._cache_by_type_and_id['goose']['goose_id'] = 1
+        rcache.record_resource_remove('goose', 'goose_id')
+        self.assertNotIn('goose_id', rcache._cache_by_type_and_id['goose'])
+        self.assertEqual({'size': {}}, rcache._indexes['goose'])
+
+    def test_get_resources_not_indexed_filter(self):
+        rcache = resource_cache.RemoteResourceCache(
+            ['goose'], indexed_attributes={'goose': ('size', )})
+        rcache._puller = self._pullmock
+        geese = [OVOLikeThing(3, size='large', name='a'),
+                 OVOLikeThing(4, size='large', name='b')]
+        for goose in geese:
+            rcache.record_resource_update(self.ctx, 'goose', goose)
+        self.assertEqual(
+            [geese[1]], rcache.get_resources('goose', {'size': ('large', ),
+                                                       'name': ('b', )}))
+        self.assertEqual(
+            [geese[0]], rcache.get_resources('goose', {'name': ('a', )}))
+
     def test_match_resources_with_func(self):
         geese = [OVOLikeThing(3, size='large'), OVOLikeThing(5, size='medium'),
                  OVOLikeThing(4, size='xlarge'), OVOLikeThing(6, size='small')]
@@ -210,3 +282,109 @@ class RemoteResourceCacheTestCase(base.BaseTestCase):
         for goose in geese:
             self.assertIsNone(
                 self.rcache.get_resource_by_id('goose', goose.id))
+
+    def _load_snapshot(self, geese):
+        snapshot_path = self.get_temp_file_path('rcache.json')
+        self.rcache._snapshot_path = snapshot_path
+        for goose in geese:
+            self.rcache.record_resource_update(self.ctx, 'goose', goose)
+        self.rcache.save_snapshot()
+
+        with mock.patch.object(resource_cache.callback_resources,
+                               'get_resource_cls',
+                               return_value=OVOLikeThing):
+            rcache = resource_cache.RemoteResourceCache(['duck', 'goose'])
+            rcache._snapshot_path = snapshot_path
+            rcache.load_snapshot()
+        rcache._puller = self._pullmock
+        return rcache
+
+    def test_save_and_load_snapshot(self):
+        geese = [OVOLikeThing(3, size='large'), OVOLikeThing(5, size='small')]
+        rcache = self._load_snapshot(geese)
+        self.assertEqual(
+            {3: geese[0].to_dict(), 5: geese[1].to_dict()},
+            {goose_id: goose.to_dict() for goose_id, goose in
+             rcache._snapshot_by_type_and_id['goose'].items()})
+        self.assertEqual({}, rcache._snapshot_by_type_and_id['duck'])
+        # the snapshot is not used until it is confirmed by the server
+        self.assertEqual([], rcache.match_resources_with_func(
+            'goose', lambda goose: True))
+
+    def test_load_snapshot_missing_file(self):
+        self.rcache._snapshot_path = self.get_temp_file_path('missing.json')
+        self.rcache.load_snapshot()
+        self.assertEqual({}, self.rcache._snapshot_by_type_and_id['goose'])
+
+    def test_resync_from_snapshot(self):
+        rcache = self._load_snapshot([OVOLikeThing(3, size='large'),
+                                      OVOLikeThing(4, size='large'),
+                                      OVOLikeThing(5, size='small')])
+        updated = OVOLikeThing(4, size='medium', revision_number=11)
+        self._pullmock.bulk_pull_changed.return_value = ([updated], [3])
+
+        self.assertEqual('large',
+                         rcache.get_resource_by_id('goose', 3).size)
+        self._pullmock.bulk_pull_changed.assert_called_once_with(
+            mock.ANY, 'goose', {3: 10, 4: 10, 5: 10},
+            filter_kwargs={'id': (3, 4, 5)})
+        self.assertEqual(updated, rcache.get_resource_by_id('goose', 4))
+        # the resource deleted while the agent was down is not requested
+        self.assertIsNone(rcache.get_resource_by_id('goose', 5))
+        self._pullmock.bulk_pull.assert_not_called()
+        self.assertEqual({}, rcache._snapshot_by_type_and_id['goose'])
+
+    def test_resync_from_snapshot_queries(self):
+        for filters in ({'size': ('large', 'small')},
+                        {'id': (3, )},
+                        {'size': ('large', ), 'color': ('red', 'blue')},
+                        {'size': ('small', ), 'color': ('red', )}):
+            self.rcache._satisfied_server_queries.update(
+                self.rcache._get_query_ids('goose', filters))
+        rcache = self._load_snapshot([OVOLikeThing(3, size='large',
+                                                   color='red')])
+        # the ID queries are not stored
+        self.assertCountEqual(
+            [{'size': ('large', )}, {'size': ('small', )},
+             {'size': ('large', ), 'color': ('red', )},
+             {'size': ('large', ), 'color': ('blue', )},
+             {'size': ('small', ), 'color': ('red', )}],
+            rcache._snapshot_queries_by_type['goose'])
+        created = OVOLikeThing(6, size='large', color='blue')
+        self._pullmock.bulk_pull_changed.side_effect = (
+            lambda context, rtype, known_revisions, filter_kwargs: (
+                [created] if 'size' in filter_kwargs else [], [3]))
+
+        self.assertCountEqual(
+            [3, 6], [goose.id for goose in rcache.get_resources(
+                'goose', {'size': ('large', )})])
+        self.assertEqual(
+            [6], [goose.id for goose in rcache.get_resources(
+                'goose', {'size': ('large', ), 'color': ('blue', )})])
+        self.assertEqual([], rcache.get_resources(
+            'goose', {'size': ('small', ), 'color': ('red', )}))
+        self._pullmock.bulk_pull.assert_not_called()
+        self.assertEqual(4, self._pullmock.bulk_pull_changed.call_count)
+        self.assertEqual(
+            {'id': (3, )},
+            self._pullmock.bulk_pull_changed.call_args_list[0].kwargs[
+                'filter_kwargs'])
+        merged = [call.kwargs['filter_kwargs'] for call in
+                  self._pullmock.bulk_pull_changed.call_args_list[1:]]
+        for filters in merged:
+            for key, values in filters.items():
+                filters[key] = set(values)
+        self.assertCountEqual(
+            [{'size': {'large', 'small'}},
+             {'size': {'large'}, 'color': {'red', 'blue'}},
+             {'size': {'small'}, 'color': {'red'}}], merged)
+
+    def test_resync_from_snapshot_unsupported_by_server(self):
+        rcache = self._load_snapshot([OVOLikeThing(3, size='large')])
+        self._pullmock.bulk_pull_changed.side_effect = (
+            oslo_messaging.RemoteError(exc_type='UnsupportedVersion'))
+        self._pullmock.bulk_pull.return_value = [OVOLikeThing(3, size='xl')]
+
+        self.assertEqual('xl', rcache.get_resource_by_id('goose', 3).size)
+        self._pullmock.bulk_pull.assert_called_once_with(
+            mock.ANY, 'goose', filter_kwargs={'id': (3, )})
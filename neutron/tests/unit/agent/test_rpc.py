@@ -28,6 +28,7 @@ from oslo_serialization import jsonutils
 from oslo_utils import timeutils
 from oslo_utils import uuidutils
 
+from neutron.agent import resource_cache
 from neutron.agent import rpc
 from neutron.conf.agent import common as conf_common
 from neutron.objects import network
@@ -230,6 +231,18 @@ class TestCacheBackedPluginApi(base.BaseTestCase):
                 "openvswitch": {"other_config": {"tx-steering": "hash"}}}),
         )
 
+    @mock.patch.object(resource_cache.RemoteResourceCache, 'start_watcher')
+    @mock.patch.object(resource_cache.RemoteResourceCache, 'start_snapshot')
+    def test__create_cache_for_l2_agent_snapshot(self, start_snapshot, *args):
+        self._api._create_cache_for_l2_agent()
+        start_snapshot.assert_not_called()
+
+        cfg.CONF.set_override('resource_cache_snapshot_path',
+                              '/var/lib/neutron/rcache.json', 'AGENT')
+        self._api._create_cache_for_l2_agent()
+        start_snapshot.assert_called_once_with(
+            '/var/lib/neutron/rcache.json', 300)
+
     def test__legacy_notifier_resource_delete(self):
         self._api._legacy_notifier(resources.PORT, events.AFTER_DELETE, self,
                                    payload=events.DBEventPayload(
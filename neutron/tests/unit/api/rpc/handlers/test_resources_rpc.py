@@ -169,6 +169,26 @@ class ResourcesPullRpcApiTestCase(ResourcesRpcBaseTestCase):
             version=TEST_VERSION, filter_kwargs=filter_kwargs)
         self.assertEqual(expected_objs, result)
 
+    def test_bulk_pull_changed(self):
+        self.obj_registry.register(FakeResource)
+        expected_obj = _create_test_resource(self.context)
+        self.cctxt_mock.call.return_value = {
+            'changed': [expected_obj.obj_to_primitive()],
+            'unchanged': ['fake_id']}
+
+        known_revisions = {expected_obj.id: 1, 'fake_id': 2}
+        filter_kwargs = {'id': tuple(known_revisions)}
+        result = self.rpc.bulk_pull_changed(
+            self.context, FakeResource.obj_name(), known_revisions,
+            filter_kwargs=filter_kwargs)
+
+        self.rpc.client.prepare.assert_called_once_with(version='1.2')
+        self.cctxt_mock.call.assert_called_once_with(
+            self.context, 'bulk_pull_changed', resource_type='FakeResource',
+            version=TEST_VERSION, known_revisions=known_revisions,
+            filter_kwargs=filter_kwargs)
+        self.assertEqual(([expected_obj], ['fake_id']), result)
+
     def test_pull_resource_not_found(self):
         resource_dict = _create_test_dict()
         resource_id = resource_dict['id']
@@ -239,6 +259,30 @@ class ResourcesPullRpcCallbackTestCase(ResourcesRpcBaseTestCase):
                 version=TEST_VERSION, filter_kwargs={'id': r1.id})
             self.assertEqual([r1.obj_to_primitive()], objs)
 
+    def test_bulk_pull_changed(self):
+        r1 = mock.Mock(id='r1', revision_number=3)
+        r2 = mock.Mock(id='r2', revision_number=5)
+        r3 = mock.Mock(id='r3', revision_number=1)
+
+        with mock.patch.object(FakeResource, 'get_objects',
+                               return_value=[r1, r2, r3]) as get_objects:
+            result = self.callbacks.bulk_pull_changed(
+                self.context, resource_type=FakeResource.obj_name(),
+                version=TEST_VERSION,
+                known_revisions={'r1': 3, 'r2': 4, 'r4': 1},
+                filter_kwargs={'id': ('r1', 'r2', 'r4')})
+
+        get_objects.assert_called_once_with(self.context, _pager=None,
+                                            id=('r1', 'r2', 'r4'))
+        r1.obj_to_primitive.assert_not_called()
+        self.assertEqual(
+            {'changed': [r2.obj_to_primitive.return_value,
+                         r3.obj_to_primitive.return_value],
+             'unchanged': ['r1']},
+            result)
+        r2.obj_to_primitive.assert_called_once_with(
+            target_version=TEST_VERSION)
+
     @mock.patch.object(FakeResource, 'obj_to_primitive')
     def test_pull_backports_to_older_version(self, to_prim_mock):
         with mock.patch.object(resources_rpc.prod_registry, 'pull',
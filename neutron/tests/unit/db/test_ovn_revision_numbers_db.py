@@ -94,6 +94,29 @@ class TestRevisionNumber(test_db_base_plugin_v2.NeutronDbPluginV2TestCase):
             self.assertIn('No revision row found for',
                           mock_log.call_args[0][0])
 
+    def test_bump_revisions(self):
+        ports = [self.deserialize(
+            self.fmt, self._create_port(self.fmt, self.net['id']))['port']
+            for _ in range(3)]
+        with db_api.CONTEXT_WRITER.using(self.ctx):
+            self._create_initial_revision(ports[0]['id'],
+                                          ovn_const.TYPE_PORTS)
+            self._create_initial_revision(ports[1]['id'],
+                                          ovn_const.TYPE_PORTS,
+                                          revision_number=124)
+        # The third port has no revision row.
+        for port in ports:
+            port['revision_number'] = 123
+
+        ovn_rn_db.bump_revisions(self.ctx, ports, ovn_const.TYPE_PORTS)
+
+        self.assertEqual(
+            [123, 124, 123],
+            [ovn_rn_db.get_revision_row(
+                self.ctx, port['id'],
+                resource_type=ovn_const.TYPE_PORTS).revision_number
+             for port in ports])
+
     def test_delete_revision(self):
         with db_api.CONTEXT_WRITER.using(self.ctx):
             self._create_initial_revision(self.net['id'],
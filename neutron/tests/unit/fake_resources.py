@@ -43,6 +43,7 @@ class FakeOvsdbNbOvnIdl:
         self.port_group_table = FakeOvsdbTable.create_one_ovsdb_table()
         self.ha_chassis_group_table = FakeOvsdbTable.create_one_ovsdb_table()
         self.ha_chassis_table = FakeOvsdbTable.create_one_ovsdb_table()
+        self.qos_table = FakeOvsdbTable.create_one_ovsdb_table()
         self._tables = {}
         self._tables['Logical_Switch'] = self.lswitch_table
         self._tables['Logical_Switch_Port'] = self.lsp_table
@@ -57,6 +58,7 @@ class FakeOvsdbNbOvnIdl:
         self._tables['Port_Group'] = self.port_group_table
         self._tables['HA_Chassis_Group'] = self.ha_chassis_group_table
         self._tables['HA_Chassis'] = self.ha_chassis_table
+        self._tables['QoS'] = self.qos_table
         self.transaction = mock.MagicMock()
         self.create_transaction = mock.MagicMock()
         self.ls_add = mock.Mock()
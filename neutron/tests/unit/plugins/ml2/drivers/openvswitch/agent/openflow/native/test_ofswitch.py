@@ -148,3 +148,96 @@ class TestBundledOpenFlowBridge(base.BaseTestCase):
         args, kwargs = self.br.br._send_msg.call_args_list[1]
         self.assertEqual(ofproto_v1_3.ONF_BCT_COMMIT_REQUEST,
                          args[0].type)
+
+
+class TestBundleFlows(base.BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.dp = mock.Mock(ofproto=ofproto_v1_3,
+                            ofproto_parser=ofproto_v1_3_parser)
+        self.dp.send_msg.return_value = True
+        self.br = ofswitch.OpenFlowSwitchMixin(os_ken_app=mock.Mock())
+        self.br._get_dp = lambda: (self.dp, ofproto_v1_3,
+                                   ofproto_v1_3_parser)
+        self.br.br_name = 'br-int'
+        self.ctrl_msgs = []
+
+        def _send_ctrl_msg(msg, reply_cls=None, reply_multi=False):
+            if not isinstance(msg, ofproto_v1_3_parser.ONFBundleCtrlMsg):
+                return None
+            self.ctrl_msgs.append(msg.type)
+            return FakeReply(msg.type + 1)
+
+        self.send_msg_retry = mock.patch.object(
+            ofswitch.OpenFlowSwitchMixin, '_send_msg_retry',
+            side_effect=lambda app, msg, reply_cls, reply_multi:
+                _send_ctrl_msg(msg)).start()
+
+    def _flow_mod(self):
+        return ofproto_v1_3_parser.OFPFlowMod(self.dp, table_id=0)
+
+    def test_bundle_flows(self):
+        with self.br.bundle_flows():
+            self.br._send_msg(self._flow_mod())
+            self.br._send_msg(self._flow_mod())
+
+        # The flows are sent without waiting for a reply
+        self.assertEqual(2, self.dp.send_msg.call_count)
+        for call in self.dp.send_msg.call_args_list:
+            msg = call[0][0]
+            self.assertIsInstance(msg, ofproto_v1_3_parser.ONFBundleAddMsg)
+            self.assertEqual(
+                ofproto_v1_3.ONF_BF_ATOMIC | ofproto_v1_3.ONF_BF_ORDERED,
+                msg.flags)
+        self.assertEqual([ofproto_v1_3.ONF_BCT_OPEN_REQUEST,
+                          ofproto_v1_3.ONF_BCT_COMMIT_REQUEST],
+                         self.ctrl_msgs)
+        self.assertEqual(set(), self.br.active_bundles)
+
+        # Out of the context, the flows are not bundled
+        flow_mod = self._flow_mod()
+        self.br._send_msg(flow_mod)
+        self.assertEqual(2, self.dp.send_msg.call_count)
+        self.send_msg_retry.assert_called_with(mock.ANY, flow_mod, None,
+                                               False)
+
+    def test_bundle_flows_nested(self):
+        with self.br.bundle_flows():
+            with self.br.bundle_flows():
+                self.br._send_msg(self._flow_mod())
+            self.br._send_msg(self._flow_mod())
+        self.assertEqual([ofproto_v1_3.ONF_BCT_OPEN_REQUEST,
+                          ofproto_v1_3.ONF_BCT_COMMIT_REQUEST],
+                         self.ctrl_msgs)
+        bundle_ids = {call[0][0].bundle_id
+                      for call in self.dp.send_msg.call_args_list}
+        self.assertEqual(1, len(bundle_ids))
+
+    def test_bundle_flows_discarded(self):
+        try:
+            with self.br.bundle_flows():
+                self.br._send_msg(self._flow_mod())
+                raise ValueError()
+        except ValueError:
+            pass
+        self.assertEqual([ofproto_v1_3.ONF_BCT_OPEN_REQUEST,
+                          ofproto_v1_3.ONF_BCT_DISCARD_REQUEST],
+                         self.ctrl_msgs)
+
+    def test_bundle_flows_send_failure(self):
+        self.dp.send_msg.return_value = False
+        self.assertRaises(RuntimeError, self._send_in_bundle)
+        self.assertEqual([ofproto_v1_3.ONF_BCT_OPEN_REQUEST,
+                          ofproto_v1_3.ONF_BCT_DISCARD_REQUEST],
+                         self.ctrl_msgs)
+
+    def _send_in_bundle(self):
+        with self.br.bundle_flows():
+            self.br._send_msg(self._flow_mod())
+
+    def test_bundle_flows_other_messages_not_bundled(self):
+        msg = ofproto_v1_3_parser.OFPFlowStatsRequest(self.dp)
+        with self.br.bundle_flows():
+            self.br._send_msg(msg, reply_cls=mock.ANY)
+        self.dp.send_msg.assert_not_called()
+        self.send_msg_retry.assert_any_call(mock.ANY, msg, mock.ANY, False)
@@ -12,6 +12,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from concurrent import futures
 import contextlib
 import copy
 import signal
@@ -154,6 +155,9 @@ class TestOvsNeutronAgent:
         self.agent = self._make_agent()
         self.agent.sg_agent = mock.Mock()
         self.agent.ovs_restarted = False
+        # There is no datapath to open OpenFlow bundles with.
+        mock.patch.object(self.agent.int_br, 'bundle_flows',
+                          side_effect=contextlib.nullcontext).start()
 
     def _make_agent(self):
         with mock.patch.object(self.mod_agent.OVSNeutronAgent,
@@ -968,6 +972,45 @@ class TestOvsNeutronAgent:
     def test_setup_arp_spoofing_protection_disabled(self):
         self._test_arp_spoofing(False)
 
+    def _test_bind_devices_flows_bundles(self, bundle_size, num_bundles):
+        cfg.CONF.set_override('openflow_bundle_ports', bundle_size, 'OVS')
+        self.agent.prevent_arp_spoofing = True
+        self.agent.vlan_manager.add('fake_network', 1, None, None, 1)
+        ovs_db_list = []
+        need_binding_ports = []
+        for idx in range(3):
+            vif_port = mock.Mock(port_name='fake_device%d' % idx, ofport=idx)
+            ovs_db_list.append({'name': vif_port.port_name, 'tag': []})
+            need_binding_ports.append({'network_id': 'fake_network',
+                                       'segmentation_id': 1,
+                                       'vif_port': vif_port,
+                                       'device': vif_port.port_name,
+                                       'admin_state_up': True})
+        with mock.patch.object(
+            self.agent.plugin_rpc, 'update_device_list',
+            return_value={'devices_up': [],
+                          'devices_down': [],
+                          'failed_devices_up': [],
+                          'failed_devices_down': []}), \
+                mock.patch.object(self.agent,
+                                  'int_br') as int_br, \
+                mock.patch.object(
+                    self.agent,
+                    'setup_arp_spoofing_protection') as setup_arp:
+            int_br.get_ports_attributes.return_value = ovs_db_list
+            self.agent._bind_devices(need_binding_ports)
+            self.assertEqual(3, setup_arp.call_count)
+            self.assertEqual(num_bundles, int_br.bundle_flows.call_count)
+
+    def test_bind_devices_flows_bundle_per_port(self):
+        self._test_bind_devices_flows_bundles(1, 3)
+
+    def test_bind_devices_flows_bundle_several_ports(self):
+        self._test_bind_devices_flows_bundles(2, 2)
+
+    def test_bind_devices_flows_bundle_disabled(self):
+        self._test_bind_devices_flows_bundles(0, 0)
+
     def _mock_treat_devices_added_updated(self, details, port, func_name):
         """Mock treat devices added or updated.
 
@@ -1143,6 +1186,95 @@ class TestOvsNeutronAgent:
             self.assertFalse(skip_devs)
             self.assertTrue(treat_vif_port.called)
 
+    def test_treat_devices_added_updated_port_processing_workers(self):
+        self.agent.port_processing_workers = 2
+        self.agent._port_processing_pool = futures.ThreadPoolExecutor(
+            max_workers=2)
+        self.addCleanup(self.agent._port_processing_pool.shutdown)
+        devices = ['dev%d' % idx for idx in range(4)]
+        details = {dev: {'device': dev, 'port_id': dev,
+                         'network_id': 'net%d' % (idx % 2),
+                         'network_type': 'vlan', 'physical_network': 'phys',
+                         'segmentation_id': idx % 2, 'admin_state_up': True,
+                         'fixed_ips': [], 'device_owner': DEVICE_OWNER_COMPUTE}
+                   for idx, dev in enumerate(devices)}
+        processed = {'net0': [], 'net1': []}
+
+        def get_devices_details(context, devices, *args):
+            return {'devices': [details[dev] for dev in devices],
+                    'failed_devices': []}
+
+        def treat_vif_port(port, port_id, network_id, *args):
+            processed[network_id].append(port_id)
+            return True
+
+        with mock.patch.object(self.agent.plugin_rpc,
+                               'get_devices_details_list_and_failed_devices',
+                               side_effect=get_devices_details) as get_dev,\
+                mock.patch.object(self.agent.int_br, 'get_vifs_by_ids',
+                                  return_value={dev: mock.Mock(ofport=1)
+                                                for dev in devices}),\
+                mock.patch.object(self.agent, 'treat_vif_port',
+                                  side_effect=treat_vif_port):
+            _, _, need_bound_devices, _, _, _ = (
+                self.agent.treat_devices_added_or_updated(
+                    devices, False, set()))
+
+        # The device details are retrieved in one chunk per worker
+        get_dev.assert_has_calls([
+            mock.call(self.agent.context, devices[:2], self.agent.agent_id,
+                      self.agent.conf.host, True),
+            mock.call(self.agent.context, devices[2:], self.agent.agent_id,
+                      self.agent.conf.host, True)], any_order=True)
+        # The ports of each network are processed in order
+        self.assertEqual({'net0': ['dev0', 'dev2'], 'net1': ['dev1', 'dev3']},
+                         processed)
+        self.assertEqual(devices,
+                         [dev['device'] for dev in need_bound_devices])
+        self.assertEqual(2,
+                         self.agent.port_processing_stats[
+                             'devices_partitions'])
+        self.assertIn('devices_details', self.agent.port_processing_stats)
+        self.assertIn('devices_wiring', self.agent.port_processing_stats)
+
+    def _test_treat_devices_partition_flows_bundles(self, bundle_size,
+                                                    num_bundles):
+        cfg.CONF.set_override('openflow_bundle_ports', bundle_size, 'OVS')
+        devices = [{'device': 'dev%d' % idx, 'port_id': 'dev%d' % idx,
+                    'network_id': 'net', 'network_type': 'vlan',
+                    'physical_network': 'phys', 'segmentation_id': 1,
+                    'admin_state_up': True, 'fixed_ips': [],
+                    'device_owner': DEVICE_OWNER_COMPUTE}
+                   for idx in range(3)]
+        vif_by_id = {dev['device']: mock.Mock(ofport=1) for dev in devices}
+        with mock.patch.object(self.agent, 'int_br') as int_br, \
+                mock.patch.object(self.agent, 'treat_vif_port',
+                                  return_value=True) as treat_vif_port, \
+                mock.patch.object(self.agent, '_update_port_network'):
+            result = self.agent._treat_devices_partition(
+                devices, vif_by_id, False, set())
+        self.assertEqual(3, treat_vif_port.call_count)
+        self.assertEqual(devices, result['need_binding'])
+        self.assertEqual(num_bundles, int_br.bundle_flows.call_count)
+
+    def test_treat_devices_partition_flows_bundle_per_port(self):
+        self._test_treat_devices_partition_flows_bundles(1, 3)
+
+    def test_treat_devices_partition_flows_bundle_several_ports(self):
+        self._test_treat_devices_partition_flows_bundles(2, 2)
+
+    def test_treat_devices_partition_flows_bundle_disabled(self):
+        self._test_treat_devices_partition_flows_bundles(0, 0)
+
+    def test_partition_devices_by_network(self):
+        devices = [{'device': 'dev1', 'network_id': 'net1'},
+                   {'device': 'dev2', 'network_id': 'net2'},
+                   {'device': 'dev3'},
+                   {'device': 'dev4', 'network_id': 'net1'}]
+        self.assertEqual(
+            [[devices[0], devices[3]], [devices[1]], [devices[2]]],
+            self.agent._partition_devices_by_network(devices))
+
     def _mock_treat_devices_removed(self, port_exists):
         details = dict(exists=port_exists)
         with mock.patch.object(self.agent.plugin_rpc,
@@ -2174,6 +2306,16 @@ class TestOvsNeutronAgent:
         mock_loop.assert_called_once_with(polling_manager=mock.ANY)
         mock_idl_monitor.start_bridge_monitor.assert_called()
 
+    def test_daemon_loop_shuts_down_port_processing_pool(self):
+        pool = mock.Mock()
+        self.agent._port_processing_pool = pool
+        with mock.patch.object(polling, 'get_polling_manager'), \
+                mock.patch.object(self.agent, 'rpc_loop'), \
+                mock.patch.object(self.agent.plugin_rpc, 'stop'), \
+                mock.patch.object(self.agent.ovs.ovsdb, 'idl_monitor'):
+            self.agent.daemon_loop()
+        pool.shutdown.assert_called_once_with()
+
     def test_daemon_loop_uses_register_signal(self):
         with mock.patch.object(polling, 'get_polling_manager'), \
              mock.patch.object(self.agent, 'rpc_loop'), \
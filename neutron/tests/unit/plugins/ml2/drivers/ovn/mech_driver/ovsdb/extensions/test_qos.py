@@ -254,6 +254,21 @@ class TestOVNClientQosExtension(test_plugin.Ml2PluginV2TestCase):
         self.assertEqual(expected,
                          self.qos_driver._qos_rules(mock.ANY, mock.ANY))
 
+    def test_policy_has_ovn_qos_rules(self):
+        egress, ingress = (constants.EGRESS_DIRECTION,
+                           constants.INGRESS_DIRECTION)
+        min_bw = {qos_constants.RULE_TYPE_MINIMUM_BANDWIDTH: {'min_kbps': 1}}
+        bw_limit = {qos_constants.RULE_TYPE_BANDWIDTH_LIMIT: {'max_kbps': 1}}
+        for qos_rules, expected in (({egress: {}, ingress: {}}, False),
+                                    ({egress: min_bw, ingress: {}}, False),
+                                    ({egress: min_bw, ingress: bw_limit},
+                                     True)):
+            with mock.patch.object(self.qos_driver, '_qos_rules',
+                                   return_value=qos_rules):
+                self.assertEqual(expected,
+                                 self.qos_driver.policy_has_ovn_qos_rules(
+                                     self.ctx, 'policy_id'))
+
     def _test__ovn_qos_rule_ingress(self, fip_id=None, ip_address=None):
         if fip_id:
             external_ids = {ovn_const.OVN_FIP_EXT_ID_KEY: fip_id}
@@ -13,9 +13,13 @@
 #
 
 import copy
+import os
 from unittest import mock
+import uuid
 
 from oslo_utils import uuidutils
+from ovs.db import data
+from ovs.db import idl
 from ovsdbapp.backend import ovs_idl
 
 from neutron.common.ovn import constants as ovn_const
@@ -26,6 +30,10 @@ from neutron.tests import base
 from neutron.tests.unit import fake_resources as fakes
 
 
+SCHEMAS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           'schemas')
+
+
 class TestDBImplIdlOvn(base.BaseTestCase):
 
     def _load_ovsdb_fake_rows(self, table, fake_attrs):
@@ -610,6 +618,22 @@ class TestNBImplIdlOvn(TestDBImplIdlOvn):
     def test_get_all_logical_routers_with_rports_without_nat_gw_port(self):
         self._test_get_all_logical_routers_with_rports(False)
 
+    def test_get_logical_routers_with_rports(self):
+        # Test empty
+        mapping = self.nb_ovn_idl.get_logical_routers_with_rports(
+            ['lr-id-c'])
+        self.assertEqual([], mapping)
+        # Test loaded values
+        self._load_nb_db()
+        mapping = self.nb_ovn_idl.get_logical_routers_with_rports(
+            ['lr-id-c', 'lr-id-f', 'lr-id-unknown'])
+        expected = [{'name': 'lr-id-c', 'ports': {}, 'static_routes': [],
+                     'snats': [], 'dnat_and_snats': []},
+                    {'name': 'lr-id-f', 'static_routes': [],
+                     'ports': {'gwc': ['10.0.4.0/24']},
+                     'snats': [], 'dnat_and_snats': []}]
+        self.assertEqual(expected, mapping)
+
     def test_get_acls_for_lswitches(self):
         self._load_nb_db()
         # Test neutron switches
@@ -1024,3 +1048,140 @@ class TestSBImplIdlOvnGetChassisByCardSerialFromCMSOptions(
             'fake-smartnic-dpu-chassis.fqdn',
             self.sb_ovn_idl.get_chassis_by_card_serial_from_cms_options(
                 'fake-serial').hostname)
+
+
+class TestImplIdlOvnIndexes(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.nb_ovn_idl = self._create_api(impl_idl_ovn.OvsdbNbOvnIdl,
+                                           'ovn-nb.ovsschema')
+        self.sb_ovn_idl = self._create_api(impl_idl_ovn.OvsdbSbOvnIdl,
+                                           'ovn-sb.ovsschema')
+
+    def _create_api(self, api_cls, schema):
+        helper = idl.SchemaHelper(os.path.join(SCHEMAS_DIR, schema))
+        helper.register_all()
+        conn = mock.MagicMock(idl=idl.Idl('unix:/nonexistent', helper),
+                              is_running=False)
+        api_cls.ovsdb_connection = None
+        return api_cls(conn)
+
+    def _add_row(self, api, table, **columns):
+        # Same as a row received from the OVSDB server, with the default
+        # value for the columns not given
+        table = api.tables[table]
+        row_data = {name: data.Datum.default(column.type)
+                    for name, column in table.columns.items()}
+        for name, value in columns.items():
+            row_data[name] = data.Datum.from_python(
+                table.columns[name].type, value,
+                lambda row: row.uuid if isinstance(row, idl.Row) else row)
+        row = idl.Row(api.idl, table, uuid.uuid4(), row_data)
+        table.rows[row.uuid] = row
+        return row
+
+    def test_indexes_created(self):
+        for api in (self.nb_ovn_idl, self.sb_ovn_idl):
+            for table, column, key in api.indexed_columns:
+                self.assertIn(impl_idl_ovn._index_name(column, key),
+                              api.tables[table].rows.indexes)
+
+    def test__index_lookup(self):
+        rows = [self._add_row(self.nb_ovn_idl, 'NAT', type='dnat_and_snat',
+                              external_ids={ovn_const.OVN_FIP_EXT_ID_KEY: v})
+                for v in ('fip1', 'fip2', 'fip1')]
+        self._add_row(self.nb_ovn_idl, 'NAT', type='snat')
+
+        for fip_id, expected in (('fip1', [rows[0], rows[2]]),
+                                 ('fip2', [rows[1]]), ('fip3', [])):
+            self.assertCountEqual(
+                expected,
+                self.nb_ovn_idl._index_lookup(
+                    'NAT', 'external_ids', fip_id,
+                    key=ovn_const.OVN_FIP_EXT_ID_KEY))
+
+        # An update from the OVSDB server replaces the row
+        nat_table = self.nb_ovn_idl.tables['NAT']
+        del nat_table.rows[rows[2].uuid]
+        self.assertEqual([rows[0]], self.nb_ovn_idl._index_lookup(
+            'NAT', 'external_ids', 'fip1', key=ovn_const.OVN_FIP_EXT_ID_KEY))
+
+    def test_index_entries(self):
+        rows = [self._add_row(self.nb_ovn_idl, 'Load_Balancer', name=name,
+                              external_ids=external_ids)
+                for name, external_ids in (
+                    ('lb1', {ovn_const.OVN_FIP_EXT_ID_KEY: 'fip1'}),
+                    ('lb2', {}))]
+        indexes = self.nb_ovn_idl.tables['Load_Balancer'].rows.indexes
+
+        # The entries are plain (value, row UUID) tuples
+        self.assertEqual(
+            sorted([('', rows[1].uuid), ('fip1', rows[0].uuid)]),
+            list(indexes[impl_idl_ovn._index_name(
+                'external_ids', ovn_const.OVN_FIP_EXT_ID_KEY)].values))
+
+        del self.nb_ovn_idl.tables['Load_Balancer'].rows[rows[0].uuid]
+        self.assertEqual(
+            [('', rows[1].uuid)],
+            list(indexes[impl_idl_ovn._index_name(
+                'external_ids', ovn_const.OVN_FIP_EXT_ID_KEY)].values))
+
+    def test__index_lookup_no_index(self):
+        row = self._add_row(self.nb_ovn_idl, 'Gateway_Chassis',
+                            name='gwc1', chassis_name='chassis1')
+        self._add_row(self.nb_ovn_idl, 'Gateway_Chassis',
+                      name='gwc2', chassis_name='chassis2')
+        gwc_table = self.nb_ovn_idl.tables['Gateway_Chassis']
+        indexes = copy.copy(gwc_table.rows.indexes)
+        gwc_table.rows.indexes.clear()
+        self.addCleanup(gwc_table.rows.indexes.update, indexes)
+
+        self.assertEqual([row],
+                         self.nb_ovn_idl.get_chassis_gateways('chassis1'))
+
+    def test__index_lookup_reference(self):
+        hcg = self._add_row(self.nb_ovn_idl, 'HA_Chassis_Group', name='hcg1')
+        lrp = self._add_row(self.nb_ovn_idl, 'Logical_Router_Port',
+                            name='lrp1', ha_chassis_group=[hcg])
+        self._add_row(self.nb_ovn_idl, 'Logical_Router_Port', name='lrp2')
+
+        self.assertEqual(
+            [lrp], self.nb_ovn_idl.get_lrp_from_ha_chassis_group([hcg]))
+
+    def test_get_ports_on_chassis(self):
+        chassis = [self._add_row(self.sb_ovn_idl, 'Chassis', name=name,
+                                 hostname=name)
+                   for name in ('chassis1', 'chassis2')]
+        datapath = self._add_row(self.sb_ovn_idl, 'Datapath_Binding',
+                                 tunnel_key=1)
+        pbs = [self._add_row(self.sb_ovn_idl, 'Port_Binding',
+                             logical_port='port%d' % idx, chassis=[ch],
+                             datapath=datapath, tunnel_key=idx)
+               for idx, ch in enumerate(chassis, 1)]
+
+        self.assertEqual([pbs[0]],
+                         self.sb_ovn_idl.get_ports_on_chassis('chassis1'))
+        self.assertEqual([], self.sb_ovn_idl.get_ports_on_chassis('chassis3'))
+        self.assertTrue(self.sb_ovn_idl.chassis_exists('chassis2'))
+        self.assertFalse(self.sb_ovn_idl.chassis_exists('chassis3'))
+
+    def test_get_network_port_bindings_by_ip(self):
+        chassis = self._add_row(self.sb_ovn_idl, 'Chassis', name='chassis1')
+        datapaths = [
+            self._add_row(self.sb_ovn_idl, 'Datapath_Binding', tunnel_key=idx,
+                          external_ids={'name': utils.ovn_name(net_id)})
+            for idx, net_id in enumerate(('net1', 'net2'), 1)]
+        pbs = [self._add_row(self.sb_ovn_idl, 'Port_Binding',
+                             logical_port='port%d' % idx, chassis=[chassis],
+                             datapath=dp, tunnel_key=idx,
+                             mac=['fa:16:3e:00:00:01 10.0.0.1'])
+               for idx, dp in enumerate(datapaths, 1)]
+
+        self.assertEqual(
+            [pbs[1]],
+            self.sb_ovn_idl.get_network_port_bindings_by_ip('net2',
+                                                            '10.0.0.1'))
+        self.assertEqual(
+            [], self.sb_ovn_idl.get_network_port_bindings_by_ip('net3',
+                                                                '10.0.0.1'))
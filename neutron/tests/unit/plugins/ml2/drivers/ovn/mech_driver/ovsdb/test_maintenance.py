@@ -208,8 +208,102 @@ class TestDBInconsistenciesPeriodics(testlib_api.SqlTestCaseLight,
     def test_check_for_inconsistencies(self, mock_get_incon_res, mock_fix_net):
         fake_row = mock.Mock(resource_type=constants.TYPE_NETWORKS)
         mock_get_incon_res.return_value = [fake_row, ]
+        fake_net = {'id': fake_row.resource_uuid}
+        get_networks = self.fake_ovn_client._plugin.get_networks
+        get_networks.return_value = [fake_net]
         self.periodic.check_for_inconsistencies()
-        mock_fix_net.assert_called_once_with(mock.ANY, fake_row)
+        get_networks.assert_called_once_with(
+            mock.ANY, filters={'id': [fake_row.resource_uuid]})
+        mock_fix_net.assert_called_once_with(mock.ANY, fake_row, fake_net)
+
+    @mock.patch.object(maintenance.DBInconsistenciesPeriodics,
+                       '_fix_create_update')
+    @mock.patch.object(ovn_revision_numbers_db, 'get_inconsistent_resources')
+    def test_check_for_inconsistencies_deleted_resource(
+            self, mock_get_incon_res, mock_fix_net):
+        fake_row = mock.Mock(resource_type=constants.TYPE_NETWORKS)
+        mock_get_incon_res.return_value = [fake_row, ]
+        self.fake_ovn_client._plugin.get_networks.return_value = []
+        self.periodic.check_for_inconsistencies()
+        mock_fix_net.assert_not_called()
+
+    @mock.patch.object(maintenance.DBInconsistenciesPeriodics,
+                       '_fix_create_update_batch')
+    @mock.patch.object(ovn_revision_numbers_db, 'get_inconsistent_resources')
+    def test_check_for_inconsistencies_batches(self, mock_get_incon_res,
+                                               mock_fix_batch):
+        cfg.CONF.set_override('maintenance_fix_batch_size', 2, group='ovn')
+        net_row = mock.Mock(resource_type=constants.TYPE_NETWORKS)
+        port_rows = [mock.Mock(resource_type=constants.TYPE_PORTS)
+                     for _ in range(5)]
+        mock_get_incon_res.return_value = [net_row] + port_rows
+        self.fake_ovn_client._plugin.get_networks.return_value = [
+            {'id': net_row.resource_uuid}]
+        self.fake_ovn_client._plugin.get_ports.return_value = [
+            {'id': row.resource_uuid} for row in port_rows]
+        mock_fix_batch.side_effect = lambda res_type, items: (len(items), 0)
+
+        self.periodic.check_for_inconsistencies()
+
+        # The networks are not fixed in batches, the ports are
+        items = [(row, {'id': row.resource_uuid}) for row in port_rows]
+        mock_fix_batch.assert_has_calls([
+            mock.call(constants.TYPE_NETWORKS,
+                      [(net_row, {'id': net_row.resource_uuid})]),
+            mock.call(constants.TYPE_PORTS, items[0:2]),
+            mock.call(constants.TYPE_PORTS, items[2:4]),
+            mock.call(constants.TYPE_PORTS, items[4:])], any_order=True)
+        self.assertEqual(4, mock_fix_batch.call_count)
+
+    @mock.patch.object(ovn_revision_numbers_db, 'bump_revision')
+    @mock.patch.object(maintenance.DBInconsistenciesPeriodics,
+                       '_fix_create_update')
+    def test__fix_create_update_batch(self, mock_fix, mock_bump):
+        rows = [mock.Mock(resource_type=constants.TYPE_PORTS)
+                for _ in range(3)]
+        items = [(row, {'id': row.resource_uuid}) for row in rows]
+        # The second port is consistent, its revision is already bumped
+        mock_fix.side_effect = [True, False, True]
+
+        self.assertEqual(
+            (3, 0), self.periodic._fix_create_update_batch(
+                constants.TYPE_PORTS, items))
+
+        self.fake_ovn_client._nb_idl.transaction.assert_called_once_with(
+            check_error=True, revision_mismatch_raise=True)
+        mock_fix.assert_has_calls([mock.call(mock.ANY, row, n_obj)
+                                   for row, n_obj in items])
+        mock_bump.assert_has_calls([
+            mock.call(mock.ANY, items[0][1], constants.TYPE_PORTS),
+            mock.call(mock.ANY, items[2][1], constants.TYPE_PORTS)])
+        self.assertEqual(2, mock_bump.call_count)
+
+    @mock.patch.object(ovn_revision_numbers_db, 'create_initial_revision')
+    @mock.patch.object(ovn_revision_numbers_db, 'bump_revision')
+    @mock.patch.object(maintenance.DBInconsistenciesPeriodics,
+                       '_fix_create_update')
+    def test__fix_create_update_batch_fallback(self, mock_fix, mock_bump,
+                                               mock_restore):
+        rows = [mock.Mock(resource_type=constants.TYPE_PORTS,
+                          revision_number=-1) for _ in range(2)]
+        items = [(row, {'id': row.resource_uuid}) for row in rows]
+        self.fake_ovn_client._nb_idl.transaction.side_effect = [
+            RuntimeError('transaction failed')]
+        # The first port fails again when fixed alone
+        mock_fix.side_effect = [RuntimeError('port failed'), True]
+
+        self.assertEqual(
+            (2, 1), self.periodic._fix_create_update_batch(
+                constants.TYPE_PORTS, items))
+
+        # The ports are retrieved again from the Neutron database
+        mock_fix.assert_has_calls([mock.call(mock.ANY, rows[0]),
+                                   mock.call(mock.ANY, rows[1])])
+        mock_bump.assert_not_called()
+        mock_restore.assert_called_once_with(
+            mock.ANY, rows[0].resource_uuid, constants.TYPE_PORTS,
+            revision_number=-1, may_exist=True,
+            std_attr_id=rows[0].standard_attr_id)
 
     def _test_fix_create_update_network(self, ovn_rev, neutron_rev):
         with db_api.CONTEXT_WRITER.using(self.ctx):
@@ -244,6 +244,60 @@ class TestOVNClient(TestOVNClientBase):
         plugin.get_port.assert_not_called()
         self.nb_idl.add_static_route.assert_not_called()
 
+    @mock.patch.object(ovn_client.db_rev, 'bump_revisions')
+    def test_create_ports(self, mock_bump_revisions):
+        ports = [
+            {'id': 'port1', 'network_id': 'net1', 'device_owner': ''},
+            {'id': 'port2', 'network_id': 'net1', 'device_owner': ''},
+            {'id': 'port3', 'network_id': 'net2', 'device_owner': ''},
+            {'id': 'fip-port', 'network_id': 'net2',
+             'device_owner': const.DEVICE_OWNER_FLOATINGIP}]
+        context = mock.Mock()
+        self.ovn_client._add_txns_to_create_port = mock.Mock()
+        self.ovn_client._add_txns_to_sync_dns_records = mock.Mock()
+        self.ovn_client.is_dns_required_for_port = mock.Mock(
+            side_effect=lambda port: port['id'] != 'port3')
+        self.ovn_client.get_port_dns_records = mock.Mock(
+            side_effect=lambda port: {port['id']: '10.0.0.1'})
+
+        self.ovn_client.create_ports(context, ports)
+
+        self.nb_idl.transaction.assert_called_once_with(check_error=True)
+        txn = self.nb_idl.transaction.return_value.__enter__.return_value
+        self.ovn_client._add_txns_to_create_port.assert_has_calls(
+            [mock.call(context, txn, port) for port in ports[:3]])
+        self.assertEqual(
+            3, self.ovn_client._add_txns_to_create_port.call_count)
+        # The DNS records of the ports are merged by logical switch.
+        self.ovn_client._add_txns_to_sync_dns_records.assert_called_once_with(
+            txn, 'net1', {'port1': '10.0.0.1', 'port2': '10.0.0.1'})
+        mock_bump_revisions.assert_called_once_with(
+            context, ports[:3], constants.TYPE_PORTS)
+
+    @mock.patch.object(ovn_client.db_rev, 'bump_revisions')
+    def test_create_ports_bump_revisions_failed(self, mock_bump_revisions):
+        ports = [{'id': 'port1', 'network_id': 'net1', 'device_owner': ''}]
+        self.ovn_client._add_txns_to_create_port = mock.Mock()
+        self.ovn_client.is_dns_required_for_port = mock.Mock(
+            return_value=False)
+        mock_bump_revisions.side_effect = RuntimeError
+
+        # The ports are created in the OVN NB database, the failure is not
+        # raised
+        self.ovn_client.create_ports(mock.Mock(), ports)
+        mock_bump_revisions.assert_called_once()
+
+    def test_create_ports_transaction_failed(self):
+        ports = [{'id': 'port1', 'network_id': 'net1', 'device_owner': ''}]
+        self.ovn_client._add_txns_to_create_port = mock.Mock()
+        self.ovn_client.is_dns_required_for_port = mock.Mock(
+            return_value=False)
+        self.nb_idl.transaction.return_value.__exit__.side_effect = (
+            RuntimeError)
+
+        self.assertRaises(RuntimeError, self.ovn_client.create_ports,
+                          mock.Mock(), ports)
+
     def test_checkout_ip_list(self):
         addresses = ["192.168.2.2/32", "2001:db8::/32"]
         add_map = self.ovn_client._checkout_ip_list(addresses)
@@ -20,10 +20,12 @@ from neutron_lib import constants as const
 from neutron_lib import exceptions as n_exc
 from neutron_lib.ovn import constants as n_lib_ovn_const
 from neutron_lib.services.logapi import constants as log_const
+from oslo_config import cfg
 from oslo_utils import uuidutils
 
 from neutron.common.ovn import acl
 from neutron.common.ovn import constants as ovn_const
+from neutron.common.ovn import utils
 from neutron.plugins.ml2.drivers.ovn.mech_driver.ovsdb import impl_idl_ovn
 from neutron.plugins.ml2.drivers.ovn.mech_driver.ovsdb import ovn_client
 from neutron.plugins.ml2.drivers.ovn.mech_driver.ovsdb import ovn_db_sync
@@ -687,6 +689,66 @@ class TestOvnNbSyncML2(test_mech_driver.OVNMechanismDriverTestCase):
             [self.get_sync_router_ports[2]],
         )
 
+    def _test_mocks_batches_helper(self, ovn_nb_synchronizer, batch_size):
+        cfg.CONF.set_override('neutron_sync_batch_size', batch_size,
+                              group='ovn')
+        core_plugin = ovn_nb_synchronizer.core_plugin
+        ovn_api = ovn_nb_synchronizer.ovn_nb_api
+        l3_plugin = ovn_nb_synchronizer.l3_plugin
+
+        def paginated(get_all):
+            def wrapper(context, filters=None, fields=None, sorts=None,
+                        limit=None, marker=None):
+                resources = sorted(get_all(context, filters=filters),
+                                   key=lambda res: res['id'])
+                if marker:
+                    resources = [res for res in resources
+                                 if res['id'] > marker]
+                return resources[:limit] if limit else resources
+
+            return wrapper
+
+        def filter_by_id(resources):
+            return lambda context, filters=None: [
+                res for res in resources
+                if not filters or res['id'] in filters['id']]
+
+        core_plugin.get_ports.side_effect = paginated(
+            core_plugin.get_ports.side_effect)
+        core_plugin.get_security_groups.side_effect = paginated(
+            filter_by_id(self.security_groups))
+        core_plugin.get_security_group_rules.side_effect = (
+            lambda context, filters=None: [
+                rule for rule in self.security_group_rules
+                if rule['security_group_id'] in
+                filters['security_group_id']])
+        l3_plugin.get_routers.side_effect = paginated(
+            filter_by_id(self.routers))
+        l3_plugin.get_floatingips.side_effect = (
+            lambda context, filters=None: [
+                fip for fip in self.floating_ips
+                if not filters or fip['router_id'] in filters['router_id']])
+        l3_plugin._get_sync_interfaces.side_effect = (
+            lambda context, router_ids, device_owners: [
+                port for port in self.get_sync_router_ports
+                if port['device_id'] in router_ids])
+
+        port_groups = {pg.name: pg for pg in self.sg_port_groups_ovn}
+        ovn_api.get_port_group.side_effect = port_groups.get
+        ovn_ports = {lport for lswitch in self.lswitches_with_ports
+                     for lport in lswitch['ports']}
+        ovn_api.get_lswitch_port.side_effect = lambda lsp_name: (
+            mock.Mock(external_ids={ovn_const.OVN_PORT_NAME_EXT_ID_KEY: ''})
+            if lsp_name in ovn_ports else None)
+        ovn_api.iter_logical_switches_with_ports = mock.Mock(
+            side_effect=lambda: iter(self.lswitches_with_ports))
+        ovn_api.get_logical_routers_with_rports = mock.Mock(
+            side_effect=lambda router_ids: [
+                lrouter for lrouter in self.lrouters_with_rports
+                if lrouter['name'] in router_ids])
+        ovn_api.iter_logical_routers_with_rports = mock.Mock(
+            side_effect=lambda: iter(self.lrouters_with_rports))
+
     def _test_ovn_nb_sync_helper(self, ovn_nb_synchronizer,
                                  networks, ports,
                                  routers, router_ports,
@@ -706,8 +768,10 @@ class TestOvnNbSyncML2(test_mech_driver.OVNMechanismDriverTestCase):
                                  add_acls_list,
                                  del_acls_list,
                                  create_metadata_list,
-                                 test_logging=False):
+                                 test_logging=False, batch_size=0):
         self._test_mocks_helper(ovn_nb_synchronizer, test_logging)
+        if batch_size:
+            self._test_mocks_batches_helper(ovn_nb_synchronizer, batch_size)
 
         ovn_api = ovn_nb_synchronizer.ovn_nb_api
         mock.patch.object(impl_idl_ovn.OvsdbNbOvnIdl, 'from_worker').start()
@@ -910,7 +974,7 @@ class TestOvnNbSyncML2(test_mech_driver.OVNMechanismDriverTestCase):
             self.assertEqual(2, ovn_nb_synchronizer.ovn_log_driver.
                              _pgs_from_log_obj.call_count)
 
-    def _test_ovn_nb_sync_mode_repair(self, test_logging=False):
+    def _test_ovn_nb_sync_mode_repair(self, test_logging=False, batch_size=0):
 
         create_network_list = [{'net': {'id': 'n2', 'mtu': 1450},
                                 'ext_ids': {}}]
@@ -1061,7 +1125,7 @@ class TestOvnNbSyncML2(test_mech_driver.OVNMechanismDriverTestCase):
                                       add_acls_list,
                                       del_acls_list,
                                       create_metadata_list,
-                                      test_logging)
+                                      test_logging, batch_size)
 
     def test_ovn_nb_sync_mode_repair(self):
         self._test_ovn_nb_sync_mode_repair(test_logging=False)
@@ -1069,7 +1133,14 @@ class TestOvnNbSyncML2(test_mech_driver.OVNMechanismDriverTestCase):
     def test_ovn_nb_sync_mode_repair_logs_created(self):
         self._test_ovn_nb_sync_mode_repair(test_logging=True)
 
-    def test_ovn_nb_sync_mode_log(self):
+    def test_ovn_nb_sync_mode_repair_in_batches(self):
+        self._test_ovn_nb_sync_mode_repair(batch_size=2)
+
+    def test_ovn_nb_sync_mode_repair_parallel(self):
+        cfg.CONF.set_override('neutron_sync_workers', 4, group='ovn')
+        self._test_ovn_nb_sync_mode_repair()
+
+    def _test_ovn_nb_sync_mode_log(self, batch_size=0):
         create_network_list = []
         create_port_list = []
         create_provnet_port_list = []
@@ -1121,7 +1192,14 @@ class TestOvnNbSyncML2(test_mech_driver.OVNMechanismDriverTestCase):
                                       del_port_groups_list,
                                       add_acls_list,
                                       del_acls_list,
-                                      create_metadata_list)
+                                      create_metadata_list,
+                                      batch_size=batch_size)
+
+    def test_ovn_nb_sync_mode_log(self):
+        self._test_ovn_nb_sync_mode_log()
+
+    def test_ovn_nb_sync_mode_log_in_batches(self):
+        self._test_ovn_nb_sync_mode_log(batch_size=2)
 
     def _test_ovn_nb_sync_calculate_routes_helper(self,
                                                   ovn_routes,
@@ -1443,6 +1521,153 @@ class TestOvnSbSyncML2(test_mech_driver.OVNMechanismDriverTestCase):
                 update_segment_host_mapping_calls, any_order=True)
 
 
+class TestRunSyncPhases(test_mech_driver.OVNMechanismDriverTestCase):
+    def setUp(self):
+        super().setUp()
+        self.synchronizer = ovn_db_sync.OvnNbSynchronizer(
+            self.plugin, self.mech_driver,
+            n_lib_ovn_const.OVN_DB_SYNC_MODE_LOG)
+        self.done = []
+
+    def _sync(self, name, inconsistencies=0, requires=(), error=None):
+        def sync(ctx):
+            for phase in requires:
+                self.assertIn(phase, self.done)
+            if error:
+                raise error
+            self.synchronizer._count_inconsistencies(inconsistencies)
+            self.done.append(name)
+        return name, sync, requires
+
+    def _test_run_sync_phases(self, workers):
+        phases = [self._sync('a', inconsistencies=2),
+                  self._sync('b', requires=('a',)),
+                  self._sync('c', inconsistencies=1, requires=('b',)),
+                  self._sync('d', inconsistencies=3, requires=('a',))]
+
+        elapsed = self.synchronizer._run_sync_phases(phases, workers)
+
+        self.assertEqual({'a', 'b', 'c', 'd'}, set(elapsed))
+        self.assertEqual(['a', 'b', 'c', 'd'], sorted(self.done))
+        self.assertEqual({'a': 2, 'c': 1, 'd': 3},
+                         {name: count for name, count in
+                          self.synchronizer._inconsistencies.items()
+                          if count})
+
+    def test_run_sync_phases_sequential(self):
+        self._test_run_sync_phases(1)
+        # With one worker, the phases run in the given order.
+        self.assertEqual(['a', 'b', 'c', 'd'], self.done)
+
+    def test_run_sync_phases_parallel(self):
+        self._test_run_sync_phases(3)
+
+    def test_run_sync_phases_error(self):
+        phases = [self._sync('a'),
+                  self._sync('b', requires=('a',), error=RuntimeError),
+                  self._sync('c', requires=('b',)),
+                  self._sync('d', requires=('a',))]
+
+        self.assertRaises(RuntimeError,
+                          self.synchronizer._run_sync_phases, phases, 1)
+        self.assertEqual(['a'], self.done)
+
+    def test_count_inconsistencies_out_of_phase(self):
+        self.synchronizer._count_inconsistencies(5)
+        self.assertFalse(self.synchronizer._inconsistencies)
+
+    @mock.patch.object(ovn_db_sync.LOG, 'info')
+    def test_do_sync_logs_inconsistencies_per_phase(self, mock_log):
+        phases = ('port_groups', 'networks_ports_and_dhcp_opts',
+                  'port_dns_records', 'acls', 'routers_and_rports',
+                  'port_qos_policies', 'fip_qos_policies', 'fip_dnat_rules',
+                  'fip_distributed_nat')
+        for phase in phases:
+            mock.patch.object(self.synchronizer, 'sync_' + phase).start()
+        self.synchronizer.sync_acls.side_effect = (
+            lambda ctx: self.synchronizer._count_inconsistencies(4))
+
+        self.synchronizer.do_sync()
+
+        counts = {call.args[1]['phase']: call.args[1]['count']
+                  for call in mock_log.call_args_list}
+        self.assertEqual(dict.fromkeys(phases, 0) | {'acls': 4}, counts)
+
+    def test_do_sync_phase_dependencies(self):
+        with mock.patch.object(self.synchronizer,
+                               '_run_sync_phases') as mock_run:
+            mock_run.return_value = collections.defaultdict(float)
+            self.synchronizer.do_sync()
+
+        requires = {name: set(deps)
+                    for name, _, deps in mock_run.call_args.args[0]}
+        self.assertEqual({'port_groups', 'networks_ports_and_dhcp_opts'},
+                         requires['acls'])
+        self.assertEqual({'networks_ports_and_dhcp_opts'},
+                         requires['routers_and_rports'])
+
+
+class TestSyncPortGroups(test_mech_driver.OVNMechanismDriverTestCase):
+    def setUp(self):
+        super().setUp()
+        self.synchronizer = ovn_db_sync.OvnNbSynchronizer(
+            self.plugin, self.mech_driver,
+            n_lib_ovn_const.OVN_DB_SYNC_MODE_REPAIR)
+        self.nb_api = self.synchronizer.ovn_nb_api
+        self.core_plugin = mock.Mock()
+        self.synchronizer.core_plugin = self.core_plugin
+        self.core_plugin.get_security_groups.return_value = [
+            {'id': 'sg1'}, {'id': 'sg2'}]
+        # The drop port group and sg1 are missing in the OVN NB DB
+        self.nb_api.db_list_rows.return_value.execute.return_value = [
+            fakes.FakeOvsdbRow.create_one_ovsdb_row(attrs={
+                'external_ids': {ovn_const.OVN_SG_EXT_ID_KEY: 'sg2'},
+                'name': utils.ovn_port_group_name('sg2')})]
+        self.ports = [
+            {'id': 'port%d' % idx, 'security_groups': security_groups,
+             'port_security_enabled': True}
+            for idx, security_groups in enumerate(
+                (['sg1'], ['sg2'], ['sg1', 'sg2'], ['sg1']))]
+        ovn_ports = {'port0', 'port1', 'port2'}
+        self.nb_api.lsp_list.return_value.execute.return_value = [
+            fakes.FakeOvsdbRow.create_one_ovsdb_row(attrs={'name': name})
+            for name in ovn_ports]
+        self.nb_api.get_lswitch_port.side_effect = lambda name: (
+            mock.Mock(external_ids={ovn_const.OVN_PORT_NAME_EXT_ID_KEY: ''})
+            if name in ovn_ports else None)
+
+    def _test_sync_port_groups(self, batch_size):
+        cfg.CONF.set_override('neutron_sync_batch_size', batch_size,
+                              group='ovn')
+        self.core_plugin.get_ports.side_effect = (
+            lambda context, filters=None, sorts=None, limit=None,
+            marker=None: [
+                port for port in self.ports
+                if not marker or port['id'] > marker][:limit])
+
+        self.synchronizer.sync_port_groups(mock.ANY)
+
+        drop_pg = ovn_const.OVN_DROP_PORT_GROUP_NAME
+        sg1_pg = utils.ovn_port_group_name('sg1')
+        self.nb_api.pg_add.assert_has_calls([
+            mock.call(name=drop_pg, acls=[]),
+            mock.call(name=sg1_pg, acls=[],
+                      external_ids={ovn_const.OVN_SG_EXT_ID_KEY: 'sg1'})])
+        # Only the ports already in the OVN NB DB are added
+        self.assertCountEqual(
+            [mock.call(drop_pg, 'port0'), mock.call(sg1_pg, 'port0'),
+             mock.call(drop_pg, 'port1'),
+             mock.call(drop_pg, 'port2'), mock.call(sg1_pg, 'port2')],
+            self.nb_api.pg_add_ports.call_args_list)
+
+    def test_sync_port_groups(self):
+        self._test_sync_port_groups(0)
+
+    def test_sync_port_groups_in_batches(self):
+        self._test_sync_port_groups(2)
+        self.assertEqual(3, self.core_plugin.get_ports.call_count)
+
+
 class TestSyncFipDnatRules(test_mech_driver.OVNMechanismDriverTestCase):
     def setUp(self):
         super().setUp()
@@ -1614,3 +1839,69 @@ class TestSyncFipDistributedNat(test_mech_driver.OVNMechanismDriverTestCase):
             self.synchronizer.sync_fip_distributed_nat(self.ctx)
 
         self.nb_api.db_set.assert_not_called()
+
+
+class TestSyncQosPolicies(test_mech_driver.OVNMechanismDriverTestCase):
+    def setUp(self):
+        super().setUp()
+        self.synchronizer = ovn_db_sync.OvnNbSynchronizer(
+            self.plugin, self.mech_driver,
+            n_lib_ovn_const.OVN_DB_SYNC_MODE_LOG)
+        self.nb_api = self.synchronizer.ovn_nb_api
+        self.nb_api._tables = {'QoS': mock.Mock(rows={
+            'uuid-1': mock.Mock(external_ids={
+                ovn_const.OVN_PORT_EXT_ID_KEY: 'port-synced'}),
+            'uuid-2': mock.Mock(external_ids={
+                ovn_const.OVN_FIP_EXT_ID_KEY: 'fip-synced'})})}
+        self.qos_ext = mock.patch.object(
+            ovn_db_sync.ovn_qos, 'OVNClientQosExtension').start().return_value
+        self.qos_ext.policy_has_ovn_qos_rules.side_effect = (
+            lambda ctx, policy_id: policy_id != 'policy-min-bw')
+        self.qos_ext.get_lsp_options_qos.side_effect = (
+            lambda port_id: ({ovn_const.LSP_OPTIONS_QOS_MIN_RATE: '1000'}
+                             if port_id == 'port-lsp-options' else {}))
+        self.count = mock.patch.object(self.synchronizer,
+                                       '_count_inconsistencies').start()
+
+    def test_sync_port_qos_policies_counts_missing(self):
+        ports = [{'id': port_id, 'qos_policy_id': policy_id}
+                 for port_id, policy_id in (
+                     ('port-synced', 'policy'),
+                     ('port-lsp-options', 'policy'),
+                     ('port-min-bw', 'policy-min-bw'),
+                     ('port-no-policy', None),
+                     ('port-missing', 'policy'))]
+        self.qos_ext.port_effective_qos_policy_id.side_effect = (
+            lambda port: (port['qos_policy_id'], 'port'))
+        with mock.patch.object(self.synchronizer, '_get_db_port_batches',
+                               return_value=[ports]), \
+                mock.patch.object(ovn_db_sync.utils, 'is_port_external',
+                                  return_value=False), \
+                mock.patch.object(ovn_db_sync.LOG, 'warning') as mock_log:
+            self.synchronizer.sync_port_qos_policies(self.context)
+
+        self.count.assert_called_once_with(1)
+        mock_log.assert_called_once_with(mock.ANY, 'port-missing')
+        # the rules of a policy are only checked once
+        self.qos_ext.policy_has_ovn_qos_rules.assert_has_calls([
+            mock.call(self.context, 'policy'),
+            mock.call(self.context, 'policy-min-bw')])
+        self.assertEqual(2,
+                         self.qos_ext.policy_has_ovn_qos_rules.call_count)
+
+    def test_sync_fip_qos_policies_counts_missing(self):
+        fips = [{'id': fip_id, 'qos_policy_id': policy_id,
+                 'router_id': router_id}
+                for fip_id, policy_id, router_id in (
+                    ('fip-synced', 'policy', 'router'),
+                    ('fip-no-router', 'policy', None),
+                    ('fip-min-bw', 'policy-min-bw', 'router'),
+                    ('fip-no-policy', None, 'router'),
+                    ('fip-missing', 'policy', 'router'))]
+        with mock.patch.object(self.synchronizer.l3_plugin,
+                               'get_floatingips', return_value=fips), \
+                mock.patch.object(ovn_db_sync.LOG, 'warning') as mock_log:
+            self.synchronizer.sync_fip_qos_policies(self.context)
+
+        self.count.assert_called_once_with(1)
+        mock_log.assert_called_once_with(mock.ANY, 'fip-missing')
@@ -2495,6 +2495,45 @@ class TestOVNMechanismDriver(TestOVNMechanismDriverBase):
         mock_create_port.assert_called_once_with(mock.ANY, passed_fake_port)
         mock_notify_dhcp.assert_called_once_with(mock.ANY, fake_port['id'])
 
+    @mock.patch.object(mech_driver.OVNMechanismDriver,
+                       '_is_port_provisioning_required', lambda *_: True)
+    @mock.patch.object(mech_driver.OVNMechanismDriver, '_notify_dhcp_updated')
+    @mock.patch.object(ovn_client.OVNClient, 'create_ports')
+    def test_create_port_bulk_postcommit(self, mock_create_ports,
+                                         mock_notify_dhcp):
+        fake_ports = [fakes.FakePort.create_one_port(
+            attrs={'status': const.PORT_STATUS_DOWN}).info()
+            for _ in range(3)]
+        fake_ctxs = [mock.Mock(current=fake_port) for fake_port in fake_ports]
+        self.mech_driver.create_port_bulk_postcommit(fake_ctxs)
+        passed_fake_ports = []
+        for fake_port, fake_ctx in zip(fake_ports, fake_ctxs):
+            passed_fake_port = copy.deepcopy(fake_port)
+            passed_fake_port['network'] = fake_ctx.network.current
+            passed_fake_ports.append(passed_fake_port)
+        mock_create_ports.assert_called_once_with(
+            fake_ctxs[0].plugin_context, passed_fake_ports)
+        mock_notify_dhcp.assert_has_calls(
+            [mock.call(mock.ANY, fake_port['id'])
+             for fake_port in fake_ports])
+
+    @mock.patch.object(mech_driver.OVNMechanismDriver, '_notify_dhcp_updated')
+    @mock.patch.object(ovn_client.OVNClient, 'create_ports')
+    def test_create_port_bulk_postcommit_notify_dhcp_failed(
+            self, mock_create_ports, mock_notify_dhcp):
+        fake_ports = [fakes.FakePort.create_one_port(
+            attrs={'status': const.PORT_STATUS_DOWN}).info()
+            for _ in range(3)]
+        fake_ctxs = [mock.Mock(current=fake_port) for fake_port in fake_ports]
+        mock_notify_dhcp.side_effect = [None, RuntimeError, None]
+        # The ports created in the OVN NB database must not be created again
+        # by create_port_postcommit
+        self.mech_driver.create_port_bulk_postcommit(fake_ctxs)
+        mock_create_ports.assert_called_once()
+        mock_notify_dhcp.assert_has_calls(
+            [mock.call(mock.ANY, fake_port['id'])
+             for fake_port in fake_ports])
+
     @mock.patch.object(mech_driver.OVNMechanismDriver,
                        '_is_port_provisioning_required', lambda *_: True)
     @mock.patch.object(mech_driver.OVNMechanismDriver, '_notify_dhcp_updated')
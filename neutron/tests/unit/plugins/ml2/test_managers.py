@@ -259,6 +259,52 @@ class TestMechManager(base.BaseTestCase):
 
         self.assertEqual(['a', 'b'], call_order)
 
+    def _make_port_contexts(self, number):
+        contexts = []
+        for idx in range(number):
+            context = mock.Mock()
+            context.current = {'id': 'port%d' % idx}
+            contexts.append(context)
+        return contexts
+
+    def test_create_port_bulk_postcommit(self):
+        self._set_two_drivers()
+        # driver_b does not implement create_port_bulk_postcommit.
+        self.driver_b.obj = mock.Mock(spec=['create_port_postcommit'])
+        contexts = self._make_port_contexts(3)
+
+        self.assertEqual(
+            {}, self._manager.create_port_bulk_postcommit(contexts))
+
+        self.driver_a.obj.create_port_bulk_postcommit.assert_called_once_with(
+            contexts)
+        self.driver_a.obj.create_port_postcommit.assert_not_called()
+        self.driver_b.obj.create_port_postcommit.assert_has_calls(
+            [mock.call(context) for context in contexts])
+
+    def test_create_port_bulk_postcommit_failure(self):
+        self._set_two_drivers()
+        contexts = self._make_port_contexts(3)
+
+        def create_port_postcommit(context):
+            if context.current['id'] == 'port1':
+                raise RuntimeError()
+
+        self.driver_a.obj.create_port_bulk_postcommit.side_effect = (
+            RuntimeError)
+        self.driver_a.obj.create_port_postcommit.side_effect = (
+            create_port_postcommit)
+
+        errors = self._manager.create_port_bulk_postcommit(contexts)
+
+        self.assertEqual(['port1'], list(errors))
+        self.assertIsInstance(errors['port1'], ml2_exc.MechanismDriverError)
+        self.driver_a.obj.create_port_postcommit.assert_has_calls(
+            [mock.call(context) for context in contexts])
+        # The next driver is not called for the port which failed.
+        self.driver_b.obj.create_port_bulk_postcommit.assert_called_once_with(
+            [contexts[0], contexts[2]])
+
 
 class TestMechDriverTriStateChecks(base.BaseTestCase):
     """Unit tests for vlan_transparent / qinq mechanism-driver aggregation."""
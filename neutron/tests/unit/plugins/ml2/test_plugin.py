@@ -1856,6 +1856,43 @@ class TestMl2PortsV2(test_plugin.TestPortsV2, Ml2PluginV2TestCase):
             ports_out = self.plugin.create_port_bulk(ctx, ports_in)
             self.assertEqual(edo, ports_out[0]['extra_dhcp_opts'])
 
+    def test_create_ports_bulk_postcommit_failures(self):
+        ctx = context.get_admin_context()
+
+        def create_port_bulk_postcommit(contexts):
+            return {mech_context.current['id']:
+                    ml2_exc.MechanismDriverError(method='create_port_bulk')
+                    for mech_context in contexts
+                    if mech_context.current['name'] != 'port-1'}
+
+        with self.network() as net:
+            ports_in = {
+                'ports': [{'port': {
+                    'network_id': net['network']['id'],
+                    'project_id': self._project_id,
+
+                    'admin_state_up': True,
+                    'device_id': '',
+                    'device_owner': '',
+                    'fixed_ips': constants.ATTR_NOT_SPECIFIED,
+                    'name': 'port-%d' % idx,
+                    'security_groups': constants.ATTR_NOT_SPECIFIED,
+                }} for idx in range(3)]}
+            with mock.patch.object(
+                    self.plugin.mechanism_manager,
+                    'create_port_bulk_postcommit',
+                    side_effect=create_port_bulk_postcommit), \
+                    mock.patch.object(self.plugin, 'delete_port',
+                                      wraps=self.plugin.delete_port) as m_del:
+                self.assertRaises(ml2_exc.MechanismDriverError,
+                                  self.plugin.create_port_bulk, ctx, ports_in)
+
+            # Both failed ports are deleted, the other one is kept.
+            self.assertEqual(2, m_del.call_count)
+            ports = self.plugin.get_ports(
+                ctx, filters={'network_id': [net['network']['id']]})
+            self.assertEqual(['port-1'], [port['name'] for port in ports])
+
     def test_create_ports_bulk_with_wrong_fixed_ips(self):
         cidr = '10.0.10.0/24'
         with self.network() as net:
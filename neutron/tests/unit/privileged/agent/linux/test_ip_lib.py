@@ -284,3 +284,73 @@ class IpLibTestCase(base.BaseTestCase):
                 [mock.call('get', 'device', namespace='namespace', ext_mask=1),
                  mock.call('get', 'device', namespace='namespace', ext_mask=1)]
             )
+
+
+class ExecuteBatchTestCase(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        client_mode = priv_lib.privileged.default.client_mode
+        priv_lib.privileged.default.client_mode = False
+        self.addCleanup(setattr, priv_lib.privileged.default, 'client_mode',
+                        client_mode)
+        self.mock_iproute = mock.patch.object(priv_lib, 'get_iproute').start()
+        self.ip = self.mock_iproute.return_value.__enter__.return_value
+        self.ip.link_lookup.return_value = [2]
+
+    def test_execute_batch(self):
+        operations = [
+            ('addr_add', {'cidr': '10.0.0.1/24', 'device': 'qr-1',
+                          'scope': 'global', 'broadcast': '10.0.0.255'}),
+            ('route_replace', {'cidr': '10.1.0.0/24', 'ip_version': 4,
+                               'device': 'qr-1', 'via': '10.0.0.2',
+                               'table': None, 'metric': None, 'scope': None,
+                               'proto': 'static', 'kwargs': {}}),
+            ('neigh_replace', {'ip_address': '10.0.0.3',
+                               'mac_address': 'fa:16:3e:00:00:01',
+                               'device': 'qr-1', 'ip_version': 4,
+                               'nud_state': 'permanent', 'kwargs': {}}),
+            ('rule_add', {'kwargs': {'family': 2, 'table': 16}}),
+            ('link_set', {'device': 'qr-1', 'attributes': {'mtu': 1400}})]
+        self.assertEqual([None] * 5,
+                         priv_lib.execute_batch('ns', operations))
+        # One socket and one lookup of the device for all the operations
+        self.mock_iproute.assert_called_once_with('ns')
+        self.ip.link_lookup.assert_called_once_with(ifname='qr-1')
+        self.ip.addr.assert_called_once_with(
+            'add', index=2, address='10.0.0.1', mask=24, family=2,
+            scope=0, broadcast='10.0.0.255')
+        self.ip.route.assert_called_once_with(
+            'replace', family=2, dst='10.1.0.0/24', proto=4,
+            gateway='10.0.0.2', oif=2)
+        self.ip.neigh.assert_called_once_with(
+            'replace', ifindex=2, dst='10.0.0.3', lladdr='fa:16:3e:00:00:01',
+            family=2, state=128)
+        self.ip.rule.assert_called_once_with('add', family=2, table=16)
+        self.ip.link.assert_called_once_with('set', index=2, mtu=1400)
+
+    def test_execute_batch_errors(self):
+        operations = [
+            ('addr_del', {'cidr': '10.0.0.1/24', 'device': 'qr-1'}),
+            ('addr_add', {'cidr': '10.0.0.1/24', 'device': 'qr-1',
+                          'scope': 'global', 'broadcast': None}),
+            ('addr_del', {'cidr': '10.0.0.1/24', 'device': 'qr-2'}),
+            ('link_set', {'device': 'qr-1', 'attributes': {'mtu': 1400}})]
+        self.ip.link_lookup.side_effect = lambda ifname: (
+            [2] if ifname == 'qr-1' else [])
+        self.ip.addr.side_effect = [
+            netlink_exceptions.NetlinkError(errno.EADDRNOTAVAIL),
+            netlink_exceptions.NetlinkError(errno.EEXIST, 'File exists')]
+        result = priv_lib.execute_batch('ns', operations)
+        self.assertIsNone(result[0])
+        self.assertEqual(errno.EEXIST, result[1][0])
+        self.assertEqual(errno.ENODEV, result[2][0])
+        self.assertIsNone(result[3])
+        self.ip.link.assert_called_once_with('set', index=2, mtu=1400)
+
+    def test_execute_batch_namespace_not_found(self):
+        self.mock_iproute.side_effect = OSError(errno.ENOENT, 'No netns')
+        self.assertRaises(priv_lib.NetworkNamespaceNotFound,
+                          priv_lib.execute_batch, 'ns',
+                          [('link_set', {'device': 'qr-1',
+                                         'attributes': {'mtu': 1400}})])
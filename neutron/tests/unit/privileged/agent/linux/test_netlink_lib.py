@@ -13,8 +13,10 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import ctypes
 from unittest import mock
 
+import netaddr
 from neutron_lib import constants
 from neutron_lib import exceptions
 import testtools
@@ -377,3 +379,109 @@ class NetlinkLibTestCase(base.BaseTestCase):
         nl_lib.nfct.nfct_close.assert_called_once_with(nl_lib.nfct.nfct_open(
             nl_constants.NFNL_SUBSYS_CTNETLINK,
             nl_constants.CONNTRACK))
+
+
+class DeleteEntriesByFiltersTestCase(base.BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.nfct = mock.patch.object(nl_lib, 'nfct').start()
+        self.entries = {}
+        self.nfct.nfct_get_attr_u8.side_effect = self._get_attr
+        self.nfct.nfct_get_attr_u16.side_effect = self._get_attr
+        self.nfct.nfct_get_attr_u32.side_effect = self._get_attr
+        self.nfct.nfct_get_attr.side_effect = self._get_address
+
+    def _add_entry(self, entry_id, zone, protocol, src, dst, mark=0):
+        version = 6 if ':' in src else 4
+        self.entries[entry_id] = {
+            nl_constants.ATTR_ZONE: zone,
+            nl_constants.ATTR_L4PROTO: protocol,
+            nl_constants.ATTR_MARK: mark,
+            nl_lib.TARGET['src'][version]: ctypes.create_string_buffer(
+                netaddr.IPAddress(src).packed),
+            nl_lib.TARGET['dst'][version]: ctypes.create_string_buffer(
+                netaddr.IPAddress(dst).packed)}
+
+    def _get_attr(self, entry_id, attr):
+        return self.entries[entry_id][attr]
+
+    def _get_address(self, entry_id, attr):
+        return ctypes.addressof(self.entries[entry_id][attr])
+
+    def _match(self, filters, entry_id, ipversion=4):
+        zone_filters = {}
+        for zone, protocol, mark, src, dst in filters:
+            zone_filters.setdefault(zone, []).append(
+                nl_lib._parse_filter(protocol, mark, src, dst))
+        return nl_lib._match_entry(zone_filters, ipversion, entry_id)
+
+    def test_match_entry(self):
+        self._add_entry(1, 4097, 6, '10.0.0.1', '10.0.0.2', mark=0x11)
+        self.assertTrue(self._match([(4097, None, None, None, None)], 1))
+        self.assertTrue(self._match(
+            [(4097, 6, '0x1/0xf', '10.0.0.1/32', '10.0.0.0/24')], 1))
+        self.assertFalse(self._match([(4098, None, None, None, None)], 1))
+        self.assertFalse(self._match([(4097, 17, None, None, None)], 1))
+        self.assertFalse(self._match([(4097, None, '1', None, None)], 1))
+        self.assertFalse(self._match(
+            [(4097, None, None, '10.0.0.2/32', None)], 1))
+        self.assertFalse(self._match(
+            [(4097, None, None, None, '10.0.1.0/24')], 1))
+        self.assertTrue(self._match(
+            [(4097, None, None, '10.0.0.2/32', None),
+             (4097, None, None, None, '10.0.0.2')], 1))
+
+    def test_match_entry_ipv6(self):
+        self._add_entry(1, 4097, 58, 'fe80::1', 'fe80::2')
+        self.assertTrue(self._match(
+            [(4097, 58, None, 'fe80::1/128', 'fe80::/64')], 1, ipversion=6))
+        self.assertFalse(self._match(
+            [(4097, 58, None, 'fe80::2/128', None)], 1, ipversion=6))
+
+    def test_delete_matching_entries(self):
+        def query(handler, query_type, data):
+            if query_type == nl_constants.NFCT_Q_DUMP:
+                callback = self.nfct.nfct_callback_register.call_args[0][2]
+                for entry_id in (1, 2, 3):
+                    self.assertEqual(nl_constants.NFCT_CB_CONTINUE,
+                                     callback(nl_constants.NFCT_T_UPDATE,
+                                              entry_id, None))
+
+        self.nfct.nfct_query.side_effect = query
+        self.nfct.nfct_clone.side_effect = lambda entry_id: entry_id * 10
+        with nl_lib.ConntrackManager(
+                nl_constants.IPVERSION_SOCKET[4]) as conntrack:
+            self.assertEqual(2, conntrack.delete_matching_entries(
+                lambda entry_id: entry_id != 2))
+        handler = self.nfct.nfct_open.return_value
+        self.nfct.nfct_query.assert_has_calls([
+            mock.call(handler, nl_constants.NFCT_Q_DUMP, mock.ANY),
+            mock.call(handler, nl_constants.NFCT_Q_DESTROY, 10),
+            mock.call(handler, nl_constants.NFCT_Q_DESTROY, 30)])
+        self.assertEqual(3, self.nfct.nfct_query.call_count)
+        self.nfct.nfct_destroy.assert_has_calls([mock.call(10),
+                                                 mock.call(30)])
+
+    def test_delete_entries_by_filters(self):
+        self._add_entry(1, 4097, 6, '10.0.0.1', '10.0.0.2')
+        self._add_entry(2, 4098, 6, '10.0.0.1', '10.0.0.2')
+        matches = []
+
+        def delete_matching_entries(match):
+            matches.append([entry_id for entry_id in self.entries
+                            if match(entry_id)])
+            return len(matches[-1])
+
+        with mock.patch.object(nl_lib.ConntrackManager,
+                               'delete_matching_entries',
+                               side_effect=delete_matching_entries):
+            # Call the unwrapped function to bypass privsep
+            raw_fn = nl_lib.delete_entries_by_filters.args[0]
+            self.assertEqual(1, raw_fn(
+                [[4, 4097, 6, None, '10.0.0.1/32', None],
+                 [4, 4097, None, None, None, '10.0.0.2/32'],
+                 [4, 4099, None, None, None, None]]))
+        # The IPv6 table is not dumped, there is no IPv6 filter
+        self.assertEqual([[1]], matches)
+        self.nfct.nfct_open.assert_called_once_with(
+            nl_constants.NFNL_SUBSYS_CTNETLINK, nl_constants.CONNTRACK)
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+benchmark_conntrack_delete.py: Compare the conntrack deletion throughput of
+one netlink pass per filter with a single batched pass, for several conntrack
+table sizes.
+
+The conntrack table of a new network namespace is filled with UDP entries of
+<ports> ports spread over 16 zones, then the entries of <filters> ports are
+deleted:
+  - 'per-filter': one dump and delete pass per port, as done by one
+    "conntrack -D" command per port (without the process spawning cost);
+  - 'conntrack': one "conntrack -D" command per port, if the command is
+    installed;
+  - 'batched': a single pass for all the ports, as done by the
+    IpConntrackManager.
+
+It must be run as root, with the libnetfilter_conntrack library installed.
+
+Usage examples:
+  sudo ./tools/benchmark_conntrack_delete.py
+  sudo ./tools/benchmark_conntrack_delete.py --sizes 10000,100000 --filters 500
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+import netaddr
+from pyroute2 import netns
+from pyroute2 import NFCTSocket
+from pyroute2.netlink.nfnetlink.nfctsocket import NFCTAttrTuple
+
+from neutron import privileged
+from neutron.privileged.agent.linux import netlink_lib
+
+ZONES = 16
+ZONE_START = 4097
+METHODS = ('per-filter', 'conntrack', 'batched')
+
+
+def _port_address(port):
+    return str(netaddr.IPAddress(netaddr.IPAddress('10.0.0.1').value + port))
+
+
+def _fill(size, ports):
+    with NFCTSocket() as nfct:
+        nfct.flush()
+        for index in range(size):
+            port = index % ports
+            src = _port_address(port)
+            dst = '10.128.%d.%d' % (index // 250 % 250, index % 250 + 1)
+            sport = 1024 + index // ports % 60000
+            nfct.entry(
+                'add', zone=ZONE_START + port % ZONES, timeout=600,
+                tuple_orig=NFCTAttrTuple(saddr=src, daddr=dst, proto=17,
+                                         sport=sport, dport=53),
+                tuple_reply=NFCTAttrTuple(saddr=dst, daddr=src, proto=17,
+                                          sport=53, dport=sport))
+
+
+def _count():
+    with NFCTSocket() as nfct:
+        return len(list(nfct.dump()))
+
+
+def _filters(count):
+    return [(4, ZONE_START + port % ZONES, 17, None,
+             _port_address(port) + '/32', None) for port in range(count)]
+
+
+def _delete(method, filters, namespace):
+    if method == 'batched':
+        netlink_lib.delete_entries_by_filters(filters)
+    elif method == 'per-filter':
+        for conntrack_filter in filters:
+            netlink_lib.delete_entries_by_filters([conntrack_filter])
+    else:
+        for _version, zone, _protocol, _mark, src, _dst in filters:
+            subprocess.run(['ip', 'netns', 'exec', namespace, 'conntrack',
+                            '-D', '-p', 'udp', '-f', 'ipv4', '-s', src,
+                            '-w', str(zone)],
+                           check=False, capture_output=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the conntrack entries deletion.')
+    parser.add_argument('--sizes', default='1000,10000,30000',
+                        help='Comma separated conntrack table sizes')
+    parser.add_argument('--ports', type=int, default=1000,
+                        help='Number of ports owning the entries')
+    parser.add_argument('--filters', type=int, default=100,
+                        help='Number of ports whose entries are deleted')
+    parser.add_argument('--method', action='append', choices=METHODS,
+                        help='Deletion method to benchmark, all by default')
+    args = parser.parse_args()
+    if os.geteuid():
+        sys.exit('This benchmark must be run as root')
+    if not netlink_lib.nfct_lib:
+        sys.exit('The libnetfilter_conntrack library is not installed')
+
+    methods = args.method or METHODS
+    if 'conntrack' in methods and not shutil.which('conntrack'):
+        print('conntrack command not found, skipping the conntrack method')
+        methods = [method for method in methods if method != 'conntrack']
+    # The deletions are done in this process, in the benchmark namespace
+    privileged.conntrack_cmd.set_client_mode(False)
+    namespace = 'benchmark-conntrack-%d' % os.getpid()
+    filters = _filters(min(args.filters, args.ports))
+    netns.create(namespace)
+    try:
+        netns.pushns(namespace)
+        print('%-8s %-11s %10s %10s %14s' % (
+            'entries', 'method', 'deleted', 'time (s)', 'entries/s'))
+        for size in [int(size) for size in args.sizes.split(',')]:
+            for method in methods:
+                _fill(size, args.ports)
+                start = time.perf_counter()
+                _delete(method, filters, namespace)
+                elapsed = time.perf_counter() - start
+                deleted = size - _count()
+                print('%-8d %-11s %10d %10.3f %14.0f' % (
+                    size, method, deleted, elapsed, deleted / elapsed))
+    finally:
+        netns.popns()
+        netns.remove(namespace)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+benchmark_fip_tc.py: Compare the time needed to set the rate limits of many
+floating IPs on a router gateway device, one IP at a time and in one batch.
+
+For each number of floating IPs, the ingress and egress rate limits of all
+the IPs are set twice (creation, then update) on a veth device of a new
+network namespace:
+  - 'per-ip': FloatingIPTcCommand.set_ip_rate_limit, called for each IP;
+    each call lists and parses all the filters of the qdisc, then runs the
+    "tc" command to delete and add the filter of the IP;
+  - 'batched': FloatingIPTcCommand.update_ip_rate_limits, called once per
+    direction with all the IPs, as done by the floating IP QoS extension of
+    the L3 agent.
+
+It must be run as root, on a kernel with the u32 classifier and the police
+action modules.
+
+Usage examples:
+  sudo ./tools/benchmark_fip_tc.py
+  sudo ./tools/benchmark_fip_tc.py --sizes 100,1000 --method batched
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import netaddr
+from neutron_lib import constants
+
+from neutron import privileged
+from neutron.agent.linux import l3_tc_lib
+from neutron.privileged.agent.linux import ip_lib as priv_ip_lib
+
+DEVICE = 'qg-benchmark'
+METHODS = ('per-ip', 'batched')
+
+
+def _ips(count):
+    first = netaddr.IPAddress('172.24.0.1').value
+    return [str(netaddr.IPAddress(first + index)) for index in range(count)]
+
+
+def _set_rate_limits(method, tc, ips, rate):
+    for direction in constants.VALID_DIRECTIONS:
+        if method == 'batched':
+            tc.update_ip_rate_limits(
+                direction, {ip: (rate, rate) for ip in ips})
+        else:
+            for ip in ips:
+                tc.set_ip_rate_limit(direction, ip, rate, rate)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the floating IP rate limits programming.')
+    parser.add_argument('--sizes', default='10,100,500',
+                        help='Comma separated numbers of floating IPs')
+    parser.add_argument('--method', action='append', choices=METHODS,
+                        help='Method to benchmark, all by default')
+    args = parser.parse_args()
+    if os.geteuid():
+        sys.exit('This benchmark must be run as root')
+
+    # The tc commands and netlink requests are run in this process
+    for context in (privileged.default, privileged.namespace_cmd,
+                    privileged.link_cmd):
+        context.set_client_mode(False)
+    namespace = 'benchmark-fip-tc-%d' % os.getpid()
+    priv_ip_lib.create_netns(namespace)
+    try:
+        priv_ip_lib.create_interface(DEVICE, namespace, 'veth',
+                                     peer={'ifname': DEVICE + '-p'})
+        priv_ip_lib.set_link_attribute(DEVICE, namespace, state='up')
+        tc = l3_tc_lib.FloatingIPTcCommand(DEVICE, namespace=namespace)
+        print('%-6s %-8s %12s %12s' % (
+            'fips', 'method', 'create (s)', 'update (s)'))
+        for size in [int(size) for size in args.sizes.split(',')]:
+            ips = _ips(size)
+            for method in args.method or METHODS:
+                times = []
+                for rate in (1000, 2000):
+                    start = time.perf_counter()
+                    _set_rate_limits(method, tc, ips, rate)
+                    times.append(time.perf_counter() - start)
+                for direction in constants.VALID_DIRECTIONS:
+                    tc.clear_all_filters(direction)
+                print('%-6d %-8s %12.3f %12.3f' % (size, method, *times))
+    finally:
+        priv_ip_lib.remove_netns(namespace)
+
+
+if __name__ == '__main__':
+    main()
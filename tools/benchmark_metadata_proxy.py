@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+benchmark_metadata_proxy.py: Load the metadata proxy request path against a
+local fake Nova metadata server, with a new connection per request (the
+previous ``requests.request`` behaviour) and with the shared keep-alive
+session.
+
+The instance lookup is skipped; each client thread calls the handler
+``_proxy_request`` method in a loop, as done by the metadata proxy worker
+threads during a cloud-init storm. The number of TCP connections accepted by
+the fake Nova server is reported with the throughput.
+
+Usage examples:
+  ./tools/benchmark_metadata_proxy.py
+  ./tools/benchmark_metadata_proxy.py --requests 20000 --concurrency 64
+  ./tools/benchmark_metadata_proxy.py --https
+"""
+
+import argparse
+from concurrent import futures
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from unittest import mock
+
+from oslo_config import cfg
+import requests
+import webob
+
+from neutron.agent.metadata import proxy_base
+from neutron.conf.agent.metadata import config as meta_conf
+
+
+# The fake Nova metadata server runs in its own process, as the real one
+# does, so that it does not compete with the proxy threads for the GIL. It
+# reports the number of accepted connections on its standard output.
+FAKE_NOVA = """
+import http.server
+import ssl
+import sys
+import threading
+
+
+class FakeNovaHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # send the headers and the body in a single segment
+    wbufsize = 65536
+    disable_nagle_algorithm = True
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        with self.lock:
+            FakeNovaHandler.connections += 1
+
+    def do_GET(self):
+        if self.path == '/connections':
+            body = str(FakeNovaHandler.connections).encode()
+            FakeNovaHandler.connections = 0
+        else:
+            body = b'i-00000001'
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), FakeNovaHandler)
+server.daemon_threads = True
+if len(sys.argv) > 1:
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(sys.argv[1], sys.argv[2])
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+print(server.server_address[1], flush=True)
+server.serve_forever()
+"""
+
+
+class ProxyHandler(proxy_base.MetadataProxyHandlerBase):
+    NETWORK_ID_HEADER = 'X-Neutron-Network-ID'
+    ROUTER_ID_HEADER = 'X-Neutron-Router-ID'
+
+    def get_port(self, remote_address, network_id=None, remote_mac=None,
+                 router_id=None, skip_cache=False):
+        return 'instance-id', 'project-id'
+
+
+def _get_cert(tmp_dir):
+    cert = os.path.join(tmp_dir, 'cert.pem')
+    key = os.path.join(tmp_dir, 'key.pem')
+    subprocess.run(['openssl', 'req', '-x509', '-newkey', 'rsa:2048',
+                    '-nodes', '-days', '1', '-subj', '/CN=127.0.0.1',
+                    '-keyout', key, '-out', cert],
+                   check=True, capture_output=True)
+    return [cert, key]
+
+
+def _get_conf(port, pool_size, protocol):
+    conf = cfg.ConfigOpts()
+    conf.register_opts(meta_conf.SHARED_OPTS)
+    conf.register_opts(meta_conf.METADATA_PROXY_HANDLER_OPTS)
+    conf([])
+    conf.set_override('nova_metadata_host', '127.0.0.1')
+    conf.set_override('nova_metadata_port', port)
+    conf.set_override('metadata_proxy_shared_secret', 'secret')
+    conf.set_override('nova_metadata_pool_size', pool_size)
+    conf.set_override('nova_metadata_protocol', protocol)
+    conf.set_override('nova_metadata_insecure', True)
+    return conf
+
+
+def _run(handler, nova_url, num_requests, concurrency):
+    def worker(count):
+        for _i in range(count):
+            req = webob.Request.blank(
+                '/latest/meta-data/instance-id',
+                headers={'X-Forwarded-For': '10.0.0.10'})
+            # set by webob.dec.wsgify when called by the proxy server
+            req.response = webob.Response()
+            resp = handler._proxy_request('instance-id', 'project-id', req)
+            assert resp.status_code == 200, resp
+
+    per_worker = num_requests // concurrency
+    start = time.perf_counter()
+    with futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for result in [executor.submit(worker, per_worker)
+                       for _i in range(concurrency)]:
+            result.result()
+    elapsed = time.perf_counter() - start
+    # read and reset the connections counter, on a new connection
+    connections = int(requests.get(nova_url + '/connections',
+                                   verify=False).text) - 1
+    return per_worker * concurrency / elapsed, connections
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the metadata proxy connections to Nova.')
+    parser.add_argument('--requests', type=int, default=5000,
+                        help='Number of proxied requests per run')
+    parser.add_argument('--concurrency', type=int, default=32,
+                        help='Number of concurrent proxy worker threads')
+    parser.add_argument('--https', action='store_true',
+                        help='Serve the fake Nova metadata API over TLS')
+    args = parser.parse_args()
+
+    protocol = 'https' if args.https else 'http'
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cert = _get_cert(tmp_dir) if args.https else []
+        nova = subprocess.Popen([sys.executable, '-c', FAKE_NOVA] + cert,
+                                stdout=subprocess.PIPE, text=True)
+        port = int(nova.stdout.readline())
+    nova_url = '%s://127.0.0.1:%d' % (protocol, port)
+    conf = _get_conf(port, args.concurrency, protocol)
+    handler = ProxyHandler(conf)
+
+    print('%-20s %12s %12s' % ('mode', 'requests/s', 'connections'))
+    # The requests module provides the same request() call as the session,
+    # without any connection reuse.
+    with mock.patch.object(proxy_base, 'get_nova_metadata_session',
+                           return_value=requests):
+        rate, connections = _run(handler, nova_url, args.requests,
+                                 args.concurrency)
+    print('%-20s %12.0f %12d' % ('per request', rate, connections))
+    rate, connections = _run(handler, nova_url, args.requests,
+                             args.concurrency)
+    print('%-20s %12.0f %12d' % ('shared session', rate, connections))
+    nova.terminate()
+    nova.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+benchmark_metadata_server.py: Compare the latency and the throughput of the
+'threads' and 'asyncio' metadata server types.
+
+The metadata server listens on a unix domain socket and forwards the requests
+to a local fake Nova metadata server, which answers after a configurable
+delay. The instance lookup is replaced by a constant answer. A client process
+sends the requests, one per connection as done by haproxy, from a given
+number of concurrent connections, and reports the throughput and the latency
+percentiles.
+
+Usage examples:
+  ./tools/benchmark_metadata_server.py
+  ./tools/benchmark_metadata_server.py --concurrency 1000 --requests 20000
+  ./tools/benchmark_metadata_server.py --nova-delay 0.05 --workers 16
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+
+from oslo_config import cfg
+
+from neutron.agent.metadata import proxy_base
+from neutron.common import metadata as common_metadata
+from neutron.conf.agent.metadata import config as meta_conf
+
+
+# The fake Nova metadata server runs in its own process, as the real one
+# does; it answers each request after the delay given as first argument.
+FAKE_NOVA = """
+import http.server
+import sys
+import time
+
+
+class FakeNovaHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    wbufsize = 65536
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        time.sleep(float(sys.argv[1]))
+        body = b'i-00000001'
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeNovaServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 4096
+
+
+server = FakeNovaServer(('127.0.0.1', 0), FakeNovaHandler)
+print(server.server_address[1], flush=True)
+server.serve_forever()
+"""
+
+# The client sends the requests from <concurrency> connections and prints
+# the throughput and the latencies as JSON.
+CLIENT = """
+import asyncio
+import json
+import sys
+import time
+
+socket_path, num_requests, concurrency = (
+    sys.argv[1], int(sys.argv[2]), int(sys.argv[3]))
+REQUEST = (b'GET /latest/meta-data/instance-id HTTP/1.1\\r\\n'
+           b'Host: 169.254.169.254\\r\\n'
+           b'X-Forwarded-For: 10.0.0.10\\r\\n'
+           b'X-Neutron-Network-ID: network-id\\r\\n\\r\\n')
+
+
+async def worker(count, latencies, errors):
+    for _i in range(count):
+        start = time.perf_counter()
+        try:
+            reader, writer = await asyncio.open_unix_connection(socket_path)
+            writer.write(REQUEST)
+            response = await reader.read()
+            writer.close()
+            if not response.startswith(b'HTTP/1.1 200'):
+                raise Exception(response[:30])
+        except Exception:
+            errors.append(1)
+            continue
+        latencies.append(time.perf_counter() - start)
+
+
+async def main():
+    latencies, errors = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*[worker(num_requests // concurrency, latencies,
+                                  errors) for _i in range(concurrency)])
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    print(json.dumps({
+        'rate': len(latencies) / elapsed,
+        'p50': latencies[len(latencies) // 2] * 1000,
+        'p99': latencies[int(len(latencies) * 0.99)] * 1000,
+        'errors': len(errors)}))
+
+
+asyncio.run(main())
+"""
+
+
+class ProxyHandler(common_metadata.MetadataProxyHandlerBaseSocketServer):
+    NETWORK_ID_HEADER = 'X-Neutron-Network-ID'
+    ROUTER_ID_HEADER = 'X-Neutron-Router-ID'
+
+    def __init__(self, request, client_address, server):
+        super().__init__(cfg.CONF, request=request,
+                         client_address=client_address, server=server)
+
+    def get_port(self, remote_address, network_id=None, remote_mac=None,
+                 router_id=None, skip_cache=False):
+        return 'instance-id', 'project-id'
+
+
+def _set_conf(port, pool_size):
+    cfg.CONF.register_opts(meta_conf.SHARED_OPTS)
+    cfg.CONF.register_opts(meta_conf.METADATA_PROXY_HANDLER_OPTS)
+    cfg.CONF.register_opts(meta_conf.UNIX_DOMAIN_METADATA_PROXY_OPTS)
+    cfg.CONF([])
+    cfg.CONF.set_override('nova_metadata_host', '127.0.0.1')
+    cfg.CONF.set_override('nova_metadata_port', port)
+    cfg.CONF.set_override('metadata_proxy_shared_secret', 'secret')
+    cfg.CONF.set_override('nova_metadata_pool_size', pool_size)
+
+
+def _run(server_type, socket_path, args):
+    cfg.CONF.set_override('metadata_server_type', server_type)
+    server_class = proxy_base.get_metadata_proxy_server_class(cfg.CONF)
+    server = server_class(args.workers, socket_path, ProxyHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        client = subprocess.run(
+            [sys.executable, '-c', CLIENT, socket_path, str(args.requests),
+             str(args.concurrency)],
+            check=True, capture_output=True, text=True)
+    finally:
+        if server_type == meta_conf.THREADS_SERVER:
+            server.shutdown()
+        server.server_close()
+        thread.join()
+        os.unlink(socket_path)
+    return json.loads(client.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the metadata server types.')
+    parser.add_argument('--requests', type=int, default=5000,
+                        help='Number of requests per run')
+    parser.add_argument('--concurrency', type=int, default=200,
+                        help='Number of concurrent client connections')
+    parser.add_argument('--workers', type=int, default=8,
+                        help='Number of metadata server worker threads')
+    parser.add_argument('--pool-size', type=int, default=256,
+                        help='Maximum number of connections to Nova')
+    parser.add_argument('--nova-delay', type=float, default=0.02,
+                        help='Response time of the fake Nova server (s)')
+    parser.add_argument('--server-type', action='append',
+                        choices=meta_conf.SERVER_TYPES,
+                        help='Server type to benchmark, all by default')
+    args = parser.parse_args()
+
+    nova = subprocess.Popen(
+        [sys.executable, '-c', FAKE_NOVA, str(args.nova_delay)],
+        stdout=subprocess.PIPE, text=True)
+    try:
+        _set_conf(int(nova.stdout.readline()), args.pool_size)
+        print('%-10s %12s %10s %10s %8s' % (
+            'server', 'requests/s', 'p50 (ms)', 'p99 (ms)', 'errors'))
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            socket_path = os.path.join(tmp_dir, 'metadata_proxy')
+            for server_type in args.server_type or meta_conf.SERVER_TYPES:
+                result = _run(server_type, socket_path, args)
+                print('%-10s %12.0f %10.1f %10.1f %8d' % (
+                    server_type, result['rate'], result['p50'],
+                    result['p99'], result['errors']))
+    finally:
+        nova.terminate()
+        nova.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+benchmark_ovn_nb_indexes.py: Compare the latency of the OvsdbNbOvnIdl helpers
+searching rows by column or external_ids key, with and without the indexes
+created with the IDL, on a synthetic OVN Northbound database.
+
+The rows are inserted directly in the IDL tables, as done when the initial
+contents of the database are received, so no OVSDB server is needed. The
+time spent loading the rows is reported too, as it includes the cost of
+maintaining the indexes.
+
+Usage examples:
+  ./tools/benchmark_ovn_nb_indexes.py
+  ./tools/benchmark_ovn_nb_indexes.py --rows 10000 100000 --queries 20
+"""
+
+import argparse
+import os
+import time
+from unittest import mock
+import uuid
+
+from ovs.db import data
+from ovs.db import idl
+
+from neutron.common.ovn import constants as ovn_const
+from neutron.plugins.ml2.drivers.ovn.mech_driver.ovsdb import impl_idl_ovn
+from neutron.services.portforwarding import constants as pf_const
+
+
+SCHEMA = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', 'neutron', 'tests',
+    'unit', 'plugins', 'ml2', 'drivers', 'ovn', 'mech_driver', 'ovsdb',
+    'schemas', 'ovn-nb.ovsschema')
+
+
+def _create_api(indexed):
+    helper = idl.SchemaHelper(SCHEMA)
+    helper.register_all()
+    conn = mock.MagicMock(idl=idl.Idl('unix:/nonexistent', helper),
+                          is_running=False)
+    impl_idl_ovn.OvsdbNbOvnIdl.ovsdb_connection = None
+    if indexed:
+        return impl_idl_ovn.OvsdbNbOvnIdl(conn)
+    with mock.patch.object(impl_idl_ovn.OvsdbNbOvnIdl, 'indexed_columns',
+                           ()):
+        return impl_idl_ovn.OvsdbNbOvnIdl(conn)
+
+
+def _add_row(api, table, defaults, **columns):
+    table = api.tables[table]
+    row_data = dict(defaults[table.name])
+    for name, value in columns.items():
+        row_data[name] = data.Datum.from_python(
+            table.columns[name].type, value, lambda atom: atom)
+    row = idl.Row(api.idl, table, uuid.uuid4(), row_data)
+    table.rows[row.uuid] = row
+
+
+def _fill(api, num_rows, num_routers, num_chassis):
+    defaults = {
+        name: {col_name: data.Datum.default(column.type)
+               for col_name, column in table.columns.items()}
+        for name, table in api.tables.items()}
+    # 40% of NAT, 30% of DHCP_Options, 20% of Load_Balancer and 10% of
+    # Gateway_Chassis rows
+    for idx in range(num_rows * 4 // 10):
+        _add_row(api, 'NAT', defaults, type='dnat_and_snat',
+                 external_ip='172.24.%d.%d' % (idx // 250, idx % 250),
+                 logical_ip='10.0.0.1',
+                 external_ids={ovn_const.OVN_FIP_EXT_ID_KEY: 'fip-%d' % idx})
+    for idx in range(num_rows * 3 // 10):
+        _add_row(api, 'DHCP_Options', defaults, cidr='10.0.0.0/24',
+                 external_ids={'subnet_id': 'subnet-%d' % (idx // 3),
+                               'port_id': 'port-%d' % idx})
+    for idx in range(num_rows * 2 // 10):
+        router = 'neutron-router-%d' % (idx % num_routers)
+        _add_row(api, 'Load_Balancer', defaults, name='pf-%d' % idx,
+                 external_ids={
+                     ovn_const.OVN_DEVICE_OWNER_EXT_ID_KEY:
+                         pf_const.PORT_FORWARDING_PLUGIN,
+                     ovn_const.OVN_ROUTER_NAME_EXT_ID_KEY: router,
+                     ovn_const.OVN_FIP_EXT_ID_KEY: 'pf-fip-%d' % idx})
+    for idx in range(num_rows // 10):
+        _add_row(api, 'Gateway_Chassis', defaults, name='gwc-%d' % idx,
+                 chassis_name='chassis-%d' % (idx % num_chassis), priority=1)
+
+
+def _run(api, queries, num_rows, num_routers, num_chassis):
+    lookups = (
+        (api.get_floatingip, 'fip-%d', num_rows * 4 // 10),
+        (api.get_subnet_dhcp_options, 'subnet-%d', num_rows // 10),
+        (api.get_router_floatingip_lbs, 'neutron-router-%d', num_routers),
+        (api.get_chassis_gateways, 'chassis-%d', num_chassis),
+    )
+    results = []
+    for method, value, num_values in lookups:
+        start = time.perf_counter()
+        for idx in range(queries):
+            method(value % (idx * 7919 % num_values))
+        results.append((time.perf_counter() - start) / queries)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--rows', type=int, nargs='+', default=[100000],
+                        help='Number of rows in the NB database.')
+    parser.add_argument('--queries', type=int, default=10,
+                        help='Number of queries per lookup type.')
+    parser.add_argument('--routers', type=int, default=1000,
+                        help='Number of routers of the port forwardings.')
+    parser.add_argument('--chassis', type=int, default=100,
+                        help='Number of gateway chassis.')
+    args = parser.parse_args()
+
+    print('%10s %-34s %14s %14s' % ('rows', 'lookup', 'scan (ms)',
+                                    'indexed (ms)'))
+    names = ('NAT by fip_id', 'DHCP_Options by subnet_id',
+             'Load_Balancer by router_name', 'Gateway_Chassis by chassis',
+             'load of the rows')
+    for num_rows in args.rows:
+        timings = []
+        for indexed in (False, True):
+            api = _create_api(indexed)
+            start = time.perf_counter()
+            _fill(api, num_rows, args.routers, args.chassis)
+            load_time = time.perf_counter() - start
+            timings.append(_run(api, args.queries, num_rows, args.routers,
+                                args.chassis) + [load_time])
+        for name, scan, indexed in zip(names, *timings):
+            print('%10d %-34s %14.3f %14.3f' % (num_rows, name, scan * 1000,
+                                                indexed * 1000))
+
+
+if __name__ == '__main__':
+    main()
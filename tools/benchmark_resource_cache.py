@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+benchmark_resource_cache.py: Compare the RemoteResourceCache.get_resources
+latency with and without the secondary indexes, for an increasing number of
+cached ports and security group rules.
+
+The cache is filled with lightweight fakes of the Port and SecurityGroupRule
+objects and the server is never queried, so the results only measure the
+lookups done by the agent, as done by the security group RPC code for each
+device.
+
+Usage examples:
+  ./tools/benchmark_resource_cache.py
+  ./tools/benchmark_resource_cache.py --objects 10000 --queries 500
+"""
+
+import argparse
+import time
+from unittest import mock
+
+from neutron.agent import resource_cache
+from neutron.api.rpc.callbacks import resources
+
+
+class FakeResource:
+    revision_number = 1
+
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+    def to_dict(self):
+        return dict(self.__dict__)
+
+
+def _fill(rcache, num_objects, num_networks, num_sgs):
+    # the context is only passed to the local notifications
+    ctx = None
+    for idx in range(num_objects):
+        rcache.record_resource_update(ctx, resources.PORT, FakeResource(
+            id='port-%d' % idx,
+            network_id='net-%d' % (idx % num_networks),
+            security_group_ids={'sg-%d' % (idx % num_sgs)},
+            device_owner='compute:nova'))
+        rcache.record_resource_update(
+            ctx, resources.SECURITYGROUPRULE, FakeResource(
+                id='rule-%d' % idx,
+                security_group_id='sg-%d' % (idx % num_sgs),
+                remote_group_id=None,
+                remote_address_group_id=None))
+
+
+def _run(rcache, queries, num_networks, num_sgs):
+    lookups = (
+        (resources.PORT, 'network_id', 'net-%d', num_networks),
+        (resources.PORT, 'security_group_ids', 'sg-%d', num_sgs),
+        (resources.SECURITYGROUPRULE, 'security_group_id', 'sg-%d', num_sgs),
+    )
+    results = []
+    for rtype, attr, value, num_values in lookups:
+        start = time.perf_counter()
+        for idx in range(queries):
+            rcache.get_resources(rtype, {attr: (value % (idx % num_values),)})
+        results.append((time.perf_counter() - start) / queries)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--objects', type=int, nargs='+',
+                        default=[10000, 50000, 100000],
+                        help='Number of cached ports (and rules).')
+    parser.add_argument('--queries', type=int, default=100,
+                        help='Number of queries per lookup type.')
+    parser.add_argument('--networks', type=int, default=500,
+                        help='Number of networks of the ports.')
+    parser.add_argument('--security-groups', type=int, default=1000,
+                        help='Number of security groups of the ports.')
+    args = parser.parse_args()
+
+    print('%10s %-34s %14s %14s' % ('objects', 'lookup', 'scan (ms)',
+                                    'indexed (ms)'))
+    names = ('ports by network_id', 'ports by security_group_ids',
+             'rules by security_group_id')
+    for num_objects in args.objects:
+        timings = []
+        for indexed_attributes in ({}, None):
+            with mock.patch.object(resource_cache.resources_rpc,
+                                   'ResourcesPullRpcApi'):
+                rcache = resource_cache.RemoteResourceCache(
+                    [resources.PORT, resources.SECURITYGROUPRULE],
+                    indexed_attributes=indexed_attributes)
+            _fill(rcache, num_objects, args.networks, args.security_groups)
+            with mock.patch.object(rcache, '_flood_cache_for_query'):
+                timings.append(_run(rcache, args.queries, args.networks,
+                                    args.security_groups))
+        for name, scan, indexed in zip(names, *timings):
+            print('%10d %-34s %14.3f %14.3f' % (num_objects, name,
+                                                scan * 1000, indexed * 1000))
+
+
+if __name__ == '__main__':
+    main()